@@ -0,0 +1,190 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+局域网广播基准测试
+
+启动带局域网广播的播放器守护进程（模拟的播放器，正在播放一个临时文件），用本机
+的多个连接模拟听众，其中部分听众接收缓慢（接收缓冲区很小，持续缓慢读取直到被
+断开）。歌曲按 --play-seconds 秒“播放”完，发送进度跟随播放进度。分别测试
+sendfile 和读取后写入两种方式，输出完成收听的快速听众数、因落后超过 --max-lag-mb
+被断开的听众数、总发送量、耗时和进程CPU时间（含模拟听众），以及临时文件被打开
+的次数（无论多少听众，每首歌曲只打开一次）。
+
+用法:
+    python benchmarks/bench_broadcast.py [--listeners 50] [--slow 5] [--size-mb 20] [--play-seconds 3]
+                                         [--max-lag-mb 4]
+"""
+
+import os
+import sys
+import time
+import socket
+import asyncio
+import logging
+import argparse
+import tempfile
+from unittest.mock import MagicMock, patch
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dupan_music.player import broadcast
+from dupan_music.player.broadcast import Broadcaster
+from dupan_music.player.daemon import PlayerDaemon
+from dupan_music.playlist.playlist import PlaylistItem
+
+# 缓慢接收的听众的接收缓冲区大小，避免内核缓冲区吸收掉落后的数据
+SLOW_RCVBUF = 64 * 1024
+
+
+def make_player(path: str, size: int, play_seconds: float) -> MagicMock:
+    """
+    创建模拟的播放器，调用 start_clock 后播放进度开始前进
+    
+    Args:
+        path: 临时文件路径
+        size: 文件大小
+        play_seconds: 播放完整首歌曲的时间（秒）
+        
+    Returns:
+        MagicMock: 播放器
+    """
+    player = MagicMock()
+    player.is_playing = True
+    player.temp_file = path
+    player.current_item = PlaylistItem(fs_id=1, server_filename="歌曲.flac", path="/音乐/歌曲.flac", size=size)
+    player.get_length.return_value = int(play_seconds * 1000)
+    
+    clock = {"start": None}
+    
+    def get_time():
+        if clock["start"] is None:
+            return 0
+        return int((time.monotonic() - clock["start"]) * 1000)
+    
+    player.get_time.side_effect = get_time
+    player.start_clock = lambda: clock.update(start=time.monotonic())
+    return player
+
+
+async def listen(port: int, size: int, slow: bool, deadline: float) -> int:
+    """
+    模拟一个听众
+    
+    Args:
+        port: 广播端口
+        size: 歌曲大小
+        slow: 是否缓慢接收（接收缓冲区为 SLOW_RCVBUF，每 0.1 秒读取 4KB，直到被广播断开）
+        deadline: 缓慢接收的听众在该时间（time.monotonic）之后仍未被断开时自行断开
+        
+    Returns:
+        int: 收到的字节数（不含响应头）
+    """
+    if slow:
+        # 连接前设置接收缓冲区，TCP 窗口按该大小协商
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, SLOW_RCVBUF)
+        sock.setblocking(False)
+        await asyncio.get_running_loop().sock_connect(sock, ("127.0.0.1", port))
+        reader, writer = await asyncio.open_connection(sock=sock)
+    else:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /stream HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    await reader.readuntil(b"\r\n\r\n")
+    
+    received = 0
+    try:
+        while received < size:
+            data = await reader.read(4096 if slow else 256 * 1024)
+            if not data:
+                break
+            received += len(data)
+            if slow:
+                if time.monotonic() > deadline:
+                    break
+                await asyncio.sleep(0.1)
+    except ConnectionError:
+        # 被广播断开时可能收到 RST
+        pass
+    writer.close()
+    return received
+
+
+async def run_listeners(port: int, size: int, listeners: int, slow: int, deadline: float) -> list:
+    tasks = [listen(port, size, i < slow, deadline) for i in range(listeners)]
+    return await asyncio.gather(*tasks)
+
+
+def run_mode(args, path: str, size: int, use_sendfile: bool) -> dict:
+    """
+    运行一次广播
+    
+    Returns:
+        dict: 结果
+    """
+    player = make_player(path, size, args.play_seconds)
+    broadcaster = Broadcaster("127.0.0.1", 0, max_lag=int(args.max_lag_mb * 1024 * 1024),
+                              use_sendfile=use_sendfile)
+    
+    opened = []
+    original_init = broadcast.Track.__init__
+    
+    def counting_init(track, *a, **kw):
+        opened.append(a[0])
+        original_init(track, *a, **kw)
+    
+    with tempfile.TemporaryDirectory() as temp_dir, \
+         patch.object(broadcast.Track, "__init__", counting_init):
+        daemon = PlayerDaemon(player, os.path.join(temp_dir, "p.sock"))
+        daemon.add_frontend(broadcaster)
+        daemon.start_in_thread()
+        try:
+            player.start_clock()
+            cpu = time.process_time()
+            start = time.perf_counter()
+            deadline = time.monotonic() + args.play_seconds + 2
+            received = asyncio.run(run_listeners(broadcaster.port, size, args.listeners, args.slow, deadline))
+            elapsed = time.perf_counter() - start
+            cpu = time.process_time() - cpu
+        finally:
+            daemon.stop()
+    
+    return {
+        "completed": sum(1 for r in received[args.slow:] if r == size),
+        "dropped": broadcaster.dropped,
+        "sent_mb": broadcaster.bytes_sent / 1024 / 1024,
+        "elapsed": elapsed,
+        "cpu": cpu,
+        "opened": len(opened),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="局域网广播基准测试")
+    parser.add_argument("--listeners", type=int, default=50, help="听众数")
+    parser.add_argument("--slow", type=int, default=5, help="其中缓慢接收的听众数")
+    parser.add_argument("--size-mb", type=float, default=20, help="歌曲大小（MB）")
+    parser.add_argument("--play-seconds", type=float, default=3, help="播放完整首歌曲的时间（秒）")
+    parser.add_argument("--max-lag-mb", type=float, default=broadcast.DEFAULT_MAX_LAG / 1024 / 1024,
+                        help="听众落后播放位置超过该大小（MB）时断开（需大于播放进度每次更新前进的字节数）")
+    args = parser.parse_args()
+    
+    for name in ("dupan_music.player.broadcast", "dupan_music.player.daemon"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    
+    size = int(args.size_mb * 1024 * 1024)
+    with tempfile.NamedTemporaryFile(suffix=".flac") as f:
+        f.write(os.urandom(size))
+        f.flush()
+        
+        print(f"听众 {args.listeners}（其中慢速 {args.slow}），歌曲 {args.size_mb:g}MB，"
+              f"播放 {args.play_seconds:g}s，最大落后 {args.max_lag_mb:g}MB")
+        print(f"{'方式':<12}{'快速完成':>6}{'断开':>6}{'发送(MB)':>12}{'耗时(s)':>10}{'CPU(s)':>10}{'打开文件':>10}")
+        for name, use_sendfile in (("sendfile", True), ("读取后写入", False)):
+            result = run_mode(args, f.name, size, use_sendfile)
+            print(f"{name:<12}{result['completed']:>6}{result['dropped']:>6}{result['sent_mb']:>12.1f}"
+                  f"{result['elapsed']:>10.2f}{result['cpu']:>10.2f}{result['opened']:>10}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+播放列表JSON读写基准测试
+
+对每个可用的编解码器，分别以缩进和紧凑两种模式保存、读取 1k/10k/100k 首歌曲的播放列表。
+
+用法:
+    python benchmarks/bench_codec.py [--sizes 1000 10000 100000] [--repeat 3]
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dupan_music.utils import codec
+from dupan_music.utils.file_utils import read_file, write_file
+from dupan_music.playlist.playlist import Playlist, PlaylistItem, playlist_from_dict
+
+
+def make_playlist(size: int) -> Playlist:
+    """
+    生成测试播放列表
+    
+    Args:
+        size: 歌曲数
+        
+    Returns:
+        Playlist: 播放列表
+    """
+    items = [
+        PlaylistItem(
+            fs_id=100000000000 + i,
+            server_filename=f"歌曲{i}.mp3",
+            path=f"/我的音乐/专辑{i % 200}/歌曲{i}.mp3",
+            size=3000000 + i,
+            category=2,
+            local_mtime=1600000000 + i,
+            server_mtime=1600000000 + i,
+            md5=f"{i:032x}",
+            add_time=1700000000 + i
+        )
+        for i in range(size)
+    ]
+    return Playlist(f"基准{size}", items=items)
+
+
+def best_of(repeat: int, func) -> float:
+    """
+    多次运行取最短耗时
+    
+    Args:
+        repeat: 运行次数
+        func: 被测函数
+        
+    Returns:
+        float: 最短耗时（秒）
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="播放列表JSON读写基准测试")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 100000], help="歌曲数")
+    parser.add_argument("--repeat", type=int, default=3, help="每项运行次数")
+    args = parser.parse_args()
+    
+    print(f"{'后端':<10}{'模式':<8}{'歌曲数':>10}{'保存(ms)':>12}{'读取(ms)':>12}{'文件(KB)':>12}")
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        for size in args.sizes:
+            playlist = make_playlist(size)
+            file_path = os.path.join(temp_dir, f"{size}.json")
+            
+            for name in codec.available_codecs():
+                codec.set_codec(name)
+                
+                for mode in ("pretty", "compact"):
+                    pretty = mode == "pretty"
+                    
+                    def save():
+                        write_file(file_path, codec.dumps(playlist.to_dict(), pretty=pretty))
+                    
+                    def load():
+                        playlist_from_dict(codec.loads(read_file(file_path)))
+                    
+                    save_time = best_of(args.repeat, save)
+                    load_time = best_of(args.repeat, load)
+                    file_size = os.path.getsize(file_path) / 1024
+                    
+                    print(f"{name:<10}{mode:<8}{size:>10}{save_time * 1000:>12.1f}"
+                          f"{load_time * 1000:>12.1f}{file_size:>12.0f}")
+    
+    codec.set_codec()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+下载路径日志开销基准测试
+
+用模拟的网络响应运行 AudioPlayer._download_file，与关闭日志时对比得到日志开销，
+并按数据块数分摊：DEBUG 关闭、DEBUG 开启且经队列写日志、DEBUG 开启且直接写日志
+文件（队列化之前的方式）。另外对比 DEBUG 关闭时 f-string 与延迟格式化的单次调用开销。
+
+用法:
+    python benchmarks/bench_logging.py [--chunks 2000] [--repeat 20]
+"""
+
+import os
+import sys
+import time
+import logging
+import argparse
+import tempfile
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from unittest.mock import MagicMock, patch
+import queue
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dupan_music.player.player import AudioPlayer
+from dupan_music.playlist.playlist import PlaylistItem
+
+CHUNK = b"\0" * 8192
+
+HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko)',
+    'Referer': 'https://pan.baidu.com/disk/home',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    'Cookie': 'BDUSS=' + 'x' * 200,
+}
+
+
+def best_of(repeat: int, func) -> float:
+    """
+    多次运行取最短耗时
+    
+    Args:
+        repeat: 运行次数
+        func: 被测函数
+        
+    Returns:
+        float: 最短耗时（秒）
+    """
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def make_session(chunks: int) -> MagicMock:
+    """
+    创建模拟的 requests 会话，HEAD 和 GET 都返回 200
+    
+    Args:
+        chunks: GET 响应的数据块数
+        
+    Returns:
+        MagicMock: 会话
+    """
+    session = MagicMock()
+    session.head.return_value = MagicMock(status_code=200, headers=HEADERS)
+    response = MagicMock(status_code=200, headers=HEADERS)
+    response.iter_content.side_effect = lambda chunk_size: (CHUNK for _ in range(chunks))
+    session.get.return_value = response
+    return session
+
+
+def main():
+    parser = argparse.ArgumentParser(description="下载路径日志开销基准测试")
+    parser.add_argument("--chunks", type=int, default=2000, help="每次下载的数据块数")
+    parser.add_argument("--repeat", type=int, default=20, help="每项运行次数")
+    args = parser.parse_args()
+    
+    logger = logging.getLogger("dupan_music.player.player")
+    saved_handlers, saved_level = list(logger.handlers), logger.level
+    logger.propagate = False
+    
+    api = MagicMock()
+    api.get_download_link.return_value = "https://allall01.baidupcs.com/file/abc?fid=1"
+    api.session.cookies = {}
+    player = AudioPlayer(api)
+    item = PlaylistItem(fs_id=1, server_filename="歌曲.mp3", path="/我的音乐/歌曲.mp3", size=len(CHUNK) * args.chunks)
+    
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # 数据写入空设备，避免磁盘写入的波动掩盖日志开销
+        temp_file = os.devnull
+        log_file = os.path.join(temp_dir, "bench.log")
+        
+        def download():
+            player._download_file(item)
+        
+        file_handler = RotatingFileHandler(log_file, maxBytes=10*1024*1024, backupCount=1, encoding="utf-8")
+        log_queue = queue.Queue()
+        listener = QueueListener(log_queue, file_handler)
+        listener.start()
+        
+        modes = [
+            ("关闭日志", logging.CRITICAL + 1, []),
+            ("DEBUG关闭", logging.INFO, [QueueHandler(log_queue)]),
+            ("DEBUG+队列", logging.DEBUG, [QueueHandler(log_queue)]),
+            ("DEBUG+直接写文件", logging.DEBUG, [file_handler]),
+        ]
+        
+        print(f"{'模式':<20}{'下载耗时(ms)':>14}{'日志开销(µs)':>14}{'每块分摊(µs)':>14}")
+        
+        # 各模式交替运行，避免磁盘缓存等随时间变化的因素只影响某个模式
+        timings = {name: [] for name, _, _ in modes}
+        with patch("dupan_music.player.player.get_temp_file", return_value=temp_file), \
+             patch("requests.Session", side_effect=lambda: make_session(args.chunks)):
+            for _ in range(args.repeat):
+                for name, level, handlers in modes:
+                    logger.handlers = handlers
+                    logger.setLevel(level)
+                    timings[name].append(best_of(1, download))
+                    log_queue.join()
+        
+        reference = min(timings[modes[0][0]])
+        for name, _, _ in modes:
+            elapsed = min(timings[name])
+            overhead = max(elapsed - reference, 0)
+            print(f"{name:<20}{elapsed * 1000:>14.2f}{overhead * 1e6:>14.1f}"
+                  f"{overhead / args.chunks * 1e6:>14.4f}")
+        
+        listener.stop()
+        file_handler.close()
+        
+        # DEBUG 关闭时单次调用的开销
+        logger.handlers = [QueueHandler(queue.Queue())]
+        logger.setLevel(logging.INFO)
+        calls = 100000
+        
+        def eager():
+            for _ in range(calls):
+                logger.debug(f"使用请求头: {HEADERS}")
+        
+        def lazy():
+            for _ in range(calls):
+                logger.debug("使用请求头: %s", HEADERS)
+        
+        print()
+        print(f"{'DEBUG关闭时的调用':<20}{'每次(ns)':>12}")
+        print(f"{'f-string':<20}{best_of(args.repeat, eager) / calls * 1e9:>12.0f}")
+        print(f"{'延迟格式化':<20}{best_of(args.repeat, lazy) / calls * 1e9:>12.0f}")
+    
+    logger.handlers = saved_handlers
+    logger.setLevel(saved_level)
+    logger.propagate = True
+
+
+if __name__ == "__main__":
+    main()
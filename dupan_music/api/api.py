@@ -8,12 +8,16 @@
 import os
 import json
 import time
+import threading
 import requests
-from typing import Dict, List, Optional, Union, Any
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, List, Optional, Union, Any, Iterator, Set
 from urllib.parse import urlencode
 
 from dupan_music.utils.logger import get_logger
 from dupan_music.auth.auth import BaiduPanAuth
+from dupan_music.utils import codec
+from dupan_music.api.listing import ListingCache
 
 logger = get_logger(__name__)
 
@@ -23,6 +27,15 @@ class BaiduPanAPI:
     # API基础URL
     PAN_API_URL = "https://pan.baidu.com/rest/2.0/xpan"
     
+    # 并发搜索时同时在途的最大请求数
+    SEARCH_MAX_WORKERS = 4
+    
+    # filemetas 接口单次请求允许的最大文件数
+    FILEMETAS_MAX_IDS = 100
+    
+    # 目录列表每页的文件数
+    LISTING_PAGE_SIZE = 1000
+
     def __init__(self, auth: BaiduPanAuth):
         """
         初始化百度网盘API
@@ -35,7 +48,22 @@ class BaiduPanAPI:
         self.session.headers.update({
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/88.0.4324.182 Safari/537.36"
         })
+        
+        # 目录列表分页缓存
+        self.listing_cache = ListingCache()
+        
+        # 刷新令牌只能使用一次，并发请求（如搜索、验证）只由一个线程刷新
+        self._token_lock = threading.Lock()
     
+    def _ensure_token(self) -> None:
+        """确保访问令牌有效，过期时刷新；并发调用时只刷新一次"""
+        if self.auth.is_authenticated():
+            return
+        with self._token_lock:
+            # 等待锁期间其他线程可能已经刷新
+            if not self.auth.is_authenticated():
+                self.auth.refresh_token()
+
     def _make_request(self, method: str, url: str, params: Dict = None, data: Dict = None, 
                      files: Dict = None, json_data: Dict = None, **kwargs) -> Dict:
         """
@@ -54,8 +82,7 @@ class BaiduPanAPI:
             API响应数据
         """
         # 确保有访问令牌
-        if not self.auth.is_authenticated():
-            self.auth.refresh_token()
+        self._ensure_token()
         
         # 添加访问令牌到参数
         if params is None:
@@ -74,7 +101,7 @@ class BaiduPanAPI:
                 **kwargs
             )
             response.raise_for_status()
-            result = response.json()
+            result = codec.loads_response(response)
             
             # 检查API错误
             if 'errno' in result and result['errno'] != 0:
@@ -89,7 +116,8 @@ class BaiduPanAPI:
     
     def get_file_list(self, dir_path: str = '/', order: str = 'name', 
                      desc: bool = False, limit: int = 1000, 
-                     web: str = 'web', folder: int = 0) -> List[Dict]:
+                     web: str = 'web', folder: int = 0,
+                     start: int = 0) -> List[Dict]:
         """
         获取文件列表
         
@@ -100,6 +128,7 @@ class BaiduPanAPI:
             limit: 返回条目数量限制
             web: 请求来源
             folder: 是否只返回文件夹 (0: 全部, 1: 只返回文件夹)
+            start: 起始位置
             
         Returns:
             文件列表
@@ -112,12 +141,48 @@ class BaiduPanAPI:
             'desc': 1 if desc else 0,
             'limit': limit,
             'web': web,
-            'folder': folder
+            'folder': folder,
+            'start': start
         }
         
         result = self._make_request('GET', url, params=params)
         return result.get('list', [])
     
+    def iter_file_list(self, dir_path: str = '/', recursive: bool = False,
+                       order: str = 'name', desc: bool = False,
+                       page_size: int = LISTING_PAGE_SIZE,
+                       use_cache: bool = True) -> Iterator[List[Dict]]:
+        """
+        分页获取文件列表，每次迭代时才请求下一页
+        
+        Args:
+            dir_path: 目录路径
+            recursive: 是否递归获取子目录
+            order: 排序方式 ('name', 'time', 'size')
+            desc: 是否降序排序
+            page_size: 每页的文件数
+            use_cache: 是否使用目录列表缓存
+            
+        Yields:
+            List[Dict]: 一页文件列表
+        """
+        start = 0
+        while True:
+            key = (dir_path, recursive, order, desc, start, page_size)
+            files = self.listing_cache.get(key) if use_cache else None
+            if files is None:
+                if recursive:
+                    files = self.get_file_list_recursive(dir_path, order, desc, page_size, start=start)
+                else:
+                    files = self.get_file_list(dir_path, order, desc, page_size, start=start)
+                self.listing_cache.put(key, files)
+            
+            if files:
+                yield files
+            if len(files) < page_size:
+                return
+            start += len(files)
+
     def get_file_list_recursive(self, dir_path: str = '/', order: str = 'name',
                               desc: bool = False, limit: int = 1000,
                               web: str = 'web', folder: int = 0,
@@ -171,6 +236,25 @@ class BaiduPanAPI:
         Returns:
             搜索结果列表
         """
+        result = self._search_page(key, dir_path, recursion, page, num, web)
+        return result.get('list', [])
+    
+    def _search_page(self, key: str, dir_path: str, recursion: int,
+                     page: int, num: int, web: str) -> Dict:
+        """
+        请求一页搜索结果
+        
+        Args:
+            key: 搜索关键词
+            dir_path: 搜索目录
+            recursion: 是否递归搜索子目录
+            page: 页码
+            num: 每页数量
+            web: 请求来源
+            
+        Returns:
+            完整的API响应（包含 list 和 has_more）
+        """
         url = f"{self.PAN_API_URL}/file"
         params = {
             'method': 'search',
@@ -182,8 +266,113 @@ class BaiduPanAPI:
             'web': web
         }
         
-        result = self._make_request('GET', url, params=params)
-        return result.get('list', [])
+        return self._make_request('GET', url, params=params)
+    
+    @staticmethod
+    def _page_has_more(result: Dict, num: int) -> bool:
+        """
+        判断搜索结果是否还有下一页
+        
+        Args:
+            result: 单页API响应
+            num: 每页数量
+            
+        Returns:
+            bool: 是否还有更多结果
+        """
+        files = result.get('list', [])
+        if not files:
+            return False
+        
+        # 旧版接口不返回 has_more，此时按是否取满一页判断
+        if 'has_more' in result:
+            return bool(result['has_more'])
+        return len(files) >= num
+    
+    def search_all(self, key: str, dir_path: str = '/', recursion: int = 1,
+                   num: int = 100, web: str = 'web',
+                   max_workers: Optional[int] = None,
+                   max_pages: Optional[int] = None) -> Iterator[Dict]:
+        """
+        获取全部搜索结果
+        
+        首页返回后，后续页面在并发窗口内同时请求，结果按到达顺序产出并按 fs_id 去重，
+        遇到 has_more == 0 的页面后不再发起新的请求。
+        
+        Args:
+            key: 搜索关键词
+            dir_path: 搜索目录
+            recursion: 是否递归搜索子目录 (0: 不递归, 1: 递归)
+            num: 每页数量
+            web: 请求来源
+            max_workers: 同时在途的最大请求数，默认为 SEARCH_MAX_WORKERS
+            max_pages: 最多请求的页数，None 表示不限制
+            
+        Yields:
+            Dict: 文件信息
+        """
+        max_workers = max(1, max_workers or self.SEARCH_MAX_WORKERS)
+        seen: Set[int] = set()
+        
+        def unique(files: List[Dict]) -> Iterator[Dict]:
+            for file in files:
+                fs_id = file.get('fs_id')
+                if fs_id in seen:
+                    continue
+                seen.add(fs_id)
+                yield file
+        
+        # 首页同步请求，多数查询只有一页
+        first = self._search_page(key, dir_path, recursion, 1, num, web)
+        yield from unique(first.get('list', []))
+        
+        if not self._page_has_more(first, num) or max_pages == 1:
+            return
+        
+        # 最后一页的页码，在收到 has_more == 0 之前未知
+        last_page = max_pages if max_pages else None
+        next_page = 2
+        pending = {}
+        
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+        try:
+            while True:
+                # 提交请求前在当前线程检查令牌，工作线程不会同时刷新
+                self._ensure_token()
+                
+                # 填满并发窗口
+                while len(pending) < max_workers and (last_page is None or next_page <= last_page):
+                    future = executor.submit(self._search_page, key, dir_path, recursion, next_page, num, web)
+                    pending[future] = next_page
+                    next_page += 1
+                
+                if not pending:
+                    break
+                
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    page = pending.pop(future)
+                    
+                    # 超出最后一页的结果直接丢弃
+                    if last_page is not None and page > last_page:
+                        continue
+                    
+                    result = future.result()
+                    if not self._page_has_more(result, num):
+                        last_page = page if last_page is None else min(last_page, page)
+                        logger.debug(f"搜索 '{key}' 在第 {page} 页结束")
+                    
+                    yield from unique(result.get('list', []))
+                
+                # 取消已确定不需要的页面
+                if last_page is not None:
+                    for future, page in list(pending.items()):
+                        if page > last_page and future.cancel():
+                            pending.pop(future)
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False)
     
     def get_file_info(self, fs_ids: List[int], thumb: int = 0, 
                      dlink: int = 0, extra: int = 0) -> List[Dict]:
@@ -256,7 +445,7 @@ class BaiduPanAPI:
                 try:
                     response = self.session.get(url, params=params, headers=headers)
                     response.raise_for_status()
-                    result = response.json()
+                    result = codec.loads_response(response)
                     
                     # 检查API错误
                     if 'errno' in result and result['errno'] != 0:
@@ -274,7 +463,7 @@ class BaiduPanAPI:
                     
                     # 使用HEAD请求获取真实下载链接（处理重定向）
                     try:
-                        logger.debug(f"获取到的初始下载链接: {dlink[:100]}...")  # 只记录链接的前100个字符
+                        logger.debug("获取到的初始下载链接: %s...", dlink[:100])  # 只记录链接的前100个字符
                         
                         # 创建新的会话对象，确保请求头正确应用
                         session = requests.Session()
@@ -315,9 +504,9 @@ class BaiduPanAPI:
                                     parsed_url.fragment
                                 ))
                                 
-                                logger.debug(f"已添加access_token参数到下载链接")
+                                logger.debug("已添加access_token参数到下载链接")
                             elif 'access_token' in query_params:
-                                logger.debug(f"下载链接已包含access_token参数")
+                                logger.debug("下载链接已包含access_token参数")
                             else:
                                 logger.warning(f"无法添加access_token参数，可能导致403错误")
                         else:
@@ -349,14 +538,14 @@ class BaiduPanAPI:
                         
                         # 对于d.pcs.baidu.com域名，直接返回处理后的链接，不需要HEAD请求
                         if is_pcs_domain:
-                            logger.debug(f"d.pcs.baidu.com域名，直接返回处理后的链接")
+                            logger.debug("d.pcs.baidu.com域名，直接返回处理后的链接")
                             # 确保使用极简化的请求头
                             session.headers.clear()
                             session.headers.update({
                                 'User-Agent': 'pan.baidu.com'
                             })
-                            logger.debug(f"最终请求头: {session.headers}")
-                            logger.debug(f"最终下载URL: {dlink}")
+                            logger.debug("最终请求头: %s", session.headers)
+                            logger.debug("最终下载URL: %s", dlink)
                             return dlink
                         
                         # 其他域名使用HEAD请求获取真实链接
@@ -365,7 +554,7 @@ class BaiduPanAPI:
                         # 如果HEAD请求成功并有重定向
                         if head_response.history:
                             real_url = head_response.url
-                            logger.debug(f"重定向到真实下载链接: {real_url[:100]}...")
+                            logger.debug("重定向到真实下载链接: %s...", real_url[:100])
                             return real_url
                         
                         # 如果HEAD请求成功但没有重定向
@@ -374,7 +563,7 @@ class BaiduPanAPI:
                         # 如果HEAD请求失败但返回了重定向链接
                         elif head_response.status_code in (301, 302, 303, 307, 308) and 'Location' in head_response.headers:
                             final_url = head_response.headers['Location']
-                            logger.debug(f"重定向到真实下载链接: {final_url[:100]}...")
+                            logger.debug("重定向到真实下载链接: %s...", final_url[:100])
                             return final_url
                         else:
                             return dlink
@@ -13,6 +13,7 @@ from typing import Dict, List, Optional, Set, Tuple
 from rich.console import Console
 from rich.table import Table
 from rich.progress import Progress
+from rich.live import Live
 from rich.prompt import Prompt, Confirm
 from rich.panel import Panel
 from rich import box
@@ -475,7 +476,7 @@ def select_files(playlist, start_path):
                 # 如果没有指定播放列表，询问用户
                 if not playlist:
                     # 获取所有播放列表
-                    playlists = playlist_manager.get_all_playlists() if playlist_manager else []
+                    playlists = playlist_manager.get_playlist_summaries() if playlist_manager else []
                     
                     if not playlists:
                         console.print("[yellow]没有找到播放列表，请先创建一个播放列表[/yellow]")
@@ -494,12 +495,8 @@ def select_files(playlist, start_path):
                 else:
                     selected_playlist = playlist
                 
-                # 添加文件到播放列表
-                success_count = 0
-                for file in selected_files:
-                    success = playlist_manager.add_to_playlist(selected_playlist, file)
-                    if success:
-                        success_count += 1
+                # 添加文件到播放列表，只保存一次
+                success_count = playlist_manager.add_many(selected_playlist, selected_files)
                 
                 console.print(f"[bold green]已成功添加 {success_count}/{len(selected_files)} 个文件到播放列表 '{selected_playlist}'[/bold green]")
                 break
@@ -670,11 +667,16 @@ def list_recursive(path, order, desc, limit, json_output):
 @click.option('--recursive/--no-recursive', default=True, help='是否递归搜索')
 @click.option('--page', default=1, help='页码')
 @click.option('--limit', '-l', default=100, help='每页数量')
+@click.option('--all', 'all_pages', is_flag=True, help='获取全部页面（并发请求）')
 @click.option('--json', 'json_output', is_flag=True, help='以JSON格式输出')
-def search(keyword, path, recursive, page, limit, json_output):
+def search(keyword, path, recursive, page, limit, all_pages, json_output):
     """搜索文件"""
     api = get_api_instance()
     
+    if all_pages:
+        search_all_pages(api, keyword, path, recursive, limit, json_output)
+        return
+    
     try:
         with Progress() as progress:
             task = progress.add_task("[cyan]搜索文件...", total=None)
@@ -695,27 +697,67 @@ def search(keyword, path, recursive, page, limit, json_output):
             console.print(f"[yellow]未找到匹配 '{keyword}' 的文件[/yellow]")
             return
         
-        table = Table(show_header=True, header_style="bold magenta", box=box.ROUNDED)
-        table.add_column("类型", style="dim", width=4)
-        table.add_column("文件名", style="cyan")
-        table.add_column("路径", style="blue")
-        table.add_column("大小", justify="right")
-        table.add_column("文件ID", style="dim")
+        table = _create_search_table()
         
         for file in files:
-            file_type = "📁" if file.get('isdir') == 1 else "📄"
-            file_name = file.get('server_filename', 'Unknown')
-            file_path = file.get('path', 'Unknown')
-            file_size = format_size(file.get('size', 0)) if file.get('isdir') == 0 else "-"
-            file_id = str(file.get('fs_id', 'Unknown'))
-            
-            table.add_row(file_type, file_name, file_path, file_size, file_id)
+            _add_search_row(table, file)
         
         console.print(table)
         console.print(f"[bold green]共找到 {len(files)} 个匹配项[/bold green]")
     except Exception as e:
         console.print(f"[red]搜索文件失败: {str(e)}[/red]")
 
+def _create_search_table() -> Table:
+    """创建搜索结果表格"""
+    table = Table(show_header=True, header_style="bold magenta", box=box.ROUNDED)
+    table.add_column("类型", style="dim", width=4)
+    table.add_column("文件名", style="cyan")
+    table.add_column("路径", style="blue")
+    table.add_column("大小", justify="right")
+    table.add_column("文件ID", style="dim")
+    return table
+
+def _add_search_row(table: Table, file: Dict) -> None:
+    """添加一行搜索结果"""
+    file_type = "📁" if file.get('isdir') == 1 else "📄"
+    file_name = file.get('server_filename', 'Unknown')
+    file_path = file.get('path', 'Unknown')
+    file_size = format_size(file.get('size', 0)) if file.get('isdir') == 0 else "-"
+    file_id = str(file.get('fs_id', 'Unknown'))
+    
+    table.add_row(file_type, file_name, file_path, file_size, file_id)
+
+def search_all_pages(api: BaiduPanAPI, keyword: str, path: str, recursive: bool,
+                     limit: int, json_output: bool) -> None:
+    """获取全部搜索结果，结果到达时实时显示"""
+    results = api.search_all(
+        key=keyword,
+        dir_path=path,
+        recursion=1 if recursive else 0,
+        num=limit
+    )
+    
+    try:
+        if json_output:
+            console.print(json.dumps([file for file in results], ensure_ascii=False, indent=2))
+            return
+        
+        table = _create_search_table()
+        count = 0
+        
+        with Live(table, console=console, refresh_per_second=4):
+            for file in results:
+                _add_search_row(table, file)
+                count += 1
+        
+        if not count:
+            console.print(f"[yellow]未找到匹配 '{keyword}' 的文件[/yellow]")
+            return
+        
+        console.print(f"[bold green]共找到 {count} 个匹配项[/bold green]")
+    except Exception as e:
+        console.print(f"[red]搜索文件失败: {str(e)}[/red]")
+
 @api.command()
 @click.argument('file_id', type=int)
 @click.option('--with-link', is_flag=True, help='获取下载链接')
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+目录列表缓存
+
+按目录、排序方式和起始位置缓存目录列表的单页结果，同一目录在有效期内再次列出时
+不再请求网盘。缓存只保存在内存中，按最近使用淘汰。
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Dict, Hashable, List, Optional
+
+
+class ListingCache:
+    """目录列表分页缓存"""
+    
+    # 默认有效期（秒）
+    DEFAULT_TTL = 300
+    
+    # 默认最多缓存的页数
+    DEFAULT_MAX_PAGES = 256
+    
+    def __init__(self, ttl: float = DEFAULT_TTL, max_pages: int = DEFAULT_MAX_PAGES):
+        """
+        初始化目录列表缓存
+        
+        Args:
+            ttl: 有效期（秒），小于等于0时不缓存
+            max_pages: 最多缓存的页数
+        """
+        self.ttl = ttl
+        self.max_pages = max(1, max_pages)
+        self._pages: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def get(self, key: Hashable) -> Optional[List[Dict]]:
+        """
+        获取缓存的页面
+        
+        Args:
+            key: 页面键
+            
+        Returns:
+            Optional[List[Dict]]: 文件列表，未缓存或已过期时为 None
+        """
+        with self._lock:
+            entry = self._pages.get(key)
+            if entry is None:
+                return None
+            
+            expires_at, files = entry
+            if expires_at < time.monotonic():
+                del self._pages[key]
+                return None
+            
+            self._pages.move_to_end(key)
+            return files
+    
+    def put(self, key: Hashable, files: List[Dict]) -> None:
+        """
+        缓存页面
+        
+        Args:
+            key: 页面键
+            files: 文件列表
+        """
+        if self.ttl <= 0:
+            return
+        
+        with self._lock:
+            self._pages[key] = (time.monotonic() + self.ttl, files)
+            self._pages.move_to_end(key)
+            while len(self._pages) > self.max_pages:
+                self._pages.popitem(last=False)
+    
+    def invalidate(self, dir_path: Optional[str] = None) -> None:
+        """
+        使缓存失效
+        
+        Args:
+            dir_path: 目录路径，为 None 时清空全部缓存；页面键的第一个元素为目录路径
+        """
+        with self._lock:
+            if dir_path is None:
+                self._pages.clear()
+                return
+            
+            for key in [key for key in self._pages if key[0] == dir_path]:
+                del self._pages[key]
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._pages)
@@ -6,7 +6,6 @@
 """
 
 import os
-import json
 import time
 import uuid
 import webbrowser
@@ -18,6 +17,7 @@ from requests.exceptions import RequestException
 from dupan_music.config.config import CONFIG
 from dupan_music.utils.logger import LOGGER
 from dupan_music.utils.file_utils import ensure_dir, read_file, write_file
+from dupan_music.utils import codec
 
 
 class BaiduPanAuth:
@@ -77,7 +77,7 @@ class BaiduPanAuth:
             try:
                 content = read_file(self.auth_file)
                 if content:
-                    loaded_info = json.loads(content)
+                    loaded_info = codec.loads(content)
                     auth_info.update(loaded_info)
             except Exception as e:
                 LOGGER.error(f"加载认证文件失败: {e}")
@@ -103,7 +103,7 @@ class BaiduPanAuth:
         
         # 保存认证信息到文件
         try:
-            write_file(self.auth_file, json.dumps(self.auth_info, ensure_ascii=False, indent=4))
+            write_file(self.auth_file, codec.dumps(self.auth_info, pretty=True))
             return True
         except Exception as e:
             LOGGER.error(f"保存认证信息失败: {e}")
@@ -181,7 +181,7 @@ class BaiduPanAuth:
             response = requests.get(url, params=params, headers=headers)
             response.raise_for_status()
             
-            data = response.json()
+            data = codec.loads_response(response)
             if "error" in data:
                 LOGGER.error(f"获取令牌失败: {data}")
                 return False
@@ -223,7 +223,7 @@ class BaiduPanAuth:
             response = requests.get(url, params=params)
             response.raise_for_status()
             
-            data = response.json()
+            data = codec.loads_response(response)
             if "error" in data:
                 LOGGER.error(f"刷新令牌失败: {data}")
                 return False
@@ -298,7 +298,7 @@ class BaiduPanAuth:
             response = requests.get(url, params=params)
             response.raise_for_status()
             
-            data = response.json()
+            data = codec.loads_response(response)
             if data["errno"] != 0:
                 LOGGER.error(f"获取用户信息失败: {data}")
                 return None
@@ -347,7 +347,7 @@ class BaiduPanAuth:
             response = requests.get(url, params=params, headers=headers)
             response.raise_for_status()
             
-            data = response.json()
+            data = codec.loads_response(response)
             if "error" in data:
                 LOGGER.error(f"获取设备码失败: {data}")
                 return "", "", ""
@@ -410,7 +410,7 @@ class BaiduPanAuth:
                 response = requests.get(url, params=params, headers=headers)
                 response.raise_for_status()
                 
-                data = response.json()
+                data = codec.loads_response(response)
                 
                 # 授权成功
                 if "access_token" in data:
@@ -423,7 +423,7 @@ class BaiduPanAuth:
                     self.auth_info["is_logged_in"] = True
                     
                     # 保存认证信息
-                    write_file(self.auth_file, json.dumps(self.auth_info, ensure_ascii=False, indent=4))
+                    write_file(self.auth_file, codec.dumps(self.auth_info, pretty=True))
                     
                     return True
                 
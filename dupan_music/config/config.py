@@ -3,15 +3,116 @@
 
 """
 配置模块
+
+默认配置和用户配置文件合并后的结果保存为配置快照（配置文件旁的
+.config.snapshot.json，只有所有者可读写），以各来源文件的修改时间和大小为键。
+来源文件未变化时直接读取快照，不再合并配置。凭据文件中的密钥不写入快照，每次
+加载时解析凭据文件（不执行）重新应用。配置在第一次读取时才加载。
 """
 
 import os
-import json
+import ast
+import copy
+import logging
+import threading
 import importlib.util
 import sys
 from typing import Dict, Any, Optional, List
 
-from dupan_music.utils.file_utils import ensure_dir
+from dupan_music.utils.file_utils import ensure_dir, read_file, write_file
+from dupan_music.utils import codec
+
+# 配置快照格式版本
+SNAPSHOT_VERSION = 2
+
+# 配置快照文件名（保存在配置文件所在目录）
+SNAPSHOT_FILE = ".config.snapshot.json"
+
+# 凭据文件路径
+CREDENTIALS_FILE = os.path.join(os.path.dirname(__file__), "credentials.py")
+
+# 日志模块依赖配置，这里直接使用标准库的 logger
+logger = logging.getLogger(__name__)
+
+
+def _stat_key(path: str) -> Optional[List[int]]:
+    """
+    获取文件的修改时间、大小和 inode，用于判断文件是否变化
+    
+    Args:
+        path: 文件路径
+        
+    Returns:
+        Optional[List[int]]: 文件不存在时为 None
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_mtime_ns, stat.st_size, stat.st_ino]
+
+
+def _read_credentials(path: str) -> Optional[Dict[str, Any]]:
+    """
+    读取凭据文件中的 CREDENTIALS 字典
+    
+    凭据文件通常只包含字面量，直接解析语法树取值，不执行文件；CREDENTIALS 不是
+    字面量（如从环境变量读取）时才导入执行凭据文件。
+    
+    Args:
+        path: 凭据文件路径
+        
+    Returns:
+        Optional[Dict[str, Any]]: 凭据，文件中没有 CREDENTIALS 时为 None
+        
+    Raises:
+        Exception: 读取、解析或执行凭据文件失败
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    
+    for node in tree.body:
+        if isinstance(node, ast.Assign):
+            targets, value = node.targets, node.value
+        elif isinstance(node, ast.AnnAssign) and node.value is not None:
+            targets, value = [node.target], node.value
+        else:
+            continue
+        if not any(isinstance(target, ast.Name) and target.id == "CREDENTIALS" for target in targets):
+            continue
+        try:
+            credentials = ast.literal_eval(value)
+        except ValueError:
+            break
+        return credentials if isinstance(credentials, dict) else None
+    else:
+        return None
+    
+    spec = importlib.util.spec_from_file_location("credentials", path)
+    credentials_module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(credentials_module)
+    return getattr(credentials_module, "CREDENTIALS", None)
+
+
+def _flatten(config: Dict[str, Any], prefix: str = "", index: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    展开多级配置，生成点号分隔的键到配置值的索引
+    
+    Args:
+        config: 配置
+        prefix: 键前缀
+        index: 写入的索引
+        
+    Returns:
+        Dict[str, Any]: 点号分隔的键 -> 配置值（字典值与配置中的是同一个对象）
+    """
+    index = {} if index is None else index
+    for key, value in config.items():
+        dotted = f"{prefix}{key}"
+        index[dotted] = value
+        if isinstance(value, dict):
+            _flatten(value, f"{dotted}.", index)
+    return index
 
 
 class Config:
@@ -65,6 +166,35 @@ class Config:
                 "log_file": os.path.expanduser("~/.dupan-music/logs/dupan-music.log"),  # 日志文件
             },
             
+            # 播放列表相关
+            "playlist": {
+                "storage": "json",  # 存储后端（json, sqlite）
+                "columnar_threshold": 5000,  # 歌曲数达到该值时使用列式存储，0 表示禁用
+                "compact": False,  # 以紧凑JSON保存播放列表（不缩进）
+                "write_delay": 0,  # 合并写入延迟（秒），短时间内多次保存同一播放列表只写入一次，0 表示立即写入
+            },
+            
+            # 播放历史相关
+            "history": {
+                "skip_threshold": 0.5,  # 播放比例低于该值且未播放完时记为跳过
+                "compact_every": 10,  # 每播放多少首更新一次最近播放列表和播放统计
+                "weighted_shuffle": True,  # 随机播放时按播放统计加权（降低经常跳过和刚播放过的歌曲的概率）
+            },
+            
+            # 播放器守护进程相关
+            "player": {
+                "socket": os.path.expanduser("~/.dupan-music/player.sock"),  # 控制套接字路径
+                "mpd_host": "127.0.0.1",  # MPD协议服务监听地址
+                "mpd_port": 0,  # MPD协议服务端口（如 6600），0 表示不启动
+                "broadcast_host": "0.0.0.0",  # 局域网广播监听地址
+                "broadcast_port": 0,  # 局域网广播端口（如 8000），0 表示不启动
+            },
+            
+            # 本地曲库相关
+            "library": {
+                "index_file": os.path.expanduser("~/.dupan-music/library.db"),  # 曲库索引文件
+            },
+            
             # 日志相关
             "log": {
                 "level": "INFO",  # 日志级别
@@ -89,53 +219,120 @@ class Config:
         
         # 配置文件
         self._config_file = config_file or self._default_config["storage"]["config_file"]
+        self._snapshot_file = os.path.join(os.path.dirname(self._config_file), SNAPSHOT_FILE)
         
         # 确保配置目录存在
         ensure_dir(os.path.dirname(self._config_file))
         
-        # 加载配置
-        self._config = self._load_config()
+        # 配置在第一次读取时加载
+        self._data: Optional[Dict[str, Any]] = None
+        self._index: Optional[Dict[str, Any]] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def _config(self) -> Dict[str, Any]:
+        """配置，第一次访问时从快照或来源文件加载"""
+        if self._data is None:
+            with self._lock:
+                if self._data is None:
+                    self._data = self._load()
+        return self._data
+    
+    @_config.setter
+    def _config(self, config: Dict[str, Any]) -> None:
+        self._data = config
+        self._index = None
+    
+    def _snapshot_key(self) -> List[Any]:
+        """
+        计算配置快照的键：快照格式、用户目录以及配置模块和配置文件的状态
+        
+        Returns:
+            List[Any]: 快照键
+        """
+        return [
+            SNAPSHOT_VERSION,
+            os.path.expanduser("~"),
+            _stat_key(__file__),
+            _stat_key(self._config_file),
+        ]
+    
+    def _load(self) -> Dict[str, Any]:
+        """
+        加载配置，来源文件未变化时读取快照，否则合并后保存新的快照，最后应用凭据
+        
+        Returns:
+            Dict[str, Any]: 配置
+        """
+        config = self._load_snapshot()
+        self._apply_credentials(config)
+        return config
+    
+    def _load_snapshot(self) -> Dict[str, Any]:
+        """
+        读取配置快照，来源文件变化时重新合并并保存快照（不含凭据）
+        
+        Returns:
+            Dict[str, Any]: 配置
+        """
+        key = self._snapshot_key()
+        if os.path.exists(self._snapshot_file):
+            try:
+                snapshot = codec.loads(read_file(self._snapshot_file) or "")
+            except ValueError:
+                snapshot = None
+            if isinstance(snapshot, dict) and snapshot.get("key") == key and isinstance(snapshot.get("config"), dict):
+                return snapshot["config"]
+        
+        config = self._load_config()
+        # 配置文件中也可能包含密钥，快照只允许所有者读取
+        write_file(self._snapshot_file, codec.dumps({"key": key, "config": config}), mode=0o600)
+        return config
     
     def _load_config(self) -> Dict[str, Any]:
         """
-        加载配置
+        合并默认配置和配置文件
         
         Returns:
             Dict[str, Any]: 配置
         """
-        # 合并默认配置
-        config = self._default_config.copy()
+        # 合并默认配置（深复制，合并时不修改默认配置）
+        config = copy.deepcopy(self._default_config)
         
         # 如果配置文件存在，则加载
         if os.path.exists(self._config_file):
             try:
                 with open(self._config_file, "r", encoding="utf-8") as f:
-                    user_config = json.load(f)
+                    user_config = codec.loads(f.read())
                 
                 # 递归合并配置
                 self._merge_config(config, user_config)
             except Exception as e:
                 print(f"加载配置文件失败: {e}")
         
-        # 尝试从凭据文件加载百度网盘API凭据
+        return config
+    
+    def _apply_credentials(self, config: Dict[str, Any]) -> None:
+        """
+        从凭据文件加载百度网盘API凭据，覆盖配置中的同名项
+        
+        Args:
+            config: 配置
+        """
         try:
-            # 动态导入凭据模块
-            credentials_path = os.path.join(os.path.dirname(__file__), "credentials.py")
-            if os.path.exists(credentials_path):
-                spec = importlib.util.spec_from_file_location("credentials", credentials_path)
-                credentials_module = importlib.util.module_from_spec(spec)
-                spec.loader.exec_module(credentials_module)
-                
-                if hasattr(credentials_module, "CREDENTIALS"):
-                    # 更新配置中的百度网盘API凭据
-                    for key, value in credentials_module.CREDENTIALS.items():
-                        if key in config:
-                            config[key] = value
-                    print("已从凭据文件加载百度网盘API凭据")
+            if not os.path.exists(CREDENTIALS_FILE):
+                return
+            credentials = _read_credentials(CREDENTIALS_FILE)
+            if credentials is None:
+                return
+            
+            # 更新配置中的百度网盘API凭据
+            for key, value in credentials.items():
+                if key in config:
+                    config[key] = value
+            logger.debug("已从凭据文件加载百度网盘API凭据")
         except Exception as e:
             print(f"加载凭据文件失败: {e}")
-        
-        return config
     
     def _merge_config(self, target: Dict[str, Any], source: Dict[str, Any]) -> None:
         """
@@ -160,7 +357,7 @@ class Config:
         """
         try:
             with open(self._config_file, "w", encoding="utf-8") as f:
-                json.dump(self._config, f, ensure_ascii=False, indent=4)
+                f.write(codec.dumps(self._config, pretty=True))
             return True
         except Exception as e:
             print(f"保存配置文件失败: {e}")
@@ -177,17 +374,11 @@ class Config:
         Returns:
             Any: 配置值
         """
-        # 处理多级键
-        keys = key.split(".")
-        value = self._config
-        
-        for k in keys:
-            if isinstance(value, dict) and k in value:
-                value = value[k]
-            else:
-                return default
-        
-        return value
+        # 多级键使用预先展开的索引
+        index = self._index
+        if index is None:
+            index = self._index = _flatten(self._config)
+        return index.get(key, default)
     
     def set(self, key: str, value: Any) -> None:
         """
@@ -209,6 +400,7 @@ class Config:
         
         # 设置最后一级的值
         config[keys[-1]] = value
+        self._index = None
     
     def reset(self, key: Optional[str] = None) -> None:
         """
@@ -220,7 +412,7 @@ class Config:
         """
         if key is None:
             # 重置所有配置
-            self._config = self._default_config.copy()
+            self._config = copy.deepcopy(self._default_config)
         else:
             # 重置指定配置
             keys = key.split(".")
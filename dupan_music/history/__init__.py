@@ -0,0 +1,11 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+播放历史模块
+"""
+
+from dupan_music.history.history import PlayHistory
+from dupan_music.history.stats import PlayStats, TrackStats
+
+__all__ = ["PlayHistory", "PlayStats", "TrackStats"]
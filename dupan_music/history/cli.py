@@ -0,0 +1,139 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+播放统计命令行接口
+"""
+
+import sys
+import json
+import click
+from datetime import datetime
+from rich.console import Console
+from rich.table import Table
+from rich import box
+
+from dupan_music.history.stats import PlayStats
+from dupan_music.playlist.playlist import PlaylistManager
+from dupan_music.utils.logger import get_logger
+from dupan_music.utils.file_utils import format_time
+
+logger = get_logger(__name__)
+console = Console()
+
+def get_play_stats() -> PlayStats:
+    """获取播放统计实例"""
+    try:
+        return PlaylistManager().stats
+    except Exception as e:
+        console.print(f"[red]初始化播放统计失败: {str(e)}[/red]")
+        sys.exit(1)
+
+def print_tracks(tracks, title: str, json_output: bool) -> None:
+    """
+    显示歌曲统计表格
+    
+    Args:
+        tracks: 歌曲统计列表
+        title: 表格标题
+        json_output: 是否以JSON格式输出
+    """
+    if json_output:
+        console.print(json.dumps([track.to_dict() for track in tracks], ensure_ascii=False, indent=2))
+        return
+    
+    if not tracks:
+        console.print("[yellow]暂无播放记录[/yellow]")
+        return
+    
+    table = Table(title=title, show_header=True, header_style="bold magenta", box=box.ROUNDED)
+    table.add_column("序号", style="dim", width=4)
+    table.add_column("文件名", style="cyan")
+    table.add_column("播放次数", justify="right")
+    table.add_column("跳过次数", justify="right")
+    table.add_column("收听时长", justify="right")
+    table.add_column("最后播放", style="dim")
+    
+    for i, track in enumerate(tracks, 1):
+        last_played = datetime.fromtimestamp(track.last_played).strftime('%Y-%m-%d %H:%M:%S') if track.last_played else "-"
+        table.add_row(
+            str(i),
+            track.server_filename or str(track.fs_id),
+            str(track.plays),
+            str(track.skips),
+            format_time(track.listen_seconds),
+            last_played
+        )
+    
+    console.print(table)
+
+@click.group()
+def stats():
+    """播放统计命令"""
+    pass
+
+@stats.command("top")
+@click.option('--limit', '-l', default=10, help='显示数量')
+@click.option('--by', 'order', type=click.Choice(['plays', 'time']), default='plays', help='排序依据（播放次数、收听时长）')
+@click.option('--json', 'json_output', is_flag=True, help='以JSON格式输出')
+def top(limit, order, json_output):
+    """显示播放最多的歌曲"""
+    play_stats = get_play_stats()
+    print_tracks(play_stats.top(limit, order), "播放最多的歌曲", json_output)
+    
+    if not json_output:
+        totals = play_stats.totals()
+        console.print(f"[bold green]共播放 {totals['plays']} 次，{totals['tracks']} 首歌曲，"
+                      f"累计收听 {format_time(totals['seconds'])}[/bold green]")
+
+@stats.command("skipped")
+@click.option('--limit', '-l', default=10, help='显示数量')
+@click.option('--json', 'json_output', is_flag=True, help='以JSON格式输出')
+def skipped(limit, json_output):
+    """显示跳过最多的歌曲"""
+    play_stats = get_play_stats()
+    print_tracks(play_stats.most_skipped(limit), "跳过最多的歌曲", json_output)
+
+@stats.command("by-hour")
+@click.option('--json', 'json_output', is_flag=True, help='以JSON格式输出')
+def by_hour(json_output):
+    """按小时显示播放次数"""
+    hours = get_play_stats().by_hour()
+    
+    if json_output:
+        console.print(json.dumps(hours))
+        return
+    
+    peak = max(hours) or 1
+    table = Table(show_header=True, header_style="bold magenta", box=box.ROUNDED)
+    table.add_column("时段", style="cyan")
+    table.add_column("播放次数", justify="right")
+    table.add_column("分布", style="green")
+    
+    for hour, count in enumerate(hours):
+        table.add_row(f"{hour:02d}:00", str(count), "█" * round(count / peak * 30))
+    
+    console.print(table)
+
+@stats.command("playlists")
+@click.option('--json', 'json_output', is_flag=True, help='以JSON格式输出')
+def playlists(json_output):
+    """显示各播放列表的播放次数"""
+    counts = get_play_stats().playlist_counts()
+    
+    if json_output:
+        console.print(json.dumps(counts, ensure_ascii=False, indent=2))
+        return
+    
+    if not counts:
+        console.print("[yellow]暂无播放记录[/yellow]")
+        return
+    
+    table = Table(show_header=True, header_style="bold magenta", box=box.ROUNDED)
+    table.add_column("播放列表", style="cyan")
+    table.add_column("播放次数", justify="right")
+    
+    for name, count in counts.items():
+        table.add_row(name, str(count))
+    
+    console.print(table)
@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+播放历史日志
+
+每次播放追加写入 NDJSON 日志（每行一条记录），写入由后台线程完成，不阻塞播放。
+日志只追加不改写，历史记录数量不限，写入开销固定；最近播放列表、统计等视图
+记录各自已处理到的文件偏移，只需处理新增的记录。
+
+记录格式:
+    {"ts": 时间戳, "event": "start", "fs_id": 文件ID, "playlist": 播放列表, "item": 播放列表项}
+    {"ts": 时间戳, "event": "end", "fs_id": 文件ID, "playlist": 播放列表,
+     "played": 已播放秒数, "length": 歌曲秒数, "skipped": 是否跳过}
+"""
+
+import os
+import time
+import queue
+import atexit
+import threading
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from dupan_music.config.config import CONFIG
+from dupan_music.utils import codec
+from dupan_music.utils.logger import get_logger
+from dupan_music.utils.file_utils import ensure_dir, file_lock, read_file, write_file
+
+logger = get_logger(__name__)
+
+# 事件类型
+EVENT_START = "start"
+EVENT_END = "end"
+
+
+class PlayHistory:
+    """播放历史日志"""
+    
+    LOG_FILENAME = "play_history.ndjson"
+    OFFSETS_FILENAME = "offsets.json"
+    
+    def __init__(self, history_dir: str):
+        """
+        初始化播放历史，首次写入时才创建目录和启动写入线程
+        
+        Args:
+            history_dir: 历史目录
+        """
+        self.history_dir = history_dir
+        self.log_path = os.path.join(history_dir, self.LOG_FILENAME)
+        self.offsets_path = os.path.join(history_dir, self.OFFSETS_FILENAME)
+        
+        # 未跳过所需的最少播放比例
+        self.skip_threshold = CONFIG.get("history.skip_threshold", 0.5)
+        
+        # 每批记录写入后的回调，参数为本批记录
+        self.on_written: Optional[Callable[[List[Dict]], None]] = None
+        
+        self._queue: "queue.Queue[Optional[Dict]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._writer_lock = threading.Lock()
+        self._atexit_registered = False
+    
+    def record_start(self, item: Dict, playlist: str = "") -> None:
+        """
+        记录开始播放
+        
+        Args:
+            item: 播放列表项字典
+            playlist: 播放列表名称
+        """
+        self._append({
+            'ts': time.time(),
+            'event': EVENT_START,
+            'fs_id': item.get('fs_id'),
+            'playlist': playlist,
+            'item': item
+        })
+    
+    def record_end(self, fs_id: int, played: float, length: float,
+                   completed: bool, playlist: str = "") -> None:
+        """
+        记录播放结束
+        
+        Args:
+            fs_id: 文件ID
+            played: 实际播放秒数（不含暂停）
+            length: 歌曲时长（秒），未知时为 0
+            completed: 是否自然播放结束
+            playlist: 播放列表名称
+        """
+        if completed:
+            skipped = False
+        elif length > 0:
+            skipped = played < length * self.skip_threshold
+        else:
+            skipped = True
+        
+        self._append({
+            'ts': time.time(),
+            'event': EVENT_END,
+            'fs_id': fs_id,
+            'playlist': playlist,
+            'played': round(played, 1),
+            'length': round(length, 1),
+            'skipped': skipped
+        })
+    
+    def _append(self, record: Dict) -> None:
+        """
+        将记录放入写入队列
+        
+        Args:
+            record: 记录
+        """
+        self._ensure_writer()
+        self._queue.put(record)
+    
+    def _ensure_writer(self) -> None:
+        """启动后台写入线程"""
+        if self._writer is not None and self._writer.is_alive():
+            return
+        
+        with self._writer_lock:
+            if self._writer is not None and self._writer.is_alive():
+                return
+            
+            self._writer = threading.Thread(target=self._write_loop, name="play-history-writer")
+            self._writer.daemon = True
+            self._writer.start()
+            
+            # 退出时写入剩余记录
+            if not self._atexit_registered:
+                atexit.register(self.close)
+                self._atexit_registered = True
+    
+    def _write_loop(self) -> None:
+        """后台写入循环，每次把队列中已有的记录合并为一次写入"""
+        while True:
+            record = self._queue.get()
+            batch = [record]
+            
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            
+            records = [record for record in batch if record is not None]
+            if records:
+                self._write(records)
+            
+            for _ in batch:
+                self._queue.task_done()
+            
+            if None in batch:
+                return
+    
+    def _write(self, records: List[Dict]) -> None:
+        """
+        追加写入记录
+        
+        Args:
+            records: 记录列表
+        """
+        data = b''.join(codec.dumpb(record) + b'\n' for record in records)
+        
+        try:
+            ensure_dir(self.history_dir)
+            with open(self.log_path, 'ab') as f:
+                # 上次写入中断留下的不完整行单独结束，避免与新记录连在一起
+                if f.tell() > 0 and not self._ends_with_newline():
+                    data = b'\n' + data
+                f.write(data)
+        except OSError as e:
+            logger.error(f"写入播放历史失败: {str(e)}")
+            return
+        
+        if self.on_written:
+            try:
+                self.on_written(records)
+            except Exception as e:
+                logger.error(f"处理播放历史失败: {str(e)}")
+    
+    def _ends_with_newline(self) -> bool:
+        """
+        检查日志文件是否以换行结尾
+        
+        Returns:
+            bool: 是否以换行结尾
+        """
+        with open(self.log_path, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+    
+    def flush(self) -> None:
+        """等待队列中的记录全部写入"""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.join()
+    
+    def close(self) -> None:
+        """写入剩余记录并停止写入线程"""
+        if self._writer is not None and self._writer.is_alive():
+            self._queue.put(None)
+            self._writer.join(timeout=5.0)
+        self._writer = None
+    
+    def read(self, offset: int = 0) -> Iterator[Tuple[Dict, int]]:
+        """
+        从指定偏移读取记录，只返回完整的行
+        
+        Args:
+            offset: 起始偏移
+            
+        Yields:
+            Tuple[Dict, int]: 记录、该记录之后的偏移
+        """
+        try:
+            f = open(self.log_path, 'rb')
+        except FileNotFoundError:
+            return
+        
+        with f:
+            # 日志被清空或替换时从头读取
+            if offset > os.fstat(f.fileno()).st_size:
+                offset = 0
+            
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b'\n'):
+                    # 正在写入的行
+                    break
+                
+                offset += len(line)
+                if not line.strip():
+                    continue
+                
+                try:
+                    record = codec.loads(line)
+                except ValueError:
+                    logger.warning(f"跳过损坏的播放历史记录: {line[:80]!r}")
+                    continue
+                yield record, offset
+    
+    def get_offset(self, consumer: str) -> int:
+        """
+        获取视图已处理到的偏移
+        
+        Args:
+            consumer: 视图名称
+            
+        Returns:
+            int: 偏移
+        """
+        return self._load_offsets().get(consumer, 0)
+    
+    def set_offset(self, consumer: str, offset: int) -> None:
+        """
+        保存视图已处理到的偏移
+        
+        写入线程（压缩最近播放列表、更新统计）和前台读取可能同时保存不同视图的偏移，
+        读取-修改-写入期间持有文件锁，避免互相覆盖。
+        
+        Args:
+            consumer: 视图名称
+            offset: 偏移
+        """
+        ensure_dir(self.history_dir)
+        with file_lock(self.offsets_path):
+            offsets = self._load_offsets()
+            offsets[consumer] = offset
+            if not write_file(self.offsets_path, codec.dumps(offsets)):
+                logger.error("保存播放历史偏移失败")
+    
+    def _load_offsets(self) -> Dict[str, int]:
+        """
+        读取各视图的偏移
+        
+        Returns:
+            Dict[str, int]: 视图名称 -> 偏移
+        """
+        content = read_file(self.offsets_path) if os.path.exists(self.offsets_path) else None
+        if not content:
+            return {}
+        
+        try:
+            return codec.loads(content)
+        except ValueError:
+            logger.warning("播放历史偏移文件损坏，将重新处理播放历史")
+            return {}
@@ -0,0 +1,351 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+播放统计
+
+统计数据由播放历史增量聚合：每次只读取上次聚合之后新增的日志记录，
+聚合结果（每首歌曲的播放次数、最后播放时间、收听时长等）与已处理到的
+日志偏移一起保存，查询时无需重新扫描全部播放历史。
+"""
+
+import os
+import time
+import threading
+from typing import Dict, Iterable, List, Optional
+
+from dupan_music.utils import codec
+from dupan_music.utils.logger import get_logger
+from dupan_music.utils.file_utils import ensure_dir, read_file, write_file
+from dupan_music.history.history import PlayHistory, EVENT_START, EVENT_END
+
+logger = get_logger(__name__)
+
+
+class TrackStats:
+    """单首歌曲的播放统计"""
+    
+    __slots__ = (
+        'fs_id', 'server_filename', 'path', 'plays', 'completes', 'skips',
+        'listen_seconds', 'last_played'
+    )
+    
+    def __init__(self, fs_id: int, server_filename: str = "", path: str = "", plays: int = 0,
+                 completes: int = 0, skips: int = 0, listen_seconds: float = 0.0,
+                 last_played: float = 0.0):
+        """
+        初始化歌曲统计
+        
+        Args:
+            fs_id: 文件ID
+            server_filename: 文件名
+            path: 文件路径
+            plays: 播放次数
+            completes: 完整播放次数
+            skips: 跳过次数
+            listen_seconds: 累计收听秒数
+            last_played: 最后播放时间
+        """
+        self.fs_id = fs_id
+        self.server_filename = server_filename
+        self.path = path
+        self.plays = plays
+        self.completes = completes
+        self.skips = skips
+        self.listen_seconds = listen_seconds
+        self.last_played = last_played
+    
+    @property
+    def skip_rate(self) -> float:
+        """跳过比例"""
+        finished = self.completes + self.skips
+        return self.skips / finished if finished else 0.0
+    
+    def to_dict(self) -> Dict:
+        """
+        转换为字典
+        
+        Returns:
+            Dict: 字典表示
+        """
+        return {field: getattr(self, field) for field in self.__slots__}
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'TrackStats':
+        """
+        从字典创建歌曲统计
+        
+        Args:
+            data: 字典数据
+            
+        Returns:
+            TrackStats: 歌曲统计
+        """
+        return cls(**{field: data[field] for field in cls.__slots__ if field in data})
+
+
+class PlayStats:
+    """播放统计引擎"""
+    
+    STATS_FILENAME = "stats.json"
+    
+    # 短时间内播放过的歌曲在加权随机播放中降低权重
+    RECENT_PENALTY_SECONDS = 3600
+    RECENT_PENALTY = 0.1
+    
+    def __init__(self, history: PlayHistory):
+        """
+        初始化播放统计，首次查询时才读取聚合结果
+        
+        Args:
+            history: 播放历史
+        """
+        self.history = history
+        self.stats_path = os.path.join(history.history_dir, self.STATS_FILENAME)
+        
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._offset = 0
+        self._tracks: Dict[int, TrackStats] = {}
+        self._hours: List[int] = [0] * 24
+        self._playlists: Dict[str, int] = {}
+        self._total_plays = 0
+        self._total_seconds = 0.0
+    
+    def _load(self) -> None:
+        """读取已保存的聚合结果"""
+        if self._loaded:
+            return
+        self._loaded = True
+        
+        content = read_file(self.stats_path) if os.path.exists(self.stats_path) else None
+        if not content:
+            return
+        
+        try:
+            data = codec.loads(content)
+            self._offset = data.get('offset', 0)
+            self._tracks = {
+                int(fs_id): TrackStats.from_dict(track) for fs_id, track in data.get('tracks', {}).items()
+            }
+            self._hours = data.get('hours', [0] * 24)
+            self._playlists = data.get('playlists', {})
+            self._total_plays = data.get('total_plays', 0)
+            self._total_seconds = data.get('total_seconds', 0.0)
+        except (ValueError, TypeError, KeyError) as e:
+            logger.warning(f"播放统计文件损坏，将重新统计: {str(e)}")
+            self._reset()
+    
+    def _reset(self) -> None:
+        """清空聚合结果"""
+        self._offset = 0
+        self._tracks = {}
+        self._hours = [0] * 24
+        self._playlists = {}
+        self._total_plays = 0
+        self._total_seconds = 0.0
+    
+    def _save(self) -> None:
+        """保存聚合结果"""
+        data = {
+            'offset': self._offset,
+            'tracks': {fs_id: track.to_dict() for fs_id, track in self._tracks.items()},
+            'hours': self._hours,
+            'playlists': self._playlists,
+            'total_plays': self._total_plays,
+            'total_seconds': self._total_seconds
+        }
+        
+        ensure_dir(self.history.history_dir)
+        if not write_file(self.stats_path, codec.dumps(data)):
+            logger.error("保存播放统计失败")
+    
+    def update(self, persist: bool = True) -> int:
+        """
+        聚合上次之后新增的播放记录
+        
+        Args:
+            persist: 有新记录时是否保存聚合结果
+            
+        Returns:
+            int: 处理的记录数
+        """
+        with self._lock:
+            self._load()
+            
+            try:
+                log_size = os.path.getsize(self.history.log_path)
+            except OSError:
+                log_size = 0
+            if self._offset > log_size:
+                # 日志被清空或替换，重新统计
+                self._reset()
+            
+            count = 0
+            for record, offset in self.history.read(self._offset):
+                self._apply(record)
+                self._offset = offset
+                count += 1
+            
+            if count and persist:
+                self._save()
+            return count
+    
+    def _apply(self, record: Dict) -> None:
+        """
+        将一条播放记录合并到聚合结果
+        
+        Args:
+            record: 播放记录
+        """
+        fs_id = record.get('fs_id')
+        if fs_id is None:
+            return
+        
+        track = self._tracks.get(fs_id)
+        if track is None:
+            track = self._tracks[fs_id] = TrackStats(fs_id)
+        
+        event = record.get('event')
+        if event == EVENT_START:
+            timestamp = record.get('ts', 0)
+            item = record.get('item') or {}
+            track.server_filename = item.get('server_filename') or track.server_filename
+            track.path = item.get('path') or track.path
+            track.plays += 1
+            track.last_played = max(track.last_played, timestamp)
+            
+            self._total_plays += 1
+            self._hours[time.localtime(timestamp).tm_hour] += 1
+            
+            playlist = record.get('playlist')
+            if playlist:
+                self._playlists[playlist] = self._playlists.get(playlist, 0) + 1
+        elif event == EVENT_END:
+            played = record.get('played', 0)
+            track.listen_seconds += played
+            self._total_seconds += played
+            
+            if record.get('skipped'):
+                track.skips += 1
+            else:
+                track.completes += 1
+    
+    def get(self, fs_id: int) -> Optional[TrackStats]:
+        """
+        获取单首歌曲的统计
+        
+        Args:
+            fs_id: 文件ID
+            
+        Returns:
+            Optional[TrackStats]: 歌曲统计
+        """
+        self.update()
+        return self._tracks.get(fs_id)
+    
+    def top(self, limit: int = 10, by: str = "plays") -> List[TrackStats]:
+        """
+        播放最多的歌曲
+        
+        Args:
+            limit: 数量
+            by: 排序依据（plays: 播放次数, time: 收听时长）
+            
+        Returns:
+            List[TrackStats]: 歌曲统计列表
+        """
+        self.update()
+        if by == "time":
+            key = lambda track: (track.listen_seconds, track.plays)
+        else:
+            key = lambda track: (track.plays, track.listen_seconds)
+        return sorted(self._tracks.values(), key=key, reverse=True)[:limit]
+    
+    def most_skipped(self, limit: int = 10) -> List[TrackStats]:
+        """
+        跳过最多的歌曲
+        
+        Args:
+            limit: 数量
+            
+        Returns:
+            List[TrackStats]: 歌曲统计列表
+        """
+        self.update()
+        skipped = [track for track in self._tracks.values() if track.skips]
+        return sorted(skipped, key=lambda track: (track.skips, track.skip_rate), reverse=True)[:limit]
+    
+    def by_hour(self) -> List[int]:
+        """
+        按小时（本地时间）统计播放次数
+        
+        Returns:
+            List[int]: 0-23 点每小时的播放次数
+        """
+        self.update()
+        return list(self._hours)
+    
+    def playlist_counts(self) -> Dict[str, int]:
+        """
+        各播放列表的播放次数
+        
+        Returns:
+            Dict[str, int]: 播放列表名称 -> 播放次数，按次数降序
+        """
+        self.update()
+        return dict(sorted(self._playlists.items(), key=lambda entry: entry[1], reverse=True))
+    
+    def play_counts(self) -> Dict[int, int]:
+        """
+        各歌曲的播放次数
+        
+        Returns:
+            Dict[int, int]: 文件ID -> 播放次数
+        """
+        self.update()
+        return {fs_id: track.plays for fs_id, track in self._tracks.items()}
+    
+    def totals(self) -> Dict[str, float]:
+        """
+        总体统计
+        
+        Returns:
+            Dict[str, float]: 总播放次数、总收听秒数、歌曲数
+        """
+        self.update()
+        return {
+            'plays': self._total_plays,
+            'seconds': self._total_seconds,
+            'tracks': len(self._tracks)
+        }
+    
+    def shuffle_weights(self, fs_ids: Iterable[int], now: Optional[float] = None) -> List[float]:
+        """
+        计算加权随机播放的权重：完整播放多的歌曲权重高，经常跳过和刚播放过的歌曲权重低
+        
+        Args:
+            fs_ids: 文件ID列表
+            now: 当前时间
+            
+        Returns:
+            List[float]: 与 fs_ids 顺序一致的权重
+        """
+        with self._lock:
+            # 播放路径上只在内存中聚合，不写入文件
+            self.update(persist=False)
+            now = now or time.time()
+            tracks = self._tracks
+            
+            weights = []
+            for fs_id in fs_ids:
+                track = tracks.get(fs_id)
+                if track is None:
+                    weights.append(1.0)
+                    continue
+                
+                weight = (track.completes + 1) / (track.skips + 1)
+                if now - track.last_played < self.RECENT_PENALTY_SECONDS:
+                    weight *= self.RECENT_PENALTY
+                weights.append(weight)
+            return weights
@@ -0,0 +1,11 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+本地曲库模块
+"""
+
+from dupan_music.library.index import LibraryIndex
+from dupan_music.library.resolver import FileResolver
+
+__all__ = ["LibraryIndex", "FileResolver"]
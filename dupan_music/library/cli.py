@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+本地曲库命令行接口
+"""
+
+import sys
+import click
+from rich.console import Console
+from rich.progress import Progress
+
+from dupan_music.api.cli import get_api_instance
+from dupan_music.config.config import CONFIG
+from dupan_music.library.index import LibraryIndex
+from dupan_music.utils.logger import get_logger
+
+logger = get_logger(__name__)
+console = Console()
+
+def get_library_index() -> LibraryIndex:
+    """获取曲库索引实例"""
+    try:
+        return LibraryIndex.open_default()
+    except Exception as e:
+        console.print(f"[red]打开曲库索引失败: {str(e)}[/red]")
+        sys.exit(1)
+
+@click.group()
+def library():
+    """本地曲库命令"""
+    pass
+
+@library.command("scan")
+@click.argument('path', default=None, required=False)
+@click.option('--page-size', default=1000, help='每次请求的文件数')
+def scan(path, page_size):
+    """扫描网盘目录并更新曲库索引"""
+    path = path or CONFIG.get("music.default_dir", "/")
+    
+    api = get_api_instance()
+    index = get_library_index()
+    
+    scanned = 0
+    try:
+        with Progress() as progress:
+            task = progress.add_task(f"[cyan]正在扫描 '{path}'...", total=None)
+            start = 0
+            while True:
+                files = api.get_file_list_recursive(path, limit=page_size, start=start)
+                scanned += index.upsert(files)
+                progress.update(task, description=f"[cyan]正在扫描 '{path}'，已索引 {scanned} 个文件...")
+                
+                if len(files) < page_size:
+                    break
+                start += len(files)
+    except Exception as e:
+        console.print(f"[red]扫描失败: {str(e)}[/red]")
+        return
+    finally:
+        index.close()
+    
+    console.print(f"[bold green]扫描完成，已索引 {scanned} 个文件[/bold green]")
+
+@library.command("info")
+def info():
+    """显示曲库索引信息"""
+    index = get_library_index()
+    try:
+        console.print(f"[bold]索引文件:[/bold] {index.db_path}")
+        console.print(f"[bold]已索引文件数:[/bold] {index.count()}")
+    finally:
+        index.close()
@@ -0,0 +1,436 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+本地曲库索引
+
+在本地SQLite数据库中记录网盘文件的路径、大小、MD5等信息，按路径、MD5+大小、
+所在目录查找文件时无需请求网盘接口。索引由扫描命令和日常的文件列表、验证结果
+增量更新，可能落后于网盘，使用查到的文件前应确认其仍然有效。
+
+每次修改索引都会递增变更序号，新增或内容变化的文件记录修改时的序号，删除的文件
+记录在 tombstones 表中，智能播放列表据此只重新计算变化的文件。
+"""
+
+import os
+import time
+import sqlite3
+import posixpath
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dupan_music.config.config import CONFIG
+from dupan_music.utils.logger import get_logger
+from dupan_music.utils.file_utils import ensure_dir
+
+logger = get_logger(__name__)
+
+# 文件信息字段，顺序与 files 表的列一致
+FILE_COLUMNS = (
+    'fs_id', 'server_filename', 'path', 'size', 'category', 'isdir',
+    'local_mtime', 'server_mtime', 'md5'
+)
+
+# 文本字段，缺失时写入空字符串
+TEXT_COLUMNS = ('server_filename', 'path', 'md5')
+
+# 内容变化时需要更新变更序号的字段
+CONTENT_COLUMNS = ('server_filename', 'path', 'size', 'server_mtime', 'md5')
+
+# SQLite单条语句允许的最大参数数量（保守取值）
+MAX_SQL_VARIABLES = 900
+
+# 数据库结构版本，记录在 PRAGMA user_version 中
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    fs_id INTEGER PRIMARY KEY,
+    server_filename TEXT NOT NULL DEFAULT '',
+    path TEXT NOT NULL UNIQUE,
+    size INTEGER NOT NULL DEFAULT 0,
+    category INTEGER NOT NULL DEFAULT 0,
+    isdir INTEGER NOT NULL DEFAULT 0,
+    local_mtime INTEGER NOT NULL DEFAULT 0,
+    server_mtime INTEGER NOT NULL DEFAULT 0,
+    md5 TEXT NOT NULL DEFAULT '',
+    parent TEXT NOT NULL DEFAULT '',
+    indexed_at INTEGER NOT NULL DEFAULT 0,
+    ext TEXT NOT NULL DEFAULT '',
+    added_at INTEGER NOT NULL DEFAULT 0,
+    seq INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE TABLE IF NOT EXISTS tombstones (
+    fs_id INTEGER PRIMARY KEY,
+    seq INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+
+INSERT OR IGNORE INTO meta (key, value) VALUES ('seq', 0);
+"""
+
+# 依赖新增列的索引和触发器，在升级数据库结构后创建
+INDEXES = """
+CREATE INDEX IF NOT EXISTS idx_files_md5_size ON files(md5, size);
+CREATE INDEX IF NOT EXISTS idx_files_parent ON files(parent);
+CREATE INDEX IF NOT EXISTS idx_files_ext ON files(ext);
+CREATE INDEX IF NOT EXISTS idx_files_size ON files(size);
+CREATE INDEX IF NOT EXISTS idx_files_server_mtime ON files(server_mtime);
+CREATE INDEX IF NOT EXISTS idx_files_added_at ON files(added_at);
+CREATE INDEX IF NOT EXISTS idx_files_seq ON files(seq);
+
+CREATE TRIGGER IF NOT EXISTS files_tombstone AFTER DELETE ON files BEGIN
+    INSERT OR REPLACE INTO tombstones (fs_id, seq) VALUES (old.fs_id, (SELECT value FROM meta WHERE key = 'seq'));
+END;
+"""
+
+
+def file_ext(path: str) -> str:
+    """
+    获取小写的文件扩展名
+    
+    Args:
+        path: 文件路径
+        
+    Returns:
+        str: 扩展名（包含点号），没有扩展名时为空字符串
+    """
+    return posixpath.splitext(path)[1].lower()
+
+
+class LibraryIndex:
+    """本地曲库索引（SQLite，WAL模式）"""
+    
+    def __init__(self, db_path: str):
+        """
+        初始化曲库索引
+        
+        Args:
+            db_path: 数据库文件路径
+        """
+        self.db_path = db_path
+        ensure_dir(os.path.dirname(db_path))
+        
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate_schema()
+        self._conn.executescript(INDEXES)
+    
+    def _migrate_schema(self) -> None:
+        """升级旧版本数据库结构"""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        
+        with self._conn:
+            # 版本1：增加扩展名、首次索引时间和变更序号，用于智能播放列表
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(files)")}
+            for column, definition in (('ext', "TEXT NOT NULL DEFAULT ''"),
+                                       ('added_at', "INTEGER NOT NULL DEFAULT 0"),
+                                       ('seq', "INTEGER NOT NULL DEFAULT 0")):
+                if column not in columns:
+                    self._conn.execute(f"ALTER TABLE files ADD COLUMN {column} {definition}")
+            
+            rows = self._conn.execute("SELECT fs_id, path FROM files").fetchall()
+            self._conn.executemany(
+                "UPDATE files SET ext = ?, added_at = indexed_at WHERE fs_id = ?",
+                [(file_ext(row['path']), row['fs_id']) for row in rows]
+            )
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
+    def _next_seq(self) -> int:
+        """
+        在当前事务中递增变更序号
+        
+        Returns:
+            int: 新的变更序号
+        """
+        self._conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'seq'")
+        return self.current_seq()
+    
+    def current_seq(self) -> int:
+        """
+        当前变更序号
+        
+        Returns:
+            int: 变更序号
+        """
+        with self._lock:
+            return self._conn.execute("SELECT value FROM meta WHERE key = 'seq'").fetchone()[0]
+    
+    @classmethod
+    def open_default(cls) -> 'LibraryIndex':
+        """
+        打开配置中的曲库索引
+        
+        Returns:
+            LibraryIndex: 曲库索引
+        """
+        return cls(CONFIG.get("library.index_file", os.path.expanduser("~/.dupan-music/library.db")))
+    
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict:
+        """
+        转换为与API返回格式一致的文件信息
+        
+        Args:
+            row: 查询结果
+            
+        Returns:
+            Dict: 文件信息
+        """
+        return {column: row[column] for column in FILE_COLUMNS + ('ext', 'added_at')}
+    
+    @staticmethod
+    def _file_row(file_info: Dict, indexed_at: int, seq: int) -> tuple:
+        """
+        转换为 files 表的一行
+        
+        Args:
+            file_info: 文件信息
+            indexed_at: 索引时间
+            seq: 变更序号
+            
+        Returns:
+            tuple: 行数据
+        """
+        values = tuple(
+            file_info.get(column) or ('' if column in TEXT_COLUMNS else 0) for column in FILE_COLUMNS
+        )
+        path = file_info['path']
+        return values + (posixpath.dirname(path), indexed_at, file_ext(path), indexed_at, seq)
+    
+    def upsert(self, file_infos: Iterable[Dict]) -> int:
+        """
+        写入或更新文件信息，目录会被忽略
+        
+        同一路径只保留最新的文件：文件被重新上传后，旧的文件ID会被替换。
+        
+        Args:
+            file_infos: API返回的文件信息
+            
+        Returns:
+            int: 写入的数量
+        """
+        file_infos = [
+            file_info for file_info in file_infos
+            if not file_info.get('isdir') and file_info.get('fs_id') and file_info.get('path')
+        ]
+        if not file_infos:
+            return 0
+        
+        columns = FILE_COLUMNS + ('parent', 'indexed_at', 'ext', 'added_at', 'seq')
+        updates = ", ".join(
+            f"{column} = excluded.{column}" for column in columns if column not in ('fs_id', 'added_at')
+        )
+        changed = " OR ".join(f"files.{column} IS NOT excluded.{column}" for column in CONTENT_COLUMNS)
+        
+        now = int(time.time())
+        try:
+            with self._lock, self._conn:
+                seq = self._next_seq()
+                rows = [self._file_row(file_info, now, seq) for file_info in file_infos]
+                
+                # 同一路径的旧文件（已被重新上传替换）先删除
+                self._conn.executemany(
+                    "DELETE FROM files WHERE path = ? AND fs_id != ?",
+                    [(row[2], row[0]) for row in rows]
+                )
+                # 内容未变化的文件不更新变更序号
+                self._conn.executemany(
+                    f"INSERT INTO files ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))}) "
+                    f"ON CONFLICT(fs_id) DO UPDATE SET {updates} WHERE {changed}",
+                    rows
+                )
+        except sqlite3.Error as e:
+            logger.error(f"更新曲库索引失败: {str(e)}")
+            return 0
+        return len(rows)
+    
+    def remove(self, fs_ids: Iterable[int]) -> int:
+        """
+        删除已失效的文件
+        
+        Args:
+            fs_ids: 文件ID
+            
+        Returns:
+            int: 删除的数量
+        """
+        fs_ids = list(set(fs_ids))
+        removed = 0
+        if not fs_ids:
+            return removed
+        
+        try:
+            with self._lock, self._conn:
+                self._next_seq()
+                for i in range(0, len(fs_ids), MAX_SQL_VARIABLES):
+                    chunk = fs_ids[i:i + MAX_SQL_VARIABLES]
+                    cursor = self._conn.execute(
+                        f"DELETE FROM files WHERE fs_id IN ({', '.join('?' * len(chunk))})", chunk
+                    )
+                    removed += cursor.rowcount
+        except sqlite3.Error as e:
+            logger.error(f"更新曲库索引失败: {str(e)}")
+        return removed
+    
+    def get(self, fs_id: int) -> Optional[Dict]:
+        """
+        按文件ID查找
+        
+        Args:
+            fs_id: 文件ID
+            
+        Returns:
+            Optional[Dict]: 文件信息
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM files WHERE fs_id = ?", (fs_id,)).fetchone()
+        return self._to_dict(row) if row else None
+    
+    def find_by_path(self, path: str) -> Optional[Dict]:
+        """
+        按路径查找
+        
+        Args:
+            path: 文件路径
+            
+        Returns:
+            Optional[Dict]: 文件信息
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM files WHERE path = ?", (path,)).fetchone()
+        return self._to_dict(row) if row else None
+    
+    def find_by_paths(self, paths: Iterable[str]) -> Dict[str, Dict]:
+        """
+        按路径批量查找
+        
+        Args:
+            paths: 文件路径
+            
+        Returns:
+            Dict[str, Dict]: 路径 -> 文件信息，不存在的路径不包含在内
+        """
+        paths = list(paths)
+        rows = []
+        with self._lock:
+            for i in range(0, len(paths), MAX_SQL_VARIABLES):
+                chunk = paths[i:i + MAX_SQL_VARIABLES]
+                rows.extend(self._conn.execute(
+                    f"SELECT * FROM files WHERE path IN ({', '.join('?' * len(chunk))})", chunk
+                ))
+        return {row['path']: self._to_dict(row) for row in rows}
+    
+    def find_by_md5(self, md5: str, size: int) -> List[Dict]:
+        """
+        按MD5和大小查找内容相同的文件
+        
+        Args:
+            md5: 文件MD5
+            size: 文件大小
+            
+        Returns:
+            List[Dict]: 文件信息列表，最近修改的在前
+        """
+        if not md5:
+            return []
+        
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM files WHERE md5 = ? AND size = ? ORDER BY server_mtime DESC", (md5, size)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+    
+    def list_dir(self, parent: str) -> List[Dict]:
+        """
+        列出目录下已索引的文件
+        
+        Args:
+            parent: 目录路径
+            
+        Returns:
+            List[Dict]: 文件信息列表
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM files WHERE parent = ? ORDER BY server_filename", (parent,)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+    
+    def get_many(self, fs_ids: Iterable[int]) -> List[Dict]:
+        """
+        按文件ID批量查找
+        
+        Args:
+            fs_ids: 文件ID
+            
+        Returns:
+            List[Dict]: 文件信息列表，顺序与查询结果一致，不存在的文件不包含在内
+        """
+        fs_ids = list(fs_ids)
+        rows = []
+        with self._lock:
+            for i in range(0, len(fs_ids), MAX_SQL_VARIABLES):
+                chunk = fs_ids[i:i + MAX_SQL_VARIABLES]
+                rows.extend(self._conn.execute(
+                    f"SELECT * FROM files WHERE fs_id IN ({', '.join('?' * len(chunk))})", chunk
+                ))
+        return [self._to_dict(row) for row in rows]
+    
+    def select(self, where: str = "1", params: Iterable = ()) -> List[Dict]:
+        """
+        按条件查找文件
+        
+        Args:
+            where: SQL条件（只能使用 files 表的列）
+            params: 条件参数
+            
+        Returns:
+            List[Dict]: 文件信息列表，按路径排序
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT * FROM files WHERE {where} ORDER BY path", tuple(params)
+            ).fetchall()
+        return [self._to_dict(row) for row in rows]
+    
+    def changes_since(self, seq: int) -> Tuple[List[Dict], List[int]]:
+        """
+        获取指定变更序号之后新增或修改的文件，以及删除的文件
+        
+        Args:
+            seq: 变更序号
+            
+        Returns:
+            Tuple[List[Dict], List[int]]: 新增或修改的文件信息、删除的文件ID
+        """
+        with self._lock:
+            changed = self._conn.execute("SELECT * FROM files WHERE seq > ?", (seq,)).fetchall()
+            deleted = self._conn.execute("SELECT fs_id FROM tombstones WHERE seq > ?", (seq,)).fetchall()
+        return [self._to_dict(row) for row in changed], [row[0] for row in deleted]
+    
+    def count(self) -> int:
+        """
+        已索引的文件数
+        
+        Returns:
+            int: 文件数
+        """
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+    
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,253 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+失效文件重新定位
+
+文件在网盘中被移动或重新上传后文件ID会改变，原ID无法再查到文件。按播放列表项
+记录的路径、MD5和大小，先在本地曲库索引中查找候选文件并批量确认其有效，找不到的
+再列出原所在目录进行匹配。
+
+导入外部播放列表时也用同样的方式把网盘路径批量转换为文件信息。
+"""
+
+import posixpath
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional
+
+from dupan_music.library.index import LibraryIndex
+from dupan_music.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class FileResolver:
+    """失效文件定位器"""
+    
+    # 同时在途的最大目录列表请求数
+    MAX_WORKERS = 4
+    
+    # 单个目录最多列出的文件数
+    LIST_LIMIT = 1000
+    
+    def __init__(self, api, index: Optional[LibraryIndex] = None,
+                 lookup: Optional[Callable[[Iterable[int]], Dict[int, Dict]]] = None,
+                 max_workers: int = MAX_WORKERS):
+        """
+        初始化定位器
+        
+        Args:
+            api: 百度网盘API实例
+            index: 曲库索引，为 None 时只按目录列表查找
+            lookup: 批量查询文件信息的函数，返回文件ID -> 文件信息，为 None 时直接调用API
+            max_workers: 并发请求数
+        """
+        self.api = api
+        self.index = index
+        self.lookup = lookup or self._lookup
+        self.max_workers = max(1, max_workers)
+    
+    def _lookup(self, fs_ids: Iterable[int]) -> Dict[int, Dict]:
+        """
+        查询文件信息
+        
+        Args:
+            fs_ids: 文件ID
+            
+        Returns:
+            Dict[int, Dict]: 文件ID -> 文件信息
+        """
+        fs_ids = list(fs_ids)
+        batch_size = self.api.FILEMETAS_MAX_IDS
+        found = {}
+        for i in range(0, len(fs_ids), batch_size):
+            try:
+                for file_info in self.api.get_file_info(fs_ids[i:i + batch_size]):
+                    found[file_info.get('fs_id')] = file_info
+            except Exception as e:
+                logger.error(f"批量获取文件信息失败: {str(e)}")
+        return found
+    
+    @staticmethod
+    def _matches(item, file_info: Dict) -> bool:
+        """
+        判断文件是否就是播放列表项原来的文件
+        
+        Args:
+            item: 播放列表项
+            file_info: 文件信息
+            
+        Returns:
+            bool: 是否匹配
+        """
+        if file_info.get('isdir'):
+            return False
+        if file_info.get('path') == item.path:
+            return True
+        return bool(item.md5) and file_info.get('md5') == item.md5 and file_info.get('size') == item.size
+    
+    def resolve(self, items: Iterable) -> Dict[int, Dict]:
+        """
+        为失效的播放列表项查找新的文件
+        
+        Args:
+            items: 已失效的播放列表项
+            
+        Returns:
+            Dict[int, Dict]: 原文件ID -> 新的文件信息，找不到的不包含在内
+        """
+        items = {item.fs_id: item for item in items}
+        resolved: Dict[int, Dict] = {}
+        if not items:
+            return resolved
+        
+        if self.index:
+            resolved.update(self._resolve_by_index(items))
+        
+        remaining = [item for fs_id, item in items.items() if fs_id not in resolved]
+        if remaining:
+            resolved.update(self._resolve_by_listing(remaining))
+        
+        logger.info(f"重新定位失效文件 {len(resolved)}/{len(items)} 个")
+        return resolved
+    
+    def resolve_paths(self, paths: Iterable[str]) -> Dict[str, Dict]:
+        """
+        按网盘路径批量查找文件，先查曲库索引，找不到的再按所在目录列出（每个目录只列一次）
+        
+        索引中查到的文件不再逐个确认，可能已失效的文件可由播放列表验证命令处理。
+        
+        Args:
+            paths: 网盘文件路径
+            
+        Returns:
+            Dict[str, Dict]: 路径 -> 文件信息，找不到的不包含在内
+        """
+        paths = list(dict.fromkeys(path for path in paths if path))
+        resolved: Dict[str, Dict] = {}
+        if not paths:
+            return resolved
+        
+        if self.index:
+            resolved.update(self.index.find_by_paths(paths))
+        
+        remaining = [path for path in paths if path not in resolved]
+        if remaining and self.api:
+            resolved.update(self._list_paths(remaining))
+        
+        logger.info(f"按路径找到文件 {len(resolved)}/{len(paths)} 个")
+        return resolved
+    
+    def _list_paths(self, paths: List[str]) -> Dict[str, Dict]:
+        """
+        列出路径所在目录（完整分页列出，每个目录只列一次）并按路径匹配
+        
+        Args:
+            paths: 网盘文件路径
+            
+        Returns:
+            Dict[str, Dict]: 路径 -> 文件信息
+        """
+        by_dir: Dict[str, set] = {}
+        for path in paths:
+            by_dir.setdefault(posixpath.dirname(path), set()).add(path)
+        
+        def list_dir(dir_path: str) -> List[Dict]:
+            return [file_info for page in self.api.iter_file_list(dir_path) for file_info in page]
+        
+        resolved = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(by_dir))) as executor:
+            futures = {executor.submit(list_dir, dir_path): dir_path for dir_path in by_dir}
+            for future in as_completed(futures):
+                dir_path = futures[future]
+                try:
+                    files = future.result()
+                except Exception as e:
+                    logger.debug(f"列出目录 {dir_path} 失败: {str(e)}")
+                    continue
+                
+                if self.index:
+                    self.index.upsert(files)
+                
+                wanted = by_dir[dir_path]
+                for file_info in files:
+                    if file_info.get('path') in wanted and not file_info.get('isdir'):
+                        resolved[file_info['path']] = file_info
+        return resolved
+    
+    def _resolve_by_index(self, items: Dict[int, object]) -> Dict[int, Dict]:
+        """
+        在曲库索引中按路径、MD5和大小查找，并确认候选文件仍然有效
+        
+        Args:
+            items: 原文件ID -> 播放列表项
+            
+        Returns:
+            Dict[int, Dict]: 原文件ID -> 新的文件信息
+        """
+        candidates: Dict[int, List[int]] = {}
+        for fs_id, item in items.items():
+            found = []
+            by_path = self.index.find_by_path(item.path) if item.path else None
+            if by_path:
+                found.append(by_path['fs_id'])
+            found.extend(file_info['fs_id'] for file_info in self.index.find_by_md5(item.md5, item.size))
+            candidates[fs_id] = [candidate for candidate in dict.fromkeys(found) if candidate not in items]
+        
+        candidate_ids = {candidate for found in candidates.values() for candidate in found}
+        live = self.lookup(candidate_ids) if candidate_ids else {}
+        
+        # 索引中已失效的文件一并清理
+        self.index.remove((candidate_ids - live.keys()) | items.keys())
+        self.index.upsert(live.values())
+        
+        resolved = {}
+        for fs_id, found in candidates.items():
+            for candidate in found:
+                file_info = live.get(candidate)
+                if file_info and self._matches(items[fs_id], file_info):
+                    resolved[fs_id] = file_info
+                    break
+        return resolved
+    
+    def _resolve_by_listing(self, items: List) -> Dict[int, Dict]:
+        """
+        列出原所在目录（每个目录只列一次）并匹配
+        
+        Args:
+            items: 播放列表项
+            
+        Returns:
+            Dict[int, Dict]: 原文件ID -> 新的文件信息
+        """
+        by_dir: Dict[str, List] = {}
+        for item in items:
+            if item.path:
+                by_dir.setdefault(posixpath.dirname(item.path), []).append(item)
+        if not by_dir:
+            return {}
+        
+        resolved = {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(by_dir))) as executor:
+            futures = {
+                executor.submit(self.api.get_file_list, dir_path, limit=self.LIST_LIMIT): dir_path
+                for dir_path in by_dir
+            }
+            for future in as_completed(futures):
+                dir_path = futures[future]
+                try:
+                    files = future.result()
+                except Exception as e:
+                    # 目录本身可能已被移动或删除
+                    logger.debug(f"列出目录 {dir_path} 失败: {str(e)}")
+                    continue
+                
+                if self.index:
+                    self.index.upsert(files)
+                
+                for item in by_dir[dir_path]:
+                    for file_info in files:
+                        if file_info.get('fs_id') != item.fs_id and self._matches(item, file_info):
+                            resolved[item.fs_id] = file_info
+                            break
+        return resolved
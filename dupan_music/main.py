@@ -6,40 +6,44 @@
 """
 
 import click
-from rich.console import Console
-from rich.panel import Panel
 
 from dupan_music import __version__
-from dupan_music.auth.cli import auth
-from dupan_music.api.cli import api
-from dupan_music.playlist.cli import playlist
-from dupan_music.player.cli import player
-from dupan_music.shell.cli import shell
+from dupan_music.utils.lazy_group import LazyGroup, load_command
 from dupan_music.utils.logger import LOGGER
 
+# 子命令 -> ("模块:对象", 简短说明)，调用时才导入对应模块
+SUBCOMMANDS = {
+    'auth': ('dupan_music.auth.cli:auth', '认证相关命令'),
+    'api': ('dupan_music.api.cli:api', '百度网盘API命令'),
+    'playlist': ('dupan_music.playlist.cli:playlist', '播放列表命令'),
+    'player': ('dupan_music.player.cli:player', '播放器命令'),
+    'stats': ('dupan_music.history.cli:stats', '播放统计命令'),
+    'library': ('dupan_music.library.cli:library', '本地曲库命令'),
+    'shell': ('dupan_music.shell.cli:shell', '启动交互式命令行界面'),
+}
 
-console = Console()
 
+def __getattr__(name: str):
+    # 兼容按模块属性访问子命令（如 dupan_music.main.auth），访问时才导入
+    if name in SUBCOMMANDS:
+        return load_command(SUBCOMMANDS[name][0])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-@click.group()
+
+@click.group(cls=LazyGroup, lazy_commands=SUBCOMMANDS)
 @click.version_option(version=__version__, prog_name="dupan-music")
 def main():
     """百度盘音乐命令行播放器"""
     pass
 
 
-# 添加子命令
-main.add_command(auth)
-main.add_command(api)
-main.add_command(playlist)
-main.add_command(player)
-main.add_command(shell)
-
-
 @main.command("version")
 def version():
     """显示版本信息"""
-    console.print(Panel(f"百度盘音乐命令行播放器 v{__version__}"))
+    from rich.console import Console
+    from rich.panel import Panel
+    
+    Console().print(Panel(f"百度盘音乐命令行播放器 v{__version__}"))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,440 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+局域网广播
+
+在播放器守护进程的事件循环中提供HTTP流，把正在播放的歌曲同时发送给局域网内的
+多个听众（GET /stream）。所有听众共用播放器已下载的临时文件：歌曲开始播放时打开
+一次，之后用 sendfile 从同一个文件描述符按各自的偏移发送，网盘始终只下载一份。
+
+发送进度跟随播放进度：听众最多领先当前播放位置 burst 字节；落后超过 max_lag 字节
+或发送超时的慢速听众会被断开，不会拖慢其他听众。MP3、AAC 可以从任意位置解码，
+新听众从当前播放位置开始收听，其他格式从歌曲开头发送。歌曲切换时，格式相同则在
+同一个连接中继续发送下一首，否则结束响应，由客户端重新连接。
+"""
+
+import os
+import asyncio
+import posixpath
+from typing import Any, Awaitable, Dict, Optional, Set, Tuple
+
+from dupan_music.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 各格式的 Content-Type
+CONTENT_TYPES = {
+    '.mp3': 'audio/mpeg',
+    '.aac': 'audio/aac',
+    '.flac': 'audio/flac',
+    '.ogg': 'audio/ogg',
+    '.opus': 'audio/ogg',
+    '.wav': 'audio/wav',
+    '.m4a': 'audio/mp4',
+    '.wma': 'audio/x-ms-wma',
+    '.aiff': 'audio/aiff',
+    '.ape': 'audio/ape',
+}
+
+# 可以从任意位置开始解码的格式
+SYNC_FORMATS = ('.mp3', '.aac')
+
+# 听众最多领先播放位置的字节数
+DEFAULT_BURST = 512 * 1024
+
+# 听众落后播放位置超过该字节数时断开
+DEFAULT_MAX_LAG = 4 * 1024 * 1024
+
+# 单次发送的最大字节数
+SEND_CHUNK = 256 * 1024
+
+# 单次发送的超时时间（秒）
+SEND_TIMEOUT = 10.0
+
+# 更新播放位置的间隔（秒）
+TICK_INTERVAL = 0.5
+
+
+class SlowListener(Exception):
+    """听众接收过慢（落后播放位置过多或发送超时）"""
+
+
+class Track:
+    """正在广播的歌曲，持有临时文件的只读句柄，删除临时文件后仍可读取"""
+    
+    def __init__(self, path: str, name: str):
+        """
+        打开临时文件
+        
+        Args:
+            path: 临时文件路径
+            name: 歌曲文件名
+            
+        Raises:
+            OSError: 打开文件失败
+        """
+        self.path = path
+        self.name = name
+        self.file = open(path, 'rb')
+        self.size = os.fstat(self.file.fileno()).st_size
+        
+        ext = posixpath.splitext(name)[1].lower()
+        self.content_type = CONTENT_TYPES.get(ext, 'application/octet-stream')
+        self.syncable = ext in SYNC_FORMATS
+        
+        # 正在发送该歌曲的听众数
+        self.users = 0
+        self.current = True
+    
+    def release(self) -> None:
+        """不再是当前歌曲或听众离开时调用，没有听众时关闭文件"""
+        if not self.current and self.users == 0 and not self.file.closed:
+            self.file.close()
+
+
+class Broadcaster:
+    """局域网HTTP广播，作为播放器守护进程的前端运行"""
+    
+    def __init__(self, host: str = "0.0.0.0", port: int = 8000, burst: int = DEFAULT_BURST,
+                 max_lag: int = DEFAULT_MAX_LAG, use_sendfile: bool = True):
+        """
+        初始化广播
+        
+        Args:
+            host: 监听地址
+            port: 监听端口，0 表示自动选择
+            burst: 听众最多领先播放位置的字节数
+            max_lag: 听众落后播放位置超过该字节数时断开
+            use_sendfile: 是否使用 sendfile，为 False 时读取文件后写入
+        """
+        self.host = host
+        self.port = port
+        self.burst = burst
+        self.max_lag = max_lag
+        self.use_sendfile = use_sendfile
+        
+        self.daemon = None
+        self.track: Optional[Track] = None
+        # 当前歌曲已播放到的字节位置
+        self.live_offset = 0
+        
+        # 统计
+        self.bytes_sent = 0
+        self.dropped = 0
+        
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Set[asyncio.StreamWriter] = set()
+        self._listeners: Set[asyncio.StreamWriter] = set()
+        self._tasks: Set[asyncio.Task] = set()
+        self._closing = False
+        self._ticker: Optional[asyncio.Task] = None
+        self._changed = asyncio.Event()
+    
+    @property
+    def listeners(self) -> int:
+        """当前听众数"""
+        return len(self._listeners)
+    
+    async def start(self, daemon) -> None:
+        """
+        开始监听
+        
+        Args:
+            daemon: 播放器守护进程（PlayerDaemon）
+        """
+        self.daemon = daemon
+        self._loop = asyncio.get_running_loop()
+        self._closing = False
+        self._changed = asyncio.Event()
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        if not self.port:
+            self.port = self._server.sockets[0].getsockname()[1]
+        
+        # 在播放器线程中打开临时文件，此时文件一定存在，之后再删除也不影响读取
+        daemon.chain_callback('on_play_callback', lambda *args: self._on_play())
+        daemon.chain_callback('on_stop_callback', lambda *args: self._publish(None))
+        await daemon.run_in_player(self._on_play)
+        
+        self._ticker = asyncio.ensure_future(self._tick())
+        logger.info(f"局域网广播已启动: http://{self.host}:{self.port}/stream")
+    
+    async def close(self) -> None:
+        """停止监听并断开所有听众"""
+        if self._ticker is not None:
+            self._ticker.cancel()
+        if self._server is not None:
+            self._server.close()
+        # 唤醒等待播放进度的听众，关闭连接使读取和发送结束
+        self._closing = True
+        self._wake()
+        for writer in list(self._connections):
+            writer.close()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+        self._set_track(None)
+    
+    def _on_play(self) -> None:
+        """播放或恢复播放时调用（播放器线程），歌曲变化时打开新的临时文件"""
+        player = self.daemon.player
+        path, item = player.temp_file, player.current_item
+        if not player.is_playing or not path or item is None:
+            return
+        track = self.track
+        if track is not None and track.path == path:
+            return
+        try:
+            self._publish(Track(path, item.server_filename))
+        except OSError as e:
+            logger.error(f"打开广播文件失败: {e}")
+    
+    def _publish(self, track: Optional[Track]) -> None:
+        """从播放器线程发布当前歌曲"""
+        try:
+            self._loop.call_soon_threadsafe(self._set_track, track)
+        except RuntimeError:
+            # 事件循环已关闭
+            if track is not None:
+                track.current = False
+                track.release()
+    
+    def _set_track(self, track: Optional[Track]) -> None:
+        """更换当前歌曲（事件循环中）"""
+        previous = self.track
+        if previous is track:
+            return
+        self.track = track
+        self.live_offset = 0
+        if previous is not None:
+            previous.current = False
+            previous.release()
+        self._wake()
+    
+    def _wake(self) -> None:
+        """唤醒等待中的听众"""
+        self._changed.set()
+        self._changed = asyncio.Event()
+    
+    async def _tick(self) -> None:
+        """定期在播放器线程中读取播放进度，换算为当前歌曲的字节位置"""
+        player = self.daemon.player
+        
+        def progress() -> Tuple[int, int]:
+            return player.get_time(), player.get_length()
+        
+        while True:
+            await asyncio.sleep(TICK_INTERVAL)
+            track = self.track
+            if track is None or not self._listeners:
+                continue
+            elapsed, length = await self.daemon.run_in_player(progress)
+            if track is not self.track:
+                continue
+            if length > 0:
+                offset = int(track.size * min(max(elapsed, 0) / length, 1.0))
+            else:
+                offset = track.size
+            # 播放位置只前进；跳转后由慢速听众检查处理
+            if offset > self.live_offset:
+                self.live_offset = offset
+                self._wake()
+    
+    async def _read_request(self, reader: asyncio.StreamReader) -> Tuple[str, str]:
+        """
+        读取HTTP请求
+        
+        Returns:
+            Tuple[str, str]: 请求方法和路径
+        """
+        request_line = await asyncio.wait_for(reader.readline(), SEND_TIMEOUT)
+        while True:
+            line = await asyncio.wait_for(reader.readline(), SEND_TIMEOUT)
+            if line in (b'\r\n', b'\n', b''):
+                break
+        parts = request_line.decode('latin-1').split()
+        if len(parts) < 2:
+            return '', ''
+        return parts[0].upper(), parts[1].split('?', 1)[0]
+    
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        处理一个HTTP连接
+        
+        Args:
+            reader: 读取流
+            writer: 写入流
+        """
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        self._connections.add(writer)
+        peer = writer.get_extra_info('peername')
+        try:
+            method, path = await self._read_request(reader)
+            if method not in ('GET', 'HEAD') or path not in ('/', '/stream'):
+                writer.write(b"HTTP/1.0 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+                await writer.drain()
+                return
+            
+            # 等待开始播放
+            while self.track is None and not self._closing:
+                await self._changed.wait()
+            if self._closing:
+                return
+            
+            writer.write(self._headers(self.track).encode('latin-1'))
+            await writer.drain()
+            if method == 'HEAD':
+                return
+            
+            self._listeners.add(writer)
+            logger.info(f"广播听众已连接: {peer}，当前 {self.listeners} 人")
+            await self._stream(writer)
+        except SlowListener as e:
+            self.dropped += 1
+            logger.warning(f"广播听众接收过慢，断开连接: {peer}: {e}")
+        except (ConnectionError, asyncio.TimeoutError, RuntimeError) as e:
+            logger.debug(f"广播听众断开: {peer}: {e!r}")
+        finally:
+            if writer in self._listeners:
+                self._listeners.discard(writer)
+                logger.info(f"广播听众已断开: {peer}，当前 {self.listeners} 人")
+            self._connections.discard(writer)
+            self._tasks.discard(task)
+            writer.close()
+    
+    @staticmethod
+    def _headers(track: Track) -> str:
+        """响应头"""
+        return (
+            "HTTP/1.0 200 OK\r\n"
+            f"Content-Type: {track.content_type}\r\n"
+            "Cache-Control: no-cache\r\n"
+            "Connection: close\r\n"
+            "icy-name: dupan-music\r\n"
+            "\r\n"
+        )
+    
+    async def _stream(self, writer: asyncio.StreamWriter) -> None:
+        """
+        持续发送当前歌曲，直到格式变化、连接断开或听众落后过多
+        
+        Args:
+            writer: 写入流
+        """
+        while self.track is None and not self._closing:
+            await self._changed.wait()
+        if self._closing:
+            return
+        track = self.track
+        offset = self.live_offset if track.syncable else 0
+        track.users += 1
+        try:
+            while not self._closing:
+                changed = self._changed
+                
+                if track is not self.track:
+                    if offset < track.size:
+                        # 已切换歌曲，发完上一首剩余的部分
+                        offset += await self._send(writer, track, offset, track.size - offset)
+                        continue
+                    if self.track is None:
+                        await changed.wait()
+                        continue
+                    if self.track.content_type != track.content_type:
+                        return
+                    track.users -= 1
+                    track.release()
+                    track, offset = self.track, 0
+                    track.users += 1
+                    continue
+                
+                if self.live_offset - offset > self.max_lag:
+                    raise SlowListener("落后播放位置过多")
+                
+                limit = min(track.size, self.live_offset + self.burst)
+                if offset < limit:
+                    offset += await self._send(writer, track, offset, limit - offset)
+                else:
+                    await changed.wait()
+        finally:
+            track.users -= 1
+            track.release()
+    
+    async def _send(self, writer: asyncio.StreamWriter, track: Track, offset: int, count: int) -> int:
+        """
+        从文件的指定位置发送数据，客户端接收缓慢时等待
+        
+        Args:
+            writer: 写入流
+            track: 歌曲
+            offset: 文件偏移
+            count: 最多发送的字节数
+            
+        Returns:
+            int: 已发送的字节数
+            
+        Raises:
+            SlowListener: 等待期间落后播放位置过多或发送超时
+        """
+        count = min(count, SEND_CHUNK)
+        if self.use_sendfile:
+            try:
+                sent = await self._wait_sent(
+                    self._loop.sendfile(writer.transport, track.file, offset, count, fallback=False),
+                    track, offset
+                )
+                self.bytes_sent += sent
+                return sent
+            except (asyncio.SendfileNotAvailableError, NotImplementedError):
+                # 当前传输不支持 sendfile，改为读取后写入
+                self.use_sendfile = False
+        
+        # os.pread 按偏移读取，多个听众共用文件句柄也不会互相影响
+        data = os.pread(track.file.fileno(), count, offset)
+        if not data:
+            raise ConnectionError("文件已截断")
+        writer.write(data)
+        await self._wait_sent(writer.drain(), track, offset)
+        self.bytes_sent += len(data)
+        return len(data)
+    
+    async def _wait_sent(self, send: Awaitable, track: Track, offset: int) -> Any:
+        """
+        等待发送完成，期间定期检查听众是否落后过多
+        
+        Args:
+            send: 发送操作
+            track: 歌曲
+            offset: 本次发送的起始偏移
+            
+        Returns:
+            Any: 发送操作的结果
+        """
+        send = asyncio.ensure_future(send)
+        deadline = self._loop.time() + SEND_TIMEOUT
+        try:
+            while True:
+                done, _ = await asyncio.wait({send}, timeout=TICK_INTERVAL)
+                if done:
+                    return send.result()
+                if self._closing:
+                    raise ConnectionError("广播已停止")
+                if track is self.track and self.live_offset - offset > self.max_lag:
+                    raise SlowListener("落后播放位置过多")
+                if self._loop.time() > deadline:
+                    raise SlowListener("发送超时")
+        finally:
+            if not send.done():
+                send.cancel()
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        广播统计
+        
+        Returns:
+            Dict[str, int]: 听众数、已发送字节数、因落后断开的听众数
+        """
+        return {"listeners": self.listeners, "bytes_sent": self.bytes_sent, "dropped": self.dropped}
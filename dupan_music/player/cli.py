@@ -18,7 +18,9 @@ from rich.prompt import Prompt, Confirm
 from rich import box
 
 from dupan_music.player.player import AudioPlayer
+from dupan_music.player.ipc import DaemonNotRunning, PlayerClient, PlayerIPCError
 from dupan_music.playlist.playlist import PlaylistManager, Playlist, PlaylistItem
+from dupan_music.playlist.folder import loaded_length, peek_length
 from dupan_music.api.api import BaiduPanAPI
 from dupan_music.auth.auth import BaiduPanAuth
 from dupan_music.utils.logger import get_logger
@@ -43,6 +45,52 @@ def get_player() -> AudioPlayer:
         console.print(f"[red]初始化播放器失败: {str(e)}[/red]")
         sys.exit(1)
 
+_client: Optional[PlayerClient] = None
+
+def get_client() -> PlayerClient:
+    """获取播放器守护进程客户端（交互式shell中的多条命令复用同一连接）"""
+    global _client
+    if _client is None:
+        _client = PlayerClient()
+    return _client
+
+def daemon_request(command: str, **args) -> Optional[Dict]:
+    """
+    向播放器守护进程发送命令，失败时显示错误
+    
+    Args:
+        command: 命令名称
+        **args: 命令参数
+        
+    Returns:
+        Optional[Dict]: 命令结果，失败时为 None
+    """
+    try:
+        return get_client().request(command, **args)
+    except DaemonNotRunning:
+        console.print("[yellow]播放器守护进程未运行，请先运行 'dupan-music player daemon start' "
+                      "或使用 'dupan-music player play <播放列表> --background' 在后台播放[/yellow]")
+    except PlayerIPCError as e:
+        console.print(f"[red]{e}[/red]")
+    return None
+
+def serve_controls(audio_player: AudioPlayer):
+    """
+    前台播放时在控制套接字上接受其他终端的控制命令
+    
+    Args:
+        audio_player: 播放器实例
+        
+    Returns:
+        Optional[PlayerDaemon]: 控制服务，套接字已被守护进程占用时为 None
+    """
+    from dupan_music.player.daemon import PlayerDaemon
+    try:
+        return PlayerDaemon(audio_player).start_in_thread()
+    except PlayerIPCError as e:
+        logger.debug(f"未启动播放器控制服务: {e}")
+        return None
+
 @click.group()
 def player():
     """播放器命令"""
@@ -52,8 +100,13 @@ def player():
 @click.argument('playlist_name')
 @click.option('--index', '-i', type=int, default=0, help='播放索引')
 @click.option('--mode', '-m', type=click.Choice(['sequential', 'loop', 'random']), default=None, help='播放模式 (sequential: 顺序播放, loop: 循环播放, random: 随机播放)')
-def play_playlist(playlist_name, index, mode):
+@click.option('--background', '-b', is_flag=True, help='交给播放器守护进程在后台播放（未运行时自动启动）')
+def play_playlist(playlist_name, index, mode, background):
     """播放指定播放列表"""
+    if background:
+        play_in_background(playlist_name, index, mode)
+        return
+    
     # 获取播放器实例
     audio_player = get_player()
     
@@ -74,8 +127,8 @@ def play_playlist(playlist_name, index, mode):
         console.print(f"[yellow]播放列表 '{playlist_name}' 为空[/yellow]")
         return
     
-    # 检查索引是否有效
-    if index < 0 or index >= len(playlist.items):
+    # 检查索引是否有效（目录播放列表只列出到该位置）
+    if index < 0 or index >= peek_length(playlist.items, index):
         console.print(f"[red]无效的播放索引: {index}[/red]")
         return
     
@@ -93,11 +146,12 @@ def play_playlist(playlist_name, index, mode):
         }
         console.print(f"[green]已设置播放模式: {mode_names.get(mode, mode)}[/green]")
         
-        # 如果是随机播放模式，则随机选择一个索引
-        if mode.upper() == "RANDOM" and len(playlist.items) > 1:
+        # 如果是随机播放模式，则从已列出的歌曲中随机选择一个索引
+        loaded = loaded_length(playlist.items)
+        if mode.upper() == "RANDOM" and loaded > 1:
             import random
             original_index = index
-            index = random.randint(0, len(playlist.items) - 1)
+            index = random.randint(0, loaded - 1)
             console.print(f"[green]随机播放模式，从索引 {original_index+1} 随机选择到索引: {index+1}[/green]")
     
     # 显示播放列表信息
@@ -111,7 +165,10 @@ def play_playlist(playlist_name, index, mode):
     table.add_column("路径", style="blue")
     table.add_column("大小", justify="right")
     
-    for i, item in enumerate(playlist.items):
+    # 只显示已列出的歌曲，目录播放列表的其余部分在播放时列出
+    items = playlist.items
+    for i in range(loaded_length(items)):
+        item = items[i]
         file_name = item.server_filename
         file_path = item.path
         file_size = format_size(item.size)
@@ -126,6 +183,8 @@ def play_playlist(playlist_name, index, mode):
             table.add_row(str(i+1), file_name, file_path, file_size)
     
     console.print(table)
+    if not getattr(items, 'exhausted', True):
+        console.print("[dim]目录中的其余歌曲在播放时列出[/dim]")
     
     # 开始播放
     console.print(f"[cyan]正在播放: {playlist.items[index].server_filename}[/cyan]")
@@ -206,6 +265,9 @@ def play_playlist(playlist_name, index, mode):
     # 显示播放控制提示
     display_controls()
     
+    # 播放期间其他终端的 pause/next 等命令可以控制本播放器
+    controls = serve_controls(audio_player)
+    
     # 显示进度条
     with Progress(
         TextColumn("[bold blue]{task.fields[status]}"),
@@ -219,7 +281,8 @@ def play_playlist(playlist_name, index, mode):
                                 status=f"播放中 - {playlist.items[index].server_filename}")
         
         try:
-            while audio_player.is_playing:
+            # 切换歌曲的命令在后台执行，下载期间 is_playing 为 False
+            while audio_player.is_playing or audio_player.is_busy:
                 # 更新进度
                 current_time = audio_player.get_time()
                 total_time = audio_player.get_length()
@@ -290,6 +353,30 @@ def play_playlist(playlist_name, index, mode):
         except KeyboardInterrupt:
             audio_player.stop()
             console.print("[yellow]已退出播放[/yellow]")
+        finally:
+            if controls:
+                controls.stop()
+
+def play_in_background(playlist_name: str, index: int, mode: Optional[str]) -> None:
+    """
+    交给播放器守护进程播放，守护进程未运行时先启动
+    
+    Args:
+        playlist_name: 播放列表名称
+        index: 播放索引
+        mode: 播放模式
+    """
+    if not get_client().is_running():
+        from dupan_music.player.daemon import spawn_daemon
+        console.print("[yellow]正在启动播放器守护进程...[/yellow]")
+        if spawn_daemon() is None:
+            console.print("[red]启动播放器守护进程失败，请查看日志[/red]")
+            return
+    
+    console.print("[yellow]缓冲中......[/yellow]")
+    status = daemon_request("play", playlist=playlist_name, index=index, mode=mode)
+    if status:
+        console.print(f"[green]正在后台播放: {status['item']['server_filename']}[/green]")
 
 def handle_key_press(key, player):
     """处理按键"""
@@ -300,12 +387,13 @@ def handle_key_press(key, player):
         # 下一曲
         console.clear()
         console.print("[yellow]缓冲中......[/yellow]")
-        player.next()
+        # 不等待下载完成，连续按键时只下载最后一首
+        player.submit('next')
     elif key == 'p':
         # 上一曲
         console.clear()
         console.print("[yellow]缓冲中......[/yellow]")
-        player.prev()
+        player.submit('prev')
     elif key == '+':
         # 增加音量
         current_volume = player.get_volume()
@@ -341,7 +429,7 @@ def handle_key_press(key, player):
         # 退出
         console.clear()
         console.print("[yellow]缓冲中......[/yellow]")
-        player.stop()
+        player.submit('stop')
 
 @player.command("play-file")
 @click.argument('fs_id')
@@ -353,155 +441,87 @@ def play_single_file(fs_id):
 @player.command("pause")
 def pause_playback():
     """暂停/恢复播放"""
-    audio_player = get_player()
-    
-    if not audio_player.is_playing:
-        console.print("[yellow]当前没有播放[/yellow]")
-        return
-    
-    result = audio_player.pause()
-    
+    result = daemon_request("pause")
     if result:
-        status = "恢复" if not audio_player.is_paused else "暂停"
+        status = "暂停" if result["paused"] else "恢复"
         console.print(f"[green]已{status}播放[/green]")
-    else:
-        console.print("[red]操作失败[/red]")
 
 @player.command("stop")
 def stop_playback():
     """停止播放"""
-    audio_player = get_player()
-    
-    if not audio_player.is_playing:
-        console.print("[yellow]当前没有播放[/yellow]")
-        return
-    
-    result = audio_player.stop()
-    
-    if result:
+    if daemon_request("stop"):
         console.print("[green]已停止播放[/green]")
-    else:
-        console.print("[red]停止播放失败[/red]")
 
 @player.command("next")
 def next_track():
     """播放下一曲"""
-    audio_player = get_player()
-    
-    if not audio_player.is_playing:
-        console.print("[yellow]当前没有播放[/yellow]")
-        return
-    
-    console.clear()
     console.print("[yellow]正在切换下一曲...[/yellow]")
-    result = audio_player.next()
-    
-    if result:
-        console.print(f"[green]正在播放下一曲: {audio_player.current_item.server_filename}[/green]")
-    else:
-        console.print("[red]播放下一曲失败[/red]")
+    status = daemon_request("next")
+    if status:
+        console.print(f"[green]正在播放下一曲: {status['item']['server_filename']}[/green]")
 
 @player.command("prev")
 def prev_track():
     """播放上一曲"""
-    audio_player = get_player()
-    
-    if not audio_player.is_playing:
-        console.print("[yellow]当前没有播放[/yellow]")
-        return
-    
-    console.clear()
     console.print("[yellow]正在切换上一曲...[/yellow]")
-    result = audio_player.prev()
-    
-    if result:
-        console.print(f"[green]正在播放上一曲: {audio_player.current_item.server_filename}[/green]")
-    else:
-        console.print("[red]播放上一曲失败[/red]")
+    status = daemon_request("prev")
+    if status:
+        console.print(f"[green]正在播放上一曲: {status['item']['server_filename']}[/green]")
 
 @player.command("volume")
 @click.argument('level', type=int)
 def set_volume(level):
     """设置音量 (0-100)"""
-    audio_player = get_player()
-    
-    if not audio_player.is_playing:
-        console.print("[yellow]当前没有播放[/yellow]")
-        return
-    
-    # 限制音量范围
-    level = max(0, min(100, level))
-    
-    result = audio_player.set_volume(level)
-    
+    result = daemon_request("volume", level=level)
     if result:
-        console.print(f"[green]已设置音量: {level}%[/green]")
-    else:
-        console.print("[red]设置音量失败[/red]")
+        console.print(f"[green]已设置音量: {result['volume']}%[/green]")
 
 @player.command("mode")
 @click.argument('mode', type=click.Choice(['sequential', 'loop', 'random']))
 def set_play_mode(mode):
     """设置播放模式 (sequential: 顺序播放, loop: 循环播放, random: 随机播放)"""
-    audio_player = get_player()
-    
-    if not audio_player.is_playing:
-        console.print("[yellow]当前没有播放，设置的模式将在下次播放时生效[/yellow]")
-    
-    # 设置播放模式
-    mode_enum = getattr(audio_player.PlayMode, mode.upper())
-    audio_player.set_play_mode(mode_enum)
-    
-    # 显示当前播放模式
-    mode_names = {
-        "sequential": "顺序播放",
-        "loop": "循环播放",
-        "random": "随机播放"
-    }
-    console.print(f"[green]已设置播放模式: {mode_names.get(mode, mode)}[/green]")
+    if daemon_request("mode", mode=mode):
+        mode_names = {
+            "sequential": "顺序播放",
+            "loop": "循环播放",
+            "random": "随机播放"
+        }
+        console.print(f"[green]已设置播放模式: {mode_names.get(mode, mode)}[/green]")
 
 @player.command("status")
 def show_status():
     """显示当前播放状态"""
-    audio_player = get_player()
+    status = daemon_request("status", metadata=True)
+    if status is None:
+        return
     
-    if not audio_player.is_playing:
+    if not status["playing"]:
         console.print("[yellow]当前没有播放[/yellow]")
         return
     
     # 获取当前播放信息
-    current_item = audio_player.current_item
+    current_item = status["item"]
     if not current_item:
         console.print("[yellow]没有正在播放的曲目[/yellow]")
         return
     
-    # 获取播放状态
-    status = "暂停中" if audio_player.is_paused else "播放中"
-    current_time = audio_player.get_time()
-    total_time = audio_player.get_length()
-    volume = audio_player.get_volume()
-    position = audio_player.get_position() * 100
-    
     # 获取播放模式
-    play_mode = audio_player.get_play_mode()
     play_mode_display = {
         "sequential": "顺序播放",
         "loop": "循环播放",
         "random": "随机播放"
-    }.get(play_mode, "未知模式")
-    
-    # 获取元数据
-    metadata = audio_player.get_metadata()
+    }.get(status["mode"], "未知模式")
     
-    # 显示播放信息
+    # 显示播放信息（时间单位为毫秒）
     panel = Panel(
-        f"[bold]文件名:[/bold] {current_item.server_filename}\n"
-        f"[bold]路径:[/bold] {current_item.path}\n"
-        f"[bold]大小:[/bold] {format_size(current_item.size)}\n"
-        f"[bold]状态:[/bold] {status}\n"
+        f"[bold]文件名:[/bold] {current_item['server_filename']}\n"
+        f"[bold]路径:[/bold] {current_item['path']}\n"
+        f"[bold]大小:[/bold] {format_size(current_item['size'])}\n"
+        f"[bold]状态:[/bold] {'暂停中' if status['paused'] else '播放中'}\n"
         f"[bold]播放模式:[/bold] {play_mode_display}\n"
-        f"[bold]进度:[/bold] {format_time(current_time)} / {format_time(total_time)} ({position:.1f}%)\n"
-        f"[bold]音量:[/bold] {volume}%",
+        f"[bold]进度:[/bold] {format_time(status['time'] / 1000)} / {format_time(status['length'] / 1000)} "
+        f"({status['position'] * 100:.1f}%)\n"
+        f"[bold]音量:[/bold] {status['volume']}%{' (静音)' if status['muted'] else ''}",
         title="播放状态",
         border_style="cyan"
     )
@@ -509,15 +529,62 @@ def show_status():
     console.print(panel)
     
     # 显示元数据
+    metadata = status.get("metadata")
     if metadata:
         metadata_table = Table(show_header=True, header_style="bold magenta", box=box.ROUNDED)
         metadata_table.add_column("标签", style="cyan")
         metadata_table.add_column("值", style="green")
         
         for key, value in metadata.items():
-            metadata_table.add_row(str(key), str(value))
+            metadata_table.add_row(key, value)
         
         console.print(Panel(metadata_table, title="音频元数据", border_style="cyan"))
 
+@player.group("daemon")
+def daemon():
+    """播放器守护进程"""
+    pass
+
+@daemon.command("start")
+@click.option('--foreground', '-f', is_flag=True, help='在当前进程中运行（不转入后台）')
+@click.option('--mpd-port', type=int, default=None, help='MPD协议服务端口（默认使用配置 player.mpd_port，0 表示不启动）')
+@click.option('--broadcast-port', type=int, default=None, help='局域网广播端口（默认使用配置 player.broadcast_port，0 表示不启动）')
+def start_daemon(foreground, mpd_port, broadcast_port):
+    """启动播放器守护进程"""
+    from dupan_music.player.daemon import run_daemon, spawn_daemon
+    
+    client = get_client()
+    if client.is_running():
+        console.print(f"[yellow]播放器守护进程已在运行: {client.socket_path}[/yellow]")
+        return
+    
+    if foreground:
+        console.print(f"[green]播放器守护进程运行中: {client.socket_path}（Ctrl+C 退出）[/green]")
+        sys.exit(run_daemon(client.socket_path, mpd_port, broadcast_port))
+    
+    pid = spawn_daemon(client.socket_path, mpd_port=mpd_port, broadcast_port=broadcast_port)
+    if pid is None:
+        console.print("[red]启动播放器守护进程失败，请查看日志[/red]")
+        return
+    console.print(f"[green]播放器守护进程已启动 (PID {pid})[/green]")
+
+@daemon.command("stop")
+def stop_daemon():
+    """停止播放器守护进程"""
+    result = daemon_request("shutdown")
+    if result:
+        console.print(f"[green]播放器守护进程已停止 (PID {result['pid']})[/green]")
+
+@daemon.command("status")
+def daemon_status():
+    """显示播放器守护进程状态"""
+    try:
+        info = get_client().request("ping")
+    except PlayerIPCError:
+        console.print("[yellow]播放器守护进程未运行[/yellow]")
+        return
+    console.print(f"[green]播放器守护进程运行中[/green] PID {info['pid']}，"
+                  f"已运行 {format_time(info['uptime'])}，套接字 {get_client().socket_path}")
+
 if __name__ == "__main__":
     player()
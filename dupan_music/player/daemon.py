@@ -0,0 +1,644 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+播放器守护进程
+
+长期运行的进程持有 AudioPlayer（VLC实例、下载的临时文件和播放状态），在 Unix 域
+套接字上接受控制命令（协议见 dupan_music.player.ipc）。命令在工作线程中调用播放器，
+由播放器的命令队列串行执行，套接字的读写由 asyncio 事件循环处理，慢命令（如切换
+歌曲需要下载）不影响其他连接的读写。
+
+播放状态变化时按MPD的子系统名称（player、mixer、options、playlist）通知监听者，
+其他前端（如 MPD 协议服务、局域网广播）运行在同一个事件循环中。
+
+用法:
+    python -m dupan_music.player.daemon [--socket PATH] [--mpd-port PORT] [--broadcast-port PORT]
+"""
+
+import os
+import sys
+import time
+import signal
+import asyncio
+import argparse
+import functools
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+from dupan_music.config.config import CONFIG
+from dupan_music.player.ipc import (
+    MAX_MESSAGE_SIZE, PlayerClient, PlayerIPCError, decode_message, encode_message, get_socket_path
+)
+from dupan_music.playlist.folder import loaded_length, peek_length
+from dupan_music.utils.logger import get_logger
+from dupan_music.utils.file_utils import ensure_dir
+
+logger = get_logger(__name__)
+
+# 播放模式名称
+PLAY_MODES = ('sequential', 'loop', 'random')
+
+
+def create_player():
+    """
+    创建播放器实例
+    
+    Returns:
+        AudioPlayer: 播放器
+        
+    Raises:
+        PlayerIPCError: 未登录
+    """
+    from dupan_music.auth.auth import BaiduPanAuth
+    from dupan_music.api.api import BaiduPanAPI
+    from dupan_music.playlist.playlist import PlaylistManager
+    from dupan_music.player.player import AudioPlayer
+    
+    auth = BaiduPanAuth()
+    if not auth.is_authenticated():
+        raise PlayerIPCError("您尚未登录，请先运行 'dupan-music login' 命令登录")
+    api = BaiduPanAPI(auth)
+    return AudioPlayer(api, PlaylistManager(api))
+
+
+class PlayerDaemon:
+    """在 Unix 域套接字上提供控制命令的播放器服务"""
+    
+    def __init__(self, player, socket_path: Optional[str] = None):
+        """
+        初始化播放器服务
+        
+        Args:
+            player: 播放器（AudioPlayer）
+            socket_path: 套接字路径，为 None 时使用配置中的路径
+        """
+        self.player = player
+        self.socket_path = socket_path or get_socket_path()
+        self.started = time.time()
+        
+        # 播放器自身串行执行命令；多个工作线程使下载期间到达的切换歌曲命令能进入
+        # 播放器的命令队列，取消正在进行的下载并合并执行，状态查询也不必等待下载
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="player")
+        self._commands: Dict[str, Callable] = {
+            name[len('cmd_'):]: getattr(self, name) for name in dir(self) if name.startswith('cmd_')
+        }
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._shutdown_requested = False
+        self._thread: Optional[threading.Thread] = None
+        
+        # 当前连接的处理任务 -> 写入流，停止时关闭连接并等待任务结束
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+        
+        # 状态变化监听者和运行在同一事件循环中的前端
+        self._listeners: List[Callable[[str], None]] = []
+        self._frontends: List[Any] = []
+        
+        # 播放队列（当前播放列表）的版本号，每次更换播放列表时加一
+        self.playlist_version = 1
+        
+        # 播放、暂停、停止和自动切换歌曲都会调用播放器的回调
+        for name in ('on_play_callback', 'on_pause_callback', 'on_stop_callback', 'on_complete_callback'):
+            self.chain_callback(name, lambda *args: self.notify('player'))
+    
+    def chain_callback(self, name: str, hook: Callable) -> None:
+        """
+        在播放器回调之后调用 hook，保留原有的回调。hook 在触发回调的播放器线程中调用
+        
+        Args:
+            name: 回调属性名
+            hook: 以回调参数调用的函数
+        """
+        previous = getattr(self.player, name, None)
+        
+        def callback(*args):
+            if previous:
+                previous(*args)
+            hook(*args)
+        
+        setattr(self.player, name, callback)
+    
+    def add_listener(self, listener: Callable[[str], None]) -> None:
+        """
+        添加状态变化监听者，在事件循环中以子系统名称调用
+        
+        Args:
+            listener: 监听者
+        """
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener: Callable[[str], None]) -> None:
+        """
+        移除状态变化监听者
+        
+        Args:
+            listener: 监听者
+        """
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+    
+    def notify(self, subsystem: str) -> None:
+        """
+        通知状态变化（可在任意线程中调用）
+        
+        Args:
+            subsystem: 子系统名称（player、mixer、options、playlist）
+        """
+        if self._loop is None or self._loop.is_closed():
+            return
+        try:
+            self._loop.call_soon_threadsafe(self._notify, subsystem)
+        except RuntimeError:
+            # 事件循环已关闭
+            pass
+    
+    def _notify(self, subsystem: str) -> None:
+        if subsystem == 'playlist':
+            self.playlist_version += 1
+        for listener in list(self._listeners):
+            listener(subsystem)
+    
+    def add_frontend(self, frontend) -> None:
+        """
+        添加与控制套接字一起运行的前端，需提供 async start(daemon) 和 async close()
+        
+        Args:
+            frontend: 前端
+        """
+        self._frontends.append(frontend)
+    
+    async def run_in_player(self, func: Callable, *args, **kwargs) -> Any:
+        """
+        在工作线程中执行函数
+        
+        Args:
+            func: 函数
+            *args: 位置参数
+            **kwargs: 关键字参数
+            
+        Returns:
+            Any: 函数返回值
+        """
+        return await self._loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+    
+    async def call(self, command: str, **args) -> Any:
+        """
+        执行控制命令
+        
+        Args:
+            command: 命令名称
+            **args: 命令参数
+            
+        Returns:
+            Any: 命令结果
+            
+        Raises:
+            PlayerIPCError: 未知命令或命令执行失败
+        """
+        handler = self._commands.get(command)
+        if handler is None:
+            raise PlayerIPCError(f"未知命令: {command}")
+        return await self.run_in_player(handler, **args)
+    
+    def _prepare_socket(self) -> None:
+        """
+        创建套接字目录并清理残留的套接字文件
+        
+        Raises:
+            PlayerIPCError: 已有守护进程在运行
+        """
+        ensure_dir(os.path.dirname(self.socket_path))
+        if not os.path.exists(self.socket_path):
+            return
+        
+        with PlayerClient(self.socket_path, timeout=1.0) as client:
+            if client.is_running():
+                raise PlayerIPCError(f"播放器守护进程已在运行: {self.socket_path}")
+        
+        # 上次异常退出留下的套接字文件
+        os.remove(self.socket_path)
+    
+    async def serve(self, ready: Optional[threading.Event] = None) -> None:
+        """
+        开始服务，直到收到 shutdown 命令或调用 stop()
+        
+        Args:
+            ready: 开始接受连接后设置的事件
+        """
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._prepare_socket()
+        
+        server = await asyncio.start_unix_server(
+            self._handle_client, path=self.socket_path, limit=MAX_MESSAGE_SIZE
+        )
+        os.chmod(self.socket_path, 0o600)
+        logger.info(f"播放器守护进程已启动: {self.socket_path}")
+        
+        started = []
+        try:
+            for frontend in self._frontends:
+                await frontend.start(self)
+                started.append(frontend)
+            if ready is not None:
+                ready.set()
+            await self._stopped.wait()
+        finally:
+            for frontend in started:
+                await frontend.close()
+            server.close()
+            for writer in self._connections.values():
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await server.wait_closed()
+            try:
+                os.remove(self.socket_path)
+            except OSError:
+                pass
+            self._executor.shutdown(wait=False)
+            logger.info("播放器守护进程已停止")
+    
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        处理一个连接：逐行读取请求并按顺序返回响应
+        
+        Args:
+            reader: 读取流
+            writer: 写入流
+        """
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while not self._stopped.is_set():
+                line = await reader.readline()
+                if not line:
+                    break
+                
+                writer.write(encode_message(await self.dispatch(line)))
+                await writer.drain()
+                
+                if self._shutdown_requested:
+                    self._stopped.set()
+        except (ConnectionError, ValueError) as e:
+            # ValueError: 单行超过 MAX_MESSAGE_SIZE
+            logger.debug(f"控制连接断开: {e}")
+        finally:
+            self._connections.pop(task, None)
+            writer.close()
+    
+    async def dispatch(self, line: bytes) -> Dict[str, Any]:
+        """
+        执行一条请求
+        
+        Args:
+            line: 请求行
+            
+        Returns:
+            Dict[str, Any]: 响应
+        """
+        try:
+            request = decode_message(line)
+            args = request.get("args") or {}
+            if not isinstance(args, dict):
+                raise PlayerIPCError("命令参数必须是JSON对象")
+            
+            result = await self.call(request.get("cmd"), **args)
+            return {"ok": True, "result": result}
+        except PlayerIPCError as e:
+            return {"ok": False, "error": str(e)}
+        except Exception as e:
+            logger.error(f"执行播放器命令失败: {str(e)}")
+            return {"ok": False, "error": str(e)}
+    
+    def stop(self) -> None:
+        """停止服务（可在其他线程中调用）"""
+        if self._loop is not None and self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+            self._thread = None
+    
+    def run(self) -> None:
+        """在当前线程中运行服务，收到 SIGTERM/SIGINT 时停止"""
+        async def main():
+            loop = asyncio.get_running_loop()
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                loop.add_signal_handler(sig, lambda: self._stopped.set())
+            await self.serve()
+        
+        asyncio.run(main())
+    
+    def start_in_thread(self, timeout: float = 5.0) -> 'PlayerDaemon':
+        """
+        在后台线程中运行服务（前台播放时接受其他终端的控制命令）
+        
+        Args:
+            timeout: 等待开始服务的超时时间（秒）
+            
+        Returns:
+            PlayerDaemon: 自身
+            
+        Raises:
+            PlayerIPCError: 套接字已被其他守护进程占用或启动失败
+        """
+        ready = threading.Event()
+        errors = []
+        
+        def target():
+            try:
+                asyncio.run(self.serve(ready))
+            except Exception as e:
+                errors.append(e)
+                ready.set()
+        
+        self._thread = threading.Thread(target=target, name="player-daemon", daemon=True)
+        self._thread.start()
+        if not ready.wait(timeout):
+            raise PlayerIPCError("启动播放器控制服务超时")
+        if errors:
+            self._thread = None
+            if isinstance(errors[0], PlayerIPCError):
+                raise errors[0]
+            raise PlayerIPCError(f"启动播放器控制服务失败: {errors[0]}")
+        return self
+    
+    def _require_playing(self) -> None:
+        """
+        检查是否正在播放
+        
+        Raises:
+            PlayerIPCError: 当前没有播放
+        """
+        if not self.player.is_playing:
+            raise PlayerIPCError("当前没有播放")
+    
+    # 以下命令在工作线程中执行，返回值需能编码为JSON
+    
+    def cmd_ping(self) -> Dict[str, Any]:
+        """守护进程信息"""
+        return {"pid": os.getpid(), "uptime": time.time() - self.started}
+    
+    def cmd_status(self, metadata: bool = False) -> Dict[str, Any]:
+        """
+        播放状态
+        
+        Args:
+            metadata: 是否包含音频元数据
+        """
+        player = self.player
+        item = player.current_item
+        playlist = player.current_playlist
+        status = {
+            "playing": player.is_playing,
+            "paused": player.is_paused,
+            "mode": player.get_play_mode(),
+            "volume": player.get_volume(),
+            "muted": player.is_muted(),
+            "playlist": playlist.name if playlist else None,
+            # 目录播放列表只报告已列出的歌曲数，状态查询不请求网盘
+            "playlist_length": loaded_length(playlist.items) if playlist else 0,
+            "playlist_version": self.playlist_version,
+            "index": player.current_index,
+            "item": None,
+            "time": 0,
+            "length": 0,
+            "position": 0.0,
+        }
+        if item is not None:
+            status["item"] = {
+                "fs_id": item.fs_id,
+                "server_filename": item.server_filename,
+                "path": item.path,
+                "size": item.size,
+            }
+        if player.is_playing:
+            status["time"] = player.get_time()
+            status["length"] = player.get_length()
+            status["position"] = player.get_position()
+        if metadata:
+            status["metadata"] = {str(key): str(value) for key, value in player.get_metadata().items()}
+        return status
+    
+    def _load_playlist(self, name: str):
+        """
+        读取播放列表
+        
+        Args:
+            name: 播放列表名称
+            
+        Returns:
+            Playlist: 播放列表
+            
+        Raises:
+            PlayerIPCError: 播放列表不存在
+        """
+        manager = self.player.playlist_manager
+        if manager is None:
+            raise PlayerIPCError("获取播放列表管理器失败")
+        
+        target = manager.get_playlist(name)
+        if not target:
+            raise PlayerIPCError(f"播放列表 '{name}' 不存在")
+        return target
+    
+    def cmd_load(self, playlist: str) -> Dict[str, Any]:
+        """
+        把播放列表设为当前播放列表（停止当前播放，不开始播放）
+        
+        Args:
+            playlist: 播放列表名称
+        """
+        self.player.set_playlist(self._load_playlist(playlist))
+        self.notify('playlist')
+        return self.cmd_status()
+    
+    def cmd_clear(self) -> Dict[str, Any]:
+        """停止播放并清空当前播放列表"""
+        self.player.set_playlist(None)
+        self.notify('playlist')
+        return self.cmd_status()
+    
+    def cmd_play(self, playlist: Optional[str] = None, index: int = 0,
+                 mode: Optional[str] = None) -> Dict[str, Any]:
+        """
+        播放播放列表
+        
+        Args:
+            playlist: 播放列表名称，为 None 时播放当前播放列表
+            index: 播放索引
+            mode: 播放模式（sequential, loop, random）
+        """
+        target = self._load_playlist(playlist) if playlist is not None else self.player.current_playlist
+        if not target:
+            raise PlayerIPCError("没有设置播放列表")
+        if not target.items:
+            raise PlayerIPCError(f"播放列表 '{target.name}' 为空")
+        if index < 0 or index >= peek_length(target.items, index):
+            raise PlayerIPCError(f"无效的播放索引: {index}")
+        
+        if playlist is not None:
+            self.player.set_playlist(target)
+            self.notify('playlist')
+        if mode:
+            self.cmd_mode(mode)
+        if not self.player.play(index):
+            raise PlayerIPCError("播放失败")
+        return self.cmd_status()
+    
+    def cmd_pause(self) -> Dict[str, Any]:
+        """暂停/恢复"""
+        self._require_playing()
+        if not self.player.pause():
+            raise PlayerIPCError("操作失败")
+        return {"paused": self.player.is_paused}
+    
+    def cmd_stop(self) -> Dict[str, Any]:
+        """停止播放"""
+        self._require_playing()
+        if not self.player.stop():
+            raise PlayerIPCError("停止播放失败")
+        return {"playing": False}
+    
+    def cmd_next(self) -> Dict[str, Any]:
+        """下一曲"""
+        self._require_playing()
+        if not self.player.next():
+            raise PlayerIPCError("播放下一曲失败")
+        return self.cmd_status()
+    
+    def cmd_prev(self) -> Dict[str, Any]:
+        """上一曲"""
+        self._require_playing()
+        if not self.player.prev():
+            raise PlayerIPCError("播放上一曲失败")
+        return self.cmd_status()
+    
+    def cmd_volume(self, level: int) -> Dict[str, Any]:
+        """
+        设置音量
+        
+        Args:
+            level: 音量（0-100）
+        """
+        level = max(0, min(100, int(level)))
+        if not self.player.set_volume(level):
+            raise PlayerIPCError("设置音量失败")
+        self.notify('mixer')
+        return {"volume": level}
+    
+    def cmd_mode(self, mode: str) -> Dict[str, Any]:
+        """
+        设置播放模式
+        
+        Args:
+            mode: 播放模式（sequential, loop, random）
+        """
+        if mode not in PLAY_MODES:
+            raise PlayerIPCError(f"无效的播放模式: {mode}")
+        self.player.set_play_mode(getattr(self.player.PlayMode, mode.upper()))
+        self.notify('options')
+        return {"mode": mode}
+    
+    def cmd_shutdown(self) -> Dict[str, Any]:
+        """停止播放并退出守护进程"""
+        self.player.stop()
+        self._shutdown_requested = True
+        return {"pid": os.getpid()}
+
+
+def spawn_daemon(socket_path: Optional[str] = None, timeout: float = 15.0,
+                 mpd_port: Optional[int] = None, broadcast_port: Optional[int] = None) -> Optional[int]:
+    """
+    在后台启动守护进程并等待其开始接受连接
+    
+    Args:
+        socket_path: 套接字路径，为 None 时使用配置中的路径
+        timeout: 等待超时时间（秒）
+        mpd_port: MPD协议服务端口，为 None 时使用配置，0 表示不启动
+        broadcast_port: 局域网广播端口，为 None 时使用配置，0 表示不启动
+        
+    Returns:
+        Optional[int]: 守护进程的PID，启动失败时为 None
+    """
+    socket_path = socket_path or get_socket_path()
+    command = [sys.executable, "-m", "dupan_music.player.daemon", "--socket", socket_path]
+    if mpd_port is not None:
+        command += ["--mpd-port", str(mpd_port)]
+    if broadcast_port is not None:
+        command += ["--broadcast-port", str(broadcast_port)]
+    process = subprocess.Popen(
+        command,
+        stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        start_new_session=True, close_fds=True
+    )
+    
+    deadline = time.monotonic() + timeout
+    with PlayerClient(socket_path, timeout=1.0) as client:
+        while time.monotonic() < deadline:
+            if client.is_running():
+                return process.pid
+            if process.poll() is not None:
+                logger.error(f"播放器守护进程启动失败，退出码: {process.returncode}")
+                return None
+            time.sleep(0.05)
+    
+    logger.error("等待播放器守护进程启动超时")
+    return None
+
+
+def run_daemon(socket_path: Optional[str] = None, mpd_port: Optional[int] = None,
+               broadcast_port: Optional[int] = None) -> int:
+    """
+    创建播放器并在当前进程中运行守护进程
+    
+    Args:
+        socket_path: 套接字路径，为 None 时使用配置中的路径
+        mpd_port: MPD协议服务端口，为 None 时使用配置，0 表示不启动
+        broadcast_port: 局域网广播端口，为 None 时使用配置，0 表示不启动
+        
+    Returns:
+        int: 退出码
+    """
+    try:
+        player = create_player()
+        daemon = PlayerDaemon(player, socket_path)
+    except PlayerIPCError as e:
+        logger.error(str(e))
+        return 1
+    
+    if mpd_port is None:
+        mpd_port = CONFIG.get("player.mpd_port", 0)
+    if mpd_port:
+        from dupan_music.player.mpd import MPDServer
+        daemon.add_frontend(MPDServer(CONFIG.get("player.mpd_host", "127.0.0.1"), mpd_port))
+    
+    if broadcast_port is None:
+        broadcast_port = CONFIG.get("player.broadcast_port", 0)
+    if broadcast_port:
+        from dupan_music.player.broadcast import Broadcaster
+        daemon.add_frontend(Broadcaster(CONFIG.get("player.broadcast_host", "0.0.0.0"), broadcast_port))
+    
+    try:
+        daemon.run()
+    except (PlayerIPCError, OSError) as e:
+        logger.error(str(e))
+        return 1
+    finally:
+        player.stop()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="播放器守护进程")
+    parser.add_argument("--socket", default=None, help="套接字路径")
+    parser.add_argument("--mpd-port", type=int, default=None, help="MPD协议服务端口，0 表示不启动")
+    parser.add_argument("--broadcast-port", type=int, default=None, help="局域网广播端口，0 表示不启动")
+    args = parser.parse_args()
+    sys.exit(run_daemon(args.socket, args.mpd_port, args.broadcast_port))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+播放器守护进程的控制协议和客户端
+
+协议为 Unix 域套接字上逐行的紧凑JSON：
+    请求: {"cmd": "pause", "args": {}}
+    响应: {"ok": true, "result": ...} 或 {"ok": false, "error": "错误信息"}
+
+客户端只依赖标准库和编解码模块，命令行控制命令不需要加载播放器、VLC和网络模块。
+"""
+
+import os
+import socket
+from typing import Any, Dict, Optional
+
+from dupan_music.config.config import CONFIG
+from dupan_music.utils import codec
+
+# 默认套接字路径
+DEFAULT_SOCKET = os.path.expanduser("~/.dupan-music/player.sock")
+
+# 单条消息的最大长度
+MAX_MESSAGE_SIZE = 1024 * 1024
+
+
+class PlayerIPCError(Exception):
+    """播放器守护进程返回错误或通信失败"""
+
+
+class DaemonNotRunning(PlayerIPCError):
+    """播放器守护进程未运行"""
+
+
+def get_socket_path() -> str:
+    """
+    获取守护进程套接字路径
+    
+    Returns:
+        str: 套接字路径
+    """
+    return os.path.expanduser(CONFIG.get("player.socket") or DEFAULT_SOCKET)
+
+
+def encode_message(message: Dict[str, Any]) -> bytes:
+    """
+    编码一条消息
+    
+    Args:
+        message: 消息
+        
+    Returns:
+        bytes: 以换行结尾的紧凑JSON
+    """
+    return codec.dumpb(message) + b"\n"
+
+
+def decode_message(line: bytes) -> Dict[str, Any]:
+    """
+    解码一条消息
+    
+    Args:
+        line: 一行数据
+        
+    Returns:
+        Dict[str, Any]: 消息
+        
+    Raises:
+        PlayerIPCError: 不是JSON对象
+    """
+    try:
+        message = codec.loads(line)
+    except ValueError as e:
+        raise PlayerIPCError(f"无效的消息: {e}")
+    if not isinstance(message, dict):
+        raise PlayerIPCError("无效的消息: 不是JSON对象")
+    return message
+
+
+class PlayerClient:
+    """播放器守护进程客户端，连接在多次请求间复用，断开后自动重连一次"""
+    
+    def __init__(self, socket_path: Optional[str] = None, timeout: float = 30.0):
+        """
+        初始化客户端
+        
+        Args:
+            socket_path: 套接字路径，为 None 时使用配置中的路径
+            timeout: 等待响应的超时时间（秒），切换歌曲需要先下载，不宜过短
+        """
+        self.socket_path = socket_path or get_socket_path()
+        self.timeout = timeout
+        self._sock: Optional[socket.socket] = None
+        self._reader = None
+    
+    def _connect(self) -> None:
+        """
+        连接守护进程
+        
+        Raises:
+            DaemonNotRunning: 套接字不存在或拒绝连接
+        """
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+        except (FileNotFoundError, ConnectionRefusedError) as e:
+            sock.close()
+            raise DaemonNotRunning(f"播放器守护进程未运行: {e}")
+        self._sock = sock
+        self._reader = sock.makefile("rb")
+    
+    def close(self) -> None:
+        """关闭连接"""
+        if self._reader is not None:
+            self._reader.close()
+            self._reader = None
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+    
+    def _roundtrip(self, data: bytes) -> bytes:
+        """
+        发送请求并读取一行响应
+        
+        Args:
+            data: 编码后的请求
+            
+        Returns:
+            bytes: 响应行
+        """
+        if self._sock is None:
+            self._connect()
+        self._sock.sendall(data)
+        line = self._reader.readline(MAX_MESSAGE_SIZE)
+        if not line:
+            raise ConnectionResetError("连接已关闭")
+        return line
+    
+    def request(self, command: str, **args) -> Any:
+        """
+        发送命令
+        
+        Args:
+            command: 命令名称
+            **args: 命令参数
+            
+        Returns:
+            Any: 命令结果
+            
+        Raises:
+            DaemonNotRunning: 守护进程未运行
+            PlayerIPCError: 命令执行失败或通信失败
+        """
+        data = encode_message({"cmd": command, "args": args})
+        reused = self._sock is not None
+        try:
+            try:
+                line = self._roundtrip(data)
+            except (BrokenPipeError, ConnectionResetError):
+                if not reused:
+                    raise
+                # 复用的连接可能已被守护进程关闭（如守护进程重启），重连一次
+                self.close()
+                line = self._roundtrip(data)
+        except OSError as e:
+            self.close()
+            raise PlayerIPCError(f"与播放器守护进程通信失败: {e}")
+        
+        response = decode_message(line)
+        if not response.get("ok"):
+            raise PlayerIPCError(response.get("error") or "未知错误")
+        return response.get("result")
+    
+    def is_running(self) -> bool:
+        """
+        守护进程是否在运行
+        
+        Returns:
+            bool: 是否在运行
+        """
+        try:
+            self.request("ping")
+            return True
+        except PlayerIPCError:
+            return False
@@ -0,0 +1,714 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+MPD 协议服务
+
+在播放器守护进程的事件循环中监听TCP端口，实现 MPD 协议的常用命令，ncmpcpp、
+手机上的 MPD 客户端等可以控制播放。所有连接由同一个事件循环处理，不为每个连接
+创建线程；idle 由守护进程的状态变化通知唤醒，不轮询。
+
+MPD 的播放队列对应当前播放列表：load 以存储的播放列表替换播放队列，歌曲ID即
+在播放队列中的位置。search/find 在本地曲库索引中查找。
+"""
+
+import asyncio
+import posixpath
+from typing import Any, Callable, Dict, List, Optional, Sequence, Set, Tuple
+
+from dupan_music.player.ipc import PlayerIPCError
+from dupan_music.playlist.collation import parse_path_tags
+from dupan_music.playlist.folder import loaded_length
+from dupan_music.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 协议版本
+MPD_VERSION = "0.23.0"
+
+# idle 可等待的子系统
+SUBSYSTEMS = (
+    'database', 'update', 'stored_playlist', 'playlist', 'player', 'mixer',
+    'output', 'options', 'partition', 'sticker', 'subscription', 'message'
+)
+
+# 错误码
+ACK_ERROR_ARG = 2
+ACK_ERROR_UNKNOWN = 5
+ACK_ERROR_NO_EXIST = 50
+ACK_ERROR_SYSTEM = 52
+
+# 支持的标签
+TAG_TYPES = ('Artist', 'Album', 'Title', 'Track')
+
+# 单行命令的最大长度
+MAX_LINE = 64 * 1024
+
+Lines = List[Tuple[str, Any]]
+
+
+class MPDError(Exception):
+    """MPD 命令错误，以 ACK 行返回给客户端"""
+    
+    def __init__(self, code: int, message: str):
+        """
+        初始化错误
+        
+        Args:
+            code: 错误码
+            message: 错误信息
+        """
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def parse_command(line: str) -> List[str]:
+    """
+    拆分命令行，参数可以用双引号括起，引号内用反斜杠转义
+    
+    Args:
+        line: 命令行
+        
+    Returns:
+        List[str]: 命令和参数
+        
+    Raises:
+        MPDError: 引号不匹配
+    """
+    tokens = []
+    i, length = 0, len(line)
+    while i < length:
+        if line[i].isspace():
+            i += 1
+            continue
+        
+        if line[i] == '"':
+            i += 1
+            token = []
+            while i < length and line[i] != '"':
+                if line[i] == '\\' and i + 1 < length:
+                    i += 1
+                token.append(line[i])
+                i += 1
+            if i >= length:
+                raise MPDError(ACK_ERROR_ARG, "Missing closing '\"'")
+            i += 1
+            tokens.append(''.join(token))
+        else:
+            start = i
+            while i < length and not line[i].isspace():
+                i += 1
+            tokens.append(line[start:i])
+    return tokens
+
+
+def song_lines(path: str, name: str, size: int, pos: Optional[int] = None) -> Lines:
+    """
+    生成歌曲信息
+    
+    Args:
+        path: 网盘路径
+        name: 文件名
+        size: 文件大小
+        pos: 在播放队列中的位置，为 None 时不输出位置和ID
+        
+    Returns:
+        Lines: 键值对
+    """
+    artist, album, track = parse_path_tags(path)
+    lines: Lines = [('file', path.lstrip('/'))]
+    if artist:
+        lines.append(('Artist', artist))
+    if album:
+        lines.append(('Album', album))
+    lines.append(('Title', posixpath.splitext(name or posixpath.basename(path))[0]))
+    if track is not None:
+        lines.append(('Track', track))
+    lines.append(('Format', posixpath.splitext(path)[1].lstrip('.').lower()))
+    lines.append(('Size', size))
+    if pos is not None:
+        lines.extend([('Pos', pos), ('Id', pos)])
+    return lines
+
+
+def parse_int(value: str) -> int:
+    """
+    解析整数参数
+    
+    Args:
+        value: 参数
+        
+    Returns:
+        int: 整数
+        
+    Raises:
+        MPDError: 不是整数
+    """
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise MPDError(ACK_ERROR_ARG, f"Integer expected: {value}")
+
+
+def parse_range(value: str, length: int) -> range:
+    """
+    解析位置或 START:END 范围
+    
+    Args:
+        value: 位置或范围
+        length: 播放队列长度
+        
+    Returns:
+        range: 位置范围
+    """
+    if ':' in value:
+        start, _, end = value.partition(':')
+        return range(parse_int(start), min(parse_int(end), length) if end else length)
+    pos = parse_int(value)
+    if pos < 0 or pos >= length:
+        raise MPDError(ACK_ERROR_ARG, "Bad song index")
+    return range(pos, pos + 1)
+
+
+class MPDSession:
+    """一个客户端连接"""
+    
+    def __init__(self, server: 'MPDServer', reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """
+        初始化连接
+        
+        Args:
+            server: MPD 服务
+            reader: 读取流
+            writer: 写入流
+        """
+        self.server = server
+        self.reader = reader
+        self.writer = writer
+        
+        # 上次 idle 以来变化的子系统
+        self.pending: Set[str] = set()
+        self.changed = asyncio.Event()
+        
+        # 未完成的读取，idle 被状态变化唤醒时保留给下一次读取，避免丢失数据
+        self._reading: Optional[asyncio.Future] = None
+    
+    def notify(self, subsystem: str) -> None:
+        """
+        记录变化的子系统并唤醒 idle
+        
+        Args:
+            subsystem: 子系统名称
+        """
+        self.pending.add(subsystem)
+        self.changed.set()
+    
+    def send(self, lines: Lines) -> None:
+        """写入键值对"""
+        self.writer.write(''.join(f"{key}: {value}\n" for key, value in lines).encode('utf-8'))
+    
+    def send_raw(self, text: str) -> None:
+        """写入文本"""
+        self.writer.write(text.encode('utf-8'))
+    
+    async def readline(self) -> Optional[str]:
+        """
+        读取一行命令
+        
+        Returns:
+            Optional[str]: 命令行，连接关闭时为 None
+        """
+        if self._reading is None:
+            self._reading = asyncio.ensure_future(self.reader.readline())
+        try:
+            line = await self._reading
+        finally:
+            self._reading = None
+        if not line:
+            return None
+        return line.decode('utf-8', errors='replace').rstrip('\r\n')
+    
+    async def run(self) -> None:
+        """处理命令直到客户端关闭连接或发送 close"""
+        self.send_raw(f"OK MPD {MPD_VERSION}\n")
+        await self.writer.drain()
+        
+        command_list: Optional[List[str]] = None
+        list_ok = False
+        while True:
+            line = await self.readline()
+            if line is None:
+                return
+            
+            if command_list is not None:
+                if line == 'command_list_end':
+                    await self.execute_list(command_list, list_ok)
+                    command_list = None
+                else:
+                    command_list.append(line)
+                continue
+            
+            if line in ('command_list_begin', 'command_list_ok_begin'):
+                command_list = []
+                list_ok = line == 'command_list_ok_begin'
+                continue
+            if line == 'close':
+                return
+            
+            await self.execute_list([line], False)
+    
+    async def execute_list(self, lines: Sequence[str], list_ok: bool) -> None:
+        """
+        依次执行命令，出错时停止并返回 ACK
+        
+        Args:
+            lines: 命令行
+            list_ok: 每条命令后是否输出 list_OK
+        """
+        for index, line in enumerate(lines):
+            name = ""
+            try:
+                args = parse_command(line)
+                if not args:
+                    raise MPDError(ACK_ERROR_UNKNOWN, "No command given")
+                name = args[0]
+                self.send(await self.execute(name, args[1:]))
+            except MPDError as e:
+                self.send_raw(f"ACK [{e.code}@{index}] {{{name}}} {e.message}\n")
+                await self.writer.drain()
+                return
+            except PlayerIPCError as e:
+                self.send_raw(f"ACK [{ACK_ERROR_SYSTEM}@{index}] {{{name}}} {e}\n")
+                await self.writer.drain()
+                return
+            if list_ok:
+                self.send_raw("list_OK\n")
+        self.send_raw("OK\n")
+        await self.writer.drain()
+    
+    async def execute(self, name: str, args: List[str]) -> Lines:
+        """
+        执行一条命令
+        
+        Args:
+            name: 命令名称
+            args: 参数
+            
+        Returns:
+            Lines: 输出的键值对
+        """
+        if name == 'idle':
+            return await self.idle(args)
+        if name == 'noidle':
+            return []
+        
+        handler = self.server.handlers.get(name)
+        if handler is None:
+            raise MPDError(ACK_ERROR_UNKNOWN, f"unknown command \"{name}\"")
+        return await handler(args)
+    
+    async def idle(self, subsystems: List[str]) -> Lines:
+        """
+        等待子系统变化，收到 noidle 时立即返回
+        
+        Args:
+            subsystems: 关注的子系统，为空时关注全部
+            
+        Returns:
+            Lines: 变化的子系统
+        """
+        wanted = set(subsystems) or set(SUBSYSTEMS)
+        while True:
+            changed = self.pending & wanted
+            if changed:
+                self.pending -= changed
+                return [('changed', subsystem) for subsystem in sorted(changed)]
+            
+            self.changed.clear()
+            if self._reading is None:
+                self._reading = asyncio.ensure_future(self.reader.readline())
+            wait = asyncio.ensure_future(self.changed.wait())
+            done, _ = await asyncio.wait({self._reading, wait}, return_when=asyncio.FIRST_COMPLETED)
+            wait.cancel()
+            
+            if self._reading in done:
+                line = await self.readline()
+                if line is None:
+                    raise ConnectionResetError("客户端已断开")
+                if line.strip() != 'noidle':
+                    raise MPDError(ACK_ERROR_ARG, "Only \"noidle\" is allowed during idle")
+                changed = self.pending & wanted
+                self.pending -= changed
+                return [('changed', subsystem) for subsystem in sorted(changed)]
+    
+    def close(self) -> None:
+        """关闭连接"""
+        if self._reading is not None:
+            self._reading.cancel()
+        self.writer.close()
+
+
+class MPDServer:
+    """MPD 协议服务，作为播放器守护进程的前端运行"""
+    
+    def __init__(self, host: str = "127.0.0.1", port: int = 6600):
+        """
+        初始化服务
+        
+        Args:
+            host: 监听地址
+            port: 监听端口
+        """
+        self.host = host
+        self.port = port
+        self.daemon = None
+        self.sessions: Set[MPDSession] = set()
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._tasks: Set[asyncio.Task] = set()
+        self._index = None
+        
+        self.handlers: Dict[str, Callable] = {
+            'ping': self.cmd_ping,
+            'status': self.cmd_status,
+            'currentsong': self.cmd_currentsong,
+            'stats': self.cmd_stats,
+            'play': self.cmd_play,
+            'playid': self.cmd_play,
+            'pause': self.cmd_pause,
+            'stop': self.cmd_stop,
+            'next': self.cmd_next,
+            'previous': self.cmd_previous,
+            'setvol': self.cmd_setvol,
+            'random': self.cmd_random,
+            'repeat': self.cmd_repeat,
+            'playlistinfo': self.cmd_playlistinfo,
+            'playlistid': self.cmd_playlistinfo,
+            'plchanges': self.cmd_plchanges,
+            'clear': self.cmd_clear,
+            'load': self.cmd_load,
+            'listplaylists': self.cmd_listplaylists,
+            'listplaylistinfo': self.cmd_listplaylistinfo,
+            'search': self.cmd_search,
+            'find': self.cmd_find,
+            'commands': self.cmd_commands,
+            'notcommands': self.cmd_empty,
+            'tagtypes': self.cmd_tagtypes,
+            'outputs': self.cmd_outputs,
+            'decoders': self.cmd_empty,
+            'urlhandlers': self.cmd_empty,
+            'channels': self.cmd_empty,
+            'readmessages': self.cmd_empty,
+        }
+    
+    async def start(self, daemon) -> None:
+        """
+        开始监听
+        
+        Args:
+            daemon: 播放器守护进程（PlayerDaemon）
+        """
+        self.daemon = daemon
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port, limit=MAX_LINE)
+        if not self.port:
+            self.port = self._server.sockets[0].getsockname()[1]
+        daemon.add_listener(self._on_change)
+        logger.info(f"MPD协议服务已启动: {self.host}:{self.port}")
+    
+    async def close(self) -> None:
+        """停止监听并关闭所有连接"""
+        if self.daemon is not None:
+            self.daemon.remove_listener(self._on_change)
+        if self._server is not None:
+            self._server.close()
+        for session in list(self.sessions):
+            session.close()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+            self._server = None
+        if self._index is not None:
+            self._index.close()
+            self._index = None
+    
+    def _on_change(self, subsystem: str) -> None:
+        """守护进程状态变化时通知所有连接"""
+        for session in self.sessions:
+            session.notify(subsystem)
+    
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        """
+        处理一个连接
+        
+        Args:
+            reader: 读取流
+            writer: 写入流
+        """
+        session = MPDSession(self, reader, writer)
+        task = asyncio.current_task()
+        self.sessions.add(session)
+        self._tasks.add(task)
+        try:
+            await session.run()
+        except (ConnectionError, ValueError, MPDError) as e:
+            # ValueError: 单行超过 MAX_LINE；MPDError: idle 期间收到其他命令
+            logger.debug(f"MPD连接断开: {e}")
+        finally:
+            self.sessions.discard(session)
+            self._tasks.discard(task)
+            session.close()
+    
+    def _queue_items(self) -> list:
+        """播放队列（当前播放列表）的歌曲，在播放器线程中调用；目录播放列表只包含已列出的歌曲"""
+        playlist = self.daemon.player.current_playlist
+        if not playlist:
+            return []
+        items = playlist.items
+        return [items[i] for i in range(loaded_length(items))]
+    
+    def _library(self):
+        """打开本地曲库索引，在播放器线程中调用"""
+        if self._index is None:
+            from dupan_music.library.index import LibraryIndex
+            self._index = LibraryIndex.open_default()
+        return self._index
+    
+    # 以下为命令处理，返回输出的键值对
+    
+    async def cmd_empty(self, args: List[str]) -> Lines:
+        return []
+    
+    cmd_ping = cmd_empty
+    
+    async def cmd_commands(self, args: List[str]) -> Lines:
+        names = sorted(set(self.handlers) | {'idle', 'noidle', 'close', 'command_list_begin',
+                                             'command_list_ok_begin', 'command_list_end'})
+        return [('command', name) for name in names]
+    
+    async def cmd_tagtypes(self, args: List[str]) -> Lines:
+        return [('tagtype', tag) for tag in TAG_TYPES]
+    
+    async def cmd_outputs(self, args: List[str]) -> Lines:
+        return [('outputid', 0), ('outputname', 'dupan-music'), ('plugin', 'vlc'), ('outputenabled', 1)]
+    
+    async def cmd_status(self, args: List[str]) -> Lines:
+        status = await self.daemon.call('status')
+        mode = status['mode']
+        state = 'stop'
+        if status['playing']:
+            state = 'pause' if status['paused'] else 'play'
+        
+        lines: Lines = [
+            ('volume', 0 if status['muted'] else status['volume']),
+            ('repeat', int(mode == 'loop')),
+            ('random', int(mode == 'random')),
+            ('single', 0),
+            ('consume', 0),
+            ('playlist', status['playlist_version']),
+            ('playlistlength', status['playlist_length']),
+            ('state', state),
+        ]
+        if status['item'] is not None and status['index'] >= 0:
+            lines.extend([('song', status['index']), ('songid', status['index'])])
+        if state != 'stop':
+            elapsed = status['time'] / 1000
+            duration = status['length'] / 1000
+            lines.extend([
+                ('time', f"{int(elapsed)}:{int(duration)}"),
+                ('elapsed', f"{elapsed:.3f}"),
+                ('duration', f"{duration:.3f}"),
+            ])
+        return lines
+    
+    async def cmd_currentsong(self, args: List[str]) -> Lines:
+        status = await self.daemon.call('status')
+        item = status['item']
+        if item is None:
+            return []
+        return song_lines(item['path'], item['server_filename'], item['size'], status['index'])
+    
+    async def cmd_stats(self, args: List[str]) -> Lines:
+        def count() -> int:
+            try:
+                return self._library().count()
+            except Exception:
+                return 0
+        
+        songs = await self.daemon.run_in_player(count)
+        info = await self.daemon.call('ping')
+        return [('songs', songs), ('uptime', int(info['uptime']))]
+    
+    async def cmd_play(self, args: List[str]) -> Lines:
+        status = await self.daemon.call('status')
+        if args:
+            pos = parse_int(args[0])
+            if pos >= 0:
+                await self.daemon.call('play', index=pos)
+                return []
+        
+        # 没有指定位置：暂停时恢复，停止时从当前歌曲开始
+        if status['playing']:
+            if status['paused']:
+                await self.daemon.call('pause')
+            return []
+        await self.daemon.call('play', index=max(status['index'], 0))
+        return []
+    
+    async def cmd_pause(self, args: List[str]) -> Lines:
+        status = await self.daemon.call('status')
+        if not status['playing']:
+            return []
+        if args and parse_int(args[0]) == int(status['paused']):
+            return []
+        await self.daemon.call('pause')
+        return []
+    
+    async def cmd_stop(self, args: List[str]) -> Lines:
+        status = await self.daemon.call('status')
+        if status['playing']:
+            await self.daemon.call('stop')
+        return []
+    
+    async def cmd_next(self, args: List[str]) -> Lines:
+        await self.daemon.call('next')
+        return []
+    
+    async def cmd_previous(self, args: List[str]) -> Lines:
+        await self.daemon.call('prev')
+        return []
+    
+    async def cmd_setvol(self, args: List[str]) -> Lines:
+        if not args:
+            raise MPDError(ACK_ERROR_ARG, "wrong number of arguments for \"setvol\"")
+        await self.daemon.call('volume', level=parse_int(args[0]))
+        return []
+    
+    async def _set_mode(self, args: List[str], mode: str) -> Lines:
+        """
+        开启或关闭 random/repeat，两者对应互斥的播放模式
+        
+        Args:
+            args: 参数（0 或 1）
+            mode: 开启时的播放模式
+        """
+        if not args:
+            raise MPDError(ACK_ERROR_ARG, "wrong number of arguments")
+        status = await self.daemon.call('status')
+        if parse_int(args[0]):
+            await self.daemon.call('mode', mode=mode)
+        elif status['mode'] == mode:
+            await self.daemon.call('mode', mode='sequential')
+        return []
+    
+    async def cmd_random(self, args: List[str]) -> Lines:
+        return await self._set_mode(args, 'random')
+    
+    async def cmd_repeat(self, args: List[str]) -> Lines:
+        return await self._set_mode(args, 'loop')
+    
+    async def cmd_playlistinfo(self, args: List[str]) -> Lines:
+        items = await self.daemon.run_in_player(self._queue_items)
+        positions = parse_range(args[0], len(items)) if args else range(len(items))
+        lines: Lines = []
+        for pos in positions:
+            item = items[pos]
+            lines.extend(song_lines(item.path, item.server_filename, item.size, pos))
+        return lines
+    
+    async def cmd_plchanges(self, args: List[str]) -> Lines:
+        # 只有整个播放队列替换一种变化，版本号不同时返回整个播放队列
+        if args and parse_int(args[0]) == self.daemon.playlist_version:
+            return []
+        return await self.cmd_playlistinfo([])
+    
+    async def cmd_clear(self, args: List[str]) -> Lines:
+        await self.daemon.call('clear')
+        return []
+    
+    async def cmd_load(self, args: List[str]) -> Lines:
+        if not args:
+            raise MPDError(ACK_ERROR_ARG, "wrong number of arguments for \"load\"")
+        try:
+            await self.daemon.call('load', playlist=args[0])
+        except PlayerIPCError as e:
+            raise MPDError(ACK_ERROR_NO_EXIST, str(e))
+        return []
+    
+    async def cmd_listplaylists(self, args: List[str]) -> Lines:
+        manager = self.daemon.player.playlist_manager
+        summaries = await self.daemon.run_in_player(manager.get_playlist_summaries)
+        lines: Lines = []
+        for summary in summaries:
+            lines.append(('playlist', summary.name))
+        return lines
+    
+    async def cmd_listplaylistinfo(self, args: List[str]) -> Lines:
+        if not args:
+            raise MPDError(ACK_ERROR_ARG, "wrong number of arguments for \"listplaylistinfo\"")
+        manager = self.daemon.player.playlist_manager
+        playlist = await self.daemon.run_in_player(manager.get_playlist, args[0])
+        if not playlist:
+            raise MPDError(ACK_ERROR_NO_EXIST, "No such playlist")
+        lines: Lines = []
+        for item in playlist.items:
+            lines.extend(song_lines(item.path, item.server_filename, item.size))
+        return lines
+    
+    def _search_library(self, pairs: List[Tuple[str, str]], exact: bool) -> List[Dict]:
+        """
+        在本地曲库索引中查找，在播放器线程中调用
+        
+        Args:
+            pairs: (标签, 值) 列表
+            exact: 是否精确匹配（find），否则为不区分大小写的子串匹配（search）
+            
+        Returns:
+            List[Dict]: 文件信息
+        """
+        # 歌手、专辑、标题都来自路径，先按路径子串在数据库中筛选
+        where, params = [], []
+        for _, value in pairs:
+            escaped = value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            where.append("path LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+        files = self._library().select(' AND '.join(where) or "1", params)
+        
+        def matches(file_info: Dict) -> bool:
+            path = file_info['path']
+            artist, album, _ = parse_path_tags(path)
+            title = posixpath.splitext(file_info['server_filename'])[0]
+            for tag, value in pairs:
+                tag = tag.lower()
+                if tag == 'any':
+                    candidates = [path.lstrip('/'), artist, album, title]
+                else:
+                    candidates = [{'file': path.lstrip('/'), 'artist': artist, 'album': album,
+                                   'title': title}.get(tag, '')]
+                if exact:
+                    if value not in candidates:
+                        return False
+                elif not any(value.casefold() in candidate.casefold() for candidate in candidates):
+                    return False
+            return True
+        
+        return [file_info for file_info in files if not file_info['isdir'] and matches(file_info)]
+    
+    async def _search(self, args: List[str], exact: bool) -> Lines:
+        if not args or len(args) % 2:
+            raise MPDError(ACK_ERROR_ARG, "incorrect arguments")
+        pairs = list(zip(args[::2], args[1::2]))
+        for tag, _ in pairs:
+            if tag.lower() not in ('any', 'file', 'artist', 'album', 'title'):
+                raise MPDError(ACK_ERROR_ARG, f"Unknown filter type: {tag}")
+        
+        files = await self.daemon.run_in_player(self._search_library, pairs, exact)
+        lines: Lines = []
+        for file_info in files:
+            lines.extend(song_lines(file_info['path'], file_info['server_filename'], file_info['size']))
+        return lines
+    
+    async def cmd_search(self, args: List[str]) -> Lines:
+        return await self._search(args, exact=False)
+    
+    async def cmd_find(self, args: List[str]) -> Lines:
+        return await self._search(args, exact=True)
@@ -3,33 +3,112 @@
 
 """
 播放器模块
+
+播放控制命令（play、next、pause 等）和VLC播放结束事件都放入命令队列，由一个命令
+线程依次执行，播放状态只在该线程中修改。调用方线程等待命令执行完成后得到结果，
+也可以用 submit 提交后不等待。连续的切换歌曲命令（如连按五次下一曲）合并为一次，
+新的切换歌曲或停止命令会取消正在进行的下载。
 """
 
 import os
 import time
 import tempfile
 import threading
+import functools
 import random
-from typing import Dict, List, Optional, Union, Callable, Literal
+from collections import deque
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Union, Callable, Literal
 from enum import Enum
-import vlc
 from dupan_music.config.config import CONFIG
-try:
-    from pydub import AudioSegment
-    PYDUB_AVAILABLE = True
-except ImportError:
-    PYDUB_AVAILABLE = False
-    import soundfile as sf
-    import numpy as np
-from mutagen import File as MutagenFile
 
 from dupan_music.utils.logger import get_logger
+from dupan_music.utils.lazy import LazyModule, module_available
 from dupan_music.utils.file_utils import get_file_extension, get_temp_file, ensure_dir
 from dupan_music.api.api import BaiduPanAPI
 from dupan_music.playlist.playlist import PlaylistManager, Playlist, PlaylistItem
+from dupan_music.playlist.folder import peek_length
+
+# 音频相关模块导入较慢，只在播放或处理音频时才导入
+vlc = LazyModule('vlc')
+mutagen = LazyModule('mutagen')
+PYDUB_AVAILABLE = module_available('pydub')
 
 logger = get_logger(__name__)
 
+# 进程内共用的VLC实例
+_vlc_instance = None
+_vlc_lock = threading.Lock()
+
+# 切换歌曲的命令，队列中连续的多个合并为一次
+NAVIGATION_COMMANDS = ('play', 'next', 'prev')
+
+# 使正在进行的下载失效的命令
+SWITCH_COMMANDS = NAVIGATION_COMMANDS + ('stop', 'set_playlist')
+
+# 命令线程空闲多久后退出（秒），有新命令时重新启动
+COMMAND_IDLE_TIMEOUT = 5.0
+
+
+def get_vlc_instance():
+    """
+    获取进程内共用的VLC实例，首次调用时创建
+    
+    Returns:
+        vlc.Instance: VLC实例
+    """
+    global _vlc_instance
+    with _vlc_lock:
+        if _vlc_instance is None:
+            _vlc_instance = vlc.Instance('--no-xlib')
+        return _vlc_instance
+
+
+def MutagenFile(file_path: str):
+    """
+    读取音频文件标签（mutagen.File）
+    
+    Args:
+        file_path: 文件路径
+        
+    Returns:
+        标签对象，无法识别时为 None
+    """
+    return mutagen.File(file_path)
+
+
+class PlayerCommand:
+    """命令队列中的一条命令"""
+    
+    __slots__ = ('kind', 'func', 'args', 'kwargs', 'future', 'seq')
+    
+    def __init__(self, kind: str, func: Callable, args: tuple, kwargs: dict):
+        self.kind = kind
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.future: Future = Future()
+        self.seq = 0
+
+
+def player_command(func: Callable) -> Callable:
+    """
+    把 AudioPlayer 的方法改为在命令线程中执行，调用方等待执行结果
+    
+    Args:
+        func: 方法，方法名即命令名称
+        
+    Returns:
+        Callable: 包装后的方法
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        return self._submit(func.__name__, func, (self,) + args, kwargs)
+    
+    wrapper.is_player_command = True
+    return wrapper
+
+
 class AudioPlayer:
     """音频播放器"""
     
@@ -47,9 +126,9 @@ class AudioPlayer:
         self.api = api
         self.playlist_manager = playlist_manager
         
-        # VLC实例
-        self.instance = vlc.Instance('--no-xlib')
-        self.player = self.instance.media_player_new()
+        # VLC媒体播放器，首次播放或调节音量时创建
+        self._player = None
+        self._volume = 100
         self.media = None
         
         # 播放模式枚举
@@ -69,6 +148,10 @@ class AudioPlayer:
         self.is_paused: bool = False
         self.play_mode: PlayMode = PlayMode.LOOP  # 默认循环播放
         
+        # 当前歌曲的播放计时（不含暂停），用于记录播放历史
+        self._play_started: Optional[float] = None
+        self._played_seconds: float = 0.0
+        
         # 临时文件
         self.temp_file: Optional[str] = None
         
@@ -80,43 +163,204 @@ class AudioPlayer:
         self.on_prev_callback: Optional[Callable] = None
         self.on_complete_callback: Optional[Callable] = None
         
-        # 事件管理线程
-        self.event_thread = None
-        self.event_running = False
+        # 命令队列和命令线程
+        self._commands: deque = deque()
+        self._commands_cond = threading.Condition()
+        self._command_thread: Optional[threading.Thread] = None
+        self._command_seq = 0
+        # 正在执行的命令序号、最新的切换歌曲或停止命令序号，用于判断下载是否已失效
+        self._running_seq = 0
+        self._latest_switch_seq = 0
+        # 等待执行和正在执行的命令数
+        self._pending = 0
     
-    def _start_event_thread(self) -> None:
-        """启动事件管理线程"""
-        if self.event_thread is not None and self.event_thread.is_alive():
-            return
+    @property
+    def instance(self):
+        """VLC实例（进程内共用）"""
+        return get_vlc_instance()
+    
+    @property
+    def player(self):
+        """VLC媒体播放器，首次访问时创建"""
+        if self._player is None:
+            self._player = self.instance.media_player_new()
+            self._player.audio_set_volume(self._volume)
+            
+            # 播放结束事件在VLC线程中触发，交给命令线程处理
+            self._player.event_manager().event_attach(
+                vlc.EventType.MediaPlayerEndReached, self._on_end_reached
+            )
+        return self._player
+    
+    @property
+    def is_busy(self) -> bool:
+        """是否有等待执行或正在执行的命令（如正在下载下一曲）"""
+        return self._pending > 0
+    
+    def submit(self, command: str, *args, **kwargs) -> Future:
+        """
+        提交播放控制命令，不等待执行完成
         
-        self.event_running = True
-        self.event_thread = threading.Thread(target=self._event_loop)
-        self.event_thread.daemon = True
-        self.event_thread.start()
-    
-    def _stop_event_thread(self) -> None:
-        """停止事件管理线程"""
-        self.event_running = False
-        if self.event_thread is not None:
-            self.event_thread.join(timeout=1.0)
-            self.event_thread = None
-    
-    def _event_loop(self) -> None:
-        """事件循环"""
-        while self.event_running:
-            # 检查播放是否结束
-            if self.is_playing and not self.is_paused and self.player.get_state() == vlc.State.Ended:
-                self.is_playing = False
-                logger.debug("播放结束")
-                
-                # 调用完成回调
-                if self.on_complete_callback:
-                    self.on_complete_callback()
-                
-                # 自动播放下一曲
-                self.next()
+        Args:
+            command: 命令名称（play、pause、stop、next、prev、set_volume 等）
+            *args: 命令参数
+            **kwargs: 命令参数
+            
+        Returns:
+            Future: 命令结果
+            
+        Raises:
+            ValueError: 未知命令
+        """
+        method = getattr(type(self), command, None)
+        if not getattr(method, 'is_player_command', False):
+            raise ValueError(f"未知命令: {command}")
+        return self._submit(command, method.__wrapped__, (self,) + args, kwargs, wait=False)
+    
+    def _submit(self, kind: str, func: Callable, args: tuple, kwargs: dict, wait: bool = True) -> Any:
+        """
+        把命令放入队列，命令线程未运行时启动
+        
+        Args:
+            kind: 命令名称
+            func: 执行命令的函数
+            args: 位置参数
+            kwargs: 关键字参数
+            wait: 是否等待执行完成
+            
+        Returns:
+            Any: wait 为 True 时为命令结果，否则为 Future
+        """
+        # 命令中调用其他命令（如 next 调用 play）时直接执行
+        if threading.current_thread() is self._command_thread:
+            result = func(*args, **kwargs)
+            if wait:
+                return result
+            future = Future()
+            future.set_result(result)
+            return future
+        
+        command = PlayerCommand(kind, func, args, kwargs)
+        with self._commands_cond:
+            self._command_seq += 1
+            command.seq = self._command_seq
+            if kind in SWITCH_COMMANDS:
+                self._latest_switch_seq = command.seq
+            self._commands.append(command)
+            self._pending += 1
+            if self._command_thread is None:
+                self._command_thread = threading.Thread(
+                    target=self._run_commands, name="AudioPlayerCommands", daemon=True
+                )
+                self._command_thread.start()
+            self._commands_cond.notify()
+        
+        return command.future.result() if wait else command.future
+    
+    def _next_batch(self) -> Optional[List[PlayerCommand]]:
+        """
+        取出下一条命令；队列开头连续的切换歌曲命令一起取出
+        
+        Returns:
+            Optional[List[PlayerCommand]]: 命令，空闲超时时为 None（命令线程退出）
+        """
+        with self._commands_cond:
+            while not self._commands:
+                if not self._commands_cond.wait(COMMAND_IDLE_TIMEOUT) and not self._commands:
+                    self._command_thread = None
+                    return None
+            
+            batch = [self._commands.popleft()]
+            if batch[0].kind in NAVIGATION_COMMANDS:
+                while self._commands and self._commands[0].kind in NAVIGATION_COMMANDS:
+                    batch.append(self._commands.popleft())
+            return batch
+    
+    def _run_commands(self) -> None:
+        """命令线程：依次执行队列中的命令"""
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            
+            self._running_seq = batch[-1].seq
+            try:
+                if len(batch) == 1:
+                    command = batch[0]
+                    result = command.func(*command.args, **command.kwargs)
+                else:
+                    result = self._navigate(batch)
+            except Exception as e:
+                logger.error(f"执行播放器命令失败: {str(e)}")
+                for command in batch:
+                    command.future.set_exception(e)
+            else:
+                for command in batch:
+                    command.future.set_result(result)
+            finally:
+                with self._commands_cond:
+                    self._pending -= len(batch)
+    
+    def _navigate(self, batch: List[PlayerCommand]) -> bool:
+        """
+        合并执行连续的切换歌曲命令，只下载和播放最终的歌曲
+        
+        Args:
+            batch: play、next、prev 命令
             
-            time.sleep(0.5)
+        Returns:
+            bool: 是否成功
+        """
+        if not self.current_playlist or not self.current_playlist.items:
+            logger.warning("没有设置播放列表或播放列表为空")
+            return False
+        
+        index, last = self.current_index, None
+        for command in batch:
+            if command.kind == 'play':
+                target = command.args[1] if len(command.args) > 1 else command.kwargs.get('index', 0)
+            elif command.kind == 'next':
+                target = self._next_index(index)
+            else:
+                target = self._prev_index(index)
+            if target is not None:
+                index, last = target, command
+        
+        if last is None:
+            return False
+        logger.debug("合并 %s 个切换歌曲命令，播放索引: %s", len(batch), index)
+        
+        result = self.play(index)
+        if result and last.kind == 'next' and self.on_next_callback:
+            self.on_next_callback(self.current_item)
+        elif result and last.kind == 'prev' and self.on_prev_callback:
+            self.on_prev_callback(self.current_item)
+        return result
+    
+    def _superseded(self) -> bool:
+        """当前命令之后是否又提交了切换歌曲或停止命令（正在进行的下载已无用）"""
+        return self._latest_switch_seq > self._running_seq
+    
+    def _on_end_reached(self, event) -> None:
+        """VLC播放结束事件（VLC线程中调用，不能调用VLC），交给命令线程处理"""
+        self._submit('end', self._handle_end, (), {}, wait=False)
+    
+    def _handle_end(self) -> None:
+        """播放结束：记录播放历史并自动播放下一曲"""
+        # 结束事件到达前可能已切换歌曲或停止
+        if not self.is_playing or self.is_paused or self.player.get_state() != vlc.State.Ended:
+            return
+        
+        self._record_play_end(completed=True)
+        self.is_playing = False
+        logger.debug("播放结束")
+        
+        # 调用完成回调
+        if self.on_complete_callback:
+            self.on_complete_callback()
+        
+        # 自动播放下一曲
+        self.next()
     
     def _clean_temp_file(self) -> None:
         """清理临时文件"""
@@ -135,12 +379,14 @@ class AudioPlayer:
             item: 播放列表项
             
         Returns:
-            Optional[str]: 临时文件路径
+            Optional[str]: 临时文件路径，下载失败或被新的切换歌曲命令取消时为 None
         """
         if not self.api:
             logger.error("未提供API实例，无法下载文件")
             return None
         
+        temp_file = None
+        completed = False
         try:
             # 获取下载链接
             download_url = self.api.get_download_link(item.fs_id)
@@ -187,9 +433,9 @@ class AudioPlayer:
                         parsed_url.fragment
                     ))
                     
-                    logger.debug(f"已添加access_token参数到下载链接")
+                    logger.debug("已添加access_token参数到下载链接")
                 elif 'access_token' in query_params:
-                    logger.debug(f"下载链接已包含access_token参数")
+                    logger.debug("下载链接已包含access_token参数")
                 else:
                     logger.warning(f"无法添加access_token参数，可能导致403错误")
             else:
@@ -217,9 +463,9 @@ class AudioPlayer:
                     if cookies_dict:
                         headers['Cookie'] = '; '.join([f'{k}={v}' for k, v in cookies_dict.items()])
             
-            logger.debug(f"开始下载文件: {item.server_filename}")
-            logger.debug(f"下载链接: {download_url[:100]}...")  # 只记录链接的前100个字符
-            logger.debug(f"使用请求头: {headers}")
+            logger.debug("开始下载文件: %s", item.server_filename)
+            logger.debug("下载链接: %s...", download_url[:100])  # 只记录链接的前100个字符
+            logger.debug("使用请求头: %s", headers)
             
             # 确保对d.pcs.baidu.com域名的请求，User-Agent始终为pan.baidu.com
             if 'd.pcs.baidu.com' in download_url and headers.get('User-Agent') != 'pan.baidu.com':
@@ -247,15 +493,15 @@ class AudioPlayer:
                         session.headers.update({
                             'User-Agent': 'pan.baidu.com'
                         })
-                        logger.debug(f"最终请求头: {session.headers}")
-                        logger.debug(f"最终下载URL: {download_url}")
+                        logger.debug("最终请求头: %s", session.headers)
+                        logger.debug("最终下载URL: %s", download_url)
                         response = session.get(download_url, stream=True, timeout=30)
                     else:
                         # 其他域名使用原有逻辑，先发送HEAD请求
                         head_response = session.head(download_url, allow_redirects=True, timeout=10)
-                        logger.debug(f"HEAD请求状态码: {head_response.status_code}")
+                        logger.debug("HEAD请求状态码: %s", head_response.status_code)
                         if head_response.headers:
-                            logger.debug(f"HEAD响应头: {head_response.headers}")
+                            logger.debug("HEAD响应头: %s", head_response.headers)
                         
                         # 如果HEAD请求成功，使用GET请求下载文件
                         if head_response.status_code == 200:
@@ -264,7 +510,7 @@ class AudioPlayer:
                             # 如果HEAD请求失败但返回了重定向链接，尝试使用重定向链接
                             if head_response.status_code in (301, 302, 303, 307, 308) and 'Location' in head_response.headers:
                                 redirect_url = head_response.headers['Location']
-                                logger.debug(f"重定向到: {redirect_url[:100]}...")
+                                logger.debug("重定向到: %s...", redirect_url[:100])
                                 # 更新Host头以匹配重定向URL
                                 from urllib.parse import urlparse
                                 redirect_host = urlparse(redirect_url).netloc
@@ -280,7 +526,7 @@ class AudioPlayer:
                     
                     # 检查响应状态
                     if response.status_code == 200:
-                        logger.debug(f"下载成功，开始写入临时文件")
+                        logger.debug("下载成功，开始写入临时文件")
                         break
                     else:
                         logger.warning(f"下载文件返回非200状态码: {response.status_code}，重试中...")
@@ -289,10 +535,10 @@ class AudioPlayer:
                 except requests.exceptions.RequestException as e:
                     logger.error(f"下载请求异常: {str(e)}")
                     if hasattr(e, 'response') and e.response:
-                        logger.debug(f"错误响应状态码: {e.response.status_code}")
-                        logger.debug(f"错误响应头: {e.response.headers}")
+                        logger.debug("错误响应状态码: %s", e.response.status_code)
+                        logger.debug("错误响应头: %s", e.response.headers)
                         if e.response.content:
-                            logger.debug(f"错误响应内容: {e.response.text[:500]}")  # 只记录前500个字符
+                            logger.debug("错误响应内容: %s", e.response.text[:500])  # 只记录前500个字符
                     
                     retry_count += 1
                     if retry_count < max_retries:
@@ -304,12 +550,24 @@ class AudioPlayer:
             
             with open(temp_file, 'wb') as f:
                 for chunk in response.iter_content(chunk_size=8192):
+                    if self._superseded():
+                        logger.info(f"已切换到其他歌曲，取消下载: {item.server_filename}")
+                        response.close()
+                        return None
                     f.write(chunk)
             
+            completed = True
             return temp_file
         except Exception as e:
             logger.error(f"下载文件失败: {str(e)}")
             return None
+        finally:
+            # 下载失败或取消时删除不完整的临时文件
+            if temp_file and not completed and os.path.exists(temp_file):
+                try:
+                    os.remove(temp_file)
+                except OSError as e:
+                    logger.error(f"清理临时文件失败: {str(e)}")
     
     def _check_file_validity(self, item: PlaylistItem) -> bool:
         """
@@ -347,6 +605,7 @@ class AudioPlayer:
         
         return None
     
+    @player_command
     def set_playlist(self, playlist: Playlist) -> bool:
         """
         设置播放列表
@@ -367,6 +626,7 @@ class AudioPlayer:
         
         return True
     
+    @player_command
     def play(self, index: int = 0) -> bool:
         """
         播放
@@ -383,15 +643,15 @@ class AudioPlayer:
         
         # 如果是随机播放模式，则始终随机选择一个索引，不考虑用户指定的索引
         if self.play_mode == self.PlayMode.RANDOM:
-            playlist_length = len(self.current_playlist.items)
+            playlist_length = self._playlist_length(index)
             if playlist_length > 1:
                 # 随机选择一个索引
                 original_index = index
-                index = random.randint(0, playlist_length - 1)
+                index = self._random_index()
                 logger.info(f"随机播放模式，从索引 {original_index} 随机选择到索引: {index}")
         
         # 检查索引是否有效
-        if index < 0 or index >= len(self.current_playlist.items):
+        if index < 0 or index >= self._playlist_length(index):
             logger.warning(f"无效的播放索引: {index}")
             return False
         
@@ -419,7 +679,8 @@ class AudioPlayer:
         # 下载文件
         self.temp_file = self._download_file(self.current_item)
         if not self.temp_file:
-            logger.error(f"下载文件失败: {self.current_item.server_filename}")
+            if not self._superseded():
+                logger.error(f"下载文件失败: {self.current_item.server_filename}")
             return False
         
         try:
@@ -433,18 +694,21 @@ class AudioPlayer:
                 self.is_playing = True
                 self.is_paused = False
                 
-                # 添加到最近播放列表
-                if self.playlist_manager:
-                    self.playlist_manager.add_to_recent_playlist(self.current_item.to_dict())
+                # 开始计时
+                self._play_started = time.monotonic()
+                self._played_seconds = 0.0
                 
-                # 启动事件线程
-                self._start_event_thread()
+                # 记录到播放历史（后台写入）
+                if self.playlist_manager:
+                    self.playlist_manager.add_to_recent_playlist(
+                        self.current_item.to_dict(), self.current_playlist.name
+                    )
                 
                 # 调用播放回调
                 if self.on_play_callback:
                     self.on_play_callback(self.current_item)
                 
-                logger.debug(f"正在播放: {self.current_item.server_filename}")
+                logger.debug("正在播放: %s", self.current_item.server_filename)
                 return True
             else:
                 logger.error(f"播放失败: {result}")
@@ -453,6 +717,7 @@ class AudioPlayer:
             logger.error(f"播放异常: {str(e)}")
             return False
     
+    @player_command
     def pause(self) -> bool:
         """
         暂停/恢复
@@ -468,6 +733,7 @@ class AudioPlayer:
             # 恢复播放
             self.player.play()
             self.is_paused = False
+            self._play_started = time.monotonic()
             logger.debug("恢复播放")
             
             # 调用播放回调
@@ -477,6 +743,9 @@ class AudioPlayer:
             # 暂停播放
             self.player.pause()
             self.is_paused = True
+            if self._play_started is not None:
+                self._played_seconds += time.monotonic() - self._play_started
+                self._play_started = None
             logger.debug("暂停播放")
             
             # 调用暂停回调
@@ -485,6 +754,7 @@ class AudioPlayer:
         
         return True
     
+    @player_command
     def stop(self) -> bool:
         """
         停止
@@ -495,6 +765,9 @@ class AudioPlayer:
         if not self.is_playing:
             return True
         
+        # 记录未播放完的歌曲
+        self._record_play_end(completed=False)
+        
         # 停止播放
         self.player.stop()
         self.is_playing = False
@@ -510,6 +783,75 @@ class AudioPlayer:
         logger.debug("停止播放")
         return True
     
+    def _playlist_length(self, index: Optional[int] = None) -> int:
+        """
+        获取播放列表长度；按需列出的播放列表（如目录播放列表）只列出到需要的位置
+        
+        Args:
+            index: 需要访问的位置（会同时列出下一首），为 None 时多列出一页
+            
+        Returns:
+            int: 可播放的歌曲数
+        """
+        return peek_length(self.current_playlist.items, None if index is None else index + 1)
+    
+    def _random_index(self) -> int:
+        """
+        随机选择一首歌曲，避免连续播放同一首；启用加权随机播放时按播放统计加权
+        
+        Returns:
+            int: 播放索引
+        """
+        items = self.current_playlist.items
+        playlist_length = self._playlist_length()
+        if playlist_length <= 1:
+            return 0
+        
+        weights = None
+        if self.playlist_manager and CONFIG.get("history.weighted_shuffle", True):
+            try:
+                if hasattr(items, 'column'):
+                    fs_ids = items.column('fs_id')
+                else:
+                    fs_ids = [items[i].fs_id for i in range(playlist_length)]
+                weights = self.playlist_manager.stats.shuffle_weights(fs_ids)
+            except Exception as e:
+                logger.warning(f"计算随机播放权重失败，使用等概率随机: {str(e)}")
+        
+        if weights is None:
+            weights = [1.0] * playlist_length
+        if 0 <= self.current_index < playlist_length:
+            weights[self.current_index] = 0.0
+        
+        return random.choices(range(playlist_length), weights=weights)[0]
+    
+    def _record_play_end(self, completed: bool) -> None:
+        """
+        记录当前歌曲播放结束
+        
+        Args:
+            completed: 是否自然播放结束
+        """
+        if not self.playlist_manager or not self.current_item:
+            return
+        
+        played = self._played_seconds
+        if self._play_started is not None:
+            played += time.monotonic() - self._play_started
+        self._play_started = None
+        self._played_seconds = 0.0
+        
+        length = self.media.get_duration() / 1000 if self.media else 0
+        playlist_name = self.current_playlist.name if self.current_playlist else ""
+        
+        try:
+            self.playlist_manager.record_play_end(
+                self.current_item.fs_id, played, max(length, 0), completed, playlist_name
+            )
+        except Exception as e:
+            logger.error(f"记录播放历史失败: {str(e)}")
+    
+    @player_command
     def set_play_mode(self, mode: 'PlayMode') -> None:
         """
         设置播放模式
@@ -518,7 +860,7 @@ class AudioPlayer:
             mode: 播放模式
         """
         self.play_mode = mode
-        logger.debug(f"设置播放模式: {mode.value}")
+        logger.debug("设置播放模式: %s", mode.value)
     
     def get_play_mode(self) -> str:
         """
@@ -529,6 +871,59 @@ class AudioPlayer:
         """
         return self.play_mode.value
     
+    def _next_index(self, index: int) -> Optional[int]:
+        """
+        根据播放模式计算下一曲索引
+        
+        Args:
+            index: 当前索引
+            
+        Returns:
+            Optional[int]: 下一曲索引，顺序播放到最后一首时为 None
+        """
+        playlist_length = self._playlist_length(index + 1)
+        
+        if self.play_mode == self.PlayMode.SEQUENTIAL:
+            # 顺序播放：播放到最后一首后停止
+            if index + 1 >= playlist_length:
+                logger.info("已是最后一首歌曲")
+                return None
+            return index + 1
+        
+        if self.play_mode == self.PlayMode.RANDOM:
+            # 随机播放：随机选择一首歌曲
+            return self._random_index()
+        
+        # 循环播放：播放到最后一首后回到第一首
+        return (index + 1) % playlist_length
+    
+    def _prev_index(self, index: int) -> Optional[int]:
+        """
+        根据播放模式计算上一曲索引
+        
+        Args:
+            index: 当前索引
+            
+        Returns:
+            Optional[int]: 上一曲索引，顺序播放到第一首时为 None
+        """
+        playlist_length = self._playlist_length(index)
+        
+        if self.play_mode == self.PlayMode.SEQUENTIAL:
+            # 顺序播放：播放到第一首后停止
+            if index - 1 < 0:
+                logger.info("已是第一首歌曲")
+                return None
+            return index - 1
+        
+        if self.play_mode == self.PlayMode.RANDOM:
+            # 随机播放：随机选择一首歌曲
+            return self._random_index()
+        
+        # 循环播放：播放到第一首后回到最后一首
+        return (index - 1) % playlist_length
+    
+    @player_command
     def next(self) -> bool:
         """
         下一曲
@@ -540,32 +935,9 @@ class AudioPlayer:
             logger.warning("没有设置播放列表或播放列表为空")
             return False
         
-        playlist_length = len(self.current_playlist.items)
-        
-        # 根据播放模式计算下一曲索引
-        if self.play_mode == self.PlayMode.SEQUENTIAL:
-            # 顺序播放：播放到最后一首后停止
-            next_index = self.current_index + 1
-            if next_index >= playlist_length:
-                logger.info("已是最后一首歌曲")
-                return False
-                
-        elif self.play_mode == self.PlayMode.LOOP:
-            # 循环播放：播放到最后一首后回到第一首
-            next_index = (self.current_index + 1) % playlist_length
-            
-        elif self.play_mode == self.PlayMode.RANDOM:
-            # 随机播放：随机选择一首歌曲
-            if playlist_length > 1:
-                # 避免连续播放同一首歌
-                next_index = random.randint(0, playlist_length - 1)
-                while next_index == self.current_index and playlist_length > 1:
-                    next_index = random.randint(0, playlist_length - 1)
-            else:
-                next_index = 0
-        else:
-            # 默认循环播放
-            next_index = (self.current_index + 1) % playlist_length
+        next_index = self._next_index(self.current_index)
+        if next_index is None:
+            return False
         
         # 播放下一曲
         result = self.play(next_index)
@@ -576,6 +948,7 @@ class AudioPlayer:
         
         return result
     
+    @player_command
     def prev(self) -> bool:
         """
         上一曲
@@ -587,32 +960,9 @@ class AudioPlayer:
             logger.warning("没有设置播放列表或播放列表为空")
             return False
         
-        playlist_length = len(self.current_playlist.items)
-        
-        # 根据播放模式计算上一曲索引
-        if self.play_mode == self.PlayMode.SEQUENTIAL:
-            # 顺序播放：播放到第一首后停止
-            prev_index = self.current_index - 1
-            if prev_index < 0:
-                logger.info("已是第一首歌曲")
-                return False
-                
-        elif self.play_mode == self.PlayMode.LOOP:
-            # 循环播放：播放到第一首后回到最后一首
-            prev_index = (self.current_index - 1) % playlist_length
-            
-        elif self.play_mode == self.PlayMode.RANDOM:
-            # 随机播放：随机选择一首歌曲
-            if playlist_length > 1:
-                # 避免连续播放同一首歌
-                prev_index = random.randint(0, playlist_length - 1)
-                while prev_index == self.current_index and playlist_length > 1:
-                    prev_index = random.randint(0, playlist_length - 1)
-            else:
-                prev_index = 0
-        else:
-            # 默认循环播放
-            prev_index = (self.current_index - 1) % playlist_length
+        prev_index = self._prev_index(self.current_index)
+        if prev_index is None:
+            return False
         
         # 播放上一曲
         result = self.play(prev_index)
@@ -623,6 +973,7 @@ class AudioPlayer:
         
         return result
     
+    @player_command
     def set_volume(self, volume: int) -> bool:
         """
         设置音量
@@ -637,8 +988,9 @@ class AudioPlayer:
         volume = max(0, min(100, volume))
         
         # 设置音量
+        self._volume = volume
         self.player.audio_set_volume(volume)
-        logger.debug(f"设置音量: {volume}")
+        logger.debug("设置音量: %s", volume)
         return True
     
     def get_volume(self) -> int:
@@ -648,8 +1000,11 @@ class AudioPlayer:
         Returns:
             int: 音量 (0-100)
         """
+        if self._player is None:
+            return self._volume
         return self.player.audio_get_volume()
         
+    @player_command
     def toggle_mute(self) -> bool:
         """
         切换静音状态
@@ -664,7 +1019,7 @@ class AudioPlayer:
         # 切换静音状态
         is_muted = self.player.audio_get_mute()
         self.player.audio_set_mute(not is_muted)
-        logger.debug(f"静音状态: {'开启' if not is_muted else '关闭'}")
+        logger.debug("静音状态: %s", '开启' if not is_muted else '关闭')
         return True
         
     def is_muted(self) -> bool:
@@ -674,6 +1029,8 @@ class AudioPlayer:
         Returns:
             bool: 是否静音
         """
+        if self._player is None:
+            return False
         return self.player.audio_get_mute()
     
     def get_position(self) -> float:
@@ -688,6 +1045,7 @@ class AudioPlayer:
         
         return self.player.get_position()
     
+    @player_command
     def set_position(self, position: float) -> bool:
         """
         设置播放位置
@@ -707,7 +1065,7 @@ class AudioPlayer:
         
         # 设置位置
         self.player.set_position(position)
-        logger.debug(f"设置播放位置: {position:.2f}")
+        logger.debug("设置播放位置: %.2f", position)
         return True
     
     def get_time(self) -> int:
@@ -790,11 +1148,15 @@ class AudioPlayer:
             output_file = get_temp_file(suffix=output_ext)
             
             if PYDUB_AVAILABLE:
+                from pydub import AudioSegment
+                
                 # 使用pydub加载音频
                 audio = AudioSegment.from_file(input_file)
                 # 导出为指定格式
                 audio.export(output_file, format=output_format)
             else:
+                import soundfile as sf
+                
                 # 使用soundfile加载音频
                 data, samplerate = sf.read(input_file)
                 # 导出为指定格式
@@ -807,8 +1169,5 @@ class AudioPlayer:
     
     def __del__(self):
         """析构函数"""
-        # 停止播放
-        self.stop()
-        
-        # 停止事件线程
-        self._stop_event_thread()
+        # 命令线程持有播放器的引用，析构时命令线程已退出，直接在当前线程中停止播放
+        AudioPlayer.stop.__wrapped__(self)
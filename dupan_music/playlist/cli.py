@@ -14,17 +14,25 @@ from rich.console import Console
 from rich.table import Table
 from rich.panel import Panel
 from rich.prompt import Prompt, Confirm
+from rich.progress import Progress
 from rich import box
 
 from dupan_music.playlist.playlist import PlaylistManager, Playlist, PlaylistItem
+from dupan_music.playlist.verify import PlaylistVerifier
+from dupan_music.playlist.m3u import PlaylistImporter, detect_format, export_file
+from dupan_music.playlist import setops
+from dupan_music.library.index import LibraryIndex
 from dupan_music.api.api import BaiduPanAPI
 from dupan_music.auth.auth import BaiduPanAuth
 from dupan_music.utils.logger import get_logger
-from dupan_music.utils.file_utils import format_size
+from dupan_music.utils.file_utils import format_size, parse_size
 
 logger = get_logger(__name__)
 console = Console()
 
+# 导入时最多列出的未找到条目数
+UNRESOLVED_DISPLAY_LIMIT = 20
+
 def get_playlist_manager() -> PlaylistManager:
     """获取播放列表管理器实例"""
     try:
@@ -50,7 +58,8 @@ def playlist():
 def list_playlists(json_output):
     """列出所有播放列表"""
     manager = get_playlist_manager()
-    playlists = manager.get_all_playlists()
+    # 使用播放列表摘要，无需读取每个播放列表的全部歌曲
+    playlists = manager.get_playlist_summaries()
     
     if not playlists:
         console.print("[yellow]没有找到播放列表[/yellow]")
@@ -66,13 +75,15 @@ def list_playlists(json_output):
     table.add_column("名称", style="cyan")
     table.add_column("描述", style="green")
     table.add_column("歌曲数", justify="right")
+    table.add_column("总大小", justify="right")
     table.add_column("创建时间", style="dim")
     table.add_column("更新时间", style="dim")
     
     for playlist in playlists:
         name = playlist.name
         description = playlist.description
-        count = len(playlist.items)
+        count = playlist.item_count
+        total_size = format_size(playlist.total_size)
         create_time = datetime.fromtimestamp(playlist.create_time).strftime('%Y-%m-%d %H:%M:%S')
         update_time = datetime.fromtimestamp(playlist.update_time).strftime('%Y-%m-%d %H:%M:%S')
         
@@ -80,7 +91,7 @@ def list_playlists(json_output):
         if name == PlaylistManager.RECENT_PLAYLIST_NAME:
             name = f"[bold]{name}[/bold]"
         
-        table.add_row(name, description, str(count), create_time, update_time)
+        table.add_row(name, description, str(count), total_size, create_time, update_time)
     
     console.print(table)
     console.print(f"[bold green]共 {len(playlists)} 个播放列表[/bold green]")
@@ -150,6 +161,79 @@ def create_playlist(name, description):
     else:
         console.print(f"[red]创建播放列表 '{name}' 失败[/red]")
 
+def _timestamp(value: Optional[datetime]) -> Optional[int]:
+    """日期转换为时间戳"""
+    return int(value.timestamp()) if value else None
+
+def _size(value: Optional[str]) -> Optional[int]:
+    """解析文件大小参数"""
+    if not value:
+        return None
+    try:
+        return parse_size(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+@playlist.command("smart")
+@click.argument('name')
+@click.option('--description', '-d', default='', help='播放列表描述')
+@click.option('--prefix', '-p', default='', help='路径前缀（目录）')
+@click.option('--ext', '-e', multiple=True, help='扩展名，可多次指定，如 -e flac -e ape')
+@click.option('--min-size', default=None, help='最小文件大小，如 10M')
+@click.option('--max-size', default=None, help='最大文件大小，如 1G')
+@click.option('--added-after', type=click.DateTime(formats=['%Y-%m-%d']), help='添加到曲库的日期下限')
+@click.option('--added-before', type=click.DateTime(formats=['%Y-%m-%d']), help='添加到曲库的日期上限')
+@click.option('--modified-after', type=click.DateTime(formats=['%Y-%m-%d']), help='修改日期下限')
+@click.option('--modified-before', type=click.DateTime(formats=['%Y-%m-%d']), help='修改日期上限')
+@click.option('--min-plays', type=int, default=None, help='最少播放次数')
+@click.option('--max-plays', type=int, default=None, help='最多播放次数')
+@click.option('--text', '-t', default='', help='路径包含的文本（只忽略英文字母的大小写）')
+@click.option('--force', '-f', is_flag=True, help='替换同名智能播放列表')
+def create_smart_playlist(name, description, prefix, ext, min_size, max_size, added_after, added_before,
+                          modified_after, modified_before, min_plays, max_plays, text, force):
+    """创建智能播放列表（按条件从本地曲库索引中选取歌曲）"""
+    from dupan_music.playlist.smart import SmartQuery
+    
+    query = SmartQuery(
+        path_prefix=prefix,
+        extensions=ext,
+        min_size=_size(min_size),
+        max_size=_size(max_size),
+        added_after=_timestamp(added_after),
+        added_before=_timestamp(added_before),
+        modified_after=_timestamp(modified_after),
+        modified_before=_timestamp(modified_before),
+        min_plays=min_plays,
+        max_plays=max_plays,
+        text=text
+    )
+    
+    manager = get_playlist_manager()
+    playlist = manager.create_smart_playlist(name, query, description, overwrite=force)
+    
+    if playlist:
+        console.print(f"[green]已创建智能播放列表 '{name}'，当前共 {playlist.item_count} 首歌曲[/green]")
+        console.print("[dim]歌曲来自本地曲库索引，可使用 'library scan' 更新索引[/dim]")
+    else:
+        console.print(f"[red]创建智能播放列表 '{name}' 失败，播放列表可能已存在（使用 --force 替换智能播放列表）[/red]")
+
+@playlist.command("folder")
+@click.argument('name')
+@click.argument('path')
+@click.option('--recursive/--no-recursive', default=False, help='是否包含子目录')
+@click.option('--description', '-d', default='', help='播放列表描述')
+def create_folder_playlist(name, path, recursive, description):
+    """创建绑定网盘目录的播放列表（播放时按需列出目录，始终与目录内容一致）"""
+    manager = get_playlist_manager()
+    
+    playlist = manager.create_folder_playlist(name, path, recursive, description)
+    
+    if playlist:
+        scope = "及其子目录" if recursive else ""
+        console.print(f"[green]已创建目录播放列表 '{name}'，歌曲来自 '{path}'{scope}[/green]")
+    else:
+        console.print(f"[red]创建目录播放列表 '{name}' 失败，播放列表可能已存在[/red]")
+
 @playlist.command("delete")
 @click.argument('name')
 @click.option('--force', '-f', is_flag=True, help='强制删除，不确认')
@@ -193,27 +277,24 @@ def add_to_playlist(playlist_name, file_ids):
         console.print("[red]您尚未登录，请先运行 'dupan-music login' 命令登录[/red]")
         return
     
-    # 添加文件
-    success_count = 0
-    for fs_id in file_ids:
+    # 批量获取文件信息
+    file_infos = []
+    batch_size = BaiduPanAPI.FILEMETAS_MAX_IDS
+    for i in range(0, len(file_ids), batch_size):
+        batch = file_ids[i:i + batch_size]
         try:
-            # 获取文件信息
-            file_info = manager.api.get_file_info([fs_id])
-            
-            if not file_info:
-                console.print(f"[red]文件ID {fs_id} 不存在[/red]")
-                continue
-            
-            # 添加到播放列表
-            success = manager.add_to_playlist(playlist_name, file_info[0])
-            
-            if success:
-                success_count += 1
-                console.print(f"[green]已添加文件 '{file_info[0].get('server_filename')}' 到播放列表[/green]")
-            else:
-                console.print(f"[red]添加文件 '{file_info[0].get('server_filename')}' 失败[/red]")
+            file_infos.extend(manager.api.get_file_info(list(batch)))
         except Exception as e:
-            console.print(f"[red]添加文件ID {fs_id} 失败: {str(e)}[/red]")
+            console.print(f"[red]获取文件信息失败: {str(e)}[/red]")
+    
+    # 报告不存在的文件
+    found_ids = {file_info.get('fs_id') for file_info in file_infos}
+    for fs_id in file_ids:
+        if fs_id not in found_ids:
+            console.print(f"[red]文件ID {fs_id} 不存在[/red]")
+    
+    # 添加文件，只保存一次
+    success_count = manager.add_many(playlist_name, file_infos)
     
     console.print(f"[bold green]共成功添加 {success_count}/{len(file_ids)} 个文件[/bold green]")
 
@@ -230,17 +311,15 @@ def remove_from_playlist(playlist_name, file_ids):
         console.print(f"[red]播放列表 '{playlist_name}' 不存在[/red]")
         return
     
-    # 移除文件
-    success_count = 0
+    # 报告不在播放列表中的文件
+    existing_ids = {item.fs_id for item in playlist.items}
     for fs_id in file_ids:
-        success = manager.remove_from_playlist(playlist_name, fs_id)
-        
-        if success:
-            success_count += 1
-            console.print(f"[green]已从播放列表移除文件ID {fs_id}[/green]")
-        else:
+        if fs_id not in existing_ids:
             console.print(f"[red]从播放列表移除文件ID {fs_id} 失败[/red]")
     
+    # 移除文件，只保存一次
+    success_count = manager.remove_many(playlist_name, file_ids)
+    
     console.print(f"[bold green]共成功移除 {success_count}/{len(file_ids)} 个文件[/bold green]")
 
 @playlist.command("clear")
@@ -269,8 +348,9 @@ def clear_playlist(playlist_name, force):
 
 @playlist.command("sort")
 @click.argument('playlist_name')
-@click.option('--key', '-k', type=click.Choice(['name', 'time', 'size', 'add_time']), 
-              default='name', help='排序键')
+@click.option('--key', '-k', type=click.Choice(['name', 'time', 'size', 'add_time', 'natural', 'pinyin',
+                                               'artist', 'album', 'track']),
+              default='name', help='排序键（natural: 自然排序，pinyin: 拼音排序，artist/album/track: 按歌手/专辑/音轨号）')
 @click.option('--desc/--asc', default=False, help='是否降序排序')
 def sort_playlist(playlist_name, key, desc):
     """排序播放列表"""
@@ -289,6 +369,96 @@ def sort_playlist(playlist_name, key, desc):
     order_type = "降序" if desc else "升序"
     console.print(f"[green]已成功按 {key} {order_type}排序播放列表 '{playlist_name}'[/green]")
 
+def _load_pair(manager, name_a, name_b):
+    """获取参与集合运算的两个播放列表"""
+    playlist_a = manager.get_playlist(name_a)
+    playlist_b = manager.get_playlist(name_b)
+    for name, found in ((name_a, playlist_a), (name_b, playlist_b)):
+        if not found:
+            console.print(f"[red]播放列表 '{name}' 不存在[/red]")
+            return None
+    return playlist_a, playlist_b
+
+def _run_set_operation(operation, name_a, name_b, output, force):
+    """执行集合运算并把结果一次性保存到输出播放列表（默认为A，替换A前需确认）"""
+    manager = get_playlist_manager()
+    pair = _load_pair(manager, name_a, name_b)
+    if not pair:
+        return
+    
+    if not output and not force and not Confirm.ask(f"未指定 --output，确定要用结果替换播放列表 '{name_a}' 吗?"):
+        console.print("[yellow]已取消[/yellow]")
+        return
+    
+    items = getattr(setops, operation)(pair[0].items, pair[1].items)
+    target = output or name_a
+    result = setops.save_result(manager, target, items, description=f"{name_a} {operation} {name_b}")
+    
+    if result:
+        console.print(f"[green]已将结果保存到播放列表 '{target}'，共 {len(items)} 首歌曲[/green]")
+    else:
+        console.print(f"[red]保存播放列表 '{target}' 失败，目标可能是只读播放列表[/red]")
+
+@playlist.command("union")
+@click.argument('name_a')
+@click.argument('name_b')
+@click.option('--output', '-o', default=None, help='保存结果的播放列表（默认为A）')
+@click.option('--force', '-f', is_flag=True, help='未指定 --output 时不确认直接替换A')
+def union_playlists(name_a, name_b, output, force):
+    """并集：A 加上 B 中 A 没有的歌曲（按文件ID和MD5去重）"""
+    _run_set_operation('union', name_a, name_b, output, force)
+
+@playlist.command("intersect")
+@click.argument('name_a')
+@click.argument('name_b')
+@click.option('--output', '-o', default=None, help='保存结果的播放列表（默认为A）')
+@click.option('--force', '-f', is_flag=True, help='未指定 --output 时不确认直接替换A')
+def intersect_playlists(name_a, name_b, output, force):
+    """交集：A 中 B 也有的歌曲"""
+    _run_set_operation('intersect', name_a, name_b, output, force)
+
+@playlist.command("subtract")
+@click.argument('name_a')
+@click.argument('name_b')
+@click.option('--output', '-o', default=None, help='保存结果的播放列表（默认为A）')
+@click.option('--force', '-f', is_flag=True, help='未指定 --output 时不确认直接替换A')
+def subtract_playlists(name_a, name_b, output, force):
+    """差集：A 中 B 没有的歌曲"""
+    _run_set_operation('subtract', name_a, name_b, output, force)
+
+@playlist.command("diff")
+@click.argument('name_a')
+@click.argument('name_b')
+@click.option('--output', '-o', default=None, help='把只在其中一个播放列表中的歌曲保存到该播放列表')
+def diff_playlists(name_a, name_b, output):
+    """对比两个播放列表"""
+    manager = get_playlist_manager()
+    pair = _load_pair(manager, name_a, name_b)
+    if not pair:
+        return
+    
+    only_a, only_b, common = setops.diff(pair[0].items, pair[1].items)
+    
+    table = Table(show_header=True, header_style="bold magenta", box=box.ROUNDED)
+    table.add_column("", style="dim", width=2)
+    table.add_column("文件名", style="cyan")
+    table.add_column("路径", style="blue")
+    for marker, items in (("-", only_a), ("+", only_b)):
+        for item in items:
+            table.add_row(marker, item.server_filename, item.path)
+    
+    if only_a or only_b:
+        console.print(table)
+    console.print(f"[bold]共有 {common} 首，只在 '{name_a}' 中 {len(only_a)} 首 (-)，"
+                  f"只在 '{name_b}' 中 {len(only_b)} 首 (+)[/bold]")
+    
+    if output:
+        result = setops.save_result(manager, output, only_a + only_b, description=f"{name_a} diff {name_b}")
+        if result:
+            console.print(f"[green]已将差异保存到播放列表 '{output}'[/green]")
+        else:
+            console.print(f"[red]保存播放列表 '{output}' 失败，目标可能是只读播放列表[/red]")
+
 @playlist.command("recent")
 @click.option('--json', 'json_output', is_flag=True, help='以JSON格式输出')
 def show_recent(json_output):
@@ -365,24 +535,20 @@ def add_from_path(playlist_name, path, recursive):
             console.print(f"[yellow]路径 '{path}' 下没有音频文件[/yellow]")
             return
         
-        # 添加文件
-        success_count = 0
-        for file in files:
-            success = manager.add_to_playlist(playlist_name, file)
-            
-            if success:
-                success_count += 1
-                console.print(f"[green]已添加文件 '{file.get('server_filename')}' 到播放列表[/green]")
+        # 添加文件，只保存一次
+        success_count = manager.add_many(playlist_name, files)
         
         console.print(f"[bold green]共成功添加 {success_count}/{len(files)} 个文件[/bold green]")
     except Exception as e:
         console.print(f"[red]添加文件失败: {str(e)}[/red]")
 
-@playlist.command("verify")
+@playlist.command("export")
 @click.argument('playlist_name')
-@click.option('--auto-refresh', is_flag=True, help='自动刷新无效文件')
-def verify_playlist(playlist_name, auto_refresh):
-    """验证播放列表文件有效性"""
+@click.argument('file_path', type=click.Path(dir_okay=False))
+@click.option('--local-root', default=None, type=click.Path(file_okay=False),
+              help='导出M3U/PLS时把网盘路径映射到该本地目录下')
+def export_playlist(playlist_name, file_path, local_root):
+    """导出播放列表（按扩展名选择格式：.m3u/.m3u8/.pls，其他为JSON）"""
     manager = get_playlist_manager()
     
     # 检查播放列表是否存在
@@ -391,46 +557,156 @@ def verify_playlist(playlist_name, auto_refresh):
         console.print(f"[red]播放列表 '{playlist_name}' 不存在[/red]")
         return
     
+    if detect_format(file_path) != 'json':
+        try:
+            count = export_file(playlist, file_path, local_root=local_root)
+        except OSError as e:
+            console.print(f"[red]导出播放列表 '{playlist_name}' 失败: {str(e)}[/red]")
+            return
+        console.print(f"[green]已将播放列表 '{playlist_name}' 的 {count} 首歌曲导出到 {file_path}[/green]")
+        return
+    
+    if manager.export_playlist(playlist_name, file_path):
+        console.print(f"[green]已将播放列表 '{playlist_name}' 导出到 {file_path}[/green]")
+    else:
+        console.print(f"[red]导出播放列表 '{playlist_name}' 失败[/red]")
+
+@playlist.command("import")
+@click.argument('file_path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--name', '-n', default=None, help='播放列表名称（默认使用文件中的名称）')
+@click.option('--force', '-f', is_flag=True, help='覆盖同名播放列表')
+@click.option('--base-dir', default='/', help='M3U/PLS 中相对路径所基于的网盘目录')
+@click.option('--strip-prefix', default='', help='M3U/PLS 中要去掉的本地路径前缀，如 D:\\Music')
+def import_playlist(file_path, name, force, base_dir, strip_prefix):
+    """导入播放列表（按扩展名选择格式：.m3u/.m3u8/.pls，其他为JSON）"""
+    manager = get_playlist_manager()
+    
+    if detect_format(file_path) != 'json':
+        _import_external(manager, file_path, name, force, base_dir, strip_prefix)
+        return
+    
+    playlist = manager.import_playlist(file_path, name=name, overwrite=force)
+    
+    if playlist:
+        console.print(f"[green]已导入播放列表 '{playlist.name}'，共 {len(playlist.items)} 首歌曲[/green]")
+    else:
+        console.print(f"[red]导入播放列表失败，播放列表可能已存在（使用 --force 覆盖）或文件格式无效[/red]")
+
+def _import_external(manager, file_path, name, force, base_dir, strip_prefix):
+    """导入M3U/PLS播放列表并报告找不到的条目"""
+    index = None
+    try:
+        index = LibraryIndex.open_default()
+    except Exception as e:
+        logger.warning(f"打开曲库索引失败，只按目录列表查找文件: {str(e)}")
+    
+    if not manager.api and not index:
+        console.print("[red]您尚未登录，请先运行 'dupan-music login' 命令登录[/red]")
+        return
+    
+    try:
+        with console.status("[cyan]正在查找播放列表中的文件...[/cyan]"):
+            result = PlaylistImporter(manager, index).import_file(
+                file_path, name=name, base_dir=base_dir, strip_prefix=strip_prefix, overwrite=force
+            )
+    except OSError as e:
+        console.print(f"[red]读取文件 {file_path} 失败: {str(e)}[/red]")
+        return
+    finally:
+        if index:
+            index.close()
+    
+    if not result.playlist:
+        console.print(f"[red]导入播放列表失败，播放列表可能已存在（使用 --force 覆盖）[/red]")
+        return
+    
+    console.print(f"[green]已导入播放列表 '{result.playlist.name}'，"
+                  f"共 {len(result.playlist.items)}/{result.total} 首歌曲[/green]")
+    
+    if result.unresolved:
+        console.print(f"[yellow]{len(result.unresolved)} 个条目在网盘中找不到:[/yellow]")
+        for location in result.unresolved[:UNRESOLVED_DISPLAY_LIMIT]:
+            console.print(f"  {location}")
+        if len(result.unresolved) > UNRESOLVED_DISPLAY_LIMIT:
+            console.print(f"  ... 另有 {len(result.unresolved) - UNRESOLVED_DISPLAY_LIMIT} 个")
+
+@playlist.command("verify")
+@click.argument('playlist_name', required=False)
+@click.option('--all', 'verify_all', is_flag=True, help='验证所有播放列表')
+@click.option('--auto-refresh', is_flag=True, help='自动刷新已变化的文件信息，并重新定位已移动或重新上传的文件')
+@click.option('--workers', '-w', default=PlaylistVerifier.MAX_WORKERS, help='并发请求数')
+def verify_playlist(playlist_name, verify_all, auto_refresh, workers):
+    """验证播放列表文件有效性"""
+    if not playlist_name and not verify_all:
+        console.print("[red]请指定播放列表名称，或使用 --all 验证所有播放列表[/red]")
+        return
+    
+    manager = get_playlist_manager()
+    
+    # 获取要验证的播放列表
+    if verify_all:
+        # 目录和智能播放列表的歌曲来自网盘目录或曲库索引，无需验证，也避免列出整个目录
+        playlists = [playlist for playlist in manager.get_all_playlists() if not playlist.read_only]
+    else:
+        playlist = manager.get_playlist(playlist_name)
+        if not playlist:
+            console.print(f"[red]播放列表 '{playlist_name}' 不存在[/red]")
+            return
+        if playlist.read_only:
+            console.print(f"[yellow]播放列表 '{playlist_name}' 是目录或智能播放列表，歌曲来自网盘目录或曲库索引，无需验证[/yellow]")
+            return
+        playlists = [playlist]
+    
     # 检查是否有API
     if not manager.api:
         console.print("[red]您尚未登录，请先运行 'dupan-music login' 命令登录[/red]")
         return
     
-    # 验证文件
-    invalid_items = []
-    refreshed_items = []
+    # 曲库索引用于重新定位失效文件，打开失败时只按目录列表查找
+    try:
+        index = LibraryIndex.open_default()
+    except Exception as e:
+        logger.warning(f"打开曲库索引失败: {str(e)}")
+        index = None
     
-    console.print(f"[cyan]正在验证播放列表 '{playlist_name}' 中的文件...[/cyan]")
+    verifier = PlaylistVerifier(manager, max_workers=workers, index=index)
     
-    for i, item in enumerate(playlist.items):
-        valid = manager.check_file_validity(item.fs_id)
-        
-        if not valid:
-            console.print(f"[yellow]文件 '{item.server_filename}' 无效[/yellow]")
-            invalid_items.append(i)
-            
-            # 尝试刷新
-            if auto_refresh:
-                refreshed_info = manager.refresh_file(item.fs_id)
-                
-                if refreshed_info:
-                    # 更新文件信息
-                    new_item = PlaylistItem.from_api_result(refreshed_info)
-                    playlist.items[i] = new_item
-                    refreshed_items.append(item.server_filename)
-                    console.print(f"[green]已刷新文件 '{item.server_filename}'[/green]")
-    
-    # 保存更新后的播放列表
-    if refreshed_items:
-        manager.save_playlist(playlist)
-        console.print(f"[bold green]已成功刷新 {len(refreshed_items)} 个文件[/bold green]")
+    try:
+        with Progress() as progress:
+            task = progress.add_task("[cyan]正在验证文件...", total=None)
+            results = verifier.verify(
+                playlists,
+                refresh=auto_refresh,
+                on_start=lambda total: progress.update(task, total=total),
+                on_progress=lambda count: progress.advance(task, count)
+            )
+    finally:
+        if index:
+            index.close()
     
     # 显示结果
-    if not invalid_items:
-        console.print(f"[bold green]播放列表 '{playlist_name}' 中的所有文件都有效[/bold green]")
-    elif not auto_refresh:
-        console.print(f"[bold yellow]播放列表 '{playlist_name}' 中有 {len(invalid_items)} 个无效文件[/bold yellow]")
-        console.print("[yellow]提示: 使用 --auto-refresh 选项可自动刷新无效文件[/yellow]")
+    changed_count = 0
+    for result in results:
+        for item in result.invalid:
+            console.print(f"[yellow]'{result.name}': 文件 '{item.server_filename}' 无效[/yellow]")
+        for item in result.unknown:
+            console.print(f"[red]'{result.name}': 文件 '{item.server_filename}' 验证失败[/red]")
+        if result.refreshed:
+            console.print(f"[green]'{result.name}': 已刷新 {result.refreshed} 个文件[/green]")
+        if result.rebound:
+            console.print(f"[green]'{result.name}': 已重新定位 {result.rebound} 个已移动或重新上传的文件[/green]")
+        
+        changed_count += len(result.changed) - result.refreshed
+        
+        if not result.invalid and not result.unknown:
+            console.print(f"[bold green]播放列表 '{result.name}' 中的所有文件都有效[/bold green]")
+        elif result.invalid:
+            console.print(f"[bold yellow]播放列表 '{result.name}' 中有 {len(result.invalid)} 个无效文件[/bold yellow]")
+            if not auto_refresh:
+                console.print("[yellow]提示: 使用 --auto-refresh 选项可尝试重新定位已移动的文件[/yellow]")
+    
+    if changed_count and not auto_refresh:
+        console.print(f"[yellow]有 {changed_count} 个文件已重命名或移动，使用 --auto-refresh 选项可自动刷新文件信息[/yellow]")
 
 if __name__ == "__main__":
     playlist()
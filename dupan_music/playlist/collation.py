@@ -0,0 +1,282 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+播放列表排序键
+
+自然排序（"Track 2" 在 "Track 10" 之前）、拼音排序以及按歌手、专辑、音轨号排序
+需要的排序键计算一次后按文件路径缓存在内存中并保存到磁盘，再次排序时只需比较
+排序键。安装了 pypinyin 时中文按拼音排序，否则拼音排序与自然排序相同。
+
+歌手、专辑和音轨号按常见的目录结构从路径中获取：
+"歌手/专辑/01 歌曲.mp3" 或文件名 "歌手 - 歌曲.mp3"。
+"""
+
+import os
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dupan_music.utils import codec
+from dupan_music.utils.logger import get_logger
+from dupan_music.utils.file_utils import ensure_dir, read_file, write_file
+from dupan_music.utils.lazy import LazyModule, module_available
+
+# pypinyin 导入时加载拼音词典，只在第一次计算拼音排序键时导入
+pypinyin = LazyModule('pypinyin')
+PYPINYIN_AVAILABLE = module_available('pypinyin')
+
+logger = get_logger(__name__)
+
+# 缓存格式版本
+CACHE_VERSION = 1
+
+# 需要排序键的排序方式
+COLLATION_SORT_KEYS = ('natural', 'pinyin', 'artist', 'album', 'track')
+
+# 没有音轨号时使用的值，排在有音轨号的歌曲之后
+NO_TRACK = 1 << 30
+
+_DIGITS = re.compile(r'\d+')
+_TRACK = re.compile(r'^\s*(?:(?:cd|disc)\s*\d+\s*[-._ ]\s*)?(\d{1,3})(?=[\s._-]|$)', re.IGNORECASE)
+_ARTIST_SEPARATOR = ' - '
+
+
+def natural_key(text: str) -> str:
+    """
+    计算自然排序键，数字按数值比较，字母不区分大小写
+    
+    数字串去掉前导零后以3位长度作前缀，字符串比较即等价于数值比较。
+    
+    Args:
+        text: 文本
+        
+    Returns:
+        str: 排序键
+    """
+    def number(match) -> str:
+        digits = match.group().lstrip('0') or '0'
+        return f"{len(digits):03d}{digits}"
+    
+    return _DIGITS.sub(number, (text or "").casefold())
+
+
+def pinyin_key(text: str) -> str:
+    """
+    计算拼音排序键，中文转换为拼音后按自然排序比较
+    
+    Args:
+        text: 文本
+        
+    Returns:
+        str: 排序键，未安装 pypinyin 时与自然排序键相同
+    """
+    if PYPINYIN_AVAILABLE and text:
+        text = ' '.join(pypinyin.lazy_pinyin(text))
+    return natural_key(text)
+
+
+def parse_path_tags(path: str) -> Tuple[str, str, Optional[int]]:
+    """
+    从路径中获取歌手、专辑和音轨号
+    
+    Args:
+        path: 文件路径
+        
+    Returns:
+        Tuple[str, str, Optional[int]]: 歌手、专辑、音轨号（没有时为 None）
+    """
+    parts = [part for part in (path or "").split('/') if part]
+    stem = os.path.splitext(parts[-1])[0] if parts else ""
+    album = parts[-2] if len(parts) >= 2 else ""
+    
+    match = _TRACK.match(stem)
+    track = int(match.group(1)) if match else None
+    
+    title = stem[match.end():].lstrip(' ._-') if match else stem
+    if _ARTIST_SEPARATOR in title:
+        artist = title.split(_ARTIST_SEPARATOR, 1)[0].strip()
+    else:
+        artist = parts[-3] if len(parts) >= 3 else ""
+    return artist, album, track
+
+
+class CollationKeys:
+    """单个文件的排序键"""
+    
+    __slots__ = ('natural', 'pinyin', 'artist', 'album', 'track')
+    
+    def __init__(self, natural: str, pinyin: str, artist: str, album: str, track: int):
+        """
+        初始化排序键
+        
+        Args:
+            natural: 文件名的自然排序键
+            pinyin: 文件名的拼音排序键
+            artist: 歌手的拼音排序键
+            album: 专辑的拼音排序键
+            track: 音轨号，没有时为 NO_TRACK
+        """
+        self.natural = natural
+        self.pinyin = pinyin
+        self.artist = artist
+        self.album = album
+        self.track = track
+    
+    @classmethod
+    def compute(cls, path: str, name: str) -> 'CollationKeys':
+        """
+        计算排序键
+        
+        Args:
+            path: 文件路径
+            name: 文件名
+            
+        Returns:
+            CollationKeys: 排序键
+        """
+        name = name or os.path.basename(path or "")
+        artist, album, track = parse_path_tags(path or name)
+        return cls(
+            natural_key(name),
+            pinyin_key(name),
+            pinyin_key(artist),
+            pinyin_key(album),
+            NO_TRACK if track is None else track
+        )
+    
+    def sort_key(self, key: str) -> Tuple:
+        """
+        获取排序方式对应的排序键
+        
+        Args:
+            key: 排序方式
+            
+        Returns:
+            Tuple: 排序键
+        """
+        if key == 'natural':
+            return (self.natural,)
+        if key == 'pinyin':
+            return (self.pinyin, self.natural)
+        if key == 'artist':
+            return (self.artist, self.album, self.track, self.natural)
+        if key == 'album':
+            return (self.album, self.track, self.natural)
+        return (self.track, self.natural)
+    
+    def to_list(self) -> List:
+        """转换为列表（用于保存）"""
+        return [self.natural, self.pinyin, self.artist, self.album, self.track]
+
+
+class CollationCache:
+    """按文件路径缓存的排序键，首次使用时从磁盘读取，计算出新的排序键后保存"""
+    
+    def __init__(self, cache_file: str):
+        """
+        初始化排序键缓存
+        
+        Args:
+            cache_file: 缓存文件路径
+        """
+        self.cache_file = cache_file
+        self._keys: Optional[Dict[str, CollationKeys]] = None
+        self._lock = threading.Lock()
+    
+    def _load(self) -> Dict[str, CollationKeys]:
+        """
+        读取缓存文件
+        
+        Returns:
+            Dict[str, CollationKeys]: 路径 -> 排序键
+        """
+        content = read_file(self.cache_file)
+        if not content:
+            return {}
+        
+        try:
+            data = codec.loads(content)
+        except ValueError:
+            return {}
+        
+        # 安装或卸载 pypinyin 后拼音排序键不同，需要重新计算
+        if data.get('version') != CACHE_VERSION or data.get('pinyin') != PYPINYIN_AVAILABLE:
+            return {}
+        return {path: CollationKeys(*values) for path, values in data.get('keys', {}).items()}
+    
+    def _save(self) -> None:
+        """保存缓存文件"""
+        ensure_dir(os.path.dirname(self.cache_file))
+        content = codec.dumps({
+            'version': CACHE_VERSION,
+            'pinyin': PYPINYIN_AVAILABLE,
+            'keys': {path: keys.to_list() for path, keys in self._keys.items()}
+        })
+        if not write_file(self.cache_file, content):
+            logger.warning(f"保存排序键缓存 {self.cache_file} 失败")
+    
+    def keys_for(self, paths: Iterable[str], names: Iterable[str]) -> List[CollationKeys]:
+        """
+        获取一组文件的排序键，缺少的计算后写入缓存
+        
+        Args:
+            paths: 文件路径
+            names: 文件名，与路径一一对应
+            
+        Returns:
+            List[CollationKeys]: 排序键
+        """
+        with self._lock:
+            if self._keys is None:
+                self._keys = self._load()
+            
+            result = []
+            computed = 0
+            for path, name in zip(paths, names):
+                cache_key = path or name or ""
+                keys = self._keys.get(cache_key)
+                if keys is None:
+                    keys = CollationKeys.compute(path, name)
+                    self._keys[cache_key] = keys
+                    computed += 1
+                result.append(keys)
+            
+            if computed:
+                logger.debug(f"计算排序键 {computed} 个")
+                self._save()
+            return result
+    
+    def sort_order(self, paths: Iterable[str], names: Iterable[str], key: str,
+                   desc: bool = False) -> List[int]:
+        """
+        计算排序后的原位置
+        
+        Args:
+            paths: 文件路径
+            names: 文件名
+            key: 排序方式（COLLATION_SORT_KEYS 之一）
+            desc: 是否降序
+            
+        Returns:
+            List[int]: 排序后的原位置
+        """
+        sort_keys = [keys.sort_key(key) for keys in self.keys_for(paths, names)]
+        return sorted(range(len(sort_keys)), key=sort_keys.__getitem__, reverse=desc)
+
+
+_default_cache: Optional[CollationCache] = None
+
+
+def get_collation_cache() -> CollationCache:
+    """
+    获取默认的排序键缓存（保存在播放列表目录旁）
+    
+    Returns:
+        CollationCache: 排序键缓存
+    """
+    global _default_cache
+    if _default_cache is None:
+        _default_cache = CollationCache(str(Path.home() / '.dupan_music' / 'sort_keys.json'))
+    return _default_cache
@@ -0,0 +1,536 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+列式播放列表
+
+大播放列表中每一项都是独立对象时，内存占用和加载时间随歌曲数线性增长。
+列式播放列表把数值字段存放在 array 中，文件名和MD5存放在列表中，路径拆分为
+驻留的目录和文件名，只有在访问某一项时才创建 PlaylistItem。
+"""
+
+import time
+from array import array
+from operator import itemgetter
+from collections.abc import MutableSequence
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from dupan_music.playlist.playlist import Playlist, PlaylistItem
+from dupan_music.playlist.collation import COLLATION_SORT_KEYS, get_collation_cache
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# 数值字段，使用 64 位整数列存放（None 按 0 存放）
+INT_COLUMNS = ('fs_id', 'size', 'category', 'isdir', 'local_mtime', 'server_mtime', 'add_time')
+
+# 播放列表项字段，顺序与 PlaylistItem.__init__ 参数一致
+ITEM_FIELDS = PlaylistItem.__slots__
+
+# MD5二进制长度
+MD5_SIZE = 16
+
+# 排序键与列的对应关系
+SORT_COLUMNS = {
+    'time': 'server_mtime',
+    'size': 'size',
+    'add_time': 'add_time',
+}
+
+
+class ColumnarItems(MutableSequence):
+    """列式存储的播放列表项序列，行为与 List[PlaylistItem] 一致"""
+    
+    def __init__(self, items: Iterable[PlaylistItem] = ()):
+        """
+        初始化列式存储
+        
+        Args:
+            items: 播放列表项
+        """
+        self._ints: Dict[str, array] = {column: array('q') for column in INT_COLUMNS}
+        self._names: List[str] = []
+        # 路径 = 目录 + '/' + 文件名；与文件名不一致的路径原样保存在 _tails 中
+        self._dir_ids = array('l')
+        self._tails: List[Optional[str]] = []
+        self._dirs: List[str] = []
+        self._dir_index: Dict[str, int] = {}
+        # 十六进制MD5按 16 字节二进制存放，无法压缩的原样保存在 _md5_raw 中
+        self._md5_bin = bytearray()
+        self._md5_raw: List[Optional[str]] = []
+        
+        self.extend(items)
+    
+    @classmethod
+    def from_rows(cls, rows: Sequence[Tuple]) -> 'ColumnarItems':
+        """
+        按列批量创建，行的字段顺序与 ITEM_FIELDS 一致
+        
+        Args:
+            rows: 行数据
+            
+        Returns:
+            ColumnarItems: 列式存储
+        """
+        columns = dict(zip(ITEM_FIELDS, zip(*rows))) if rows else {}
+        return cls._from_columns(columns, len(rows))
+    
+    @classmethod
+    def from_dicts(cls, dicts: Sequence[Dict]) -> 'ColumnarItems':
+        """
+        从字典列表按列批量创建，不创建中间的 PlaylistItem 对象
+        
+        Args:
+            dicts: 播放列表项字典
+            
+        Returns:
+            ColumnarItems: 列式存储
+        """
+        columns = {field: [data.get(field) for data in dicts] for field in ITEM_FIELDS}
+        return cls._from_columns(columns, len(dicts))
+    
+    @classmethod
+    def _from_columns(cls, columns: Dict[str, Sequence], length: int) -> 'ColumnarItems':
+        """
+        从列数据创建
+        
+        Args:
+            columns: 字段 -> 列数据
+            length: 行数
+            
+        Returns:
+            ColumnarItems: 列式存储
+        """
+        result = cls()
+        if not length:
+            return result
+        
+        now = int(time.time())
+        for column in INT_COLUMNS:
+            default = now if column == 'add_time' else 0
+            result._ints[column] = array('q', [value or default for value in columns[column]])
+        
+        result._names = list(columns['server_filename'])
+        
+        split_path = result._split_path
+        dir_ids = array('l')
+        for path, name in zip(columns['path'], result._names):
+            dir_id, tail = split_path(path, name)
+            dir_ids.append(dir_id)
+            result._tails.append(tail)
+        result._dir_ids = dir_ids
+        
+        md5_bin = result._md5_bin
+        for md5 in columns['md5']:
+            packed, raw = pack_md5(md5)
+            md5_bin += packed
+            result._md5_raw.append(raw)
+        return result
+    
+    def _split_path(self, path: Optional[str], name: Optional[str]) -> Tuple[int, Optional[str]]:
+        """
+        拆分路径为驻留的目录编号和例外路径
+        
+        Args:
+            path: 文件路径
+            name: 文件名
+            
+        Returns:
+            Tuple[int, Optional[str]]: 目录编号（-1 表示未使用）、例外路径
+        """
+        if path is None:
+            return -1, None
+        
+        directory, _, basename = path.rpartition('/')
+        if basename != name or not directory:
+            return -1, path
+        
+        dir_id = self._dir_index.get(directory)
+        if dir_id is None:
+            dir_id = len(self._dirs)
+            self._dir_index[directory] = dir_id
+            self._dirs.append(directory)
+        return dir_id, None
+    
+    def _path(self, index: int) -> Optional[str]:
+        """
+        还原指定位置的文件路径
+        
+        Args:
+            index: 位置
+            
+        Returns:
+            Optional[str]: 文件路径
+        """
+        dir_id = self._dir_ids[index]
+        if dir_id < 0:
+            return self._tails[index]
+        return self._dirs[dir_id] + '/' + self._names[index]
+    
+    def _md5(self, index: int) -> str:
+        """
+        还原指定位置的MD5
+        
+        Args:
+            index: 位置
+            
+        Returns:
+            str: MD5
+        """
+        raw = self._md5_raw[index]
+        if raw is not None:
+            return raw
+        return self._md5_bin[index * MD5_SIZE:(index + 1) * MD5_SIZE].hex()
+    
+    def _row(self, index: int) -> Tuple:
+        """
+        读取指定位置的一行
+        
+        Args:
+            index: 位置
+            
+        Returns:
+            Tuple: 行数据，字段顺序与 ITEM_FIELDS 一致
+        """
+        ints = self._ints
+        return (
+            ints['fs_id'][index], self._names[index], self._path(index), ints['size'][index],
+            ints['category'][index], ints['isdir'][index], ints['local_mtime'][index],
+            ints['server_mtime'][index], self._md5(index), ints['add_time'][index]
+        )
+    
+    def _row_columns(self) -> List[MutableSequence]:
+        """
+        获取每行一个元素的所有列（不含MD5二进制列）
+        
+        Returns:
+            List[MutableSequence]: 列
+        """
+        return list(self._ints.values()) + [self._names, self._dir_ids, self._tails, self._md5_raw]
+    
+    def rows(self) -> Iterator[Tuple]:
+        """
+        按顺序遍历所有行，不创建 PlaylistItem
+        
+        Yields:
+            Tuple: 行数据，字段顺序与 ITEM_FIELDS 一致
+        """
+        for index in range(len(self._names)):
+            yield self._row(index)
+    
+    def column(self, name: str) -> Sequence:
+        """
+        获取一列数据（只读使用）
+        
+        Args:
+            name: 字段名
+            
+        Returns:
+            Sequence: 列数据
+        """
+        if name in self._ints:
+            return self._ints[name]
+        if name == 'server_filename':
+            return self._names
+        if name == 'path':
+            return [self._path(index) for index in range(len(self._names))]
+        if name == 'md5':
+            return [self._md5(index) for index in range(len(self._names))]
+        raise KeyError(name)
+    
+    def take(self, indices: Iterable[int]) -> 'ColumnarItems':
+        """
+        按位置选取若干行组成新的序列
+        
+        Args:
+            indices: 位置列表
+            
+        Returns:
+            ColumnarItems: 新的列式存储
+        """
+        indices = list(indices)
+        result = ColumnarItems()
+        # 目录表只增不减，新序列使用副本即可
+        result._dirs = list(self._dirs)
+        result._dir_index = dict(self._dir_index)
+        if not indices:
+            return result
+        
+        # itemgetter 在 C 层完成按位置选取
+        getter = itemgetter(*indices)
+        pick = (lambda values: getter(values)) if len(indices) > 1 else (lambda values: (getter(values),))
+        
+        result._ints = {column: array('q', pick(values)) for column, values in self._ints.items()}
+        result._names = list(pick(self._names))
+        result._dir_ids = array('l', pick(self._dir_ids))
+        result._tails = list(pick(self._tails))
+        result._md5_raw = list(pick(self._md5_raw))
+        
+        md5_bin = self._md5_bin
+        result._md5_bin = bytearray(b''.join([md5_bin[i * MD5_SIZE:(i + 1) * MD5_SIZE] for i in indices]))
+        return result
+    
+    def reorder(self, order: Sequence[int]) -> None:
+        """
+        按给定顺序原地重排
+        
+        Args:
+            order: 新顺序中每个位置对应的原位置
+        """
+        reordered = self.take(order)
+        self._ints = reordered._ints
+        self._names = reordered._names
+        self._dir_ids = reordered._dir_ids
+        self._tails = reordered._tails
+        self._md5_bin = reordered._md5_bin
+        self._md5_raw = reordered._md5_raw
+    
+    def _decompose(self, item: PlaylistItem) -> Tuple[List, bytes]:
+        """
+        拆分播放列表项为各列的值
+        
+        Args:
+            item: 播放列表项
+            
+        Returns:
+            Tuple[List, bytes]: 与 _row_columns 顺序一致的值、MD5二进制
+        """
+        values = [getattr(item, column) or 0 for column in INT_COLUMNS]
+        dir_id, tail = self._split_path(item.path, item.server_filename)
+        packed, raw = pack_md5(item.md5)
+        return values + [item.server_filename, dir_id, tail, raw], packed
+    
+    def _check_index(self, index: int) -> int:
+        """
+        校验并规范化位置
+        
+        Args:
+            index: 位置，可为负数
+            
+        Returns:
+            int: 规范化后的位置
+        """
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("播放列表索引超出范围")
+        return index
+    
+    def __len__(self) -> int:
+        return len(self._names)
+    
+    def __getitem__(self, index: Union[int, slice]) -> Union[PlaylistItem, 'ColumnarItems']:
+        if isinstance(index, slice):
+            return self.take(range(len(self))[index])
+        return PlaylistItem(*self._row(self._check_index(index)))
+    
+    def __iter__(self) -> Iterator[PlaylistItem]:
+        for row in self.rows():
+            yield PlaylistItem(*row)
+    
+    def __setitem__(self, index: Union[int, slice], item) -> None:
+        if isinstance(index, slice):
+            # 切片赋值较少使用，退化为整体重建
+            items = list(self)
+            items[index] = list(item)
+            self.reorder([])
+            self.extend(items)
+            return
+        
+        index = self._check_index(index)
+        values, packed = self._decompose(item)
+        for column, value in zip(self._row_columns(), values):
+            column[index] = value
+        self._md5_bin[index * MD5_SIZE:(index + 1) * MD5_SIZE] = packed
+    
+    def __delitem__(self, index: Union[int, slice]) -> None:
+        if isinstance(index, slice):
+            removed = set(range(len(self))[index])
+            self.reorder([i for i in range(len(self)) if i not in removed])
+            return
+        
+        index = self._check_index(index)
+        for column in self._row_columns():
+            del column[index]
+        del self._md5_bin[index * MD5_SIZE:(index + 1) * MD5_SIZE]
+    
+    def insert(self, index: int, item: PlaylistItem) -> None:
+        # 与 list.insert 一致，越界位置截断到两端
+        if index < 0:
+            index = max(index + len(self), 0)
+        index = min(index, len(self))
+        
+        values, packed = self._decompose(item)
+        for column, value in zip(self._row_columns(), values):
+            column.insert(index, value)
+        self._md5_bin[index * MD5_SIZE:index * MD5_SIZE] = packed
+    
+    def sort(self, key=None, reverse: bool = False) -> None:
+        """
+        与 list.sort 相同的通用排序，按列排序请使用 ColumnarPlaylist.sort_by
+        
+        Args:
+            key: 排序键函数，参数为 PlaylistItem
+            reverse: 是否降序
+        """
+        keys = [key(item) if key else item for item in self]
+        self.reorder(sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse))
+    
+    def __eq__(self, other) -> bool:
+        if isinstance(other, ColumnarItems):
+            return list(self.rows()) == list(other.rows())
+        if isinstance(other, list):
+            return len(other) == 0 and len(self) == 0
+        return NotImplemented
+    
+    def __repr__(self) -> str:
+        return f"ColumnarItems({len(self)} items)"
+
+
+class ColumnarPlaylist(Playlist):
+    """列式存储的播放列表，接口与 Playlist 一致，排序和统计按列进行"""
+    
+    @Playlist.items.setter
+    def items(self, items: Iterable[PlaylistItem]) -> None:
+        if not isinstance(items, ColumnarItems):
+            items = ColumnarItems(items)
+        Playlist.items.fset(self, items)
+    
+    @property
+    def total_size(self) -> int:
+        """总大小"""
+        if not self.is_loaded and self._summary:
+            return self._summary.total_size
+        return sum(self.items.column('size'))
+    
+    def add_item(self, item: PlaylistItem) -> bool:
+        return self.add_items([item]) > 0
+    
+    def add_items(self, items: Iterable[PlaylistItem]) -> int:
+        existing = set(self.items.column('fs_id'))
+        added = 0
+        
+        for item in items:
+            if item.fs_id in existing:
+                continue
+            existing.add(item.fs_id)
+            self.items.append(item)
+            added += 1
+        
+        if added:
+            self.update_time = int(time.time())
+        return added
+    
+    def remove_item(self, fs_id: int) -> bool:
+        return self.remove_items([fs_id]) > 0
+    
+    def remove_items(self, fs_ids: Iterable[int]) -> int:
+        fs_ids = set(fs_ids)
+        column = self.items.column('fs_id')
+        keep = [index for index, fs_id in enumerate(column) if fs_id not in fs_ids]
+        removed = len(column) - len(keep)
+        
+        if removed:
+            self.items.reorder(keep)
+            self.update_time = int(time.time())
+        return removed
+    
+    def sort_by(self, key: str, desc: bool = False) -> None:
+        items = self.items
+        
+        if key in COLLATION_SORT_KEYS:
+            order = get_collation_cache().sort_order(
+                items.column('path'), items.column('server_filename'), key, desc
+            )
+        elif key == 'name':
+            names = [name.lower() for name in items.column('server_filename')]
+            order = sorted(range(len(names)), key=names.__getitem__, reverse=desc)
+        elif key in SORT_COLUMNS:
+            order = argsort(items.column(SORT_COLUMNS[key]), desc)
+        else:
+            order = None
+        
+        if order is not None:
+            items.reorder(order)
+        
+        self.update_time = int(time.time())
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        统计播放列表
+        
+        Returns:
+            Dict[str, int]: 歌曲数、总大小、最大文件大小、最早和最晚修改时间
+        """
+        items = self.items
+        if not items:
+            return super().stats()
+        
+        sizes = items.column('size')
+        mtimes = items.column('server_mtime')
+        return {
+            'item_count': len(items),
+            'total_size': sum(sizes),
+            'max_size': max(sizes),
+            'oldest_mtime': min(mtimes),
+            'newest_mtime': max(mtimes)
+        }
+    
+    def to_dict(self) -> Dict:
+        return {
+            'name': self.name,
+            'description': self.description,
+            'items': [dict(zip(ITEM_FIELDS, row)) for row in self.items.rows()],
+            'create_time': self.create_time,
+            'update_time': self.update_time
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'ColumnarPlaylist':
+        return cls(
+            name=data.get('name', ''),
+            description=data.get('description', ''),
+            items=ColumnarItems.from_dicts(data.get('items', [])),
+            create_time=data.get('create_time', int(time.time())),
+            update_time=data.get('update_time', int(time.time()))
+        )
+
+
+def argsort(column: Sequence[int], desc: bool = False) -> List[int]:
+    """
+    对整数列做稳定排序，返回排序后的原位置
+    
+    Args:
+        column: 整数列
+        desc: 是否降序
+        
+    Returns:
+        List[int]: 排序后的原位置
+    """
+    if NUMPY_AVAILABLE and isinstance(column, array):
+        keys = np.frombuffer(column, dtype=np.int64) if len(column) else np.zeros(0, dtype=np.int64)
+        return np.argsort(-keys if desc else keys, kind='stable').tolist()
+    
+    return sorted(range(len(column)), key=column.__getitem__, reverse=desc)
+
+
+def pack_md5(md5: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """
+    压缩十六进制MD5
+    
+    Args:
+        md5: MD5字符串
+        
+    Returns:
+        Tuple[bytes, Optional[str]]: 16 字节二进制；无法无损压缩时为全零并返回原字符串
+    """
+    if md5 and len(md5) == 2 * MD5_SIZE:
+        try:
+            packed = bytes.fromhex(md5)
+            if packed.hex() == md5:
+                return packed, None
+        except ValueError:
+            pass
+    return bytes(MD5_SIZE), md5 or ''
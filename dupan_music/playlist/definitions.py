@@ -0,0 +1,179 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+只保存定义的播放列表
+
+智能播放列表、目录播放列表等只保存定义（查询条件、目录路径），歌曲在使用时才
+计算或列出。定义以JSON文件保存在播放列表目录的子目录中，每个播放列表一个文件。
+"""
+
+import os
+from abc import ABC, abstractmethod
+from typing import List, Optional, Tuple
+
+from dupan_music.playlist.playlist import Playlist, PlaylistSummary
+from dupan_music.utils import codec
+from dupan_music.utils.logger import get_logger
+from dupan_music.utils.file_utils import ensure_dir, read_file, write_file
+
+logger = get_logger(__name__)
+
+
+class PlaylistDefinitions(ABC):
+    """播放列表定义管理，子类实现 load"""
+    
+    # 播放列表类型，需要实现 from_dict 和 to_dict
+    playlist_class = Playlist
+    
+    # 除定义外，删除时一并删除的文件后缀（如缓存）
+    extra_suffixes: Tuple[str, ...] = ()
+    
+    def __init__(self, definitions_dir: str):
+        """
+        初始化播放列表定义管理
+        
+        Args:
+            definitions_dir: 定义文件目录
+        """
+        self.definitions_dir = definitions_dir
+    
+    def _path(self, name: str, suffix: str) -> str:
+        """
+        获取定义或缓存文件路径
+        
+        Args:
+            name: 播放列表名称
+            suffix: 文件后缀
+            
+        Returns:
+            str: 文件路径
+        """
+        safe_name = name.replace('/', '_').replace('\\', '_')
+        return os.path.join(self.definitions_dir, f"{safe_name}{suffix}")
+    
+    def names(self) -> List[str]:
+        """
+        所有播放列表的名称
+        
+        Returns:
+            List[str]: 名称列表
+        """
+        try:
+            filenames = os.listdir(self.definitions_dir)
+        except OSError:
+            return []
+        
+        names = []
+        for filename in sorted(filenames):
+            if filename.endswith('.json'):
+                definition = self._read_definition(os.path.join(self.definitions_dir, filename))
+                if definition:
+                    names.append(definition.name)
+        return names
+    
+    def exists(self, name: str) -> bool:
+        """
+        播放列表是否存在
+        
+        Args:
+            name: 播放列表名称
+            
+        Returns:
+            bool: 是否存在
+        """
+        return os.path.isfile(self._path(name, '.json'))
+    
+    def _read_definition(self, file_path: str) -> Optional[Playlist]:
+        """
+        读取播放列表定义
+        
+        Args:
+            file_path: 定义文件路径
+            
+        Returns:
+            Optional[Playlist]: 播放列表（未加载歌曲）
+        """
+        content = read_file(file_path)
+        if not content:
+            return None
+        
+        try:
+            return self.playlist_class.from_dict(codec.loads(content))
+        except (ValueError, TypeError) as e:
+            logger.error(f"读取播放列表定义 {file_path} 失败: {str(e)}")
+            return None
+    
+    def save(self, playlist: Playlist) -> bool:
+        """
+        保存播放列表定义
+        
+        Args:
+            playlist: 播放列表
+            
+        Returns:
+            bool: 是否成功
+        """
+        ensure_dir(self.definitions_dir)
+        return write_file(self._path(playlist.name, '.json'), codec.dumps(playlist.to_dict(), pretty=True))
+    
+    def delete(self, name: str) -> bool:
+        """
+        删除播放列表
+        
+        Args:
+            name: 播放列表名称
+            
+        Returns:
+            bool: 是否成功
+        """
+        if not self.exists(name):
+            return False
+        
+        try:
+            os.remove(self._path(name, '.json'))
+        except OSError as e:
+            logger.error(f"删除播放列表 {name} 失败: {str(e)}")
+            return False
+        
+        for suffix in self.extra_suffixes:
+            try:
+                os.remove(self._path(name, suffix))
+            except OSError:
+                pass
+        return True
+    
+    @abstractmethod
+    def load(self, name: str) -> Optional[Playlist]:
+        """
+        获取播放列表，歌曲在首次访问时才读取
+        
+        Args:
+            name: 播放列表名称
+            
+        Returns:
+            Optional[Playlist]: 播放列表
+        """
+    
+    def load_all(self) -> List[Playlist]:
+        """
+        获取所有播放列表
+        
+        Returns:
+            List[Playlist]: 播放列表列表
+        """
+        playlists = []
+        for name in self.names():
+            playlist = self.load(name)
+            if playlist:
+                playlists.append(playlist)
+        return playlists
+    
+    def list_summaries(self) -> List[PlaylistSummary]:
+        """
+        获取所有播放列表的摘要
+        
+        Returns:
+            List[PlaylistSummary]: 摘要列表
+        """
+        return [playlist.summary() for playlist in self.load_all()]
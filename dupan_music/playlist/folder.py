@@ -0,0 +1,328 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+目录播放列表
+
+目录播放列表只保存绑定的网盘目录，歌曲在播放时按页列出，播放到已列出部分的末尾
+时才请求下一页，因此大目录也能立即开始播放，目录中新增或删除的文件下次打开时
+自动体现。目录列表通过API的分页迭代器和目录列表缓存获取。
+"""
+
+import os
+import threading
+from collections.abc import Sequence
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+from dupan_music.config.config import CONFIG
+from dupan_music.playlist.playlist import Playlist, PlaylistItem, PlaylistSummary
+from dupan_music.playlist.definitions import PlaylistDefinitions
+from dupan_music.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+
+class FolderItems(Sequence):
+    """
+    按需列出的播放列表项
+    
+    len() 和切片需要列出全部文件；按索引访问和迭代只列出到需要的位置。
+    """
+    
+    def __init__(self, pages: Iterator[List[Dict]], extensions: Iterable[str],
+                 on_complete: Optional[Callable[[int, int], None]] = None):
+        """
+        初始化播放列表项
+        
+        Args:
+            pages: 目录列表分页迭代器
+            extensions: 支持的音频扩展名
+            on_complete: 全部列出后的回调，参数为歌曲数和总大小
+        """
+        self._pages = pages
+        self._extensions = {ext.lower() for ext in extensions}
+        self._on_complete = on_complete
+        self._items: List[PlaylistItem] = []
+        self._exhausted = False
+        self._lock = threading.RLock()
+    
+    @property
+    def loaded_count(self) -> int:
+        """已列出的歌曲数"""
+        return len(self._items)
+    
+    @property
+    def exhausted(self) -> bool:
+        """是否已列出全部文件"""
+        return self._exhausted
+    
+    def _is_audio(self, file_info: Dict) -> bool:
+        """
+        判断是否为支持的音频文件
+        
+        Args:
+            file_info: 文件信息
+            
+        Returns:
+            bool: 是否为音频文件
+        """
+        if file_info.get('isdir'):
+            return False
+        name = file_info.get('server_filename') or file_info.get('path') or ""
+        return os.path.splitext(name)[1].lower() in self._extensions
+    
+    def _load_page(self) -> bool:
+        """
+        读取下一页
+        
+        Returns:
+            bool: 是否还有更多页
+        """
+        if self._exhausted:
+            return False
+        
+        try:
+            files = next(self._pages)
+        except StopIteration:
+            self._exhausted = True
+            if self._on_complete:
+                self._on_complete(len(self._items), sum(item.size or 0 for item in self._items))
+            return False
+        except Exception as e:
+            # 列表中断时保留已列出的部分
+            logger.error(f"列出目录失败: {str(e)}")
+            self._exhausted = True
+            return False
+        
+        self._items.extend(PlaylistItem.from_api_result(f) for f in files if self._is_audio(f))
+        return True
+    
+    def _ensure(self, index: int) -> None:
+        """
+        列出到指定位置
+        
+        Args:
+            index: 播放列表项索引
+        """
+        with self._lock:
+            while len(self._items) <= index and self._load_page():
+                pass
+    
+    def _ensure_all(self) -> None:
+        """列出全部文件"""
+        with self._lock:
+            while self._load_page():
+                pass
+    
+    def peek_length(self, index: Optional[int] = None) -> int:
+        """
+        获取已列出的歌曲数，不列出全部文件
+        
+        Args:
+            index: 需要列出到的位置，为 None 时再列出一页
+            
+        Returns:
+            int: 已列出的歌曲数
+        """
+        with self._lock:
+            if index is None:
+                count = len(self._items)
+                while len(self._items) == count and self._load_page():
+                    pass
+            else:
+                self._ensure(index)
+            return len(self._items)
+    
+    def __len__(self) -> int:
+        self._ensure_all()
+        return len(self._items)
+    
+    def __bool__(self) -> bool:
+        self._ensure(0)
+        return bool(self._items)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice) or index < 0:
+            self._ensure_all()
+        else:
+            self._ensure(index)
+        return self._items[index]
+    
+    def __setitem__(self, index: int, item: PlaylistItem) -> None:
+        self._ensure(index)
+        self._items[index] = item
+    
+    def __iter__(self) -> Iterator[PlaylistItem]:
+        index = 0
+        while True:
+            self._ensure(index)
+            if index >= len(self._items):
+                return
+            yield self._items[index]
+            index += 1
+
+
+def peek_length(items: Sequence, index: Optional[int] = None) -> int:
+    """
+    获取播放列表长度；按需列出的播放列表只列出到需要的位置
+    
+    Args:
+        items: 播放列表项
+        index: 需要列出到的位置，为 None 时再列出一页
+        
+    Returns:
+        int: 可访问的歌曲数
+    """
+    if isinstance(items, FolderItems):
+        return items.peek_length(index)
+    return len(items)
+
+
+def loaded_length(items: Sequence) -> int:
+    """
+    获取已列出的歌曲数，不请求网盘；其他播放列表为全部歌曲数
+    
+    Args:
+        items: 播放列表项
+        
+    Returns:
+        int: 已列出的歌曲数
+    """
+    if isinstance(items, FolderItems):
+        return items.loaded_count
+    return len(items)
+
+
+class FolderPlaylist(Playlist):
+    """目录播放列表，歌曲为绑定目录中的音频文件，不能直接修改"""
+    
+    read_only = True
+    
+    def __init__(self, name: str, path: str, recursive: bool = False, description: str = "",
+                 item_count: int = 0, total_size: int = 0,
+                 create_time: int = None, update_time: int = None):
+        """
+        初始化目录播放列表
+        
+        Args:
+            name: 播放列表名称
+            path: 网盘目录路径
+            recursive: 是否包含子目录
+            description: 播放列表描述
+            item_count: 上次完整列出时的歌曲数
+            total_size: 上次完整列出时的总大小
+            create_time: 创建时间
+            update_time: 更新时间
+        """
+        super().__init__(name, description, create_time=create_time, update_time=update_time)
+        self.path = path
+        self.recursive = recursive
+        self.last_item_count = item_count
+        self.last_total_size = total_size
+    
+    def to_dict(self) -> Dict:
+        """
+        转换为字典（只包含定义，不包含歌曲）
+        
+        Returns:
+            Dict: 字典表示
+        """
+        return {
+            'name': self.name,
+            'description': self.description,
+            'path': self.path,
+            'recursive': self.recursive,
+            'item_count': self.last_item_count,
+            'total_size': self.last_total_size,
+            'create_time': self.create_time,
+            'update_time': self.update_time
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'FolderPlaylist':
+        """
+        从字典创建目录播放列表
+        
+        Args:
+            data: 字典数据
+            
+        Returns:
+            FolderPlaylist: 目录播放列表
+        """
+        return cls(
+            name=data.get('name', ''),
+            path=data['path'],
+            recursive=data.get('recursive', False),
+            description=data.get('description', ''),
+            item_count=data.get('item_count', 0),
+            total_size=data.get('total_size', 0),
+            create_time=data.get('create_time'),
+            update_time=data.get('update_time')
+        )
+
+
+class FolderPlaylists(PlaylistDefinitions):
+    """目录播放列表管理，定义保存在播放列表目录的 folders 子目录中"""
+    
+    playlist_class = FolderPlaylist
+    
+    def __init__(self, folders_dir: str, api=None):
+        """
+        初始化目录播放列表管理
+        
+        Args:
+            folders_dir: 目录播放列表目录
+            api: 百度网盘API实例
+        """
+        super().__init__(folders_dir)
+        self.api = api
+    
+    def load(self, name: str) -> Optional[FolderPlaylist]:
+        """
+        获取目录播放列表，歌曲在播放时才按页列出
+        
+        Args:
+            name: 播放列表名称
+            
+        Returns:
+            Optional[FolderPlaylist]: 目录播放列表
+        """
+        playlist = self._read_definition(self._path(name, '.json'))
+        if playlist is None:
+            return None
+        
+        # 摘要使用上次完整列出时的结果，避免列出目录
+        playlist._summary = PlaylistSummary(
+            name=playlist.name,
+            description=playlist.description,
+            item_count=playlist.last_item_count,
+            total_size=playlist.last_total_size,
+            create_time=playlist.create_time,
+            update_time=playlist.update_time
+        )
+        playlist._loader = lambda: self._list_items(playlist)
+        return playlist
+    
+    def _list_items(self, playlist: FolderPlaylist):
+        """
+        创建按需列出的播放列表项
+        
+        Args:
+            playlist: 目录播放列表
+            
+        Returns:
+            FolderItems: 播放列表项，未登录时为空列表
+        """
+        if not self.api:
+            logger.warning(f"未登录，无法列出目录播放列表 {playlist.name}")
+            return []
+        
+        def on_complete(item_count: int, total_size: int) -> None:
+            if (item_count, total_size) != (playlist.last_item_count, playlist.last_total_size):
+                playlist.last_item_count = item_count
+                playlist.last_total_size = total_size
+                self.save(playlist)
+        
+        pages = self.api.iter_file_list(playlist.path, recursive=playlist.recursive)
+        extensions = CONFIG.get("music.supported_formats", ['.mp3', '.flac', '.wav', '.aac', '.ogg'])
+        return FolderItems(pages, extensions, on_complete)
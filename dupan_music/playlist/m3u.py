@@ -0,0 +1,344 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+M3U/M3U8/PLS 播放列表导入导出
+
+导入时逐行解析文件，不把整个文件读入内存；条目中的路径先按本地曲库索引批量转换为
+文件信息，找不到的再按所在目录批量列出（每个目录只请求一次），不会逐条请求网盘。
+导出时逐行写入网盘路径，或映射到本地目录下的路径。
+"""
+
+import os
+import posixpath
+from typing import Dict, Iterable, Iterator, List, Optional, TextIO
+from urllib.parse import unquote, urlparse
+
+from dupan_music.library.index import LibraryIndex
+from dupan_music.library.resolver import FileResolver
+from dupan_music.playlist.playlist import Playlist, PlaylistItem, PlaylistManager
+from dupan_music.utils.logger import get_logger
+from dupan_music.utils.file_utils import ensure_dir
+
+logger = get_logger(__name__)
+
+# 文件扩展名 -> 播放列表格式
+FORMATS = {
+    '.m3u': 'm3u',
+    '.m3u8': 'm3u',
+    '.pls': 'pls',
+}
+
+
+def detect_format(file_path: str) -> str:
+    """
+    按扩展名判断播放列表格式
+    
+    Args:
+        file_path: 文件路径
+        
+    Returns:
+        str: 'm3u'、'pls' 或 'json'
+    """
+    return FORMATS.get(os.path.splitext(file_path)[1].lower(), 'json')
+
+
+class PlaylistEntry:
+    """外部播放列表中的一个条目"""
+    
+    __slots__ = ('location', 'title', 'duration')
+    
+    def __init__(self, location: str, title: str = "", duration: int = -1):
+        """
+        初始化条目
+        
+        Args:
+            location: 文件位置（路径或URL）
+            title: 标题
+            duration: 时长（秒），未知时为 -1
+        """
+        self.location = location
+        self.title = title
+        self.duration = duration
+
+
+def iter_m3u(lines: Iterable[str]) -> Iterator[PlaylistEntry]:
+    """
+    解析M3U/M3U8
+    
+    Args:
+        lines: 文件行
+        
+    Yields:
+        PlaylistEntry: 条目
+    """
+    title = ""
+    duration = -1
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        
+        if line.startswith('#EXTINF:'):
+            info, _, title = line[len('#EXTINF:'):].partition(',')
+            try:
+                duration = int(float(info.split()[0]))
+            except (ValueError, IndexError):
+                duration = -1
+            continue
+        if line.startswith('#'):
+            continue
+        
+        yield PlaylistEntry(line, title.strip(), duration)
+        title = ""
+        duration = -1
+
+
+def iter_pls(lines: Iterable[str]) -> Iterator[PlaylistEntry]:
+    """
+    解析PLS，条目在编号变化时产出，标题和时长可以出现在文件路径之前或之后
+    
+    Args:
+        lines: 文件行
+        
+    Yields:
+        PlaylistEntry: 条目
+    """
+    current = None
+    fields: Dict[str, str] = {}
+    
+    def entry() -> Optional[PlaylistEntry]:
+        if 'file' not in fields:
+            return None
+        try:
+            duration = int(fields.get('length', -1))
+        except ValueError:
+            duration = -1
+        return PlaylistEntry(fields['file'], fields.get('title', ""), duration)
+    
+    for line in lines:
+        key, sep, value = line.strip().partition('=')
+        if not sep:
+            continue
+        
+        key = key.strip().lower()
+        for field in ('file', 'title', 'length'):
+            if key.startswith(field) and key[len(field):].isdigit():
+                number = key[len(field):]
+                if number != current:
+                    pending = entry()
+                    if pending:
+                        yield pending
+                    current = number
+                    fields = {}
+                fields[field] = value.strip()
+                break
+    
+    pending = entry()
+    if pending:
+        yield pending
+
+
+def read_entries(file_path: str, fmt: Optional[str] = None) -> Iterator[PlaylistEntry]:
+    """
+    逐行读取外部播放列表
+    
+    Args:
+        file_path: 文件路径
+        fmt: 格式，为 None 时按扩展名判断
+        
+    Yields:
+        PlaylistEntry: 条目
+    """
+    fmt = fmt or detect_format(file_path)
+    parse = iter_pls if fmt == 'pls' else iter_m3u
+    
+    # utf-8-sig 兼容带BOM的文件，无法解码的字符替换后照常解析
+    with open(file_path, 'r', encoding='utf-8-sig', errors='replace') as f:
+        yield from parse(f)
+
+
+def to_remote_path(location: str, base_dir: str = "/", strip_prefix: str = "") -> Optional[str]:
+    """
+    把条目位置转换为网盘路径
+    
+    Args:
+        location: 条目位置（绝对路径、相对路径、file:// URL 或 Windows 路径）
+        base_dir: 相对路径所基于的网盘目录
+        strip_prefix: 转换前去掉的本地路径前缀
+        
+    Returns:
+        Optional[str]: 网盘路径，网络地址等无法转换时为 None
+    """
+    if '://' in location:
+        url = urlparse(location)
+        if url.scheme != 'file':
+            return None
+        location = unquote(url.path)
+    
+    path = location.replace('\\', '/')
+    prefix = strip_prefix.replace('\\', '/').rstrip('/')
+    if prefix and (path == prefix or path.startswith(prefix + '/')):
+        path = path[len(prefix):].lstrip('/')
+    
+    # 去掉盘符，如 D:/Music/a.mp3
+    if len(path) >= 2 and path[1] == ':' and path[0].isalpha():
+        path = path[2:]
+    
+    if not path.startswith('/'):
+        path = posixpath.join(base_dir or "/", path)
+    return posixpath.normpath(path)
+
+
+class ImportResult:
+    """导入结果"""
+    
+    def __init__(self, playlist: Optional[Playlist], total: int = 0,
+                 unresolved: Optional[List[str]] = None):
+        """
+        初始化导入结果
+        
+        Args:
+            playlist: 导入的播放列表，保存失败时为 None
+            total: 条目数
+            unresolved: 找不到文件的条目位置
+        """
+        self.playlist = playlist
+        self.total = total
+        self.unresolved = unresolved or []
+
+
+class PlaylistImporter:
+    """M3U/PLS 播放列表导入"""
+    
+    def __init__(self, manager: PlaylistManager, index: Optional[LibraryIndex] = None,
+                 max_workers: int = FileResolver.MAX_WORKERS):
+        """
+        初始化导入器
+        
+        Args:
+            manager: 播放列表管理器
+            index: 曲库索引，为 None 时只按目录列表查找
+            max_workers: 并发请求数
+        """
+        self.manager = manager
+        self.resolver = FileResolver(manager.api, index, max_workers=max_workers)
+    
+    def import_file(self, file_path: str, name: Optional[str] = None, fmt: Optional[str] = None,
+                    base_dir: str = "/", strip_prefix: str = "",
+                    overwrite: bool = False) -> ImportResult:
+        """
+        导入播放列表
+        
+        Args:
+            file_path: 文件路径
+            name: 播放列表名称，默认使用文件名
+            fmt: 格式，为 None 时按扩展名判断
+            base_dir: 相对路径所基于的网盘目录
+            strip_prefix: 转换前去掉的本地路径前缀
+            overwrite: 是否覆盖同名播放列表
+            
+        Returns:
+            ImportResult: 导入结果
+        """
+        name = name or os.path.splitext(os.path.basename(file_path))[0]
+        if self.manager.playlist_exists(name) and not (overwrite and self.manager.store.exists(name)):
+            logger.warning(f"播放列表 {name} 已存在")
+            return ImportResult(None)
+        
+        locations = []
+        paths = []
+        for entry in read_entries(file_path, fmt):
+            locations.append(entry.location)
+            paths.append(to_remote_path(entry.location, base_dir, strip_prefix))
+        
+        resolved = self.resolver.resolve_paths(path for path in paths if path)
+        
+        items = []
+        unresolved = []
+        seen = set()
+        for location, path in zip(locations, paths):
+            file_info = resolved.get(path) if path else None
+            if file_info is None:
+                unresolved.append(location)
+            elif file_info['fs_id'] not in seen:
+                seen.add(file_info['fs_id'])
+                items.append(PlaylistItem.from_api_result(file_info))
+        
+        playlist = Playlist(name=name, description=f"从 {os.path.basename(file_path)} 导入", items=items)
+        if not self.manager.save_playlist(playlist):
+            return ImportResult(None, len(locations), unresolved)
+        
+        logger.info(f"导入播放列表 {name}: {len(items)} 首歌曲，{len(unresolved)} 个条目未找到")
+        return ImportResult(playlist, len(locations), unresolved)
+
+
+def _write_m3u(f: TextIO, items: Iterable[PlaylistItem], location) -> int:
+    """
+    写入M3U
+    
+    Args:
+        f: 文件对象
+        items: 播放列表项
+        location: 播放列表项 -> 写入的路径
+        
+    Returns:
+        int: 写入的歌曲数
+    """
+    f.write("#EXTM3U\n")
+    count = 0
+    for item in items:
+        title = os.path.splitext(item.server_filename or "")[0]
+        f.write(f"#EXTINF:-1,{title}\n{location(item)}\n")
+        count += 1
+    return count
+
+
+def _write_pls(f: TextIO, items: Iterable[PlaylistItem], location) -> int:
+    """
+    写入PLS
+    
+    Args:
+        f: 文件对象
+        items: 播放列表项
+        location: 播放列表项 -> 写入的路径
+        
+    Returns:
+        int: 写入的歌曲数
+    """
+    f.write("[playlist]\n")
+    count = 0
+    for item in items:
+        count += 1
+        title = os.path.splitext(item.server_filename or "")[0]
+        f.write(f"File{count}={location(item)}\nTitle{count}={title}\nLength{count}=-1\n")
+    f.write(f"NumberOfEntries={count}\nVersion=2\n")
+    return count
+
+
+def export_file(playlist: Playlist, file_path: str, fmt: Optional[str] = None,
+                local_root: Optional[str] = None) -> int:
+    """
+    导出播放列表为M3U/PLS，逐行写入
+    
+    Args:
+        playlist: 播放列表
+        file_path: 导出文件路径
+        fmt: 格式，为 None 时按扩展名判断
+        local_root: 本地目录，指定时写入网盘路径映射到该目录下的本地路径（如同步到本地的副本）
+        
+    Returns:
+        int: 导出的歌曲数
+    """
+    fmt = fmt or detect_format(file_path)
+    if local_root:
+        def location(item: PlaylistItem) -> str:
+            return os.path.join(local_root, *item.path.strip('/').split('/'))
+    else:
+        def location(item: PlaylistItem) -> str:
+            return item.path
+    
+    ensure_dir(os.path.dirname(os.path.abspath(file_path)))
+    with open(file_path, 'w', encoding='utf-8') as f:
+        write = _write_pls if fmt == 'pls' else _write_m3u
+        return write(f, playlist.items, location)
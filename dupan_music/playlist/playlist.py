@@ -6,20 +6,32 @@
 """
 
 import os
-import json
 import time
+import threading
+from abc import ABC, abstractmethod
 from datetime import datetime
-from typing import Dict, List, Optional, Any, Union
+from typing import Dict, List, Optional, Any, Union, Iterable, Callable
 from pathlib import Path
 
+from dupan_music.config.config import CONFIG
 from dupan_music.utils.logger import get_logger
-from dupan_music.utils.file_utils import ensure_dir, read_file, write_file
+from dupan_music.utils.file_utils import CoalescingWriter, ensure_dir, file_lock, read_file, write_file
+from dupan_music.utils import codec
+from dupan_music.history.history import PlayHistory, EVENT_START
+from dupan_music.history.stats import PlayStats
+from dupan_music.playlist.collation import COLLATION_SORT_KEYS, get_collation_cache
 
 logger = get_logger(__name__)
 
 class PlaylistItem:
     """播放列表项"""
     
+    # 使用 __slots__ 避免每项一个 __dict__，大播放列表可显著减少内存占用
+    __slots__ = (
+        'fs_id', 'server_filename', 'path', 'size', 'category', 'isdir',
+        'local_mtime', 'server_mtime', 'md5', 'add_time'
+    )
+    
     def __init__(self, fs_id: int, server_filename: str, path: str, size: int, 
                  category: int = 0, isdir: int = 0, local_mtime: int = 0, 
                  server_mtime: int = 0, md5: str = "", add_time: int = 0):
@@ -118,9 +130,72 @@ class PlaylistItem:
         )
 
 
+class PlaylistSummary:
+    """播放列表摘要，用于列出播放列表而无需读取全部播放列表项"""
+    
+    def __init__(self, name: str, description: str = "", item_count: int = 0,
+                 total_size: int = 0, create_time: int = 0, update_time: int = 0):
+        """
+        初始化播放列表摘要
+        
+        Args:
+            name: 播放列表名称
+            description: 播放列表描述
+            item_count: 歌曲数
+            total_size: 总大小
+            create_time: 创建时间
+            update_time: 更新时间
+        """
+        self.name = name
+        self.description = description
+        self.item_count = item_count
+        self.total_size = total_size
+        self.create_time = create_time
+        self.update_time = update_time
+    
+    def to_dict(self) -> Dict:
+        """
+        转换为字典
+        
+        Returns:
+            Dict: 字典表示
+        """
+        return {
+            'name': self.name,
+            'description': self.description,
+            'item_count': self.item_count,
+            'total_size': self.total_size,
+            'create_time': self.create_time,
+            'update_time': self.update_time
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'PlaylistSummary':
+        """
+        从字典创建播放列表摘要
+        
+        Args:
+            data: 字典数据
+            
+        Returns:
+            PlaylistSummary: 播放列表摘要
+        """
+        return cls(
+            name=data.get('name', ''),
+            description=data.get('description', ''),
+            item_count=data.get('item_count', 0),
+            total_size=data.get('total_size', 0),
+            create_time=data.get('create_time', 0),
+            update_time=data.get('update_time', 0)
+        )
+
+
 class Playlist:
     """播放列表"""
     
+    # 只读播放列表（如智能播放列表）不能直接修改和保存
+    read_only = False
+    
     def __init__(self, name: str, description: str = "", items: List[PlaylistItem] = None,
                  create_time: int = None, update_time: int = None):
         """
@@ -138,6 +213,98 @@ class Playlist:
         self.items = items or []
         self.create_time = create_time or int(time.time())
         self.update_time = update_time or int(time.time())
+        
+        # 延迟加载时的摘要信息
+        self._summary: Optional[PlaylistSummary] = None
+    
+    @property
+    def items(self) -> List[PlaylistItem]:
+        """播放列表项，延迟加载的播放列表在首次访问时才读取"""
+        if self._loader is not None:
+            loader = self._loader
+            self._loader = None
+            self._items = loader()
+        return self._items
+    
+    @items.setter
+    def items(self, items: List[PlaylistItem]) -> None:
+        self._items = items
+        self._loader = None
+    
+    @property
+    def is_loaded(self) -> bool:
+        """播放列表项是否已加载"""
+        return self._loader is None
+    
+    @property
+    def item_count(self) -> int:
+        """歌曲数，未加载时使用摘要中的数量"""
+        if not self.is_loaded and self._summary:
+            return self._summary.item_count
+        return len(self.items)
+    
+    @property
+    def total_size(self) -> int:
+        """总大小，未加载时使用摘要中的大小"""
+        if not self.is_loaded and self._summary:
+            return self._summary.total_size
+        return sum(item.size or 0 for item in self.items)
+    
+    def summary(self) -> PlaylistSummary:
+        """
+        生成播放列表摘要
+        
+        Returns:
+            PlaylistSummary: 播放列表摘要
+        """
+        return PlaylistSummary(
+            name=self.name,
+            description=self.description,
+            item_count=self.item_count,
+            total_size=self.total_size,
+            create_time=self.create_time,
+            update_time=self.update_time
+        )
+    
+    def stats(self) -> Dict[str, int]:
+        """
+        统计播放列表
+        
+        Returns:
+            Dict[str, int]: 歌曲数、总大小、最大文件大小、最早和最晚修改时间
+        """
+        sizes = [item.size or 0 for item in self.items]
+        mtimes = [item.server_mtime for item in self.items]
+        return {
+            'item_count': len(sizes),
+            'total_size': sum(sizes),
+            'max_size': max(sizes, default=0),
+            'oldest_mtime': min(mtimes, default=0),
+            'newest_mtime': max(mtimes, default=0)
+        }
+    
+    @classmethod
+    def from_summary(cls, summary: PlaylistSummary,
+                     loader: Callable[[], List[PlaylistItem]]) -> 'Playlist':
+        """
+        从摘要创建延迟加载的播放列表
+        
+        Args:
+            summary: 播放列表摘要
+            loader: 读取播放列表项的函数
+            
+        Returns:
+            Playlist: 播放列表
+        """
+        playlist = cls(
+            name=summary.name,
+            description=summary.description,
+            create_time=summary.create_time,
+            update_time=summary.update_time
+        )
+        playlist._summary = summary
+        playlist._loader = loader
+        return playlist
     
     def add_item(self, item: PlaylistItem) -> bool:
         """
@@ -159,6 +326,30 @@ class Playlist:
         self.update_time = int(time.time())
         return True
     
+    def add_items(self, items: Iterable[PlaylistItem]) -> int:
+        """
+        批量添加播放列表项，按 fs_id 去重
+        
+        Args:
+            items: 播放列表项
+            
+        Returns:
+            int: 实际添加的数量
+        """
+        existing = {item.fs_id for item in self.items}
+        added = 0
+        
+        for item in items:
+            if item.fs_id in existing:
+                continue
+            existing.add(item.fs_id)
+            self.items.append(item)
+            added += 1
+        
+        if added:
+            self.update_time = int(time.time())
+        return added
+    
     def remove_item(self, fs_id: int) -> bool:
         """
         移除播放列表项
@@ -177,6 +368,25 @@ class Playlist:
             return True
         return False
     
+    def remove_items(self, fs_ids: Iterable[int]) -> int:
+        """
+        批量移除播放列表项
+        
+        Args:
+            fs_ids: 文件ID
+            
+        Returns:
+            int: 实际移除的数量
+        """
+        fs_ids = set(fs_ids)
+        original_length = len(self.items)
+        self.items = [item for item in self.items if item.fs_id not in fs_ids]
+        
+        removed = original_length - len(self.items)
+        if removed:
+            self.update_time = int(time.time())
+        return removed
+    
     def clear(self) -> None:
         """清空播放列表"""
         self.items = []
@@ -187,10 +397,17 @@ class Playlist:
         排序播放列表
         
         Args:
-            key: 排序键 ('name', 'time', 'size', 'add_time')
+            key: 排序键 ('name', 'time', 'size', 'add_time'，以及使用排序键缓存的
+                 'natural', 'pinyin', 'artist', 'album', 'track')
             desc: 是否降序
         """
-        if key == 'name':
+        if key in COLLATION_SORT_KEYS:
+            items = self.items
+            order = get_collation_cache().sort_order(
+                [item.path for item in items], [item.server_filename for item in items], key, desc
+            )
+            self.items = [items[index] for index in order]
+        elif key == 'name':
             self.items.sort(key=lambda x: x.server_filename.lower(), reverse=desc)
         elif key == 'time':
             self.items.sort(key=lambda x: x.server_mtime, reverse=desc)
@@ -201,6 +418,21 @@ class Playlist:
         
         self.update_time = int(time.time())
     
+    def copy(self) -> 'Playlist':
+        """
+        复制播放列表，播放列表项序列为副本（播放列表项本身共用）
+        
+        Returns:
+            Playlist: 副本
+        """
+        return type(self)(
+            name=self.name,
+            description=self.description,
+            items=self.items[:],
+            create_time=self.create_time,
+            update_time=self.update_time
+        )
+    
     def to_dict(self) -> Dict:
         """
         转换为字典
@@ -238,127 +470,148 @@ class Playlist:
         )
 
 
-class PlaylistManager:
-    """播放列表管理器"""
+def use_columnar(item_count: int) -> bool:
+    """
+    判断是否使用列式存储的播放列表
     
-    # 最近播放列表名称
-    RECENT_PLAYLIST_NAME = "最近播放"
+    Args:
+        item_count: 歌曲数
+        
+    Returns:
+        bool: 歌曲数达到配置的阈值时返回 True
+    """
+    threshold = CONFIG.get("playlist.columnar_threshold", 5000)
+    return bool(threshold) and item_count >= threshold
+
+
+def playlist_from_dict(data: Dict) -> Playlist:
+    """
+    从字典创建播放列表，大播放列表使用列式存储
     
-    # 最近播放列表最大容量
-    RECENT_PLAYLIST_MAX_SIZE = 30
+    Args:
+        data: 字典数据
+        
+    Returns:
+        Playlist: 播放列表
+    """
+    if use_columnar(len(data.get('items', []))):
+        from dupan_music.playlist.columnar import ColumnarPlaylist
+        return ColumnarPlaylist.from_dict(data)
     
-    def __init__(self, api=None):
+    return Playlist.from_dict(data)
+
+
+class PlaylistCache:
+    """
+    已解析播放列表的内存缓存
+    
+    每条记录带有读取时的版本标记（如文件状态），版本不一致即失效。
+    缓存中保存的是副本，取出时也返回副本，调用方修改播放列表不会影响缓存。
+    """
+    
+    def __init__(self):
+        """初始化缓存"""
+        self._entries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+    
+    def get(self, name: str, version: Any) -> Optional[Playlist]:
         """
-        初始化播放列表管理器
+        读取缓存
         
         Args:
-            api: 百度网盘API实例
+            name: 播放列表名称
+            version: 当前版本标记
+            
+        Returns:
+            Optional[Playlist]: 播放列表副本，未缓存或已失效时为 None
         """
-        self.api = api
-        self.playlists_dir = self._get_playlists_dir()
-        
-        # 确保目录存在
-        ensure_dir(self.playlists_dir)
-        
-        # 确保最近播放列表存在
-        self._ensure_recent_playlist()
+        with self._lock:
+            entry = self._entries.get(name)
+        if entry is None or entry[0] != version:
+            return None
+        return entry[1].copy()
     
-    def _get_playlists_dir(self) -> str:
+    def put(self, name: str, version: Any, playlist: Playlist) -> None:
         """
-        获取播放列表目录
+        写入缓存
         
-        Returns:
-            str: 播放列表目录
+        Args:
+            name: 播放列表名称
+            version: 版本标记，为 None 时只移除旧记录
+            playlist: 播放列表
         """
-        # 获取用户主目录
-        home_dir = str(Path.home())
-        
-        # 播放列表目录
-        playlists_dir = os.path.join(home_dir, '.dupan_music', 'playlists')
-        
-        return playlists_dir
+        with self._lock:
+            if version is None:
+                self._entries.pop(name, None)
+            else:
+                self._entries[name] = (version, playlist.copy())
     
-    def _ensure_recent_playlist(self) -> None:
-        """确保最近播放列表存在"""
-        recent_playlist = self.get_playlist(self.RECENT_PLAYLIST_NAME)
+    def invalidate(self, name: Optional[str] = None) -> None:
+        """
+        移除缓存
         
-        if not recent_playlist:
-            # 创建最近播放列表
-            recent_playlist = Playlist(
-                name=self.RECENT_PLAYLIST_NAME,
-                description="自动记录最近播放的音乐"
-            )
-            self.save_playlist(recent_playlist)
+        Args:
+            name: 播放列表名称，为 None 时全部移除
+        """
+        with self._lock:
+            if name is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(name, None)
     
-    def _get_playlist_path(self, name: str) -> str:
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class PlaylistStore(ABC):
+    """播放列表存储后端基类"""
+    
+    @abstractmethod
+    def exists(self, name: str) -> bool:
         """
-        获取播放列表文件路径
+        检查播放列表是否存在
         
         Args:
             name: 播放列表名称
             
         Returns:
-            str: 播放列表文件路径
+            bool: 是否存在
         """
-        # 文件名安全处理
-        safe_name = name.replace('/', '_').replace('\\', '_')
+    
+    @abstractmethod
+    def load(self, name: str) -> Optional[Playlist]:
+        """
+        读取播放列表
         
-        return os.path.join(self.playlists_dir, f"{safe_name}.json")
+        Args:
+            name: 播放列表名称
+            
+        Returns:
+            Optional[Playlist]: 播放列表
+        """
     
-    def get_all_playlists(self) -> List[Playlist]:
+    @abstractmethod
+    def load_all(self) -> List[Playlist]:
         """
-        获取所有播放列表
+        读取所有播放列表
         
         Returns:
             List[Playlist]: 播放列表列表
         """
-        playlists = []
-        
-        # 遍历播放列表目录
-        if os.path.exists(self.playlists_dir):
-            for filename in os.listdir(self.playlists_dir):
-                if filename.endswith('.json'):
-                    file_path = os.path.join(self.playlists_dir, filename)
-                    
-                    try:
-                        # 读取播放列表文件
-                        content = read_file(file_path)
-                        if content:
-                            data = json.loads(content)
-                            playlist = Playlist.from_dict(data)
-                            playlists.append(playlist)
-                    except Exception as e:
-                        logger.error(f"读取播放列表文件 {file_path} 失败: {str(e)}")
-        
-        return playlists
     
-    def get_playlist(self, name: str) -> Optional[Playlist]:
+    def list_summaries(self) -> List[PlaylistSummary]:
         """
-        获取播放列表
+        列出所有播放列表的摘要
         
-        Args:
-            name: 播放列表名称
-            
         Returns:
-            Optional[Playlist]: 播放列表
+            List[PlaylistSummary]: 播放列表摘要列表
         """
-        file_path = self._get_playlist_path(name)
-        
-        if os.path.exists(file_path):
-            try:
-                # 读取播放列表文件
-                content = read_file(file_path)
-                if content:
-                    data = json.loads(content)
-                    return Playlist.from_dict(data)
-            except Exception as e:
-                logger.error(f"读取播放列表 {name} 失败: {str(e)}")
-        
-        return None
+        return [playlist.summary() for playlist in self.load_all()]
     
-    def save_playlist(self, playlist: Playlist) -> bool:
+    @abstractmethod
+    def save(self, playlist: Playlist) -> bool:
         """
-        保存播放列表
+        保存播放列表（整体覆盖）
         
         Args:
             playlist: 播放列表
@@ -366,99 +619,828 @@ class PlaylistManager:
         Returns:
             bool: 是否成功
         """
-        file_path = self._get_playlist_path(playlist.name)
-        
-        try:
-            # 更新时间
-            playlist.update_time = int(time.time())
-            
-            # 转换为字典
-            data = playlist.to_dict()
-            
-            # 写入文件
-            return write_file(file_path, json.dumps(data, ensure_ascii=False, indent=2))
-        except Exception as e:
-            logger.error(f"保存播放列表 {playlist.name} 失败: {str(e)}")
-            return False
     
-    def create_playlist(self, name: str, description: str = "") -> Optional[Playlist]:
+    @abstractmethod
+    def delete(self, name: str) -> bool:
         """
-        创建播放列表
+        删除播放列表
         
         Args:
             name: 播放列表名称
-            description: 播放列表描述
             
         Returns:
-            Optional[Playlist]: 播放列表
+            bool: 是否成功
         """
-        # 检查是否已存在
-        if self.get_playlist(name):
-            logger.warning(f"播放列表 {name} 已存在")
-            return None
-        
-        # 创建播放列表
-        playlist = Playlist(name=name, description=description)
-        
-        # 保存播放列表
-        if self.save_playlist(playlist):
-            return playlist
-        
-        return None
     
-    def delete_playlist(self, name: str) -> bool:
+    def add_items(self, name: str, items: List[PlaylistItem]) -> int:
         """
-        删除播放列表
+        追加播放列表项，已存在的文件会被跳过
         
         Args:
             name: 播放列表名称
+            items: 播放列表项
             
         Returns:
-            bool: 是否成功
+            int: 实际添加的数量
         """
-        # 不允许删除最近播放列表
-        if name == self.RECENT_PLAYLIST_NAME:
-            logger.warning(f"不允许删除最近播放列表")
-            return False
-        
-        file_path = self._get_playlist_path(name)
+        playlist = self.load(name)
+        if not playlist:
+            return 0
         
-        try:
-            # 检查文件是否存在
-            if os.path.exists(file_path):
-                os.remove(file_path)
-                return True
-            return False
-        except Exception as e:
-            logger.error(f"删除播放列表 {name} 失败: {str(e)}")
-            return False
+        added = playlist.add_items(items)
+        if added and not self.save(playlist):
+            return 0
+        return added
     
-    def add_to_playlist(self, playlist_name: str, file_info: Dict) -> bool:
+    def remove_items(self, name: str, fs_ids: Iterable[int]) -> int:
         """
-        添加文件到播放列表
+        移除播放列表项
         
         Args:
-            playlist_name: 播放列表名称
-            file_info: 文件信息
+            name: 播放列表名称
+            fs_ids: 文件ID
+            
+        Returns:
+            int: 实际移除的数量
+        """
+        playlist = self.load(name)
+        if not playlist:
+            return 0
+        
+        removed = playlist.remove_items(fs_ids)
+        if removed and not self.save(playlist):
+            return 0
+        return removed
+    
+    def flush(self) -> None:
+        """写入尚未写入的修改"""
+        pass
+    
+    def close(self) -> None:
+        """释放存储资源"""
+        pass
+
+
+class JsonPlaylistStore(PlaylistStore):
+    """JSON文件存储后端，每个播放列表一个文件"""
+    
+    # 摘要清单文件名（不以 .json 结尾，不会被当作播放列表读取）
+    MANIFEST_FILENAME = ".manifest"
+    
+    def __init__(self, playlists_dir: str, write_delay: float = 0):
+        """
+        初始化JSON存储
+        
+        Args:
+            playlists_dir: 播放列表目录
+            write_delay: 合并写入的延迟（秒），大于 0 时短时间内对同一播放列表的多次保存
+                只写入一次，为 0 时立即写入
+        """
+        self.playlists_dir = playlists_dir
+        self.manifest_path = os.path.join(playlists_dir, self.MANIFEST_FILENAME)
+        self.writer = CoalescingWriter(write_delay) if write_delay > 0 else None
+        # 文件路径 -> 已保存但尚未写入文件的播放列表（合并写入），读取时优先使用
+        self._unsaved: Dict[str, Playlist] = {}
+        self._unsaved_lock = threading.Lock()
+        
+        # 已解析的播放列表，按文件状态判断是否被外部修改
+        self.cache = PlaylistCache()
+        
+        # 文件名 -> 摘要及文件状态，首次使用时读取
+        self._manifest: Optional[Dict[str, Dict]] = None
+        # 清单是否有未写入的修改
+        self._manifest_dirty = False
+        # 清单的读取-修改-写入可能与合并写入线程的回调同时发生
+        self._manifest_lock = threading.RLock()
+    
+    def get_path(self, name: str) -> str:
+        """
+        获取播放列表文件路径
+        
+        Args:
+            name: 播放列表名称
+            
+        Returns:
+            str: 播放列表文件路径
+        """
+        # 文件名安全处理
+        safe_name = name.replace('/', '_').replace('\\', '_')
+        
+        return os.path.join(self.playlists_dir, f"{safe_name}.json")
+    
+    @staticmethod
+    def _file_version(file_path: str) -> Optional[tuple]:
+        """
+        获取文件版本标记，原子写入会替换文件，inode 随之改变
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            Optional[tuple]: (修改时间, 大小, inode)，无法获取时为 None
+        """
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    
+    def _read(self, file_path: str) -> Optional[Playlist]:
+        """
+        读取并解析播放列表文件
+        
+        Args:
+            file_path: 播放列表文件路径
+            
+        Returns:
+            Optional[Playlist]: 播放列表
+        """
+        content = read_file(file_path)
+        if content:
+            data = codec.loads(content)
+            return playlist_from_dict(data)
+        return None
+    
+    def _load_manifest(self) -> Dict[str, Dict]:
+        """
+        读取摘要清单
+        
+        Returns:
+            Dict[str, Dict]: 文件名 -> 摘要记录
+        """
+        with self._manifest_lock:
+            if self._manifest is None:
+                self._manifest = {}
+                
+                if os.path.exists(self.manifest_path):
+                    try:
+                        content = read_file(self.manifest_path)
+                        if content:
+                            self._manifest = codec.loads(content).get('playlists', {})
+                    except Exception as e:
+                        logger.warning(f"读取播放列表清单失败，将重新生成: {str(e)}")
+            
+            return self._manifest
+    
+    def _write_manifest(self) -> None:
+        """写入摘要清单"""
+        with self._manifest_lock:
+            data = {'version': 1, 'playlists': self._load_manifest()}
+            if write_file(self.manifest_path, codec.dumps(data)):
+                self._manifest_dirty = False
+            else:
+                logger.warning("写入播放列表清单失败")
+    
+    @staticmethod
+    def _manifest_record(playlist: Playlist, stat: os.stat_result) -> Dict:
+        """
+        生成清单记录，记录文件状态以便识别外部修改
+        
+        Args:
+            playlist: 播放列表
+            stat: 播放列表文件状态
+            
+        Returns:
+            Dict: 清单记录
+        """
+        record = playlist.summary().to_dict()
+        record['mtime_ns'] = stat.st_mtime_ns
+        record['file_size'] = stat.st_size
+        return record
+    
+    def _update_manifest(self, file_path: str, playlist: Optional[Playlist]) -> None:
+        """
+        更新单个播放列表的清单记录，修改在下次列出播放列表时写入
+        
+        Args:
+            file_path: 播放列表文件路径
+            playlist: 播放列表，为 None 时删除记录
+        """
+        filename = os.path.basename(file_path)
+        
+        record = None
+        if playlist is not None:
+            try:
+                record = self._manifest_record(playlist, os.stat(file_path))
+            except OSError:
+                record = None
+        
+        with self._manifest_lock:
+            manifest = self._load_manifest()
+            if record is None:
+                if manifest.pop(filename, None) is not None:
+                    self._manifest_dirty = True
+            else:
+                manifest[filename] = record
+                self._manifest_dirty = True
+    
+    def flush(self) -> None:
+        if self.writer:
+            self.writer.flush()
+    
+    def exists(self, name: str) -> bool:
+        file_path = self.get_path(name)
+        return file_path in self._unsaved or os.path.exists(file_path)
+    
+    def load(self, name: str) -> Optional[Playlist]:
+        file_path = self.get_path(name)
+        
+        # 尚未写入的修改直接从内存读取，读取不会触发写入，连续修改得以合并
+        playlist = self._unsaved.get(file_path)
+        if playlist is not None:
+            return playlist
+        
+        if os.path.exists(file_path):
+            version = self._file_version(file_path)
+            if version is not None:
+                playlist = self.cache.get(name, version)
+                if playlist is not None:
+                    return playlist
+            
+            try:
+                # 读取播放列表文件
+                playlist = self._read(file_path)
+            except Exception as e:
+                logger.error(f"读取播放列表 {name} 失败: {str(e)}")
+                return None
+            
+            if playlist is not None:
+                self.cache.put(name, version, playlist)
+            return playlist
+        
+        self.cache.invalidate(name)
+        return None
+    
+    def load_all(self) -> List[Playlist]:
+        with self._unsaved_lock:
+            unsaved = dict(self._unsaved)
+        playlists = list(unsaved.values())
+        
+        # 遍历播放列表目录
+        if os.path.exists(self.playlists_dir):
+            for filename in os.listdir(self.playlists_dir):
+                if filename.endswith('.json'):
+                    file_path = os.path.join(self.playlists_dir, filename)
+                    if file_path in unsaved:
+                        continue
+                    
+                    try:
+                        # 读取播放列表文件
+                        playlist = self._read(file_path)
+                        if playlist:
+                            playlists.append(playlist)
+                    except Exception as e:
+                        logger.error(f"读取播放列表文件 {file_path} 失败: {str(e)}")
+        
+        return playlists
+    
+    def list_summaries(self) -> List[PlaylistSummary]:
+        # 尚未写入的播放列表使用内存中的摘要（写入线程完成写入时会移除）
+        with self._unsaved_lock:
+            unsaved = {os.path.basename(path): playlist for path, playlist in self._unsaved.items()}
+        summaries = [playlist.summary() for playlist in unsaved.values()]
+        if not os.path.exists(self.playlists_dir):
+            return summaries
+        
+        # 合并写入线程的回调会修改清单，清单的读取-修改-写入期间持有锁
+        with self._manifest_lock:
+            manifest = self._load_manifest()
+            seen = set()
+            changed = False
+            
+            with os.scandir(self.playlists_dir) as entries:
+                for entry in entries:
+                    if not entry.name.endswith('.json') or not entry.is_file():
+                        continue
+                    
+                    seen.add(entry.name)
+                    if entry.name in unsaved:
+                        continue
+                    
+                    stat = entry.stat()
+                    record = manifest.get(entry.name)
+                    
+                    # 清单记录与文件状态一致时直接使用，无需解析播放列表
+                    if record and record.get('mtime_ns') == stat.st_mtime_ns and record.get('file_size') == stat.st_size:
+                        summaries.append(PlaylistSummary.from_dict(record))
+                        continue
+                    
+                    # 清单缺失或文件被外部修改，重新解析该播放列表
+                    try:
+                        playlist = self._read(entry.path)
+                    except Exception as e:
+                        logger.error(f"读取播放列表文件 {entry.path} 失败: {str(e)}")
+                        continue
+                    
+                    if not playlist:
+                        continue
+                    
+                    manifest[entry.name] = self._manifest_record(playlist, stat)
+                    summaries.append(playlist.summary())
+                    changed = True
+            
+            # 移除已删除文件的记录
+            for filename in set(manifest) - seen:
+                del manifest[filename]
+                changed = True
+            
+            if changed or self._manifest_dirty:
+                self._write_manifest()
+        
+        summaries.sort(key=lambda summary: summary.name)
+        return summaries
+    
+    def save(self, playlist: Playlist) -> bool:
+        file_path = self.get_path(playlist.name)
+        
+        if self.writer:
+            # 写入时才序列化，期间的修改合并为一次写入
+            compact = CONFIG.get("playlist.compact", False)
+            
+            def render() -> str:
+                return codec.dumps(playlist.to_dict(), pretty=not compact)
+            
+            def written(success: bool) -> None:
+                # 在写入器持有文件锁时调用，文件状态就是本次写入的结果
+                with self._unsaved_lock:
+                    if self._unsaved.get(file_path) is playlist:
+                        del self._unsaved[file_path]
+                if success:
+                    self.cache.put(playlist.name, self._file_version(file_path), playlist)
+                    self._update_manifest(file_path, playlist)
+                else:
+                    logger.error(f"保存播放列表 {playlist.name} 失败")
+            
+            self.cache.invalidate(playlist.name)
+            with self._unsaved_lock:
+                self._unsaved[file_path] = playlist
+            self.writer.submit(file_path, render, written)
+            return True
+        
+        try:
+            # 转换为字典
+            data = playlist.to_dict()
+            
+            # 写入文件，紧凑模式下不缩进以减小文件体积并加快读写
+            compact = CONFIG.get("playlist.compact", False)
+            with file_lock(file_path):
+                if not write_file(file_path, codec.dumps(data, pretty=not compact)):
+                    self.cache.invalidate(playlist.name)
+                    return False
+                # 持有锁时获取文件状态，其他进程的写入不会被误认为本次写入
+                self.cache.put(playlist.name, self._file_version(file_path), playlist)
+        except Exception as e:
+            logger.error(f"保存播放列表 {playlist.name} 失败: {str(e)}")
+            self.cache.invalidate(playlist.name)
+            return False
+        
+        self._update_manifest(file_path, playlist)
+        return True
+    
+    def delete(self, name: str) -> bool:
+        self.flush()
+        self.cache.invalidate(name)
+        file_path = self.get_path(name)
+        
+        try:
+            # 检查文件是否存在
+            if os.path.exists(file_path):
+                os.remove(file_path)
+                self._update_manifest(file_path, None)
+                return True
+            return False
+        except Exception as e:
+            logger.error(f"删除播放列表 {name} 失败: {str(e)}")
+            return False
+    
+    def add_items(self, name: str, items: List[PlaylistItem]) -> int:
+        # 读取、修改、写入期间持有文件锁，避免与其他进程（如播放器和shell）的修改互相覆盖；
+        # 合并写入时延迟的写入由写入器在持有同一把锁时执行
+        with file_lock(self.get_path(name)):
+            return super().add_items(name, items)
+    
+    def remove_items(self, name: str, fs_ids: Iterable[int]) -> int:
+        with file_lock(self.get_path(name)):
+            return super().remove_items(name, fs_ids)
+    
+    def close(self) -> None:
+        self.flush()
+
+
+class PlaylistManager:
+    """播放列表管理器"""
+    
+    # 最近播放列表名称
+    RECENT_PLAYLIST_NAME = "最近播放"
+    
+    # 最近播放列表最大容量
+    RECENT_PLAYLIST_MAX_SIZE = 30
+    
+    def __init__(self, api=None):
+        """
+        初始化播放列表管理器
+        
+        Args:
+            api: 百度网盘API实例
+        """
+        self.api = api
+        self.playlists_dir = self._get_playlists_dir()
+        
+        # 确保目录存在
+        ensure_dir(self.playlists_dir)
+        
+        # 存储后端
+        self.store = self._create_store()
+        
+        # 播放历史，最近播放列表由播放历史压缩生成
+        self.history = PlayHistory(os.path.join(os.path.dirname(self.playlists_dir), 'history'))
+        self.history.on_written = self._on_history_written
+        self.stats = PlayStats(self.history)
+        self._compact_lock = threading.Lock()
+        self._pending_plays = 0
+        
+        # 智能播放列表和目录播放列表，首次使用时初始化
+        self._smart_playlists = None
+        self._folder_playlists = None
+
+        # 确保最近播放列表存在
+        self._ensure_recent_playlist()
+    
+    def _get_playlists_dir(self) -> str:
+        """
+        获取播放列表目录
+        
+        Returns:
+            str: 播放列表目录
+        """
+        # 获取用户主目录
+        home_dir = str(Path.home())
+        
+        # 播放列表目录
+        playlists_dir = os.path.join(home_dir, '.dupan_music', 'playlists')
+        
+        return playlists_dir
+    
+    def _create_store(self) -> PlaylistStore:
+        """
+        根据配置创建存储后端
+        
+        Returns:
+            PlaylistStore: 存储后端
+        """
+        json_store = JsonPlaylistStore(self.playlists_dir, CONFIG.get("playlist.write_delay", 0))
+        storage = CONFIG.get("playlist.storage", "json")
+        
+        if storage == "sqlite":
+            try:
+                from dupan_music.playlist.sqlite_store import SqlitePlaylistStore
+                
+                store = SqlitePlaylistStore(os.path.join(self.playlists_dir, "playlists.db"))
+                
+                # 首次启用时自动迁移已有的JSON播放列表
+                store.migrate_from(json_store)
+                return store
+            except Exception as e:
+                logger.error(f"初始化SQLite播放列表存储失败，回退到JSON存储: {str(e)}")
+        elif storage != "json":
+            logger.warning(f"未知的播放列表存储后端 {storage}，使用JSON存储")
+        
+        return json_store
+    
+    @property
+    def smart_playlists(self):
+        """智能播放列表管理"""
+        if self._smart_playlists is None:
+            from dupan_music.playlist.smart import SmartPlaylists
+            
+            self._smart_playlists = SmartPlaylists(os.path.join(self.playlists_dir, 'smart'), self.stats)
+        return self._smart_playlists
+    
+    @property
+    def folder_playlists(self):
+        """目录播放列表管理"""
+        if self._folder_playlists is None:
+            from dupan_music.playlist.folder import FolderPlaylists
+            
+            self._folder_playlists = FolderPlaylists(os.path.join(self.playlists_dir, 'folders'), self.api)
+        return self._folder_playlists
+    
+    def _definitions(self) -> List:
+        """
+        只保存定义的播放列表管理（智能播放列表、目录播放列表）
+        
+        Returns:
+            List[PlaylistDefinitions]: 管理对象列表
+        """
+        return [self.smart_playlists, self.folder_playlists]
+    
+    def playlist_exists(self, name: str) -> bool:
+        """
+        名称是否已被任一类播放列表使用
+        
+        Args:
+            name: 播放列表名称
+            
+        Returns:
+            bool: 是否已被使用
+        """
+        return self.store.exists(name) or any(source.exists(name) for source in self._definitions())
+
+    def _ensure_recent_playlist(self) -> None:
+        """确保最近播放列表存在"""
+        recent_playlist = self.get_playlist(self.RECENT_PLAYLIST_NAME)
+        
+        if not recent_playlist:
+            # 创建最近播放列表
+            recent_playlist = Playlist(
+                name=self.RECENT_PLAYLIST_NAME,
+                description="自动记录最近播放的音乐"
+            )
+            self.save_playlist(recent_playlist)
+    
+    def get_playlist_summaries(self) -> List[PlaylistSummary]:
+        """
+        获取所有播放列表的摘要（名称、描述、歌曲数、总大小等），不读取播放列表项
+        
+        Returns:
+            List[PlaylistSummary]: 播放列表摘要列表
+        """
+        summaries = self.store.list_summaries()
+        for source in self._definitions():
+            summaries.extend(source.list_summaries())
+        return sorted(summaries, key=lambda summary: summary.name)
+    
+    def get_all_playlists(self) -> List[Playlist]:
+        """
+        获取所有播放列表，播放列表项在首次访问时才读取
+        
+        Returns:
+            List[Playlist]: 播放列表列表
+        """
+        playlists = [
+            Playlist.from_summary(summary, self._item_loader(summary.name))
+            for summary in self.store.list_summaries()
+        ]
+        for source in self._definitions():
+            playlists.extend(source.load_all())
+        return sorted(playlists, key=lambda playlist: playlist.name)
+    
+    def _item_loader(self, name: str) -> Callable[[], List[PlaylistItem]]:
+        """
+        创建读取播放列表项的函数
+        
+        Args:
+            name: 播放列表名称
+            
+        Returns:
+            Callable[[], List[PlaylistItem]]: 读取函数
+        """
+        def load_items() -> List[PlaylistItem]:
+            playlist = self.store.load(name)
+            return playlist.items if playlist else []
+        
+        return load_items
+    
+    def get_playlist(self, name: str) -> Optional[Playlist]:
+        """
+        获取播放列表
+        
+        Args:
+            name: 播放列表名称
+            
+        Returns:
+            Optional[Playlist]: 播放列表
+        """
+        if name == self.RECENT_PLAYLIST_NAME:
+            self.compact_history()
+            return self.store.load(name)
+        
+        playlist = self.store.load(name)
+        for source in self._definitions():
+            if playlist:
+                break
+            playlist = source.load(name)
+        return playlist
+
+    def save_playlist(self, playlist: Playlist) -> bool:
+        """
+        保存播放列表
+        
+        Args:
+            playlist: 播放列表
+            
+        Returns:
+            bool: 是否成功
+        """
+        if playlist.read_only:
+            logger.warning(f"播放列表 {playlist.name} 是只读的，不能修改")
+            return False
+        
+        # 更新时间
+        playlist.update_time = int(time.time())
+        
+        return self.store.save(playlist)
+    
+    def create_smart_playlist(self, name: str, query, description: str = "",
+                              overwrite: bool = False):
+        """
+        创建智能播放列表
+        
+        Args:
+            name: 播放列表名称
+            query: 查询条件（SmartQuery）
+            description: 播放列表描述
+            overwrite: 是否替换已有的同名智能播放列表
+            
+        Returns:
+            Optional[SmartPlaylist]: 智能播放列表
+        """
+        from dupan_music.playlist.smart import SmartPlaylist
+        
+        if self.store.exists(name) or self.folder_playlists.exists(name):
+            logger.warning(f"播放列表 {name} 已存在")
+            return None
+        if self.smart_playlists.exists(name) and not overwrite:
+            logger.warning(f"智能播放列表 {name} 已存在")
+            return None
+        
+        playlist = SmartPlaylist(name=name, query=query, description=description)
+        if not self.smart_playlists.save(playlist):
+            return None
+        return self.smart_playlists.load(name)
+    
+    def create_folder_playlist(self, name: str, path: str, recursive: bool = False,
+                               description: str = ""):
+        """
+        创建绑定网盘目录的播放列表
+        
+        Args:
+            name: 播放列表名称
+            path: 网盘目录路径
+            recursive: 是否包含子目录
+            description: 播放列表描述
+            
+        Returns:
+            Optional[FolderPlaylist]: 目录播放列表
+        """
+        from dupan_music.playlist.folder import FolderPlaylist
+        
+        if self.playlist_exists(name):
+            logger.warning(f"播放列表 {name} 已存在")
+            return None
+        
+        playlist = FolderPlaylist(name=name, path=path, recursive=recursive, description=description)
+        if not self.folder_playlists.save(playlist):
+            return None
+        return self.folder_playlists.load(name)
+    
+    def create_playlist(self, name: str, description: str = "") -> Optional[Playlist]:
+        """
+        创建播放列表
+        
+        Args:
+            name: 播放列表名称
+            description: 播放列表描述
+            
+        Returns:
+            Optional[Playlist]: 播放列表
+        """
+        # 检查是否已存在
+        if self.playlist_exists(name):
+            logger.warning(f"播放列表 {name} 已存在")
+            return None
+        
+        # 创建播放列表
+        playlist = Playlist(name=name, description=description)
+        
+        # 保存播放列表
+        if self.save_playlist(playlist):
+            return playlist
+        
+        return None
+    
+    def delete_playlist(self, name: str) -> bool:
+        """
+        删除播放列表
+        
+        Args:
+            name: 播放列表名称
+            
+        Returns:
+            bool: 是否成功
+        """
+        # 不允许删除最近播放列表
+        if name == self.RECENT_PLAYLIST_NAME:
+            logger.warning(f"不允许删除最近播放列表")
+            return False
+        
+        if self.store.delete(name):
+            return True
+        return any(source.delete(name) for source in self._definitions())
+
+    def export_playlist(self, name: str, file_path: str) -> bool:
+        """
+        导出播放列表为JSON文件
+        
+        Args:
+            name: 播放列表名称
+            file_path: 导出文件路径
             
         Returns:
             bool: 是否成功
         """
-        # 获取播放列表
-        playlist = self.get_playlist(playlist_name)
+        playlist = self.get_playlist(name)
         if not playlist:
-            logger.warning(f"播放列表 {playlist_name} 不存在")
+            logger.warning(f"播放列表 {name} 不存在")
+            return False
+        
+        try:
+            return write_file(file_path, codec.dumps(playlist.to_dict(), pretty=True))
+        except Exception as e:
+            logger.error(f"导出播放列表 {name} 失败: {str(e)}")
             return False
+    
+    def import_playlist(self, file_path: str, name: Optional[str] = None,
+                        overwrite: bool = False) -> Optional[Playlist]:
+        """
+        从JSON文件导入播放列表
+        
+        Args:
+            file_path: 导入文件路径
+            name: 播放列表名称，默认使用文件中的名称
+            overwrite: 是否覆盖同名播放列表
+            
+        Returns:
+            Optional[Playlist]: 导入的播放列表
+        """
+        content = read_file(file_path)
+        if not content:
+            logger.error(f"读取文件 {file_path} 失败")
+            return None
+        
+        try:
+            playlist = playlist_from_dict(codec.loads(content))
+        except Exception as e:
+            logger.error(f"解析播放列表文件 {file_path} 失败: {str(e)}")
+            return None
+        
+        if name:
+            playlist.name = name
+        
+        if not playlist.name:
+            logger.error(f"播放列表文件 {file_path} 缺少名称")
+            return None
+        
+        if self.store.exists(playlist.name):
+            if not overwrite:
+                logger.warning(f"播放列表 {playlist.name} 已存在")
+                return None
+        elif self.playlist_exists(playlist.name):
+            # 覆盖只针对普通播放列表，不能用导入的播放列表遮盖同名的智能或目录播放列表
+            logger.warning(f"播放列表 {playlist.name} 已被智能播放列表或目录播放列表使用")
+            return None
+        
+        if self.save_playlist(playlist):
+            return playlist
+        
+        return None
+    
+    def add_to_playlist(self, playlist_name: str, file_info: Dict) -> bool:
+        """
+        添加文件到播放列表
+        
+        Args:
+            playlist_name: 播放列表名称
+            file_info: 文件信息
+            
+        Returns:
+            bool: 是否成功
+        """
+        return self.add_many(playlist_name, [file_info]) > 0
+    
+    def add_many(self, playlist_name: str, file_infos: Iterable[Dict]) -> int:
+        """
+        批量添加文件到播放列表，所有修改只保存一次
+        
+        Args:
+            playlist_name: 播放列表名称
+            file_infos: 文件信息
+            
+        Returns:
+            int: 实际添加的数量（已存在的文件不计入）
+        """
+        # 检查播放列表是否存在
+        if not self.store.exists(playlist_name):
+            logger.warning(f"播放列表 {playlist_name} 不存在")
+            return 0
         
         # 创建播放列表项
-        item = PlaylistItem.from_api_result(file_info)
+        items = [PlaylistItem.from_api_result(file_info) for file_info in file_infos]
+        if not items:
+            return 0
         
         # 添加到播放列表
-        if playlist.add_item(item):
-            # 保存播放列表
-            return self.save_playlist(playlist)
-        
-        return False
+        return self.store.add_items(playlist_name, items)
     
     def remove_from_playlist(self, playlist_name: str, fs_id: int) -> bool:
         """
@@ -471,18 +1453,30 @@ class PlaylistManager:
         Returns:
             bool: 是否成功
         """
-        # 获取播放列表
-        playlist = self.get_playlist(playlist_name)
-        if not playlist:
+        return self.remove_many(playlist_name, [fs_id]) > 0
+    
+    def remove_many(self, playlist_name: str, fs_ids: Iterable[int]) -> int:
+        """
+        从播放列表批量移除文件，所有修改只保存一次
+        
+        Args:
+            playlist_name: 播放列表名称
+            fs_ids: 文件ID
+            
+        Returns:
+            int: 实际移除的数量
+        """
+        # 检查播放列表是否存在
+        if not self.store.exists(playlist_name):
             logger.warning(f"播放列表 {playlist_name} 不存在")
-            return False
+            return 0
         
-        # 移除文件
-        if playlist.remove_item(fs_id):
-            # 保存播放列表
-            return self.save_playlist(playlist)
+        fs_ids = list(fs_ids)
+        if not fs_ids:
+            return 0
         
-        return False
+        # 移除文件
+        return self.store.remove_items(playlist_name, fs_ids)
     
     def check_file_validity(self, fs_id: int) -> bool:
         """
@@ -534,44 +1528,89 @@ class PlaylistManager:
             logger.error(f"刷新文件信息失败: {str(e)}")
             return None
     
-    def add_to_recent_playlist(self, file_info: Dict) -> bool:
+    def add_to_recent_playlist(self, file_info: Dict, playlist_name: str = "") -> bool:
         """
-        添加到最近播放列表
+        记录开始播放
+        
+        只追加写入播放历史，最近播放列表在压缩播放历史时更新。
         
         Args:
             file_info: 文件信息
+            playlist_name: 所在播放列表名称
             
         Returns:
             bool: 是否成功
         """
-        # 获取最近播放列表
-        recent_playlist = self.get_playlist(self.RECENT_PLAYLIST_NAME)
-        if not recent_playlist:
-            # 创建最近播放列表
-            recent_playlist = self.create_playlist(
-                self.RECENT_PLAYLIST_NAME,
-                "自动记录最近播放的音乐"
-            )
-            
-            if not recent_playlist:
-                logger.error("创建最近播放列表失败")
-                return False
-        
-        # 创建播放列表项
         item = PlaylistItem.from_api_result(file_info)
+        self.history.record_start(item.to_dict(), playlist_name)
+        return True
+    
+    def record_play_end(self, fs_id: int, played: float, length: float,
+                        completed: bool, playlist_name: str = "") -> None:
+        """
+        记录播放结束
         
-        # 移除已存在的相同文件
-        recent_playlist.remove_item(item.fs_id)
-        
-        # 添加到列表开头
-        recent_playlist.items.insert(0, item)
-        
-        # 限制列表大小
-        if len(recent_playlist.items) > self.RECENT_PLAYLIST_MAX_SIZE:
-            recent_playlist.items = recent_playlist.items[:self.RECENT_PLAYLIST_MAX_SIZE]
+        Args:
+            fs_id: 文件ID
+            played: 实际播放秒数
+            length: 歌曲时长（秒）
+            completed: 是否自然播放结束
+            playlist_name: 所在播放列表名称
+        """
+        self.history.record_end(fs_id, played, length, completed, playlist_name)
+    
+    def _on_history_written(self, records: List[Dict]) -> None:
+        """
+        播放历史写入后的回调，累计一定数量的播放后更新最近播放列表和播放统计
         
-        # 更新时间
-        recent_playlist.update_time = int(time.time())
+        Args:
+            records: 本批写入的记录
+        """
+        self._pending_plays += sum(1 for record in records if record.get('event') == EVENT_START)
+        if self._pending_plays >= CONFIG.get("history.compact_every", 10):
+            self.compact_history()
+            self.stats.update()
+    
+    def compact_history(self) -> bool:
+        """
+        压缩播放历史，将上次压缩后的新播放记录合并到最近播放列表
         
-        # 保存播放列表
-        return self.save_playlist(recent_playlist)
+        Returns:
+            bool: 是否成功
+        """
+        with self._compact_lock:
+            offset = self.history.get_offset(self.RECENT_PLAYLIST_NAME)
+            
+            # 新记录按时间顺序排列，同一文件只保留最后一次播放
+            latest: Dict[int, Dict] = {}
+            for record, offset_after in self.history.read(offset):
+                offset = offset_after
+                if record.get('event') == EVENT_START and record.get('item'):
+                    latest.pop(record['fs_id'], None)
+                    latest[record['fs_id']] = record
+            
+            if not latest:
+                self._pending_plays = 0
+                return True
+            
+            recent_playlist = self.store.load(self.RECENT_PLAYLIST_NAME) or Playlist(
+                name=self.RECENT_PLAYLIST_NAME,
+                description="自动记录最近播放的音乐"
+            )
+            
+            # 最新播放的排在最前
+            items = []
+            for record in reversed(list(latest.values())):
+                item = PlaylistItem.from_dict(record['item'])
+                item.add_time = int(record['ts'])
+                items.append(item)
+            
+            items.extend(item for item in recent_playlist.items if item.fs_id not in latest)
+            recent_playlist.items = items[:self.RECENT_PLAYLIST_MAX_SIZE]
+            
+            if not self.save_playlist(recent_playlist):
+                return False
+            
+            self.history.set_offset(self.RECENT_PLAYLIST_NAME, offset)
+            self._pending_plays = 0
+            return True
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+播放列表集合运算
+
+并集、交集、差集和对比按文件ID和内容MD5建立哈希索引，两首歌文件ID相同或MD5相同
+即视为同一首（同一文件上传到不同位置时文件ID不同而MD5相同），时间复杂度与两个
+播放列表的长度之和成线性关系。
+"""
+
+from typing import List, Optional, Sequence, Set, Tuple
+
+from dupan_music.playlist.playlist import Playlist, PlaylistItem, PlaylistManager
+from dupan_music.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 支持的集合运算
+SET_OPERATIONS = ('union', 'intersect', 'subtract', 'diff')
+
+
+def _columns(items: Sequence[PlaylistItem]) -> Tuple[Sequence[int], Sequence[str]]:
+    """
+    获取文件ID列和MD5列，列式存储时直接读取列
+    
+    Args:
+        items: 播放列表项
+        
+    Returns:
+        Tuple[Sequence[int], Sequence[str]]: 文件ID列、MD5列
+    """
+    if hasattr(items, 'column'):
+        return items.column('fs_id'), items.column('md5')
+    return [item.fs_id for item in items], [item.md5 for item in items]
+
+
+class ItemIndex:
+    """播放列表项的文件ID和MD5哈希索引"""
+    
+    def __init__(self, items: Sequence[PlaylistItem] = ()):
+        """
+        初始化索引
+        
+        Args:
+            items: 播放列表项
+        """
+        self.fs_ids: Set[int] = set()
+        self.md5s: Set[str] = set()
+        fs_ids, md5s = _columns(items)
+        self.update(fs_ids, md5s)
+    
+    def update(self, fs_ids: Sequence[int], md5s: Sequence[str]) -> None:
+        """
+        加入文件
+        
+        Args:
+            fs_ids: 文件ID
+            md5s: 对应的MD5，空值不参与比较
+        """
+        self.fs_ids.update(fs_ids)
+        self.md5s.update(md5 for md5 in md5s if md5)
+    
+    def contains(self, fs_id: int, md5: Optional[str]) -> bool:
+        """
+        是否包含同一首歌
+        
+        Args:
+            fs_id: 文件ID
+            md5: 文件MD5
+            
+        Returns:
+            bool: 文件ID或MD5已存在
+        """
+        return fs_id in self.fs_ids or bool(md5) and md5 in self.md5s
+    
+    def add(self, fs_id: int, md5: Optional[str]) -> None:
+        """
+        加入一个文件
+        
+        Args:
+            fs_id: 文件ID
+            md5: 文件MD5
+        """
+        self.fs_ids.add(fs_id)
+        if md5:
+            self.md5s.add(md5)
+
+
+def _select(items: Sequence[PlaylistItem], keep, seen: Optional[ItemIndex] = None) -> List[PlaylistItem]:
+    """
+    按条件选出播放列表项，同时去掉自身重复的歌曲
+    
+    Args:
+        items: 播放列表项
+        keep: 判断函数，参数为文件ID和MD5
+        seen: 已选出的歌曲索引，会被更新
+        
+    Returns:
+        List[PlaylistItem]: 选出的播放列表项
+    """
+    seen = seen if seen is not None else ItemIndex()
+    fs_ids, md5s = _columns(items)
+    selected = []
+    for index, (fs_id, md5) in enumerate(zip(fs_ids, md5s)):
+        if seen.contains(fs_id, md5) or not keep(fs_id, md5):
+            continue
+        seen.add(fs_id, md5)
+        selected.append(items[index])
+    return selected
+
+
+def union(a: Sequence[PlaylistItem], b: Sequence[PlaylistItem]) -> List[PlaylistItem]:
+    """
+    并集：A 的歌曲，加上 B 中 A 没有的歌曲
+    
+    Args:
+        a: 播放列表A的播放列表项
+        b: 播放列表B的播放列表项
+        
+    Returns:
+        List[PlaylistItem]: 结果
+    """
+    seen = ItemIndex()
+    result = _select(a, lambda fs_id, md5: True, seen)
+    result.extend(_select(b, lambda fs_id, md5: True, seen))
+    return result
+
+
+def intersect(a: Sequence[PlaylistItem], b: Sequence[PlaylistItem]) -> List[PlaylistItem]:
+    """
+    交集：A 中 B 也有的歌曲
+    
+    Args:
+        a: 播放列表A的播放列表项
+        b: 播放列表B的播放列表项
+        
+    Returns:
+        List[PlaylistItem]: 结果
+    """
+    index = ItemIndex(b)
+    return _select(a, index.contains)
+
+
+def subtract(a: Sequence[PlaylistItem], b: Sequence[PlaylistItem]) -> List[PlaylistItem]:
+    """
+    差集：A 中 B 没有的歌曲
+    
+    Args:
+        a: 播放列表A的播放列表项
+        b: 播放列表B的播放列表项
+        
+    Returns:
+        List[PlaylistItem]: 结果
+    """
+    index = ItemIndex(b)
+    return _select(a, lambda fs_id, md5: not index.contains(fs_id, md5))
+
+
+def diff(a: Sequence[PlaylistItem], b: Sequence[PlaylistItem]) -> Tuple[List[PlaylistItem], List[PlaylistItem], int]:
+    """
+    对比两个播放列表
+    
+    Args:
+        a: 播放列表A的播放列表项
+        b: 播放列表B的播放列表项
+        
+    Returns:
+        Tuple[List[PlaylistItem], List[PlaylistItem], int]: 只在A中的歌曲、只在B中的歌曲、共有的歌曲数
+    """
+    only_a = subtract(a, b)
+    only_b = subtract(b, a)
+    common = len(intersect(a, b))
+    return only_a, only_b, common
+
+
+def save_result(manager: PlaylistManager, name: str, items: List[PlaylistItem],
+                description: str = "") -> Optional[Playlist]:
+    """
+    把运算结果一次性保存到播放列表，已存在时替换其歌曲
+    
+    Args:
+        manager: 播放列表管理器
+        name: 目标播放列表名称
+        items: 播放列表项
+        description: 新建播放列表时的描述
+        
+    Returns:
+        Optional[Playlist]: 保存后的播放列表，目标为只读播放列表或保存失败时为 None
+    """
+    playlist = manager.get_playlist(name)
+    if playlist is None:
+        if manager.playlist_exists(name):
+            return None
+        playlist = Playlist(name=name, description=description)
+    elif playlist.read_only:
+        logger.warning(f"播放列表 {name} 是只读的，不能修改")
+        return None
+    
+    playlist.items = items
+    if not manager.save_playlist(playlist):
+        return None
+    return playlist
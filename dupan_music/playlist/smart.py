@@ -0,0 +1,467 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+智能播放列表
+
+智能播放列表只保存查询条件（路径前缀、扩展名、大小、添加/修改时间、播放次数、
+文本匹配），歌曲由本地曲库索引计算得出，不复制播放列表项。计算结果（文件ID和
+大小）与索引的变更序号一起缓存，索引变化后只重新判断变化的文件。歌曲在首次访问
+时才计算并从索引读取，列出播放列表时的歌曲数和大小来自上次计算的结果。
+"""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dupan_music.library.index import LibraryIndex
+from dupan_music.playlist.playlist import Playlist, PlaylistItem, PlaylistSummary, use_columnar
+from dupan_music.playlist.columnar import ColumnarItems
+from dupan_music.playlist.definitions import PlaylistDefinitions
+from dupan_music.utils import codec
+from dupan_music.utils.logger import get_logger
+from dupan_music.utils.file_utils import ensure_dir, read_file, write_file
+
+logger = get_logger(__name__)
+
+# 缓存格式版本
+CACHE_VERSION = 1
+
+# 文本条件只忽略ASCII字母的大小写，与 SQLite 的 LIKE 一致
+_ASCII_LOWER = str.maketrans('ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')
+
+
+def ascii_lower(text: str) -> str:
+    """
+    只把ASCII字母转换为小写（SQLite 的 LIKE 只对ASCII字母不区分大小写）
+    
+    Args:
+        text: 文本
+        
+    Returns:
+        str: 转换后的文本
+    """
+    return text.translate(_ASCII_LOWER)
+
+
+class SmartQuery:
+    """智能播放列表查询条件，所有条件同时满足"""
+    
+    FIELDS = (
+        'path_prefix', 'extensions', 'min_size', 'max_size', 'added_after', 'added_before',
+        'modified_after', 'modified_before', 'min_plays', 'max_plays', 'text'
+    )
+    
+    def __init__(self, path_prefix: str = "", extensions: Optional[Iterable[str]] = None,
+                 min_size: Optional[int] = None, max_size: Optional[int] = None,
+                 added_after: Optional[int] = None, added_before: Optional[int] = None,
+                 modified_after: Optional[int] = None, modified_before: Optional[int] = None,
+                 min_plays: Optional[int] = None, max_plays: Optional[int] = None,
+                 text: str = ""):
+        """
+        初始化查询条件
+        
+        Args:
+            path_prefix: 路径前缀（目录）
+            extensions: 扩展名列表，如 ["flac", ".mp3"]
+            min_size: 最小文件大小（字节）
+            max_size: 最大文件大小（字节）
+            added_after: 添加到曲库的时间下限（时间戳）
+            added_before: 添加到曲库的时间上限（时间戳）
+            modified_after: 修改时间下限（时间戳）
+            modified_before: 修改时间上限（时间戳）
+            min_plays: 最少播放次数
+            max_plays: 最多播放次数
+            text: 路径包含的文本（不区分ASCII字母的大小写）
+        """
+        path_prefix = (path_prefix or "").rstrip('/')
+        self.path_prefix = f"{path_prefix}/" if path_prefix else ""
+        self.extensions = sorted({
+            ext.lower() if ext.startswith('.') else f".{ext.lower()}" for ext in (extensions or []) if ext
+        })
+        self.min_size = min_size
+        self.max_size = max_size
+        self.added_after = added_after
+        self.added_before = added_before
+        self.modified_after = modified_after
+        self.modified_before = modified_before
+        self.min_plays = min_plays
+        self.max_plays = max_plays
+        self.text = text or ""
+    
+    @property
+    def uses_plays(self) -> bool:
+        """是否包含播放次数条件（播放次数不在曲库索引中）"""
+        return self.min_plays is not None or self.max_plays is not None
+    
+    def to_sql(self) -> Tuple[str, List]:
+        """
+        转换为 files 表的SQL条件（播放次数条件除外），尽量使用索引列
+        
+        Returns:
+            Tuple[str, List]: SQL条件、参数
+        """
+        clauses = ["isdir = 0"]
+        params: List = []
+        
+        if self.path_prefix:
+            # 前缀匹配转换为路径范围，可使用路径索引（'0' 是 '/' 的下一个字符）
+            clauses.append("path >= ? AND path < ?")
+            params.extend([self.path_prefix, self.path_prefix[:-1] + '0'])
+        if self.extensions:
+            clauses.append(f"ext IN ({', '.join('?' * len(self.extensions))})")
+            params.extend(self.extensions)
+        
+        for column, operator, value in (
+            ('size', '>=', self.min_size), ('size', '<=', self.max_size),
+            ('added_at', '>=', self.added_after), ('added_at', '<', self.added_before),
+            ('server_mtime', '>=', self.modified_after), ('server_mtime', '<', self.modified_before)
+        ):
+            if value is not None:
+                clauses.append(f"{column} {operator} ?")
+                params.append(value)
+        
+        if self.text:
+            escaped = self.text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            clauses.append("path LIKE ? ESCAPE '\\'")
+            params.append(f"%{escaped}%")
+        
+        return " AND ".join(clauses), params
+    
+    def matches(self, file_info: Dict, plays: int = 0) -> bool:
+        """
+        判断文件是否满足条件，与 to_sql 的结果一致
+        
+        Args:
+            file_info: 曲库索引中的文件信息
+            plays: 播放次数
+            
+        Returns:
+            bool: 是否满足
+        """
+        path = file_info.get('path') or ""
+        size = file_info.get('size') or 0
+        added_at = file_info.get('added_at') or 0
+        mtime = file_info.get('server_mtime') or 0
+        
+        if file_info.get('isdir'):
+            return False
+        if self.path_prefix and not path.startswith(self.path_prefix):
+            return False
+        if self.extensions and file_info.get('ext') not in self.extensions:
+            return False
+        if self.min_size is not None and size < self.min_size:
+            return False
+        if self.max_size is not None and size > self.max_size:
+            return False
+        if self.added_after is not None and added_at < self.added_after:
+            return False
+        if self.added_before is not None and added_at >= self.added_before:
+            return False
+        if self.modified_after is not None and mtime < self.modified_after:
+            return False
+        if self.modified_before is not None and mtime >= self.modified_before:
+            return False
+        if self.text and ascii_lower(self.text) not in ascii_lower(path):
+            return False
+        return self.matches_plays(plays)
+    
+    def matches_plays(self, plays: int) -> bool:
+        """
+        判断播放次数是否满足条件
+        
+        Args:
+            plays: 播放次数
+            
+        Returns:
+            bool: 是否满足
+        """
+        if self.min_plays is not None and plays < self.min_plays:
+            return False
+        if self.max_plays is not None and plays > self.max_plays:
+            return False
+        return True
+    
+    def to_dict(self) -> Dict:
+        """
+        转换为字典，只包含已设置的条件
+        
+        Returns:
+            Dict: 字典表示
+        """
+        data = {}
+        for field in self.FIELDS:
+            value = getattr(self, field)
+            if value not in (None, "", []):
+                data[field] = value
+        return data
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SmartQuery':
+        """
+        从字典创建查询条件
+        
+        Args:
+            data: 字典数据
+            
+        Returns:
+            SmartQuery: 查询条件
+        """
+        return cls(**{field: data[field] for field in cls.FIELDS if field in data})
+    
+    def __eq__(self, other) -> bool:
+        return isinstance(other, SmartQuery) and self.to_dict() == other.to_dict()
+
+
+class SmartPlaylist(Playlist):
+    """智能播放列表，歌曲由查询条件决定，不能直接修改"""
+    
+    read_only = True
+    
+    def __init__(self, name: str, query: SmartQuery, description: str = "",
+                 create_time: int = None, update_time: int = None):
+        """
+        初始化智能播放列表
+        
+        Args:
+            name: 播放列表名称
+            query: 查询条件
+            description: 播放列表描述
+            create_time: 创建时间
+            update_time: 更新时间
+        """
+        super().__init__(name, description, create_time=create_time, update_time=update_time)
+        self.query = query
+    
+    def to_dict(self) -> Dict:
+        """
+        转换为字典（只包含定义，不包含歌曲）
+        
+        Returns:
+            Dict: 字典表示
+        """
+        return {
+            'name': self.name,
+            'description': self.description,
+            'query': self.query.to_dict(),
+            'create_time': self.create_time,
+            'update_time': self.update_time
+        }
+    
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'SmartPlaylist':
+        """
+        从字典创建智能播放列表
+        
+        Args:
+            data: 字典数据
+            
+        Returns:
+            SmartPlaylist: 智能播放列表
+        """
+        return cls(
+            name=data.get('name', ''),
+            query=SmartQuery.from_dict(data.get('query', {})),
+            description=data.get('description', ''),
+            create_time=data.get('create_time'),
+            update_time=data.get('update_time')
+        )
+
+
+class SmartPlaylists(PlaylistDefinitions):
+    """智能播放列表管理，定义和计算结果缓存保存在播放列表目录的 smart 子目录中"""
+    
+    playlist_class = SmartPlaylist
+    extra_suffixes = ('.cache',)
+    
+    def __init__(self, smart_dir: str, stats=None, index: Optional[LibraryIndex] = None):
+        """
+        初始化智能播放列表管理
+        
+        Args:
+            smart_dir: 智能播放列表目录
+            stats: 播放统计，用于播放次数条件
+            index: 曲库索引，为 None 时在首次计算时打开默认索引
+        """
+        super().__init__(smart_dir)
+        self.stats = stats
+        self._index = index
+    
+    @property
+    def index(self) -> LibraryIndex:
+        """曲库索引"""
+        if self._index is None:
+            self._index = LibraryIndex.open_default()
+        return self._index
+    
+    def save(self, playlist: SmartPlaylist) -> bool:
+        """
+        保存智能播放列表定义，并计算一次歌曲以生成摘要
+        
+        Args:
+            playlist: 智能播放列表
+            
+        Returns:
+            bool: 是否成功
+        """
+        if not super().save(playlist):
+            return False
+        
+        try:
+            self.members(playlist)
+        except Exception as e:
+            logger.warning(f"计算智能播放列表 {playlist.name} 失败: {str(e)}")
+        return True
+    
+    def load(self, name: str) -> Optional[SmartPlaylist]:
+        """
+        获取智能播放列表，歌曲在首次访问时才计算并从曲库索引读取
+        
+        Args:
+            name: 播放列表名称
+            
+        Returns:
+            Optional[SmartPlaylist]: 智能播放列表，访问歌曲前的歌曲数和大小来自上次计算的结果
+        """
+        playlist = self._read_definition(self._path(name, '.json'))
+        if playlist is None:
+            return None
+        
+        item_count, total_size = self._cached_totals(playlist)
+        playlist._summary = PlaylistSummary(
+            name=playlist.name,
+            description=playlist.description,
+            item_count=item_count,
+            total_size=total_size,
+            create_time=playlist.create_time,
+            update_time=playlist.update_time
+        )
+        playlist._loader = lambda: self._load_items(self.members(playlist)[0])
+        return playlist
+    
+    def _cached_totals(self, playlist: SmartPlaylist) -> Tuple[int, int]:
+        """
+        从计算结果缓存获取歌曲数和总大小，不打开曲库索引
+        
+        Args:
+            playlist: 智能播放列表
+            
+        Returns:
+            Tuple[int, int]: 歌曲数、总大小，没有与查询条件一致的缓存时为 0
+        """
+        cache = self._load_cache(playlist.name)
+        if (not cache or cache.get('version') != CACHE_VERSION
+                or SmartQuery.from_dict(cache.get('query', {})) != playlist.query):
+            return 0, 0
+        return len(cache['fs_ids']), sum(cache['sizes'])
+    
+    def _load_items(self, fs_ids: List[int]) -> List[PlaylistItem]:
+        """
+        从曲库索引读取播放列表项，按路径排序
+        
+        Args:
+            fs_ids: 文件ID
+            
+        Returns:
+            List[PlaylistItem]: 播放列表项，大列表使用列式存储
+        """
+        files = sorted(self.index.get_many(fs_ids), key=lambda file_info: file_info['path'])
+        rows = [
+            (f['fs_id'], f['server_filename'], f['path'], f['size'], f['category'], f['isdir'],
+             f['local_mtime'], f['server_mtime'], f['md5'], f['added_at'])
+            for f in files
+        ]
+        if use_columnar(len(rows)):
+            return ColumnarItems.from_rows(rows)
+        return [PlaylistItem(*row) for row in rows]
+    
+    def members(self, playlist: SmartPlaylist) -> Tuple[List[int], List[int]]:
+        """
+        计算智能播放列表包含的文件，索引未变化时直接使用缓存，变化时只重新判断变化的文件
+        
+        Args:
+            playlist: 智能播放列表
+            
+        Returns:
+            Tuple[List[int], List[int]]: 文件ID、对应的文件大小
+        """
+        query = playlist.query
+        seq = self.index.current_seq()
+        plays_key = self.stats.totals()['plays'] if query.uses_plays and self.stats else None
+        play_counts = None
+        
+        cache = self._load_cache(playlist.name)
+        if (cache and cache.get('version') == CACHE_VERSION
+                and SmartQuery.from_dict(cache.get('query', {})) == query
+                and cache.get('plays') == plays_key):
+            members = dict(zip(cache['fs_ids'], cache['sizes']))
+            if cache['seq'] == seq:
+                return list(members), list(members.values())
+            
+            changed, deleted = self.index.changes_since(cache['seq'])
+            for fs_id in deleted:
+                members.pop(fs_id, None)
+            
+            if query.uses_plays:
+                play_counts = self._play_counts()
+            for file_info in changed:
+                plays = play_counts.get(file_info['fs_id'], 0) if play_counts is not None else 0
+                if query.matches(file_info, plays):
+                    members[file_info['fs_id']] = file_info['size']
+                else:
+                    members.pop(file_info['fs_id'], None)
+        else:
+            where, params = query.to_sql()
+            files = self.index.select(where, params)
+            if query.uses_plays:
+                play_counts = self._play_counts()
+                files = [f for f in files if query.matches_plays(play_counts.get(f['fs_id'], 0))]
+            members = {f['fs_id']: f['size'] for f in files}
+        
+        self._save_cache(playlist.name, {
+            'version': CACHE_VERSION,
+            'query': query.to_dict(),
+            'seq': seq,
+            'plays': plays_key,
+            'fs_ids': list(members),
+            'sizes': list(members.values())
+        })
+        return list(members), list(members.values())
+    
+    def _play_counts(self) -> Dict[int, int]:
+        """
+        获取各歌曲的播放次数
+        
+        Returns:
+            Dict[int, int]: 文件ID -> 播放次数
+        """
+        return self.stats.play_counts() if self.stats else {}
+    
+    def _load_cache(self, name: str) -> Optional[Dict]:
+        """
+        读取计算结果缓存
+        
+        Args:
+            name: 播放列表名称
+            
+        Returns:
+            Optional[Dict]: 缓存
+        """
+        content = read_file(self._path(name, '.cache'))
+        if not content:
+            return None
+        
+        try:
+            return codec.loads(content)
+        except ValueError:
+            return None
+    
+    def _save_cache(self, name: str, cache: Dict) -> None:
+        """
+        保存计算结果缓存
+        
+        Args:
+            name: 播放列表名称
+            cache: 缓存
+        """
+        ensure_dir(self.definitions_dir)
+        if not write_file(self._path(name, '.cache'), codec.dumps(cache)):
+            logger.warning(f"保存智能播放列表缓存 {name} 失败")
@@ -0,0 +1,386 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+SQLite播放列表存储后端
+"""
+
+import os
+import time
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from dupan_music.utils.logger import get_logger
+from dupan_music.utils.file_utils import ensure_dir
+from dupan_music.playlist.playlist import (
+    Playlist, PlaylistCache, PlaylistItem, PlaylistSummary, PlaylistStore, JsonPlaylistStore, use_columnar
+)
+from dupan_music.playlist.columnar import ColumnarItems, ColumnarPlaylist
+
+logger = get_logger(__name__)
+
+# 播放列表项字段，顺序与 items 表的列一致
+ITEM_COLUMNS = (
+    'fs_id', 'server_filename', 'path', 'size', 'category', 'isdir',
+    'local_mtime', 'server_mtime', 'md5', 'add_time'
+)
+
+# SQLite单条语句允许的最大参数数量（保守取值）
+MAX_SQL_VARIABLES = 900
+
+# 数据库结构版本，记录在 PRAGMA user_version 中
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS playlists (
+    name TEXT PRIMARY KEY,
+    description TEXT NOT NULL DEFAULT '',
+    item_count INTEGER NOT NULL DEFAULT 0,
+    total_size INTEGER NOT NULL DEFAULT 0,
+    create_time INTEGER NOT NULL,
+    update_time INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS items (
+    playlist TEXT NOT NULL REFERENCES playlists(name) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    fs_id INTEGER NOT NULL,
+    server_filename TEXT,
+    path TEXT,
+    size INTEGER,
+    category INTEGER NOT NULL DEFAULT 0,
+    isdir INTEGER NOT NULL DEFAULT 0,
+    local_mtime INTEGER NOT NULL DEFAULT 0,
+    server_mtime INTEGER NOT NULL DEFAULT 0,
+    md5 TEXT NOT NULL DEFAULT '',
+    add_time INTEGER NOT NULL DEFAULT 0
+);
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_items_playlist_fs_id ON items(playlist, fs_id);
+CREATE INDEX IF NOT EXISTS idx_items_playlist_position ON items(playlist, position);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SqlitePlaylistStore(PlaylistStore):
+    """SQLite存储后端（WAL模式），增删播放列表项只修改受影响的行"""
+    
+    def __init__(self, db_path: str):
+        """
+        初始化SQLite存储
+        
+        Args:
+            db_path: 数据库文件路径
+        """
+        self.db_path = db_path
+        ensure_dir(os.path.dirname(db_path))
+        
+        # 同一连接可能被播放器的事件线程使用，访问时需加锁
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(SCHEMA)
+        self._migrate_schema()
+        
+        # 已读取的播放列表，版本标记为 (数据版本, 本连接修改次数)：
+        # 其他连接提交修改后 PRAGMA data_version 改变，缓存全部失效；
+        # data_version 不反映本连接的修改，本连接写入时增加对应播放列表的修改次数
+        self.cache = PlaylistCache()
+        self._data_version = self._read_data_version()
+        self._generations: Dict[str, int] = {}
+    
+    def _read_data_version(self) -> int:
+        """
+        读取数据版本，其他连接提交修改后改变
+        
+        Returns:
+            int: 数据版本
+        """
+        return self._conn.execute("PRAGMA data_version").fetchone()[0]
+    
+    def _check_data_version(self) -> int:
+        """
+        检查其他连接（如另一个进程）是否修改了数据库，修改过时清空缓存，需持有锁
+        
+        Returns:
+            int: 当前数据版本
+        """
+        version = self._read_data_version()
+        if version != self._data_version:
+            self.cache.invalidate()
+            self._data_version = version
+        return version
+    
+    def _touch(self, name: str) -> None:
+        """
+        记录本连接对播放列表的修改，需持有锁
+        
+        Args:
+            name: 播放列表名称
+        """
+        self._generations[name] = self._generations.get(name, 0) + 1
+        self.cache.invalidate(name)
+    
+    def _migrate_schema(self) -> None:
+        """升级旧版本数据库结构"""
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version >= SCHEMA_VERSION:
+            return
+        
+        with self._conn:
+            # 版本1：播放列表表增加歌曲数和总大小，用于列出播放列表时无需读取播放列表项
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(playlists)")}
+            for column in ('item_count', 'total_size'):
+                if column not in columns:
+                    self._conn.execute(
+                        f"ALTER TABLE playlists ADD COLUMN {column} INTEGER NOT NULL DEFAULT 0"
+                    )
+            for (name,) in self._conn.execute("SELECT name FROM playlists").fetchall():
+                self._refresh_summary(name)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    
+    def _refresh_summary(self, name: str, update_time: Optional[int] = None) -> None:
+        """
+        在当前事务中重新统计播放列表的歌曲数和总大小
+        
+        Args:
+            name: 播放列表名称
+            update_time: 更新时间，为 None 时不修改
+        """
+        self._conn.execute(
+            "UPDATE playlists SET "
+            "item_count = (SELECT COUNT(*) FROM items WHERE playlist = :name), "
+            "total_size = (SELECT COALESCE(SUM(size), 0) FROM items WHERE playlist = :name), "
+            "update_time = COALESCE(:update_time, update_time) "
+            "WHERE name = :name",
+            {'name': name, 'update_time': update_time}
+        )
+    
+    @staticmethod
+    def _item_row(name: str, position: int, item: PlaylistItem) -> Tuple:
+        """
+        转换为 items 表的一行
+        
+        Args:
+            name: 播放列表名称
+            position: 位置
+            item: 播放列表项
+            
+        Returns:
+            Tuple: 行数据
+        """
+        return (name, position) + tuple(getattr(item, column) for column in ITEM_COLUMNS)
+    
+    def _insert_items(self, name: str, items: Iterable[PlaylistItem], start: int) -> int:
+        """
+        在当前事务中插入播放列表项，已存在的文件会被忽略
+        
+        Args:
+            name: 播放列表名称
+            items: 播放列表项
+            start: 起始位置
+            
+        Returns:
+            int: 实际插入的数量
+        """
+        placeholders = ", ".join("?" * (len(ITEM_COLUMNS) + 2))
+        before = self._conn.total_changes
+        self._conn.executemany(
+            f"INSERT OR IGNORE INTO items (playlist, position, {', '.join(ITEM_COLUMNS)}) "
+            f"VALUES ({placeholders})",
+            (self._item_row(name, position, item) for position, item in enumerate(items, start))
+        )
+        return self._conn.total_changes - before
+    
+    def exists(self, name: str) -> bool:
+        with self._lock:
+            row = self._conn.execute("SELECT 1 FROM playlists WHERE name = ?", (name,)).fetchone()
+        return row is not None
+    
+    def load(self, name: str) -> Optional[Playlist]:
+        try:
+            with self._lock:
+                version = (self._check_data_version(), self._generations.get(name, 0))
+                playlist = self.cache.get(name, version)
+                if playlist is not None:
+                    return playlist
+                
+                row = self._conn.execute(
+                    "SELECT name, description, create_time, update_time FROM playlists WHERE name = ?",
+                    (name,)
+                ).fetchone()
+                if not row:
+                    return None
+                
+                rows = self._conn.execute(
+                    f"SELECT {', '.join(ITEM_COLUMNS)} FROM items WHERE playlist = ? ORDER BY position",
+                    (name,)
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.error(f"读取播放列表 {name} 失败: {str(e)}")
+            return None
+        
+        if use_columnar(len(rows)):
+            playlist_class = ColumnarPlaylist
+            items = ColumnarItems.from_rows(rows)
+        else:
+            playlist_class = Playlist
+            items = [PlaylistItem(*item_row) for item_row in rows]
+        playlist = playlist_class(
+            name=row[0],
+            description=row[1],
+            items=items,
+            create_time=row[2],
+            update_time=row[3]
+        )
+        self.cache.put(name, version, playlist)
+        return playlist
+    
+    def load_all(self) -> List[Playlist]:
+        with self._lock:
+            names = [row[0] for row in self._conn.execute("SELECT name FROM playlists ORDER BY name")]
+        
+        playlists = []
+        for name in names:
+            playlist = self.load(name)
+            if playlist:
+                playlists.append(playlist)
+        return playlists
+    
+    def list_summaries(self) -> List[PlaylistSummary]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT name, description, item_count, total_size, create_time, update_time "
+                "FROM playlists ORDER BY name"
+            ).fetchall()
+        return [PlaylistSummary(*row) for row in rows]
+    
+    def save(self, playlist: Playlist) -> bool:
+        try:
+            with self._lock, self._conn:
+                self._touch(playlist.name)
+                self._conn.execute(
+                    "INSERT INTO playlists (name, description, create_time, update_time) VALUES (?, ?, ?, ?) "
+                    "ON CONFLICT(name) DO UPDATE SET description = excluded.description, "
+                    "create_time = excluded.create_time, update_time = excluded.update_time",
+                    (playlist.name, playlist.description, playlist.create_time, playlist.update_time)
+                )
+                self._conn.execute("DELETE FROM items WHERE playlist = ?", (playlist.name,))
+                self._insert_items(playlist.name, playlist.items, 0)
+                self._refresh_summary(playlist.name)
+            return True
+        except sqlite3.Error as e:
+            logger.error(f"保存播放列表 {playlist.name} 失败: {str(e)}")
+            return False
+    
+    def delete(self, name: str) -> bool:
+        try:
+            with self._lock, self._conn:
+                self._touch(name)
+                cursor = self._conn.execute("DELETE FROM playlists WHERE name = ?", (name,))
+            return cursor.rowcount > 0
+        except sqlite3.Error as e:
+            logger.error(f"删除播放列表 {name} 失败: {str(e)}")
+            return False
+    
+    def add_items(self, name: str, items: List[PlaylistItem]) -> int:
+        try:
+            # 所有插入在同一个事务中完成，重复文件由 (playlist, fs_id) 唯一索引过滤
+            with self._lock, self._conn:
+                self._touch(name)
+                row = self._conn.execute(
+                    "SELECT COALESCE(MAX(position), -1) FROM items WHERE playlist = ?", (name,)
+                ).fetchone()
+                added = self._insert_items(name, items, row[0] + 1)
+                if added:
+                    self._refresh_summary(name, int(time.time()))
+            return added
+        except sqlite3.Error as e:
+            logger.error(f"添加文件到播放列表 {name} 失败: {str(e)}")
+            return 0
+    
+    def remove_items(self, name: str, fs_ids: Iterable[int]) -> int:
+        fs_ids = list(set(fs_ids))
+        removed = 0
+        
+        try:
+            with self._lock, self._conn:
+                self._touch(name)
+                for i in range(0, len(fs_ids), MAX_SQL_VARIABLES):
+                    chunk = fs_ids[i:i + MAX_SQL_VARIABLES]
+                    cursor = self._conn.execute(
+                        f"DELETE FROM items WHERE playlist = ? AND fs_id IN ({', '.join('?' * len(chunk))})",
+                        [name] + chunk
+                    )
+                    removed += cursor.rowcount
+                if removed:
+                    self._refresh_summary(name, int(time.time()))
+            return removed
+        except sqlite3.Error as e:
+            logger.error(f"从播放列表 {name} 移除文件失败: {str(e)}")
+            return 0
+    
+    def get_meta(self, key: str) -> Optional[str]:
+        """
+        读取元数据
+        
+        Args:
+            key: 键
+            
+        Returns:
+            Optional[str]: 值
+        """
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+    
+    def set_meta(self, key: str, value: str) -> None:
+        """
+        写入元数据
+        
+        Args:
+            key: 键
+            value: 值
+        """
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO meta (key, value) VALUES (?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+                (key, value)
+            )
+    
+    def migrate_from(self, json_store: JsonPlaylistStore) -> int:
+        """
+        从JSON存储迁移播放列表，只在首次启用时执行一次
+        
+        JSON文件会被保留，仍可作为导入导出格式使用。
+        
+        Args:
+            json_store: JSON存储后端
+            
+        Returns:
+            int: 迁移的播放列表数量
+        """
+        if self.get_meta("json_migrated"):
+            return 0
+        
+        migrated = 0
+        for playlist in json_store.load_all():
+            if not self.exists(playlist.name) and self.save(playlist):
+                migrated += 1
+        
+        self.set_meta("json_migrated", str(int(time.time())))
+        if migrated:
+            logger.info(f"已将 {migrated} 个播放列表迁移到SQLite存储")
+        return migrated
+    
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+播放列表批量验证
+
+汇总一个或全部播放列表中的文件ID并去重，按 filemetas 接口允许的最大数量分批，
+在线程池中并发查询；失效的文件按原路径、MD5和大小重新定位，每个播放列表的变更
+只保存一次。
+"""
+
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from dupan_music.api.api import BaiduPanAPI
+from dupan_music.library.index import LibraryIndex
+from dupan_music.library.resolver import FileResolver
+from dupan_music.playlist.playlist import Playlist, PlaylistItem, PlaylistManager
+from dupan_music.utils.logger import get_logger
+
+logger = get_logger(__name__)
+
+# 比较后判断文件信息是否已变化的字段
+REFRESH_FIELDS = ('server_filename', 'path', 'size', 'md5', 'server_mtime')
+
+
+class PlaylistVerifyResult:
+    """单个播放列表的验证结果"""
+    
+    def __init__(self, name: str, total: int = 0):
+        """
+        初始化验证结果
+        
+        Args:
+            name: 播放列表名称
+            total: 歌曲数量
+        """
+        self.name = name
+        self.total = total
+        # 已失效的播放列表项
+        self.invalid: List[PlaylistItem] = []
+        # 文件信息已变化（重命名、移动等）的播放列表项
+        self.changed: List[PlaylistItem] = []
+        # 查询失败、无法判断的播放列表项
+        self.unknown: List[PlaylistItem] = []
+        # 已刷新的数量
+        self.refreshed = 0
+        # 已重新定位到新文件ID的数量
+        self.rebound = 0
+
+
+class PlaylistVerifier:
+    """播放列表批量验证器"""
+    
+    # 同时在途的最大请求数
+    MAX_WORKERS = 4
+    
+    def __init__(self, manager: PlaylistManager, max_workers: int = MAX_WORKERS,
+                 batch_size: int = BaiduPanAPI.FILEMETAS_MAX_IDS,
+                 index: Optional[LibraryIndex] = None):
+        """
+        初始化验证器
+        
+        Args:
+            manager: 播放列表管理器（需要API实例）
+            max_workers: 并发请求数
+            batch_size: 每次请求的文件数
+            index: 曲库索引，用于重新定位失效文件并记录查询结果
+        """
+        self.manager = manager
+        self.index = index
+        self.max_workers = max(1, max_workers)
+        self.batch_size = max(1, min(batch_size, BaiduPanAPI.FILEMETAS_MAX_IDS))
+    
+    def resolve(self, fs_ids: Iterable[int],
+                on_progress: Optional[Callable[[int], None]] = None) -> Tuple[Dict[int, Dict], set]:
+        """
+        并发批量查询文件信息
+        
+        Args:
+            fs_ids: 文件ID
+            on_progress: 每批完成后的回调，参数为本批文件数
+            
+        Returns:
+            Tuple[Dict[int, Dict], set]: 文件ID -> 文件信息、查询失败的文件ID
+        """
+        fs_ids = list(dict.fromkeys(fs_ids))
+        batches = [fs_ids[i:i + self.batch_size] for i in range(0, len(fs_ids), self.batch_size)]
+        
+        found: Dict[int, Dict] = {}
+        failed = set()
+        if not batches:
+            return found, failed
+        
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(batches))) as executor:
+            futures = {executor.submit(self.manager.api.get_file_info, batch): batch for batch in batches}
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    for file_info in future.result():
+                        found[file_info.get('fs_id')] = file_info
+                except Exception as e:
+                    logger.error(f"批量获取文件信息失败: {str(e)}")
+                    failed.update(batch)
+                
+                if on_progress:
+                    on_progress(len(batch))
+        
+        return found, failed
+    
+    def verify(self, playlists: List[Playlist], refresh: bool = False,
+               on_start: Optional[Callable[[int], None]] = None,
+               on_progress: Optional[Callable[[int], None]] = None) -> List[PlaylistVerifyResult]:
+        """
+        验证播放列表
+        
+        Args:
+            playlists: 播放列表
+            refresh: 是否更新已变化的播放列表项，并将失效的播放列表项重新定位到新文件
+            on_start: 开始查询前的回调，参数为去重后的文件数
+            on_progress: 每批完成后的回调，参数为本批文件数
+            
+        Returns:
+            List[PlaylistVerifyResult]: 每个播放列表的验证结果
+        """
+        fs_ids = {}
+        for playlist in playlists:
+            items = playlist.items
+            column = items.column('fs_id') if hasattr(items, 'column') else [item.fs_id for item in items]
+            fs_ids.update(dict.fromkeys(column))
+        
+        if on_start:
+            on_start(len(fs_ids))
+        found, failed = self.resolve(fs_ids, on_progress)
+        
+        if self.index:
+            self.index.upsert(found.values())
+        
+        # 失效的文件按原路径等信息批量重新定位
+        rebinds: Dict[int, Dict] = {}
+        if refresh:
+            dead = [
+                item for playlist in playlists for item in playlist.items
+                if item.fs_id not in found and item.fs_id not in failed
+            ]
+            if dead:
+                resolver = FileResolver(
+                    self.manager.api, self.index,
+                    lookup=lambda ids: self.resolve(ids)[0],
+                    max_workers=self.max_workers
+                )
+                rebinds = resolver.resolve(dead)
+        
+        results = []
+        for playlist in playlists:
+            result = PlaylistVerifyResult(playlist.name, len(playlist.items))
+            updates = {}
+            # 新文件已在播放列表中时不重新定位，避免重复
+            present = {item.fs_id for item in playlist.items} if rebinds else set()
+            
+            for index, item in enumerate(playlist.items):
+                if item.fs_id in failed:
+                    result.unknown.append(item)
+                    continue
+                
+                file_info = found.get(item.fs_id)
+                if file_info is None:
+                    new_info = rebinds.get(item.fs_id)
+                    if new_info is None or new_info.get('fs_id') in present or playlist.read_only:
+                        result.invalid.append(item)
+                    else:
+                        present.add(new_info.get('fs_id'))
+                        new_item = PlaylistItem.from_api_result(new_info)
+                        new_item.add_time = item.add_time
+                        updates[index] = new_item
+                        result.rebound += 1
+                elif any(file_info.get(field, getattr(item, field)) != getattr(item, field)
+                         for field in REFRESH_FIELDS):
+                    result.changed.append(item)
+                    if refresh and not playlist.read_only:
+                        new_item = PlaylistItem.from_api_result(file_info)
+                        new_item.add_time = item.add_time
+                        updates[index] = new_item
+            
+            if updates:
+                for index, new_item in updates.items():
+                    playlist.items[index] = new_item
+                if self.manager.save_playlist(playlist):
+                    result.refreshed = len(updates) - result.rebound
+                else:
+                    result.rebound = 0
+                    logger.error(f"保存播放列表失败: {playlist.name}")
+            
+            results.append(result)
+        
+        return results
@@ -23,10 +23,8 @@ from prompt_toolkit.filters import Condition
 from rich.console import Console
 
 from dupan_music import __version__
-from dupan_music.auth.cli import auth
-from dupan_music.api.cli import api
-from dupan_music.playlist.cli import playlist
-from dupan_music.player.cli import player
+from dupan_music.main import SUBCOMMANDS
+from dupan_music.utils.lazy_group import load_command
 from dupan_music.utils.logger import get_logger
 
 logger = get_logger(__name__)
@@ -112,6 +110,7 @@ class DupanMusicCompleter(Completer):
                     '--page': None,
                     '--limit': None,
                     '-l': None,
+                    '--all': None,
                     '--json': None,
                 },
                 'info': {
@@ -162,6 +161,65 @@ class DupanMusicCompleter(Completer):
                     '--all': None,
                 },
                 'clear': None,
+                'export': {
+                    '--local-root': None,
+                },
+                'import': {
+                    '--name': None,
+                    '-n': None,
+                    '--force': None,
+                    '-f': None,
+                    '--base-dir': None,
+                    '--strip-prefix': None,
+                },
+                'smart': {
+                    '--description': None,
+                    '-d': None,
+                    '--prefix': None,
+                    '-p': None,
+                    '--ext': None,
+                    '-e': None,
+                    '--min-size': None,
+                    '--max-size': None,
+                    '--added-after': None,
+                    '--added-before': None,
+                    '--modified-after': None,
+                    '--modified-before': None,
+                    '--min-plays': None,
+                    '--max-plays': None,
+                    '--text': None,
+                    '-t': None,
+                    '--force': None,
+                    '-f': None,
+                },
+                'union': {
+                    '--output': None,
+                    '-o': None,
+                },
+                'intersect': {
+                    '--output': None,
+                    '-o': None,
+                },
+                'subtract': {
+                    '--output': None,
+                    '-o': None,
+                },
+                'diff': {
+                    '--output': None,
+                    '-o': None,
+                },
+                'folder': {
+                    '--recursive': None,
+                    '--no-recursive': None,
+                    '--description': None,
+                    '-d': None,
+                },
+                'verify': {
+                    '--all': None,
+                    '--auto-refresh': None,
+                    '--workers': None,
+                    '-w': None,
+                },
             },
             'player': {
                 'play': {
@@ -173,6 +231,8 @@ class DupanMusicCompleter(Completer):
                     '--repeat': None,
                     '--volume': None,
                     '-v': None,
+                    '--background': None,
+                    '-b': None,
                 },
                 'pause': None,
                 'resume': None,
@@ -182,6 +242,41 @@ class DupanMusicCompleter(Completer):
                 'volume': None,
                 'status': None,
                 'playlist': None,
+                'daemon': {
+                    'start': {
+                        '--foreground': None,
+                        '-f': None,
+                        '--mpd-port': None,
+                        '--broadcast-port': None,
+                    },
+                    'stop': None,
+                    'status': None,
+                },
+            },
+            'stats': {
+                'top': {
+                    '--limit': None,
+                    '-l': None,
+                    '--by': None,
+                    '--json': None,
+                },
+                'skipped': {
+                    '--limit': None,
+                    '-l': None,
+                    '--json': None,
+                },
+                'by-hour': {
+                    '--json': None,
+                },
+                'playlists': {
+                    '--json': None,
+                },
+            },
+            'library': {
+                'scan': {
+                    '--page-size': None,
+                },
+                'info': None,
             },
             'version': None,
             'help': None,
@@ -260,18 +355,28 @@ class InteractiveShell:
         # 命令历史索引
         self.history_index = 0
         
-        # 命令映射
+        # 命令映射，子命令在首次执行时才导入
         self.commands = {
-            'auth': auth,
-            'api': api,
-            'playlist': playlist,
-            'player': player,
+            'auth': self._lazy_command('auth'),
+            'api': self._lazy_command('api'),
+            'playlist': self._lazy_command('playlist'),
+            'player': self._lazy_command('player'),
+            'stats': self._lazy_command('stats'),
+            'library': self._lazy_command('library'),
             'version': self.show_version,
             'help': self.show_help,
             'exit': self.exit_shell,
             'quit': self.exit_shell,
         }
 
+    @staticmethod
+    def _lazy_command(name: str) -> Callable:
+        """创建执行时才导入子命令的函数"""
+        def run(args):
+            return load_command(SUBCOMMANDS[name][0])(args)
+        
+        return run
+    
     def show_version(self, *args, **kwargs):
         """显示版本信息"""
         from rich.panel import Panel
@@ -291,6 +396,8 @@ class InteractiveShell:
         help_table.add_row("api", "百度网盘API命令")
         help_table.add_row("playlist", "播放列表管理命令")
         help_table.add_row("player", "播放器控制命令")
+        help_table.add_row("stats", "播放统计命令")
+        help_table.add_row("library", "本地曲库命令")
         help_table.add_row("version", "显示版本信息")
         help_table.add_row("help", "显示帮助信息")
         help_table.add_row("exit/quit", "退出交互式shell")
@@ -0,0 +1,213 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+JSON编解码模块
+
+优先使用已安装的 orjson 或 msgspec，均未安装时使用标准库 json。
+所有后端的输出都不转义非ASCII字符，与 json.dumps(..., ensure_ascii=False) 一致。
+"""
+
+import json
+from typing import Any, Dict, Optional, Union
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    import msgspec
+    MSGSPEC_AVAILABLE = True
+except ImportError:
+    MSGSPEC_AVAILABLE = False
+
+Data = Union[str, bytes, bytearray, memoryview]
+
+
+class JsonCodec:
+    """标准库 json 编解码"""
+    
+    name = "json"
+    
+    def loads(self, data: Data) -> Any:
+        """
+        解码JSON
+        
+        Args:
+            data: JSON文本或UTF-8字节
+            
+        Returns:
+            Any: 解码结果
+        """
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        return json.loads(data)
+    
+    def dumpb(self, obj: Any, pretty: bool = False) -> bytes:
+        """
+        编码为UTF-8字节
+        
+        Args:
+            obj: 要编码的对象
+            pretty: 是否缩进输出（2个空格）
+            
+        Returns:
+            bytes: JSON字节
+        """
+        if pretty:
+            text = json.dumps(obj, ensure_ascii=False, indent=2)
+        else:
+            text = json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+        return text.encode('utf-8')
+
+
+class OrjsonCodec(JsonCodec):
+    """orjson 编解码"""
+    
+    name = "orjson"
+    
+    def loads(self, data: Data) -> Any:
+        return orjson.loads(data)
+    
+    def dumpb(self, obj: Any, pretty: bool = False) -> bytes:
+        option = orjson.OPT_NON_STR_KEYS
+        if pretty:
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, option=option)
+
+
+class MsgspecCodec(JsonCodec):
+    """msgspec 编解码"""
+    
+    name = "msgspec"
+    
+    def __init__(self):
+        self._encoder = msgspec.json.Encoder()
+        self._decoder = msgspec.json.Decoder()
+    
+    def loads(self, data: Data) -> Any:
+        # 与其他后端一致，解码失败时抛出 ValueError
+        try:
+            return self._decoder.decode(data)
+        except msgspec.DecodeError as e:
+            raise ValueError(str(e)) from e
+    
+    def dumpb(self, obj: Any, pretty: bool = False) -> bytes:
+        encoded = self._encoder.encode(obj)
+        if pretty:
+            return msgspec.json.format(encoded, indent=2)
+        return encoded
+
+
+def available_codecs() -> Dict[str, JsonCodec]:
+    """
+    获取当前环境可用的编解码器
+    
+    Returns:
+        Dict[str, JsonCodec]: 名称 -> 编解码器，按优先级排列
+    """
+    codecs = {}
+    if ORJSON_AVAILABLE:
+        codecs[OrjsonCodec.name] = OrjsonCodec()
+    if MSGSPEC_AVAILABLE:
+        codecs[MsgspecCodec.name] = MsgspecCodec()
+    codecs[JsonCodec.name] = JsonCodec()
+    return codecs
+
+
+_codec: JsonCodec = next(iter(available_codecs().values()))
+
+
+def get_codec() -> JsonCodec:
+    """
+    获取当前使用的编解码器
+    
+    Returns:
+        JsonCodec: 编解码器
+    """
+    return _codec
+
+
+def set_codec(name: Optional[str] = None) -> JsonCodec:
+    """
+    切换编解码器
+    
+    Args:
+        name: 编解码器名称（orjson, msgspec, json），为 None 时使用优先级最高的可用后端
+        
+    Returns:
+        JsonCodec: 切换后的编解码器
+    """
+    global _codec
+    
+    codecs = available_codecs()
+    if name is None:
+        _codec = next(iter(codecs.values()))
+    elif name in codecs:
+        _codec = codecs[name]
+    else:
+        raise ValueError(f"JSON编解码器不可用: {name}")
+    return _codec
+
+
+def loads(data: Data) -> Any:
+    """
+    解码JSON
+    
+    Args:
+        data: JSON文本或UTF-8字节
+        
+    Returns:
+        Any: 解码结果
+    """
+    return _codec.loads(data)
+
+
+def dumpb(obj: Any, pretty: bool = False) -> bytes:
+    """
+    编码为UTF-8字节
+    
+    Args:
+        obj: 要编码的对象
+        pretty: 是否缩进输出
+        
+    Returns:
+        bytes: JSON字节
+    """
+    return _codec.dumpb(obj, pretty)
+
+
+def dumps(obj: Any, pretty: bool = False) -> str:
+    """
+    编码为JSON文本
+    
+    Args:
+        obj: 要编码的对象
+        pretty: 是否缩进输出
+        
+    Returns:
+        str: JSON文本
+    """
+    return _codec.dumpb(obj, pretty).decode('utf-8')
+
+
+def loads_response(response) -> Any:
+    """
+    解码HTTP响应的JSON内容，直接解析原始字节以避免 requests 的文本解码开销
+    
+    Args:
+        response: requests 响应对象
+        
+    Returns:
+        Any: 解码结果
+    """
+    content = getattr(response, 'content', None)
+    if isinstance(content, (bytes, bytearray)):
+        try:
+            return loads(content)
+        except ValueError:
+            # 非UTF-8编码或内容无效时交给 requests 处理，保持原有的异常类型
+            pass
+    return response.json()
@@ -6,10 +6,21 @@
 """
 
 import os
+import atexit
 import shutil
 import hashlib
+import threading
+import weakref
 from pathlib import Path
-from typing import Optional, List, Tuple
+from typing import Callable, Dict, Optional, List, Tuple, Union
+try:
+    import fcntl
+    FCNTL_AVAILABLE = True
+except ImportError:
+    FCNTL_AVAILABLE = False
+
+# 合并写入的默认延迟（秒）
+DEFAULT_WRITE_DELAY = 0.5
 
 
 def ensure_dir(directory: str) -> None:
@@ -249,25 +260,288 @@ def read_file(file_path: str, encoding: str = "utf-8") -> Optional[str]:
         return None
 
 
-def write_file(file_path: str, content: str, encoding: str = "utf-8") -> bool:
+class FileLock:
+    """
+    跨进程的文件锁（fcntl 建议锁），同一进程内可重入
+    
+    锁加在旁边的 .lock 文件上：原子写入会替换目标文件，锁不能加在目标文件本身。
+    不支持 fcntl 的平台上只在进程内互斥。
+    """
+    
+    _locks: Dict[str, 'FileLock'] = {}
+    _registry_lock = threading.Lock()
+    
+    def __init__(self, lock_path: str):
+        """
+        初始化文件锁
+        
+        Args:
+            lock_path: 锁文件路径
+        """
+        self.lock_path = lock_path
+        self._rlock = threading.RLock()
+        self._fd: Optional[int] = None
+        self._depth = 0
+    
+    @classmethod
+    def for_path(cls, file_path: str) -> 'FileLock':
+        """
+        获取文件对应的锁，同一文件在进程内共用一把锁
+        
+        Args:
+            file_path: 被保护的文件路径
+            
+        Returns:
+            FileLock: 文件锁
+        """
+        directory, name = os.path.split(os.path.abspath(file_path))
+        lock_path = os.path.join(directory, f".{name}.lock")
+        with cls._registry_lock:
+            lock = cls._locks.get(lock_path)
+            if lock is None:
+                lock = cls._locks[lock_path] = cls(lock_path)
+            return lock
+    
+    def acquire(self) -> None:
+        """获取锁，其他进程持有时阻塞等待"""
+        self._rlock.acquire()
+        if self._depth == 0 and FCNTL_AVAILABLE:
+            try:
+                ensure_dir(os.path.dirname(self.lock_path))
+                self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            except OSError:
+                if self._fd is not None:
+                    os.close(self._fd)
+                    self._fd = None
+                self._rlock.release()
+                raise
+        self._depth += 1
+    
+    def release(self) -> None:
+        """释放锁"""
+        self._depth -= 1
+        if self._depth == 0 and self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+        self._rlock.release()
+    
+    def __enter__(self) -> 'FileLock':
+        self.acquire()
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.release()
+
+
+def file_lock(file_path: str) -> FileLock:
+    """
+    获取文件的跨进程锁，用于"读取-修改-写入"等需要互斥的操作
+    
+    Args:
+        file_path: 被保护的文件路径
+        
+    Returns:
+        FileLock: 文件锁（可用作上下文管理器）
+    """
+    return FileLock.for_path(file_path)
+
+
+def atomic_write(file_path: str, content: Union[str, bytes], encoding: str = "utf-8",
+                 mode: Optional[int] = None) -> None:
+    """
+    原子写入文件：写入同目录下的临时文件并同步到磁盘后重命名为目标文件
+    
+    写入过程中崩溃时目标文件保持原内容，读取方不会读到写了一半的文件。
+    
+    Args:
+        file_path: 文件路径
+        content: 内容
+        encoding: 文本内容的编码
+        mode: 文件权限，为 None 时保留原文件的权限
+        
+    Raises:
+        OSError: 写入失败
+    """
+    directory, name = os.path.split(os.path.abspath(file_path))
+    ensure_dir(directory)
+    data = content.encode(encoding) if isinstance(content, str) else content
+    
+    # 与直接 open 创建文件一样按 umask 设置权限（mkstemp 创建的文件只有所有者可读写）
+    while True:
+        temp_path = os.path.join(directory, f".{name}.{os.urandom(4).hex()}.tmp")
+        try:
+            fd = os.open(temp_path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o666)
+            break
+        except FileExistsError:
+            continue
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        # 保留原文件的权限（如 auth.json）
+        if mode is None:
+            try:
+                mode = os.stat(file_path).st_mode & 0o7777
+            except OSError:
+                pass
+        if mode is not None:
+            os.chmod(temp_path, mode)
+        
+        with file_lock(file_path):
+            os.replace(temp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    
+    # 同步目录，确保重命名本身落盘
+    if hasattr(os, 'O_DIRECTORY'):
+        try:
+            dir_fd = os.open(directory, os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
+
+
+# 所有合并写入器，进程退出时写入未写入的内容
+_writers: 'weakref.WeakSet[CoalescingWriter]' = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_writers() -> None:
+    """进程退出时写入所有合并写入器中未写入的内容"""
+    for writer in list(_writers):
+        writer.flush()
+
+
+class CoalescingWriter:
+    """
+    合并写入：短时间内对同一文件的多次写入只在延迟结束后写入一次最新内容
+    
+    内容在写入时才生成，写入期间持有目标文件的跨进程锁。未写入的内容在调用 flush
+    或进程退出时写入；写入完成（重命名）后才不再视为未写入。
+    """
+    
+    def __init__(self, delay: float = DEFAULT_WRITE_DELAY):
+        """
+        初始化合并写入器
+        
+        Args:
+            delay: 延迟（秒）
+        """
+        self.delay = delay
+        self._lock = threading.Lock()
+        # 文件路径 -> (生成内容的函数, 写入后的回调, 定时器)
+        self._pending: Dict[str, Tuple[Callable, Optional[Callable], threading.Timer]] = {}
+        _writers.add(self)
+    
+    def submit(self, file_path: str, render: Callable[[], Union[str, bytes]],
+               callback: Optional[Callable[[bool], None]] = None) -> None:
+        """
+        提交写入，同一文件未写入的旧内容被替换
+        
+        Args:
+            file_path: 文件路径
+            render: 生成文件内容的函数
+            callback: 写入后的回调，参数为是否成功
+        """
+        timer = threading.Timer(self.delay, self._write, args=(file_path,))
+        timer.daemon = True
+        with self._lock:
+            previous = self._pending.get(file_path)
+            if previous:
+                previous[2].cancel()
+            self._pending[file_path] = (render, callback, timer)
+        timer.start()
+    
+    def pending(self, file_path: str) -> bool:
+        """
+        是否有未写入的内容
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            bool: 是否有未写入的内容
+        """
+        return file_path in self._pending
+    
+    def _write(self, file_path: str) -> bool:
+        """
+        写入文件，回调在持有文件锁时调用
+        
+        Args:
+            file_path: 文件路径
+            
+        Returns:
+            bool: 是否成功
+        """
+        # 先获取文件锁：定时器和 flush 同时写入同一文件时串行执行，后者不会重复写入
+        with file_lock(file_path):
+            with self._lock:
+                entry = self._pending.get(file_path)
+            if entry is None:
+                return True
+            
+            render, callback, timer = entry
+            timer.cancel()
+            try:
+                atomic_write(file_path, render())
+                success = True
+            except Exception:
+                success = False
+            
+            # 写入期间提交的新内容保留，由它自己的定时器写入
+            with self._lock:
+                if self._pending.get(file_path) is entry:
+                    del self._pending[file_path]
+            
+            if callback:
+                callback(success)
+            return success
+    
+    def flush(self, file_path: Optional[str] = None) -> bool:
+        """
+        立即写入未写入的内容
+        
+        Args:
+            file_path: 文件路径，为 None 时写入所有文件
+            
+        Returns:
+            bool: 是否全部成功
+        """
+        paths = [file_path] if file_path is not None else list(self._pending)
+        success = True
+        for path in paths:
+            success = self._write(path) and success
+        return success
+
+
+def write_file(file_path: str, content: str, encoding: str = "utf-8", mode: Optional[int] = None) -> bool:
     """
-    写入文件内容
+    写入文件内容（原子写入）
     
     Args:
         file_path: 文件路径
         content: 内容
         encoding: 编码
+        mode: 文件权限，为 None 时保留原文件的权限
         
     Returns:
         bool: 是否成功
     """
     try:
-        # 确保目录存在
-        ensure_dir(os.path.dirname(file_path))
-        
-        # 写入文件
-        with open(file_path, "w", encoding=encoding) as f:
-            f.write(content)
+        atomic_write(file_path, content, encoding, mode)
         return True
     except Exception:
         return False
@@ -316,7 +590,7 @@ def read_binary_file(file_path: str) -> Optional[bytes]:
 
 def write_binary_file(file_path: str, content: bytes) -> bool:
     """
-    写入二进制文件内容
+    写入二进制文件内容（原子写入）
     
     Args:
         file_path: 文件路径
@@ -326,12 +600,7 @@ def write_binary_file(file_path: str, content: bytes) -> bool:
         bool: 是否成功
     """
     try:
-        # 确保目录存在
-        ensure_dir(os.path.dirname(file_path))
-        
-        # 写入文件
-        with open(file_path, "wb") as f:
-            f.write(content)
+        atomic_write(file_path, content)
         return True
     except Exception:
         return False
@@ -389,6 +658,31 @@ def human_readable_size(size_bytes: int) -> str:
 format_size = human_readable_size
 
 
+def parse_size(size: str) -> int:
+    """
+    解析人类可读的文件大小
+    
+    Args:
+        size: 文件大小，如 "1024"、"10M"、"1.5GB"
+        
+    Returns:
+        int: 字节数
+        
+    Raises:
+        ValueError: 格式无效
+    """
+    units = {"": 1, "B": 1, "K": 1024, "M": 1024 ** 2, "G": 1024 ** 3, "T": 1024 ** 4}
+    text = size.strip().upper()
+    if text.endswith("B") and len(text) > 1 and text[-2] in "KMGT":
+        text = text[:-1]
+    
+    number = text.rstrip("KMGTB")
+    unit = text[len(number):]
+    if unit not in units or not number:
+        raise ValueError(f"无效的文件大小: {size}")
+    return int(float(number) * units[unit])
+
+
 def format_time(seconds: int) -> str:
     """
     将秒数格式化为人类可读的时间格式
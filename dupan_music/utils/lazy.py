@@ -0,0 +1,73 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+延迟导入模块
+
+vlc、pydub、soundfile、mutagen 等模块导入较慢，且只在真正播放或处理音频时才需要。
+用 LazyModule 代替模块对象，首次访问属性时才导入。
+"""
+
+import importlib
+import importlib.util
+from types import ModuleType
+from typing import Optional
+
+
+def module_available(name: str) -> bool:
+    """
+    检查模块是否已安装，不导入模块
+    
+    Args:
+        name: 模块名
+        
+    Returns:
+        bool: 是否已安装
+    """
+    try:
+        return importlib.util.find_spec(name) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+class LazyModule:
+    """首次访问属性时才导入的模块"""
+    
+    def __init__(self, name: str):
+        """
+        初始化延迟导入模块
+        
+        Args:
+            name: 模块名
+        """
+        self._name = name
+        self._module: Optional[ModuleType] = None
+    
+    @property
+    def is_loaded(self) -> bool:
+        """模块是否已导入"""
+        return self._module is not None
+    
+    def load(self) -> ModuleType:
+        """
+        导入模块
+        
+        Returns:
+            ModuleType: 模块
+            
+        Raises:
+            ImportError: 模块未安装
+        """
+        if self._module is None:
+            self._module = importlib.import_module(self._name)
+        return self._module
+    
+    def __getattr__(self, attr: str):
+        # 只在实例上找不到属性时调用，测试中替换的属性优先；私有属性不转发，避免初始化前递归
+        if attr.startswith('_'):
+            raise AttributeError(attr)
+        return getattr(self.load(), attr)
+    
+    def __repr__(self) -> str:
+        state = "已导入" if self.is_loaded else "未导入"
+        return f"<LazyModule {self._name} ({state})>"
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+延迟加载的 click 命令组
+
+子命令模块会导入 requests、rich、vlc 等较慢的依赖。LazyGroup 只记录子命令所在的
+模块和简短说明，显示帮助时直接使用记录的说明，调用子命令时才导入对应模块。
+"""
+
+import importlib
+from typing import Dict, List, Optional, Tuple
+
+import click
+
+
+def load_command(spec: str) -> click.Command:
+    """
+    导入子命令
+    
+    Args:
+        spec: "模块:对象"，如 "dupan_music.auth.cli:auth"
+        
+    Returns:
+        click.Command: 子命令
+    """
+    module_name, attr = spec.split(':', 1)
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class LazyGroup(click.Group):
+    """子命令在调用时才导入的命令组"""
+    
+    def __init__(self, *args, lazy_commands: Optional[Dict[str, Tuple[str, str]]] = None, **kwargs):
+        """
+        初始化命令组
+        
+        Args:
+            lazy_commands: 子命令名称 -> ("模块:对象", 简短说明)
+        """
+        super().__init__(*args, **kwargs)
+        self.lazy_commands = dict(lazy_commands or {})
+    
+    def list_commands(self, ctx: click.Context) -> List[str]:
+        return sorted(set(super().list_commands(ctx)) | set(self.lazy_commands))
+    
+    def get_command(self, ctx: click.Context, cmd_name: str) -> Optional[click.Command]:
+        if cmd_name in self.lazy_commands and cmd_name not in self.commands:
+            # 导入后注册为普通子命令，之后不再重复导入
+            self.add_command(load_command(self.lazy_commands[cmd_name][0]), cmd_name)
+        return super().get_command(ctx, cmd_name)
+    
+    def format_commands(self, ctx: click.Context, formatter: click.HelpFormatter) -> None:
+        names = self.list_commands(ctx)
+        if not names:
+            return
+        
+        limit = formatter.width - 6 - max(len(name) for name in names)
+        rows = []
+        for name in names:
+            if name not in self.commands:
+                # 未导入的子命令使用记录的说明，不为显示帮助而导入模块
+                rows.append((name, self.lazy_commands[name][1]))
+                continue
+            
+            command = self.commands[name]
+            if not command.hidden:
+                rows.append((name, command.get_short_help_str(limit)))
+        
+        if rows:
+            with formatter.section("Commands"):
+                formatter.write_dl(rows)
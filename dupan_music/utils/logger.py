@@ -3,16 +3,28 @@
 
 """
 日志模块
+
+日志记录器只挂一个 QueueHandler，记录放入队列后立即返回；控制台和文件处理器由
+QueueListener 在后台线程中调用，播放和下载线程不做文件I/O。相同配置的处理器在
+进程内只创建一次，所有日志记录器共用。
 """
 
 import os
+import queue
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
-from typing import Optional
+import threading
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Dict, List, Optional, Tuple
 
 from dupan_music.config.config import CONFIG
 from dupan_music.utils.file_utils import ensure_dir
 
+# 日志配置（格式、日期格式、日志文件） -> 共用的 QueueHandler
+_queue_handlers: Dict[Tuple[str, str, Optional[str]], QueueHandler] = {}
+_queue_handlers_lock = threading.Lock()
+
+
 def get_logger(name: str = "dupan_music", level: Optional[str] = None) -> logging.Logger:
     """
     获取日志记录器
@@ -27,6 +39,82 @@ def get_logger(name: str = "dupan_music", level: Optional[str] = None) -> loggin
     return setup_logger(name, level)
 
 
+def _create_handlers(log_format: str, date_format: str, log_file: Optional[str]) -> List[logging.Handler]:
+    """
+    创建控制台处理器和文件处理器
+    
+    Args:
+        log_format: 日志格式
+        date_format: 日期格式
+        log_file: 日志文件，为空时不写入文件
+        
+    Returns:
+        List[logging.Handler]: 处理器
+    """
+    # 创建格式化器
+    formatter = logging.Formatter(log_format, date_format)
+    
+    # 创建控制台处理器
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    handlers = [console_handler]
+    
+    # 如果指定了日志文件，则创建文件处理器
+    if log_file:
+        # 确保日志目录存在
+        ensure_dir(os.path.dirname(log_file))
+        
+        # 创建文件处理器（最大10MB，保留5个备份）
+        file_handler = RotatingFileHandler(
+            log_file, maxBytes=10*1024*1024, backupCount=5, encoding="utf-8"
+        )
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+    
+    return handlers
+
+
+def _get_queue_handler(log_format: str, date_format: str, log_file: Optional[str]) -> QueueHandler:
+    """
+    获取日志配置对应的 QueueHandler，第一次使用时创建处理器并启动后台线程
+    
+    Args:
+        log_format: 日志格式
+        date_format: 日期格式
+        log_file: 日志文件
+        
+    Returns:
+        QueueHandler: 队列处理器，listener 属性为对应的 QueueListener
+    """
+    key = (log_format, date_format, log_file)
+    with _queue_handlers_lock:
+        handler = _queue_handlers.get(key)
+        if handler is None:
+            log_queue = queue.Queue()
+            handler = QueueHandler(log_queue)
+            handler.listener = QueueListener(
+                log_queue, *_create_handlers(log_format, date_format, log_file), respect_handler_level=True
+            )
+            handler.listener.start()
+            atexit.register(handler.listener.stop)
+            _queue_handlers[key] = handler
+        return handler
+
+
+def flush_logs() -> None:
+    """等待队列中的日志全部写入处理器并刷新"""
+    with _queue_handlers_lock:
+        handlers = list(_queue_handlers.values())
+    
+    for handler in handlers:
+        listener = handler.listener
+        if listener._thread is None:
+            continue
+        listener.queue.join()
+        for target in listener.handlers:
+            target.flush()
+
+
 def setup_logger(name: str = "dupan_music", level: Optional[str] = None) -> logging.Logger:
     """
     设置日志记录器
@@ -58,29 +146,11 @@ def setup_logger(name: str = "dupan_music", level: Optional[str] = None) -> logg
     }
     logger.setLevel(level_map.get(log_level.upper(), logging.INFO))
     
-    # 清除已有的处理器
-    if logger.handlers:
+    # 已挂上相同配置的队列处理器时不再重建
+    handler = _get_queue_handler(log_format, date_format, log_file)
+    if logger.handlers != [handler]:
         logger.handlers.clear()
-    
-    # 创建格式化器
-    formatter = logging.Formatter(log_format, date_format)
-    
-    # 创建控制台处理器
-    console_handler = logging.StreamHandler()
-    console_handler.setFormatter(formatter)
-    logger.addHandler(console_handler)
-    
-    # 如果指定了日志文件，则创建文件处理器
-    if log_file:
-        # 确保日志目录存在
-        ensure_dir(os.path.dirname(log_file))
-        
-        # 创建文件处理器（最大10MB，保留5个备份）
-        file_handler = RotatingFileHandler(
-            log_file, maxBytes=10*1024*1024, backupCount=5, encoding="utf-8"
-        )
-        file_handler.setFormatter(formatter)
-        logger.addHandler(file_handler)
+        logger.addHandler(handler)
     
     return logger
 
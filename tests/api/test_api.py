@@ -7,6 +7,8 @@ API模块测试
 
 import os
 import json
+import time
+import threading
 import pytest
 from unittest.mock import patch, MagicMock, mock_open
 
@@ -151,6 +153,29 @@ class TestBaiduPanAPI:
         assert kwargs["params"]["desc"] == 1
         assert kwargs["params"]["limit"] == 100
 
+    @patch('dupan_music.api.api.BaiduPanAPI.get_file_list')
+    def test_iter_file_list(self, mock_get_file_list):
+        """测试分页获取文件列表和目录列表缓存"""
+        pages = [
+            [{"fs_id": i, "path": f"/test/{i}.mp3"} for i in range(2)],
+            [{"fs_id": 2, "path": "/test/2.mp3"}]
+        ]
+        mock_get_file_list.side_effect = pages
+        
+        # 只在迭代时请求下一页
+        iterator = self.api.iter_file_list("/test", page_size=2)
+        assert next(iterator) == pages[0]
+        assert mock_get_file_list.call_count == 1
+        assert list(iterator) == [pages[1]]
+        mock_get_file_list.assert_called_with("/test", "name", False, 2, start=2)
+        
+        # 再次列出时使用缓存
+        assert list(self.api.iter_file_list("/test", page_size=2)) == pages
+        assert mock_get_file_list.call_count == 2
+        
+        self.api.listing_cache.invalidate("/test")
+        assert len(self.api.listing_cache) == 0
+    
     @patch('dupan_music.api.api.BaiduPanAPI._make_request')
     def test_get_file_list_recursive(self, mock_make_request):
         """测试递归获取文件列表"""
@@ -243,6 +268,66 @@ class TestBaiduPanAPI:
         assert kwargs["params"]["page"] == 1
         assert kwargs["params"]["num"] == 50
 
+    @patch('dupan_music.api.api.BaiduPanAPI._make_request')
+    def test_search_all(self, mock_make_request):
+        """测试获取全部搜索结果"""
+        # 模拟分页响应：共3页，第2页与第1页有重复项
+        pages = {
+            1: {"errno": 0, "has_more": 1, "list": [{"fs_id": 1}, {"fs_id": 2}]},
+            2: {"errno": 0, "has_more": 1, "list": [{"fs_id": 2}, {"fs_id": 3}]},
+            3: {"errno": 0, "has_more": 0, "list": [{"fs_id": 4}]},
+        }
+        
+        def fake_request(method, url, params=None, **kwargs):
+            return pages.get(params["page"], {"errno": 0, "has_more": 0, "list": []})
+        
+        mock_make_request.side_effect = fake_request
+        
+        # 获取全部结果
+        result = list(self.api.search_all(key="test", num=2, max_workers=2))
+        
+        # 验证结果已去重且完整
+        assert sorted(file["fs_id"] for file in result) == [1, 2, 3, 4]
+        
+        # 验证不会请求最后一页之后超出并发窗口的页面
+        requested = [call[1]["params"]["page"] for call in mock_make_request.call_args_list]
+        assert set(requested) <= {1, 2, 3, 4}
+        assert requested[0] == 1
+
+    @patch('dupan_music.api.api.BaiduPanAPI._make_request')
+    def test_search_all_single_page(self, mock_make_request):
+        """测试获取全部搜索结果（只有一页）"""
+        mock_make_request.return_value = {
+            "errno": 0,
+            "has_more": 0,
+            "list": [{"fs_id": 1}]
+        }
+        
+        result = list(self.api.search_all(key="test"))
+        
+        assert [file["fs_id"] for file in result] == [1]
+        mock_make_request.assert_called_once()
+    
+    def test_concurrent_token_refresh(self):
+        """测试令牌过期时并发请求只刷新一次（刷新令牌只能使用一次）"""
+        state = {"valid": False}
+        self.mock_auth.is_authenticated.side_effect = lambda: state["valid"]
+        
+        def refresh():
+            time.sleep(0.05)
+            state["valid"] = True
+            return True
+        
+        self.mock_auth.refresh_token.side_effect = refresh
+        
+        threads = [threading.Thread(target=self.api._ensure_token) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        self.mock_auth.refresh_token.assert_called_once()
+
     @patch('dupan_music.api.api.BaiduPanAPI._make_request')
     def test_get_file_info(self, mock_make_request):
         """测试获取文件信息"""
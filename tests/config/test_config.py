@@ -241,3 +241,64 @@ class TestConfig:
             
             # 验证打印信息
             mock_print.assert_called_with("加载凭据文件失败: 测试异常")
+
+
+class TestConfigSnapshot:
+    """测试配置快照"""
+    
+    def test_lazy_load(self, tmp_path):
+        """测试配置在第一次读取时才加载"""
+        config_file = str(tmp_path / "config.json")
+        with patch.object(Config, "_load", return_value={"ui": {"theme": "auto"}}) as mock_load:
+            config = Config(config_file)
+            mock_load.assert_not_called()
+            
+            assert config.get("ui.theme") == "auto"
+            assert config.get("ui.language") is None
+            mock_load.assert_called_once()
+    
+    def test_snapshot_reused(self, tmp_path):
+        """测试来源文件未变化时读取快照，变化后重新合并"""
+        config_file = tmp_path / "config.json"
+        config_file.write_text(json.dumps({"ui": {"theme": "dark"}}), encoding="utf-8")
+        
+        assert Config(str(config_file)).get("ui.theme") == "dark"
+        assert (tmp_path / ".config.snapshot.json").exists()
+        
+        with patch.object(Config, "_load_config") as mock_load:
+            config = Config(str(config_file))
+            assert config.get("ui.theme") == "dark"
+            assert config.get("ui") == {"theme": "dark", "language": "zh_CN", "show_progress": True}
+            mock_load.assert_not_called()
+        
+        config_file.write_text(json.dumps({"ui": {"theme": "light"}}), encoding="utf-8")
+        assert Config(str(config_file)).get("ui.theme") == "light"
+    
+    def test_snapshot_excludes_credentials(self, tmp_path):
+        """测试凭据不写入快照，读取快照时重新应用（不执行凭据文件），快照只有所有者可读写"""
+        credentials_file = tmp_path / "credentials.py"
+        credentials_file.write_text('CREDENTIALS = {"app_key": "key", "secret_key": "s3cr3t-value"}\n', encoding="utf-8")
+        config_file = str(tmp_path / "config.json")
+        snapshot_file = tmp_path / ".config.snapshot.json"
+        
+        with patch("dupan_music.config.config.CREDENTIALS_FILE", str(credentials_file)), \
+             patch("importlib.util.spec_from_file_location") as mock_spec, \
+             patch("builtins.print") as mock_print:
+            assert Config(config_file).get("secret_key") == "s3cr3t-value"
+            assert "s3cr3t-value" not in snapshot_file.read_text(encoding="utf-8")
+            assert snapshot_file.stat().st_mode & 0o777 == 0o600
+            
+            with patch.object(Config, "_load_config") as mock_load:
+                config = Config(config_file)
+                assert config.get("app_key") == "key"
+                mock_load.assert_not_called()
+            mock_spec.assert_not_called()
+            mock_print.assert_not_called()
+    
+    def test_dynamic_credentials(self, tmp_path):
+        """测试 CREDENTIALS 不是字面量时执行凭据文件"""
+        credentials_file = tmp_path / "credentials.py"
+        credentials_file.write_text('CREDENTIALS = dict(app_key="k" * 3)\n', encoding="utf-8")
+        
+        with patch("dupan_music.config.config.CREDENTIALS_FILE", str(credentials_file)):
+            assert Config(str(tmp_path / "config.json")).get("app_key") == "kkk"
@@ -8,7 +8,7 @@ pytest配置文件
 import os
 import sys
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 # 添加项目根目录到Python路径
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -20,6 +20,13 @@ from dupan_music.playlist.playlist import PlaylistManager
 from dupan_music.player.player import AudioPlayer
 
 
+@pytest.fixture(autouse=True)
+def reset_vlc_instance():
+    """每个测试重新创建进程内共用的VLC实例（测试中通常为模拟对象）"""
+    with patch('dupan_music.player.player._vlc_instance', None):
+        yield
+
+
 @pytest.fixture
 def mock_auth():
     """模拟认证对象"""
@@ -0,0 +1,151 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试播放历史模块
+"""
+
+import threading
+
+import pytest
+from unittest.mock import patch
+
+from dupan_music.history.history import PlayHistory, EVENT_START, EVENT_END
+from dupan_music.playlist.playlist import PlaylistItem, PlaylistManager
+
+
+def make_item(fs_id):
+    """创建测试用播放列表项字典"""
+    return PlaylistItem(
+        fs_id=fs_id,
+        server_filename=f"song{fs_id}.mp3",
+        path=f"/music/song{fs_id}.mp3",
+        size=1024
+    ).to_dict()
+
+
+class TestPlayHistory:
+    """测试播放历史日志"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.history = None
+    
+    def teardown_method(self):
+        """测试后清理"""
+        if self.history:
+            self.history.close()
+    
+    def test_record_and_read(self, tmp_path):
+        """测试追加写入和读取"""
+        self.history = PlayHistory(str(tmp_path / "history"))
+        self.history.record_start(make_item(1), "测试")
+        self.history.record_end(1, 100.0, 200.0, completed=True, playlist="测试")
+        self.history.flush()
+        
+        records = [record for record, _ in self.history.read()]
+        assert [record["event"] for record in records] == [EVENT_START, EVENT_END]
+        assert records[0]["item"]["fs_id"] == 1
+        assert records[0]["playlist"] == "测试"
+        assert records[1]["skipped"] is False
+        
+        # 从偏移继续读取时只返回新记录
+        offset = list(self.history.read())[-1][1]
+        self.history.record_start(make_item(2))
+        self.history.flush()
+        assert [record["fs_id"] for record, _ in self.history.read(offset)] == [2]
+    
+    def test_skipped(self, tmp_path):
+        """测试跳过判定"""
+        self.history = PlayHistory(str(tmp_path))
+        self.history.record_end(1, 10.0, 200.0, completed=False)
+        self.history.record_end(2, 150.0, 200.0, completed=False)
+        self.history.record_end(3, 10.0, 0, completed=False)
+        self.history.flush()
+        
+        assert [record["skipped"] for record, _ in self.history.read()] == [True, False, True]
+    
+    def test_corrupt_line(self, tmp_path):
+        """测试跳过损坏和不完整的行"""
+        self.history = PlayHistory(str(tmp_path))
+        with open(self.history.log_path, "wb") as f:
+            f.write(b'{"event": "start", "fs_id": 1}\n{broken\n{"event": "start"')
+        
+        assert [record["fs_id"] for record, _ in self.history.read()] == [1]
+        
+        # 新记录不会与不完整的行连在一起
+        self.history.record_start(make_item(2))
+        self.history.flush()
+        assert [record["fs_id"] for record, _ in self.history.read()] == [1, 2]
+    
+    def test_offsets(self, tmp_path):
+        """测试视图偏移"""
+        self.history = PlayHistory(str(tmp_path))
+        assert self.history.get_offset("recent") == 0
+        
+        self.history.set_offset("recent", 128)
+        assert PlayHistory(str(tmp_path)).get_offset("recent") == 128
+    
+    def test_concurrent_offsets(self, tmp_path):
+        """测试多个线程同时保存不同视图的偏移不会互相覆盖"""
+        self.history = PlayHistory(str(tmp_path))
+        
+        def save(consumer):
+            for offset in range(20):
+                self.history.set_offset(consumer, offset)
+        
+        threads = [threading.Thread(target=save, args=(f"view{i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        
+        assert all(self.history.get_offset(f"view{i}") == 19 for i in range(4))
+
+
+class TestRecentPlaylist:
+    """测试由播放历史生成的最近播放列表"""
+    
+    @patch('dupan_music.playlist.playlist.Path.home')
+    def test_compact_history(self, mock_home, tmp_path):
+        """测试压缩播放历史生成最近播放列表"""
+        mock_home.return_value = str(tmp_path)
+        manager = PlaylistManager()
+        
+        try:
+            with patch.object(manager.store, 'save', wraps=manager.store.save) as mock_save:
+                for fs_id in (1, 2, 3, 1):
+                    assert manager.add_to_recent_playlist(make_item(fs_id), "测试") is True
+                manager.history.flush()
+                
+                # 记录播放时不改写播放列表
+                mock_save.assert_not_called()
+            
+            recent = manager.get_playlist(PlaylistManager.RECENT_PLAYLIST_NAME)
+            assert [item.fs_id for item in recent.items] == [1, 3, 2]
+            
+            # 已压缩的记录不会重复处理
+            with patch.object(manager.store, 'save') as mock_save:
+                manager.compact_history()
+                mock_save.assert_not_called()
+        finally:
+            manager.history.close()
+    
+    @patch('dupan_music.playlist.playlist.CONFIG.get')
+    @patch('dupan_music.playlist.playlist.Path.home')
+    def test_max_size(self, mock_home, mock_config_get, tmp_path):
+        """测试最近播放列表容量"""
+        mock_home.return_value = str(tmp_path)
+        mock_config_get.side_effect = lambda key, default=None: default
+        manager = PlaylistManager()
+        
+        try:
+            for fs_id in range(PlaylistManager.RECENT_PLAYLIST_MAX_SIZE + 5):
+                manager.add_to_recent_playlist(make_item(fs_id))
+            manager.history.flush()
+            
+            recent = manager.get_playlist(PlaylistManager.RECENT_PLAYLIST_NAME)
+            assert len(recent.items) == PlaylistManager.RECENT_PLAYLIST_MAX_SIZE
+            assert recent.items[0].fs_id == PlaylistManager.RECENT_PLAYLIST_MAX_SIZE + 4
+        finally:
+            manager.history.close()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试播放统计模块
+"""
+
+import pytest
+from unittest.mock import patch
+from click.testing import CliRunner
+
+from dupan_music.history.history import PlayHistory
+from dupan_music.history.stats import PlayStats
+from dupan_music.history.cli import stats
+from dupan_music.playlist.playlist import PlaylistItem
+
+
+def make_item(fs_id):
+    """创建测试用播放列表项字典"""
+    return PlaylistItem(
+        fs_id=fs_id,
+        server_filename=f"song{fs_id}.mp3",
+        path=f"/music/song{fs_id}.mp3",
+        size=1024
+    ).to_dict()
+
+
+class TestPlayStats:
+    """测试播放统计引擎"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.history = None
+    
+    def teardown_method(self):
+        """测试后清理"""
+        if self.history:
+            self.history.close()
+    
+    def play(self, fs_id, played, completed, playlist="测试"):
+        """记录一次完整的播放"""
+        self.history.record_start(make_item(fs_id), playlist)
+        self.history.record_end(fs_id, played, 200.0, completed=completed, playlist=playlist)
+    
+    def test_aggregate(self, tmp_path):
+        """测试聚合播放记录"""
+        self.history = PlayHistory(str(tmp_path))
+        self.play(1, 200.0, True)
+        self.play(1, 200.0, True)
+        self.play(2, 10.0, False, playlist="其他")
+        self.history.flush()
+        
+        play_stats = PlayStats(self.history)
+        top = play_stats.top()
+        assert [track.fs_id for track in top] == [1, 2]
+        assert top[0].plays == 2
+        assert top[0].completes == 2
+        assert top[0].listen_seconds == 400.0
+        assert top[0].server_filename == "song1.mp3"
+        
+        assert [track.fs_id for track in play_stats.most_skipped()] == [2]
+        assert play_stats.playlist_counts() == {"测试": 2, "其他": 1}
+        assert sum(play_stats.by_hour()) == 3
+        assert play_stats.totals() == {'plays': 3, 'seconds': 410.0, 'tracks': 2}
+    
+    def test_incremental(self, tmp_path):
+        """测试只处理新增记录并保存聚合结果"""
+        self.history = PlayHistory(str(tmp_path))
+        self.play(1, 200.0, True)
+        self.history.flush()
+        
+        play_stats = PlayStats(self.history)
+        assert play_stats.update() == 2
+        assert play_stats.update() == 0
+        
+        self.play(1, 50.0, False)
+        self.history.flush()
+        
+        # 新实例从保存的偏移继续
+        play_stats = PlayStats(self.history)
+        assert play_stats.update() == 2
+        track = play_stats.get(1)
+        assert track.plays == 2
+        assert track.skips == 1
+    
+    def test_log_replaced(self, tmp_path):
+        """测试日志被清空后重新统计"""
+        self.history = PlayHistory(str(tmp_path))
+        self.play(1, 200.0, True)
+        self.play(2, 200.0, True)
+        self.history.flush()
+        
+        play_stats = PlayStats(self.history)
+        assert play_stats.totals()['plays'] == 2
+        
+        open(self.history.log_path, 'wb').close()
+        self.play(3, 200.0, True)
+        self.history.flush()
+        
+        assert [track.fs_id for track in play_stats.top()] == [3]
+    
+    def test_shuffle_weights(self, tmp_path):
+        """测试加权随机播放权重"""
+        self.history = PlayHistory(str(tmp_path))
+        self.play(1, 200.0, True)
+        self.play(2, 10.0, False)
+        self.history.flush()
+        
+        play_stats = PlayStats(self.history)
+        weights = play_stats.shuffle_weights([1, 2, 3], now=play_stats.get(1).last_played + 7200)
+        assert weights == [2.0, 0.5, 1.0]
+        
+        # 刚播放过的歌曲权重降低
+        recent = play_stats.shuffle_weights([1], now=play_stats.get(1).last_played + 60)
+        assert recent[0] == pytest.approx(0.2)
+
+
+class TestStatsCli:
+    """测试播放统计命令"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.runner = CliRunner()
+    
+    @patch('dupan_music.history.cli.get_play_stats')
+    def test_top_json(self, mock_get_play_stats, tmp_path):
+        """测试以JSON格式输出播放最多的歌曲"""
+        history = PlayHistory(str(tmp_path))
+        try:
+            history.record_start(make_item(1), "测试")
+            history.flush()
+            mock_get_play_stats.return_value = PlayStats(history)
+            
+            result = self.runner.invoke(stats, ['top', '--json'])
+            assert result.exit_code == 0
+            assert '"server_filename": "song1.mp3"' in result.output
+        finally:
+            history.close()
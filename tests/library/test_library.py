@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试本地曲库索引和失效文件定位
+"""
+
+import pytest
+from unittest.mock import MagicMock
+
+from dupan_music.library.index import LibraryIndex
+from dupan_music.library.resolver import FileResolver
+from dupan_music.playlist.playlist import Playlist, PlaylistItem, PlaylistManager
+from dupan_music.playlist.verify import PlaylistVerifier
+
+
+def make_file_info(fs_id, path, md5="", size=1024):
+    """创建测试用文件信息"""
+    return {
+        'fs_id': fs_id,
+        'server_filename': path.rsplit('/', 1)[-1],
+        'path': path,
+        'size': size,
+        'isdir': 0,
+        'md5': md5
+    }
+
+
+def make_item(fs_id, path, md5="", size=1024):
+    """创建测试用播放列表项"""
+    return PlaylistItem.from_api_result(make_file_info(fs_id, path, md5, size))
+
+
+class TestLibraryIndex:
+    """测试曲库索引"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.index = None
+    
+    def teardown_method(self):
+        """测试后清理"""
+        if self.index:
+            self.index.close()
+    
+    def test_upsert_and_find(self, tmp_path):
+        """测试写入和查找"""
+        self.index = LibraryIndex(str(tmp_path / "library.db"))
+        assert self.index.upsert([
+            make_file_info(1, "/music/a.mp3", md5="aaa"),
+            make_file_info(2, "/music/b.mp3", md5="bbb"),
+            {'fs_id': 3, 'path': "/music/dir", 'isdir': 1}
+        ]) == 2
+        
+        assert self.index.count() == 2
+        assert self.index.find_by_path("/music/a.mp3")['fs_id'] == 1
+        assert [f['fs_id'] for f in self.index.find_by_md5("bbb", 1024)] == [2]
+        assert self.index.find_by_md5("bbb", 1) == []
+        assert [f['fs_id'] for f in self.index.list_dir("/music")] == [1, 2]
+    
+    def test_reupload_replaces_path(self, tmp_path):
+        """测试同一路径重新上传后替换旧的文件ID"""
+        self.index = LibraryIndex(str(tmp_path / "library.db"))
+        self.index.upsert([make_file_info(1, "/music/a.mp3")])
+        self.index.upsert([make_file_info(9, "/music/a.mp3")])
+        
+        assert self.index.get(1) is None
+        assert self.index.find_by_path("/music/a.mp3")['fs_id'] == 9
+        
+        assert self.index.remove([9]) == 1
+        assert self.index.count() == 0
+
+
+class TestFileResolver:
+    """测试失效文件定位"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.index = None
+        self.api = MagicMock()
+    
+    def teardown_method(self):
+        """测试后清理"""
+        if self.index:
+            self.index.close()
+    
+    def test_resolve_by_index(self, tmp_path):
+        """测试按索引中的MD5找到移动后的文件"""
+        self.index = LibraryIndex(str(tmp_path / "library.db"))
+        self.index.upsert([
+            make_file_info(1, "/old/a.mp3", md5="aaa"),
+            make_file_info(2, "/new/a.mp3", md5="aaa"),
+            make_file_info(3, "/new/b.mp3", md5="bbb")
+        ])
+        lookup = MagicMock(return_value={2: make_file_info(2, "/new/a.mp3", md5="aaa")})
+        
+        resolver = FileResolver(self.api, self.index, lookup=lookup)
+        resolved = resolver.resolve([make_item(1, "/old/a.mp3", md5="aaa")])
+        
+        assert resolved[1]['fs_id'] == 2
+        lookup.assert_called_once_with({2})
+        self.api.get_file_list.assert_not_called()
+        # 失效的文件从索引中删除
+        assert self.index.get(1) is None
+    
+    def test_resolve_by_listing(self, tmp_path):
+        """测试按原目录列表找到重新上传的文件"""
+        self.index = LibraryIndex(str(tmp_path / "library.db"))
+        self.api.get_file_list.return_value = [
+            make_file_info(7, "/music/a.mp3"),
+            make_file_info(8, "/music/c.mp3")
+        ]
+        
+        resolver = FileResolver(self.api, self.index, lookup=MagicMock(return_value={}))
+        resolved = resolver.resolve([
+            make_item(1, "/music/a.mp3"),
+            make_item(2, "/music/b.mp3")
+        ])
+        
+        assert {fs_id: info['fs_id'] for fs_id, info in resolved.items()} == {1: 7}
+        # 同一目录只列出一次，结果写入索引
+        self.api.get_file_list.assert_called_once()
+        assert self.index.find_by_path("/music/c.mp3")['fs_id'] == 8
+
+
+class TestVerifierRebind:
+    """测试验证时重新定位失效文件"""
+    
+    def test_rebind(self):
+        """测试失效文件绑定到新的文件ID并只保存一次"""
+        manager = MagicMock(spec=PlaylistManager)
+        manager.api = MagicMock()
+        manager.save_playlist.return_value = True
+        manager.api.get_file_info.side_effect = lambda fs_ids: [
+            make_file_info(fs_id, f"/music/{fs_id}.mp3") for fs_id in fs_ids if fs_id != 1
+        ]
+        manager.api.get_file_list.return_value = [make_file_info(5, "/music/1.mp3")]
+        
+        playlist = Playlist("测试", items=[make_item(1, "/music/1.mp3"), make_item(2, "/music/2.mp3")])
+        result, = PlaylistVerifier(manager).verify([playlist], refresh=True)
+        
+        assert result.rebound == 1
+        assert not result.invalid
+        assert [item.fs_id for item in playlist.items] == [5, 2]
+        manager.save_playlist.assert_called_once_with(playlist)
@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试局域网广播
+"""
+
+import os
+import socket
+
+import pytest
+from unittest.mock import patch
+
+from dupan_music.player.broadcast import Broadcaster
+from dupan_music.player.daemon import PlayerDaemon
+from dupan_music.playlist.playlist import PlaylistItem
+from tests.player.test_daemon import make_player
+
+
+def open_stream(port: int, path: str = "/stream"):
+    """
+    请求广播流
+    
+    Returns:
+        Tuple[socket.socket, bytes, bytes]: 连接、响应头和已读取的数据
+    """
+    sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+    sock.sendall(f"GET {path} HTTP/1.1\r\nHost: localhost\r\n\r\n".encode())
+    data = b""
+    while b"\r\n\r\n" not in data:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        data += chunk
+    headers, _, body = data.partition(b"\r\n\r\n")
+    return sock, headers, body
+
+
+def read_exactly(sock: socket.socket, body: bytes, size: int) -> bytes:
+    """读取到 size 字节为止"""
+    while len(body) < size:
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        body += chunk
+    return body
+
+
+class TestBroadcaster:
+    """测试局域网广播"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.player = make_player()
+        # 已播放到结尾，整首歌曲都可以发送
+        self.player.get_time.return_value = 4000
+    
+    @pytest.fixture(autouse=True)
+    def fast_tick(self):
+        with patch("dupan_music.player.broadcast.TICK_INTERVAL", 0.01):
+            yield
+    
+    def write_track(self, tmp_path, name: str, size: int) -> bytes:
+        """创建临时文件并设为正在播放"""
+        data = os.urandom(size)
+        path = tmp_path / name
+        path.write_bytes(data)
+        self.player.temp_file = str(path)
+        self.player.current_item = PlaylistItem(fs_id=size, server_filename=name, path=f"/music/{name}", size=size)
+        return data
+    
+    def start(self, tmp_path, **kwargs) -> PlayerDaemon:
+        self.broadcaster = Broadcaster("127.0.0.1", 0, **kwargs)
+        daemon = PlayerDaemon(self.player, str(tmp_path / "p.sock"))
+        daemon.add_frontend(self.broadcaster)
+        return daemon.start_in_thread()
+    
+    @pytest.mark.parametrize("use_sendfile", [True, False])
+    def test_stream(self, tmp_path, use_sendfile):
+        """测试多个听众收到完整的歌曲"""
+        data = self.write_track(tmp_path, "a.flac", 3 * 1024 * 1024 + 17)
+        daemon = self.start(tmp_path, use_sendfile=use_sendfile)
+        try:
+            streams = [open_stream(self.broadcaster.port) for _ in range(3)]
+            for sock, headers, body in streams:
+                assert headers.startswith(b"HTTP/1.0 200 OK")
+                assert b"Content-Type: audio/flac" in headers
+                assert read_exactly(sock, body, len(data)) == data
+                sock.close()
+        finally:
+            daemon.stop()
+    
+    def test_paced_by_playback(self, tmp_path):
+        """测试听众最多领先播放位置 burst 字节"""
+        data = self.write_track(tmp_path, "a.flac", 1024 * 1024)
+        self.player.get_time.return_value = 1000
+        daemon = self.start(tmp_path, burst=1000)
+        try:
+            sock, _, body = open_stream(self.broadcaster.port)
+            expected = len(data) // 4 + 1000
+            assert read_exactly(sock, body, expected) == data[:expected]
+            sock.settimeout(0.2)
+            with pytest.raises(socket.timeout):
+                sock.recv(1)
+            sock.close()
+        finally:
+            daemon.stop()
+    
+    def test_lagging_listener_dropped(self, tmp_path):
+        """测试落后播放位置过多的听众被断开"""
+        data = self.write_track(tmp_path, "a.flac", 1024 * 1024)
+        daemon = self.start(tmp_path, burst=0, max_lag=1000)
+        try:
+            sock, _, body = open_stream(self.broadcaster.port)
+            assert len(read_exactly(sock, body, len(data))) < len(data)
+            sock.close()
+            assert self.broadcaster.dropped == 1
+        finally:
+            daemon.stop()
+    
+    def test_track_change(self, tmp_path):
+        """测试格式相同时继续发送下一首，格式变化时结束响应"""
+        first = self.write_track(tmp_path, "a.mp3", 100000)
+        daemon = self.start(tmp_path)
+        try:
+            sock, headers, body = open_stream(self.broadcaster.port)
+            assert b"Content-Type: audio/mpeg" in headers
+            body = read_exactly(sock, body, len(first))
+            assert body == first
+            
+            # 播放器切换歌曲后删除上一首的临时文件
+            os.remove(self.player.temp_file)
+            second = self.write_track(tmp_path, "b.mp3", 50000)
+            self.player.on_play_callback(self.player.current_item)
+            assert read_exactly(sock, b"", len(second)) == second
+            
+            self.write_track(tmp_path, "c.flac", 1000)
+            self.player.on_play_callback(self.player.current_item)
+            assert sock.recv(1) == b""
+            sock.close()
+        finally:
+            daemon.stop()
+    
+    def test_not_found(self, tmp_path):
+        """测试未知路径"""
+        self.write_track(tmp_path, "a.mp3", 1000)
+        daemon = self.start(tmp_path)
+        try:
+            sock, headers, _ = open_stream(self.broadcaster.port, "/other")
+            assert headers.startswith(b"HTTP/1.0 404")
+            sock.close()
+        finally:
+            daemon.stop()
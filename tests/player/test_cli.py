@@ -572,12 +572,12 @@ class TestPlayerCLI:
         
         # 测试n键（下一曲）
         handle_key_press('n', mock_player)
-        mock_player.next.assert_called_once()
+        mock_player.submit.assert_called_once_with('next')
         mock_player.reset_mock()
         
         # 测试p键（上一曲）
         handle_key_press('p', mock_player)
-        mock_player.prev.assert_called_once()
+        mock_player.submit.assert_called_once_with('prev')
         mock_player.reset_mock()
         
         # 测试+键（增加音量）
@@ -596,4 +596,4 @@ class TestPlayerCLI:
         
         # 测试q键（退出）
         handle_key_press('q', mock_player)
-        mock_player.stop.assert_called_once()
+        mock_player.submit.assert_called_once_with('stop')
@@ -0,0 +1,188 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试播放器守护进程
+"""
+
+import os
+import socket
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from dupan_music.player.daemon import PlayerDaemon
+from dupan_music.player.ipc import DaemonNotRunning, PlayerClient, PlayerIPCError
+from dupan_music.playlist.folder import FolderItems
+from dupan_music.playlist.playlist import Playlist, PlaylistItem
+
+
+def make_player():
+    """创建模拟的播放器"""
+    item = PlaylistItem(fs_id=1, server_filename="a.mp3", path="/music/a.mp3", size=1024)
+    player = MagicMock()
+    player.is_playing = True
+    player.is_paused = False
+    player.current_item = item
+    player.current_playlist = Playlist("测试", items=[item])
+    player.current_index = 0
+    player.get_play_mode.return_value = "sequential"
+    player.get_volume.return_value = 80
+    player.is_muted.return_value = False
+    player.get_time.return_value = 1000
+    player.get_length.return_value = 4000
+    player.get_position.return_value = 0.25
+    
+    def pause():
+        player.is_paused = not player.is_paused
+        return True
+    
+    player.pause.side_effect = pause
+    return player
+
+
+class TestPlayerDaemon:
+    """测试守护进程和客户端"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.player = make_player()
+    
+    @pytest.fixture
+    def socket_path(self, tmp_path):
+        return str(tmp_path / "p.sock")
+    
+    @pytest.fixture
+    def daemon(self, socket_path):
+        daemon = PlayerDaemon(self.player, socket_path).start_in_thread()
+        yield daemon
+        daemon.stop()
+    
+    def test_commands(self, daemon, socket_path):
+        """测试控制命令"""
+        with PlayerClient(socket_path) as client:
+            assert client.request("ping")["pid"] == os.getpid()
+            
+            assert client.request("pause") == {"paused": True}
+            assert client.request("pause") == {"paused": False}
+            
+            status = client.request("status")
+            assert status["item"]["server_filename"] == "a.mp3"
+            assert (status["playlist"], status["time"], status["volume"]) == ("测试", 1000, 80)
+            
+            assert client.request("volume", level=150) == {"volume": 100}
+            self.player.set_volume.assert_called_once_with(100)
+            
+            assert client.request("mode", mode="loop") == {"mode": "loop"}
+            with pytest.raises(PlayerIPCError, match="无效的播放模式"):
+                client.request("mode", mode="shuffle")
+            with pytest.raises(PlayerIPCError, match="未知命令"):
+                client.request("eject")
+            
+            self.player.is_playing = False
+            with pytest.raises(PlayerIPCError, match="当前没有播放"):
+                client.request("next")
+    
+    def test_play(self, daemon, socket_path):
+        """测试播放播放列表"""
+        playlist = Playlist("收藏", items=[self.player.current_item])
+        self.player.playlist_manager.get_playlist.side_effect = lambda name: playlist if name == "收藏" else None
+        self.player.play.return_value = True
+        
+        with PlayerClient(socket_path) as client:
+            status = client.request("play", playlist="收藏", index=0, mode="random")
+            assert status["item"]["fs_id"] == 1
+            self.player.set_playlist.assert_called_once_with(playlist)
+            self.player.play.assert_called_once_with(0)
+            
+            with pytest.raises(PlayerIPCError, match="不存在"):
+                client.request("play", playlist="没有")
+            with pytest.raises(PlayerIPCError, match="无效的播放索引"):
+                client.request("play", playlist="收藏", index=5)
+    
+    def test_folder_playlist_not_listed(self, daemon, socket_path):
+        """测试播放和状态查询只列出目录播放列表需要的部分"""
+        requested = []
+        
+        def pages():
+            for start in range(0, 100, 10):
+                requested.append(start)
+                yield [{'fs_id': start + i, 'server_filename': f"{start + i}.mp3",
+                        'path': f"/music/{start + i}.mp3", 'size': 1024, 'isdir': 0} for i in range(10)]
+        
+        playlist = Playlist("目录", items=FolderItems(pages(), ['.mp3']))
+        self.player.playlist_manager.get_playlist.return_value = playlist
+        self.player.play.return_value = True
+        
+        with PlayerClient(socket_path) as client:
+            client.request("play", playlist="目录", index=12)
+            self.player.current_playlist = playlist
+            assert client.request("status")["playlist_length"] == 20
+        assert requested == [0, 10]
+    
+    def test_not_running(self, socket_path):
+        """测试守护进程未运行"""
+        with pytest.raises(DaemonNotRunning):
+            PlayerClient(socket_path).request("ping")
+        assert not PlayerClient(socket_path).is_running()
+    
+    def test_socket_in_use(self, daemon, socket_path):
+        """测试同一套接字不能启动第二个守护进程"""
+        with pytest.raises(PlayerIPCError, match="已在运行"):
+            PlayerDaemon(make_player(), socket_path).start_in_thread()
+        assert PlayerClient(socket_path).is_running()
+    
+    def test_stale_socket(self, socket_path):
+        """测试清理异常退出留下的套接字文件"""
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(socket_path)
+        stale.close()
+        
+        daemon = PlayerDaemon(self.player, socket_path).start_in_thread()
+        try:
+            assert PlayerClient(socket_path).is_running()
+        finally:
+            daemon.stop()
+    
+    def test_shutdown_and_reconnect(self, socket_path):
+        """测试 shutdown 命令退出守护进程，复用的连接在守护进程重启后重连"""
+        client = PlayerClient(socket_path)
+        daemon = PlayerDaemon(self.player, socket_path).start_in_thread()
+        client.request("shutdown")
+        daemon._thread.join(timeout=5)
+        
+        assert not os.path.exists(socket_path)
+        self.player.stop.assert_called_once()
+        
+        daemon = PlayerDaemon(self.player, socket_path).start_in_thread()
+        try:
+            assert client.request("ping")["pid"] == os.getpid()
+        finally:
+            client.close()
+            daemon.stop()
+
+
+class TestDaemonCLI:
+    """测试控制命令作为守护进程客户端"""
+    
+    def test_control_commands(self, tmp_path):
+        """测试命令发送给守护进程，守护进程未运行时给出提示"""
+        from click.testing import CliRunner
+        from dupan_music.player import cli
+        
+        socket_path = str(tmp_path / "p.sock")
+        runner = CliRunner()
+        with patch.object(cli, "_client", PlayerClient(socket_path)):
+            result = runner.invoke(cli.player, ["pause"])
+            assert "播放器守护进程未运行" in result.output
+            
+            player = make_player()
+            daemon = PlayerDaemon(player, socket_path).start_in_thread()
+            try:
+                assert "已暂停播放" in runner.invoke(cli.player, ["pause"]).output
+                assert "已设置音量: 30%" in runner.invoke(cli.player, ["volume", "30"]).output
+                assert "a.mp3" in runner.invoke(cli.player, ["status"]).output
+                assert "运行中" in runner.invoke(cli.player, ["daemon", "status"]).output
+            finally:
+                cli._client.close()
+                daemon.stop()
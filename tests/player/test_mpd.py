@@ -0,0 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试 MPD 协议服务
+"""
+
+import socket
+
+import pytest
+
+from dupan_music.library.index import LibraryIndex
+from dupan_music.player.daemon import PlayerDaemon
+from dupan_music.player.mpd import MPDError, MPDServer, parse_command
+from dupan_music.playlist.playlist import Playlist, PlaylistItem
+from tests.player.test_daemon import make_player
+
+
+class MPDConnection:
+    """测试用的同步 MPD 客户端"""
+    
+    def __init__(self, port: int):
+        self.sock = socket.create_connection(("127.0.0.1", port), timeout=5)
+        self.reader = self.sock.makefile("r", encoding="utf-8")
+        self.greeting = self.reader.readline().rstrip("\n")
+    
+    def send(self, *lines: str) -> None:
+        self.sock.sendall("".join(line + "\n" for line in lines).encode("utf-8"))
+    
+    def response(self) -> list:
+        """读取到 OK 或 ACK 为止的响应行"""
+        lines = []
+        while True:
+            line = self.reader.readline().rstrip("\n")
+            lines.append(line)
+            if line == "OK" or line.startswith("ACK"):
+                return lines
+    
+    def command(self, line: str) -> dict:
+        self.send(line)
+        lines = self.response()
+        assert lines[-1] == "OK", lines
+        return dict(line.split(": ", 1) for line in lines[:-1])
+    
+    def close(self) -> None:
+        self.reader.close()
+        self.sock.close()
+
+
+class TestParseCommand:
+    """测试命令行解析"""
+    
+    def test_quoted(self):
+        """测试引号和转义"""
+        assert parse_command('find artist "周 杰伦" title "a \\"b\\""') == ["find", "artist", "周 杰伦", "title", 'a "b"']
+        assert parse_command("status") == ["status"]
+        with pytest.raises(MPDError):
+            parse_command('load "abc')
+
+
+class TestMPDServer:
+    """测试 MPD 协议服务"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.player = make_player()
+        self.items = [
+            PlaylistItem(fs_id=1, server_filename="a.mp3", path="/音乐/歌手/专辑/01 a.mp3", size=1024),
+            PlaylistItem(fs_id=2, server_filename="b.flac", path="/音乐/歌手/专辑/02 b.flac", size=2048),
+        ]
+        self.player.current_item = self.items[0]
+        self.player.current_playlist = Playlist("测试", items=self.items)
+    
+    @pytest.fixture
+    def mpd(self, tmp_path):
+        server = MPDServer("127.0.0.1", 0)
+        server._index = LibraryIndex(str(tmp_path / "library.db"))
+        server._index.upsert([
+            {"fs_id": item.fs_id, "server_filename": item.server_filename, "path": item.path,
+             "size": item.size, "isdir": 0, "category": 2}
+            for item in self.items
+        ])
+        daemon = PlayerDaemon(self.player, str(tmp_path / "p.sock"))
+        daemon.add_frontend(server)
+        daemon.start_in_thread()
+        connection = MPDConnection(server.port)
+        yield connection
+        connection.close()
+        daemon.stop()
+    
+    def test_status(self, mpd):
+        """测试状态和当前歌曲"""
+        assert mpd.greeting.startswith("OK MPD ")
+        
+        status = mpd.command("status")
+        assert status["state"] == "play"
+        assert (status["volume"], status["song"], status["playlistlength"]) == ("80", "0", "2")
+        assert status["elapsed"] == "1.000"
+        
+        song = mpd.command("currentsong")
+        assert song["file"] == "音乐/歌手/专辑/01 a.mp3"
+        assert song["Pos"] == "0"
+    
+    def test_playback(self, mpd):
+        """测试播放控制命令"""
+        self.player.play.return_value = True
+        mpd.command("play 1")
+        self.player.play.assert_called_once_with(1)
+        
+        mpd.command("pause 1")
+        assert self.player.is_paused
+        mpd.command("pause 1")
+        assert self.player.is_paused
+        
+        mpd.command("setvol 30")
+        self.player.set_volume.assert_called_once_with(30)
+        
+        mpd.command("random 1")
+        self.player.set_play_mode.assert_called_once()
+        
+        mpd.send("setvol abc")
+        assert mpd.response() == ["ACK [2@0] {setvol} Integer expected: abc"]
+        mpd.send("eject")
+        assert mpd.response()[-1].startswith("ACK [5@0] {eject}")
+    
+    def test_playlistinfo(self, mpd):
+        """测试播放队列"""
+        mpd.send("playlistinfo")
+        lines = mpd.response()
+        assert [line for line in lines if line.startswith("Pos: ")] == ["Pos: 0", "Pos: 1"]
+        assert "Title: b" in lines and "Track: 2" in lines
+        
+        assert mpd.command("playlistinfo 1")["file"] == "音乐/歌手/专辑/02 b.flac"
+        mpd.send("playlistinfo 5")
+        assert mpd.response()[-1].startswith("ACK [2@0]")
+    
+    def test_search(self, mpd):
+        """测试在曲库索引中查找"""
+        mpd.send('search title "B"')
+        assert [line for line in mpd.response() if line.startswith("file: ")] == ["file: 音乐/歌手/专辑/02 b.flac"]
+        
+        mpd.send('find artist "歌手" album "专辑"')
+        assert len([line for line in mpd.response() if line.startswith("file: ")]) == 2
+        mpd.send('find artist "歌"')
+        assert mpd.response() == ["OK"]
+        
+        mpd.send("search genre rock")
+        assert mpd.response()[-1].startswith("ACK [2@0] {search}")
+    
+    def test_command_list(self, mpd):
+        """测试命令列表，出错时停止执行"""
+        mpd.send("command_list_ok_begin", "ping", "status", "command_list_end")
+        lines = mpd.response()
+        assert lines.count("list_OK") == 2 and lines[-1] == "OK"
+        
+        mpd.send("command_list_begin", "ping", "eject", "ping", "command_list_end")
+        assert mpd.response()[-1].startswith("ACK [5@1] {eject}")
+    
+    def test_idle(self, mpd):
+        """测试 idle 由播放器事件唤醒，noidle 立即返回"""
+        mpd.send("idle player mixer")
+        self.player.on_pause_callback()
+        assert mpd.response() == ["changed: player", "OK"]
+        
+        mpd.send("idle")
+        mpd.send("noidle")
+        assert mpd.response() == ["OK"]
+        
+        # 未在 idle 时发生的变化在下次 idle 时立即返回
+        mpd.command("setvol 20")
+        mpd.send("idle mixer")
+        assert mpd.response() == ["changed: mixer", "OK"]
@@ -6,7 +6,10 @@
 """
 
 import os
+import sys
 import time
+import subprocess
+import threading
 import pytest
 from unittest.mock import patch, MagicMock, call
 
@@ -71,16 +74,26 @@ class TestAudioPlayer:
         self.mock_vlc_state = MagicMock()
         self.mock_vlc_state.Ended = 6
         
+        # VLC实例在首次使用时创建，模拟对象在整个测试期间有效
+        self.mock_vlc_instance.media_player_new.return_value = self.mock_vlc_player
+        self.mock_vlc_instance.media_new.return_value = self.mock_vlc_media
+        self.patchers = [
+            patch('dupan_music.player.player.vlc.Instance', return_value=self.mock_vlc_instance),
+            patch('dupan_music.player.player.vlc.State', self.mock_vlc_state),
+        ]
+        for patcher in self.patchers:
+            patcher.start()
+        
         # 创建播放器实例
-        with patch('dupan_music.player.player.vlc.Instance', return_value=self.mock_vlc_instance), \
-             patch('dupan_music.player.player.vlc.State', self.mock_vlc_state):
-            self.mock_vlc_instance.media_player_new.return_value = self.mock_vlc_player
-            self.mock_vlc_instance.media_new.return_value = self.mock_vlc_media
-            
-            self.player = AudioPlayer(
-                api=self.mock_api,
-                playlist_manager=self.mock_playlist_manager
-            )
+        self.player = AudioPlayer(
+            api=self.mock_api,
+            playlist_manager=self.mock_playlist_manager
+        )
+    
+    def teardown_method(self):
+        """测试后清理"""
+        for patcher in reversed(self.patchers):
+            patcher.stop()
     
     @patch('dupan_music.player.player.os.path.exists')
     @patch('dupan_music.player.player.os.remove')
@@ -253,9 +266,8 @@ class TestAudioPlayer:
         assert self.player.current_item is None
         assert self.player.current_index == -1
     
-    @patch('dupan_music.player.player.threading.Thread')
     @patch('dupan_music.player.player.os.path.exists')
-    def test_play_success(self, mock_exists, mock_thread):
+    def test_play_success(self, mock_exists):
         """测试播放（成功）"""
         # 设置模拟对象
         mock_exists.return_value = True
@@ -632,3 +644,163 @@ class TestAudioPlayer:
         mock_audio_segment.from_file.assert_called_once_with("/tmp/input.m4a")
         mock_audio.export.assert_called_once_with("/tmp/output.mp3", format="mp3")
         assert result == "/tmp/output.mp3"
+
+
+class TestAudioPlayerLazyPlaylist:
+    """测试播放器按需列出目录播放列表"""
+    
+    def test_next_lists_next_page(self):
+        """测试播放到已列出部分的末尾时才列出下一页"""
+        from dupan_music.playlist.folder import FolderItems, FolderPlaylist
+        
+        requested = []
+        
+        def pages():
+            for start in (0, 10):
+                requested.append(start)
+                yield [
+                    {'fs_id': start + i, 'server_filename': f"{start + i}.mp3",
+                     'path': f"/music/{start + i}.mp3", 'size': 1024, 'isdir': 0}
+                    for i in range(10)
+                ]
+        
+        playlist = FolderPlaylist("目录", "/music")
+        playlist.items = FolderItems(pages(), ['.mp3'])
+        
+        with patch('dupan_music.player.player.vlc.Instance'):
+            player = AudioPlayer()
+        player.set_playlist(playlist)
+        
+        with patch.object(player, 'play', return_value=True) as mock_play:
+            player.current_index = 0
+            assert player.next()
+            mock_play.assert_called_with(1)
+            assert requested == [0]
+            
+            player.current_index = 9
+            assert player.next()
+            mock_play.assert_called_with(10)
+            assert requested == [0, 10]
+
+
+class TestAudioPlayerLazyInit:
+    """测试VLC和音频模块按需初始化"""
+    
+    def test_no_audio_modules_on_import(self):
+        """测试导入播放器模块时不导入音频相关模块"""
+        code = (
+            "import sys, dupan_music.player.player\n"
+            "print(','.join(m for m in ('vlc', 'mutagen', 'pydub', 'soundfile') if m in sys.modules))\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
+        assert result.returncode == 0, result.stderr
+        assert result.stdout.strip() == ""
+    
+    def test_shared_instance(self):
+        """测试创建播放器不初始化VLC，VLC实例在进程内只创建一次"""
+        with patch('dupan_music.player.player.vlc.Instance') as mock_instance:
+            first = AudioPlayer()
+            second = AudioPlayer()
+            assert first.get_volume() == 100
+            assert first.is_muted() is False
+            mock_instance.assert_not_called()
+            
+            first.set_volume(30)
+            second.player
+            mock_instance.assert_called_once_with('--no-xlib')
+            assert mock_instance.return_value.media_player_new.call_count == 2
+
+
+class TestAudioPlayerCommands:
+    """测试播放控制命令在命令线程中串行执行"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.patcher = patch('dupan_music.player.player.vlc.Instance')
+        mock_instance = self.patcher.start()
+        self.mock_vlc_player = mock_instance.return_value.media_player_new.return_value
+        self.mock_vlc_player.play.return_value = 0
+        
+        self.player = AudioPlayer(api=MagicMock())
+        self.player.set_playlist(Playlist("测试", items=[
+            PlaylistItem(fs_id=i, server_filename=f"{i}.mp3", path=f"/music/{i}.mp3", size=1024)
+            for i in range(10)
+        ]))
+    
+    def teardown_method(self):
+        """测试后清理"""
+        self.patcher.stop()
+    
+    def test_collapse_and_cancel(self):
+        """测试连续的下一曲合并为一次，并取消正在进行的下载"""
+        downloads = []
+        started = threading.Event()
+        
+        def download(item):
+            downloads.append((item.fs_id, threading.current_thread()))
+            if len(downloads) == 1:
+                # 第一次下载持续到被新的命令取消
+                started.set()
+                deadline = time.monotonic() + 5
+                while not self.player._superseded() and time.monotonic() < deadline:
+                    time.sleep(0.01)
+                return None
+            return "/tmp/test.mp3"
+        
+        self.player.current_index = 0
+        with patch.object(self.player, '_download_file', side_effect=download):
+            first = self.player.submit('next')
+            assert started.wait(5)
+            presses = [self.player.submit('next') for _ in range(5)]
+            
+            assert first.result(5) is False
+            assert [future.result(5) for future in presses] == [True] * 5
+        
+        # 第一次下载从索引1开始，之后五次下一曲合并为一次
+        assert [fs_id for fs_id, _ in downloads] == [1, 6]
+        assert self.player.current_index == 6
+        assert self.player.is_playing and not self.player.is_busy
+        threads = {thread for _, thread in downloads}
+        assert len(threads) == 1 and threading.current_thread() not in threads
+    
+    def test_end_event(self):
+        """测试VLC播放结束事件在命令线程中自动播放下一曲"""
+        import vlc
+        
+        on_complete = MagicMock()
+        self.player.on_complete_callback = on_complete
+        with patch.object(self.player, '_download_file', return_value="/tmp/test.mp3"):
+            assert self.player.play(2)
+            
+            self.mock_vlc_player.get_state.return_value = vlc.State.Ended
+            self.player._on_end_reached(None)
+            # 命令按顺序执行，之后的命令返回时结束事件已处理
+            self.player.set_volume(50)
+        
+        on_complete.assert_called_once()
+        assert self.player.current_index == 3
+    
+    def test_cancelled_download_removes_temp_file(self, tmp_path):
+        """测试取消的下载删除不完整的临时文件"""
+        temp_file = str(tmp_path / "part.mp3")
+        open(temp_file, 'wb').close()
+        
+        def chunks(chunk_size):
+            yield b"a" * chunk_size
+            # 下载期间提交了新的切换歌曲命令
+            self.player._latest_switch_seq = self.player._running_seq + 1
+            yield b"b" * chunk_size
+        
+        session = MagicMock()
+        session.head.return_value = MagicMock(status_code=200, headers={})
+        session.get.return_value = MagicMock(status_code=200)
+        session.get.return_value.iter_content.side_effect = chunks
+        self.player.api.get_download_link.return_value = "https://example.com/test.mp3"
+        self.player.api.session.cookies = {}
+        
+        with patch('dupan_music.player.player.get_temp_file', return_value=temp_file), \
+             patch('requests.Session', return_value=session):
+            assert self.player._download_file(self.player.current_playlist.items[0]) is None
+        
+        assert not os.path.exists(temp_file)
@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试播放列表排序键
+"""
+
+import subprocess
+import sys
+
+import pytest
+from unittest.mock import patch
+
+from dupan_music.playlist.collation import (
+    NO_TRACK, CollationCache, CollationKeys, natural_key, parse_path_tags
+)
+from dupan_music.playlist.columnar import ColumnarPlaylist
+from dupan_music.playlist.playlist import Playlist, PlaylistItem
+
+
+def make_item(fs_id, path):
+    """创建测试用播放列表项"""
+    return PlaylistItem(fs_id=fs_id, server_filename=path.rsplit('/', 1)[-1], path=path, size=1024)
+
+
+class TestCollationKeys:
+    """测试排序键计算"""
+    
+    def test_natural_key(self):
+        """测试数字按数值比较"""
+        names = ["Track 10.mp3", "track 2.mp3", "Track 002b.mp3", "Track 1.mp3"]
+        assert sorted(names, key=natural_key) == ["Track 1.mp3", "track 2.mp3", "Track 002b.mp3", "Track 10.mp3"]
+    
+    @pytest.mark.parametrize("path, expected", [
+        ("/music/周杰伦/范特西/03 双截棍.mp3", ("周杰伦", "范特西", 3)),
+        ("/music/华语/陈奕迅 - 十年.flac", ("陈奕迅", "华语", None)),
+        ("/music/专辑/CD2-07. Song.mp3", ("music", "专辑", 7)),
+        ("/song.mp3", ("", "", None)),
+    ])
+    def test_parse_path_tags(self, path, expected):
+        """测试从路径获取歌手、专辑和音轨号"""
+        assert parse_path_tags(path) == expected
+    
+    def test_cache_persisted(self, tmp_path):
+        """测试排序键只计算一次并保存到磁盘"""
+        cache_file = str(tmp_path / "sort_keys.json")
+        paths = ["/a/b/2.mp3", "/a/b/10.mp3"]
+        
+        assert CollationCache(cache_file).sort_order(paths, ["2.mp3", "10.mp3"], 'natural', desc=True) == [1, 0]
+        
+        with patch.object(CollationKeys, 'compute', wraps=CollationKeys.compute) as mock_compute:
+            cache = CollationCache(cache_file)
+            keys = cache.keys_for(paths, ["2.mp3", "10.mp3"])
+            mock_compute.assert_not_called()
+        assert [key.track for key in keys] == [2, 10]
+    
+    def test_pypinyin_imported_lazily(self):
+        """测试导入排序模块时不导入 pypinyin"""
+        code = (
+            "import sys\n"
+            "import dupan_music.playlist.collation\n"
+            "print('pypinyin' in sys.modules)\n"
+        )
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert result.stdout.strip() == "False"
+
+
+class TestSortModes:
+    """测试播放列表排序方式"""
+    
+    ITEMS = [
+        ("/music/B/专辑2/02 b.mp3", 1),
+        ("/music/A/专辑1/10 c.mp3", 2),
+        ("/music/A/专辑1/2 a.mp3", 3),
+        ("/music/A/专辑1/untitled.mp3", 4),
+    ]
+    
+    @pytest.mark.parametrize("playlist_class", [Playlist, ColumnarPlaylist])
+    @pytest.mark.parametrize("key, expected", [
+        ('natural', [3, 1, 2, 4]),
+        ('artist', [3, 2, 4, 1]),
+        ('track', [3, 1, 2, 4]),
+    ])
+    def test_sort_by(self, tmp_path, playlist_class, key, expected):
+        """测试使用排序键排序"""
+        playlist = playlist_class("测试", items=[make_item(fs_id, path) for path, fs_id in self.ITEMS])
+        cache = CollationCache(str(tmp_path / "sort_keys.json"))
+        
+        with patch('dupan_music.playlist.playlist.get_collation_cache', return_value=cache), \
+             patch('dupan_music.playlist.columnar.get_collation_cache', return_value=cache):
+            playlist.sort_by(key)
+            assert [item.fs_id for item in playlist.items] == expected
+            
+            playlist.sort_by(key, desc=True)
+            assert [item.fs_id for item in playlist.items] == expected[::-1]
+        
+        assert cache.keys_for(["/music/A/专辑1/untitled.mp3"], ["untitled.mp3"])[0].track == NO_TRACK
@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试列式播放列表
+"""
+
+import pytest
+from unittest.mock import patch
+
+from dupan_music.playlist.playlist import Playlist, PlaylistItem, playlist_from_dict
+from dupan_music.playlist.columnar import ColumnarItems, ColumnarPlaylist
+
+
+def make_item(fs_id, directory="/music"):
+    """创建测试用播放列表项"""
+    return PlaylistItem(
+        fs_id=fs_id,
+        server_filename=f"song{fs_id}.mp3",
+        path=f"{directory}/song{fs_id}.mp3",
+        size=1024 * fs_id,
+        category=2,
+        server_mtime=1000 - fs_id,
+        md5=f"{fs_id:032x}",
+        add_time=1600000000 + fs_id
+    )
+
+
+class TestColumnarItems:
+    """测试列式存储的播放列表项序列"""
+    
+    def test_round_trip(self):
+        """测试存取后字段不变"""
+        items = [make_item(1), make_item(2, "/其他"), PlaylistItem(3, "a.mp3", "/x/b.mp3", 5, md5="ABC")]
+        columnar = ColumnarItems(items)
+        
+        assert len(columnar) == 3
+        for original, restored in zip(items, columnar):
+            assert restored.to_dict() == original.to_dict()
+    
+    def test_list_operations(self):
+        """测试与列表一致的操作"""
+        columnar = ColumnarItems([make_item(1), make_item(2), make_item(3)])
+        
+        columnar.insert(0, make_item(9))
+        assert [item.fs_id for item in columnar] == [9, 1, 2, 3]
+        
+        columnar[1] = make_item(8)
+        del columnar[-1]
+        assert [item.fs_id for item in columnar] == [9, 8, 2]
+        assert columnar[-1].path == "/music/song2.mp3"
+        
+        sliced = columnar[:2]
+        assert isinstance(sliced, ColumnarItems)
+        assert [item.fs_id for item in sliced] == [9, 8]
+        
+        columnar.sort(key=lambda item: item.fs_id)
+        assert [item.fs_id for item in columnar] == [2, 8, 9]
+        
+        with pytest.raises(IndexError):
+            columnar[3]
+    
+    def test_from_dicts(self):
+        """测试从字典按列创建"""
+        dicts = [make_item(fs_id).to_dict() for fs_id in range(1, 4)]
+        columnar = ColumnarItems.from_dicts(dicts)
+        
+        assert [item.to_dict() for item in columnar] == dicts
+        assert list(columnar.column('size')) == [1024, 2048, 3072]
+
+
+class TestColumnarPlaylist:
+    """测试列式播放列表"""
+    
+    def test_playlist_api(self):
+        """测试与 Playlist 一致的接口"""
+        playlist = ColumnarPlaylist("测试", items=[make_item(1), make_item(2)])
+        assert isinstance(playlist.items, ColumnarItems)
+        
+        assert playlist.add_item(make_item(3)) is True
+        assert playlist.add_item(make_item(3)) is False
+        assert playlist.add_items([make_item(3), make_item(4)]) == 1
+        assert playlist.remove_items([1, 99]) == 1
+        assert playlist.remove_item(2) is True
+        assert [item.fs_id for item in playlist.items] == [3, 4]
+        assert playlist.total_size == 1024 * 7
+        
+        playlist.clear()
+        assert len(playlist.items) == 0
+    
+    def test_sort_by(self):
+        """测试按列排序"""
+        items = [make_item(fs_id) for fs_id in (2, 10, 1)]
+        playlist = ColumnarPlaylist("测试", items=items)
+        
+        playlist.sort_by('size')
+        assert [item.fs_id for item in playlist.items] == [1, 2, 10]
+        
+        playlist.sort_by('time')
+        assert [item.fs_id for item in playlist.items] == [10, 2, 1]
+        
+        playlist.sort_by('name', desc=True)
+        assert [item.fs_id for item in playlist.items] == [2, 10, 1]
+    
+    def test_stats(self):
+        """测试统计与 Playlist 一致"""
+        items = [make_item(fs_id) for fs_id in range(1, 6)]
+        
+        assert ColumnarPlaylist("测试", items=items).stats() == Playlist("测试", items=items).stats()
+    
+    def test_to_dict_from_dict(self):
+        """测试序列化与 Playlist 一致"""
+        playlist = Playlist("测试", "描述", items=[make_item(fs_id) for fs_id in range(1, 4)])
+        data = playlist.to_dict()
+        
+        columnar = ColumnarPlaylist.from_dict(data)
+        assert columnar.to_dict() == data
+    
+    @patch('dupan_music.playlist.playlist.CONFIG.get')
+    def test_playlist_from_dict_threshold(self, mock_config_get):
+        """测试达到阈值时使用列式存储"""
+        mock_config_get.return_value = 3
+        data = Playlist("测试", items=[make_item(fs_id) for fs_id in range(1, 4)]).to_dict()
+        
+        assert isinstance(playlist_from_dict(data), ColumnarPlaylist)
+        
+        data['items'].pop()
+        assert not isinstance(playlist_from_dict(data), ColumnarPlaylist)
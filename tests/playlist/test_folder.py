@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试目录播放列表
+"""
+
+from unittest.mock import MagicMock, patch
+
+from dupan_music.playlist.playlist import PlaylistManager
+from dupan_music.playlist.folder import FolderItems, FolderPlaylist, loaded_length, peek_length
+
+
+def make_page(start, count, path="/music"):
+    """创建一页测试用文件信息，每页包含一个子目录和一个非音频文件"""
+    files = [
+        {
+            'fs_id': start + i,
+            'server_filename': f"{start + i}.mp3",
+            'path': f"{path}/{start + i}.mp3",
+            'size': 1024,
+            'isdir': 0
+        }
+        for i in range(count)
+    ]
+    files.append({'fs_id': -start - 1, 'server_filename': "sub", 'path': f"{path}/sub", 'isdir': 1})
+    files.append({'fs_id': -start - 2, 'server_filename': "cover.jpg", 'path': f"{path}/cover.jpg", 'isdir': 0})
+    return files
+
+
+class TestFolderItems:
+    """测试按需列出的播放列表项"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.requested = []
+        self.on_complete = MagicMock()
+        
+        def pages():
+            for start in (0, 10, 20):
+                self.requested.append(start)
+                yield make_page(start, 10)
+        
+        self.items = FolderItems(pages(), ['.mp3'], self.on_complete)
+    
+    def test_pages_on_demand(self):
+        """测试只列出到访问的位置"""
+        assert self.items
+        assert self.requested == [0]
+        
+        assert self.items[12].fs_id == 12
+        assert self.requested == [0, 10]
+        assert self.items.peek_length(5) == 20
+        self.on_complete.assert_not_called()
+    
+    def test_full_listing(self):
+        """测试 len() 列出全部文件并过滤非音频文件"""
+        assert len(self.items) == 30
+        assert self.items.exhausted
+        assert [item.fs_id for item in self.items][-1] == 29
+        self.on_complete.assert_called_once_with(30, 30 * 1024)
+    
+    def test_peek_more(self):
+        """测试不指定位置时多列出一页"""
+        assert self.items.peek_length() == 10
+        assert self.items.peek_length() == 20
+        assert self.requested == [0, 10]
+    
+    def test_length_helpers(self):
+        """测试长度辅助函数不列出全部文件，普通列表直接返回长度"""
+        assert loaded_length(self.items) == 0
+        assert peek_length(self.items, 3) == 10
+        assert loaded_length(self.items) == 10
+        assert self.requested == [0]
+        assert peek_length([1, 2, 3]) == loaded_length([1, 2, 3]) == 3
+
+
+class TestManagerFolderPlaylists:
+    """测试播放列表管理器中的目录播放列表"""
+    
+    @patch('dupan_music.playlist.playlist.Path.home')
+    def test_manager(self, mock_home, tmp_path):
+        """测试创建、获取和删除目录播放列表"""
+        mock_home.return_value = str(tmp_path)
+        api = MagicMock()
+        api.iter_file_list.return_value = iter([make_page(0, 3)])
+        manager = PlaylistManager(api)
+        
+        try:
+            assert manager.create_folder_playlist("目录", "/music", recursive=True)
+            assert manager.create_folder_playlist("目录", "/other") is None
+            assert manager.create_playlist("目录") is None
+            
+            playlist = manager.get_playlist("目录")
+            assert isinstance(playlist, FolderPlaylist)
+            api.iter_file_list.assert_not_called()
+            
+            assert [item.fs_id for item in playlist.items] == [0, 1, 2]
+            api.iter_file_list.assert_called_once_with("/music", recursive=True)
+            assert manager.save_playlist(playlist) is False
+            
+            # 完整列出后摘要记录歌曲数
+            summaries = {summary.name: summary for summary in manager.get_playlist_summaries()}
+            assert summaries["目录"].item_count == 3
+            
+            assert manager.delete_playlist("目录")
+            assert manager.get_playlist("目录") is None
+        finally:
+            manager.history.close()
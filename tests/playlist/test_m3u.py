@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试M3U/PLS导入导出
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from dupan_music.library.index import LibraryIndex
+from dupan_music.playlist.playlist import Playlist, PlaylistItem, PlaylistManager
+from dupan_music.playlist.m3u import (
+    PlaylistImporter, detect_format, export_file, iter_m3u, iter_pls, read_entries, to_remote_path
+)
+
+
+def make_file_info(fs_id, path):
+    """创建测试用文件信息"""
+    return {'fs_id': fs_id, 'server_filename': path.rsplit('/', 1)[-1], 'path': path, 'size': 1024, 'isdir': 0}
+
+
+class TestParse:
+    """测试解析"""
+    
+    def test_m3u(self):
+        """测试解析M3U扩展信息和注释"""
+        lines = ["#EXTM3U", "#EXTINF:215,歌手 - 歌曲", "/music/a.mp3", "", "# 注释", "b.flac"]
+        entries = list(iter_m3u(lines))
+        
+        assert [entry.location for entry in entries] == ["/music/a.mp3", "b.flac"]
+        assert (entries[0].title, entries[0].duration) == ("歌手 - 歌曲", 215)
+        assert (entries[1].title, entries[1].duration) == ("", -1)
+    
+    def test_pls(self):
+        """测试解析PLS，标题可以出现在路径之前"""
+        lines = [
+            "[playlist]", "File1=/music/a.mp3", "Title1=A", "Length1=100",
+            "Title2=B", "File2=/music/b.mp3", "NumberOfEntries=2", "Version=2"
+        ]
+        entries = list(iter_pls(lines))
+        
+        assert [(entry.location, entry.title) for entry in entries] == [("/music/a.mp3", "A"), ("/music/b.mp3", "B")]
+        assert entries[0].duration == 100
+    
+    @pytest.mark.parametrize("location, expected", [
+        ("/music/a.mp3", "/music/a.mp3"),
+        ("sub/../a.mp3", "/base/a.mp3"),
+        ("D:\\Music\\华语\\a.mp3", "/base/华语/a.mp3"),
+        ("file:///home/me/Music/a%20b.mp3", "/base/a b.mp3"),
+        ("http://example.com/a.mp3", None),
+    ])
+    def test_to_remote_path(self, location, expected):
+        """测试转换为网盘路径"""
+        prefix = "D:\\Music" if location.startswith("D:") else "/home/me/Music"
+        assert to_remote_path(location, "/base", prefix) == expected
+    
+    def test_detect_format(self):
+        """测试按扩展名判断格式"""
+        assert detect_format("a.M3U8") == "m3u"
+        assert detect_format("a.pls") == "pls"
+        assert detect_format("a.json") == "json"
+
+
+class TestImportExport:
+    """测试导入导出"""
+    
+    @patch('dupan_music.playlist.playlist.Path.home')
+    def test_import(self, mock_home, tmp_path):
+        """测试先按索引查找，找不到的每个目录只列出一次"""
+        mock_home.return_value = str(tmp_path)
+        api = MagicMock()
+        api.iter_file_list.side_effect = lambda dir_path: iter([[
+            make_file_info(10 + i, f"{dir_path}/{i}.mp3") for i in range(3)
+        ]])
+        manager = PlaylistManager(api)
+        index = LibraryIndex(str(tmp_path / "library.db"))
+        index.upsert([make_file_info(1, "/indexed/a.mp3")])
+        
+        m3u_file = tmp_path / "收藏.m3u8"
+        m3u_file.write_text("\ufeff#EXTM3U\n/indexed/a.mp3\n/new/0.mp3\n/new/2.mp3\n/new/missing.mp3\n"
+                            "/indexed/a.mp3\nhttp://example.com/x.mp3\n", encoding="utf-8")
+        
+        try:
+            result = PlaylistImporter(manager, index).import_file(str(m3u_file))
+            
+            assert result.playlist.name == "收藏"
+            assert [item.fs_id for item in result.playlist.items] == [1, 10, 12]
+            assert result.total == 6
+            assert result.unresolved == ["/new/missing.mp3", "http://example.com/x.mp3"]
+            api.iter_file_list.assert_called_once_with("/new")
+            
+            # 列出的目录写入索引
+            assert index.find_by_path("/new/1.mp3")['fs_id'] == 11
+            
+            # 同名播放列表需要覆盖
+            assert PlaylistImporter(manager, index).import_file(str(m3u_file)).playlist is None
+        finally:
+            index.close()
+            manager.history.close()
+    
+    @pytest.mark.parametrize("file_name", ["out.m3u", "out.pls"])
+    def test_export_round_trip(self, tmp_path, file_name):
+        """测试导出后能重新解析"""
+        playlist = Playlist("测试", items=[
+            PlaylistItem.from_api_result(make_file_info(1, "/music/a.mp3")),
+            PlaylistItem.from_api_result(make_file_info(2, "/music/华语/b.flac"))
+        ])
+        file_path = str(tmp_path / file_name)
+        
+        assert export_file(playlist, file_path) == 2
+        entries = list(read_entries(file_path))
+        assert [entry.location for entry in entries] == ["/music/a.mp3", "/music/华语/b.flac"]
+        assert entries[1].title == "b"
+        
+        export_file(playlist, file_path, local_root=str(tmp_path / "local"))
+        assert list(read_entries(file_path))[0].location == str(tmp_path / "local" / "music" / "a.mp3")
@@ -183,6 +183,23 @@ class TestPlaylist:
         assert result is False
         assert len(playlist.items) == 1
 
+    def test_add_items(self):
+        """测试批量添加播放列表项"""
+        # 创建播放列表
+        playlist = Playlist(name="测试播放列表")
+        playlist.add_item(PlaylistItem(fs_id=1, server_filename="1.mp3", path="/1.mp3", size=1))
+        
+        # 批量添加，包含已存在项和批次内重复项
+        items = [
+            PlaylistItem(fs_id=fs_id, server_filename=f"{fs_id}.mp3", path=f"/{fs_id}.mp3", size=1)
+            for fs_id in [1, 2, 3, 2]
+        ]
+        result = playlist.add_items(items)
+        
+        # 验证结果
+        assert result == 2
+        assert [item.fs_id for item in playlist.items] == [1, 2, 3]
+
     def test_remove_item(self):
         """测试移除播放列表项"""
         # 创建播放列表
@@ -221,6 +238,22 @@ class TestPlaylist:
         assert result is False
         assert len(playlist.items) == 1
 
+    def test_remove_items(self):
+        """测试批量移除播放列表项"""
+        # 创建播放列表
+        items = [
+            PlaylistItem(fs_id=fs_id, server_filename=f"{fs_id}.mp3", path=f"/{fs_id}.mp3", size=1)
+            for fs_id in [1, 2, 3, 4]
+        ]
+        playlist = Playlist(name="测试播放列表", items=items)
+        
+        # 批量移除
+        result = playlist.remove_items([2, 4, 5])
+        
+        # 验证结果
+        assert result == 2
+        assert [item.fs_id for item in playlist.items] == [1, 3]
+
     def test_clear(self):
         """测试清空播放列表"""
         # 创建播放列表
@@ -615,3 +648,32 @@ class TestPlaylistManager:
         mock_read_file.assert_called_once_with(
             os.path.join("/mock/home/.dupan_music/playlists", "recent.json")
         )
+
+    @patch('dupan_music.playlist.playlist.Path.home')
+    def test_add_many_remove_many(self, mock_home, tmp_path):
+        """测试批量添加和移除（只保存一次）"""
+        # 设置模拟对象
+        mock_home.return_value = str(tmp_path)
+        
+        # 创建播放列表管理器
+        manager = PlaylistManager()
+        manager.create_playlist("测试")
+        
+        file_infos = [
+            {"fs_id": fs_id, "server_filename": f"{fs_id}.mp3", "path": f"/{fs_id}.mp3", "size": 1}
+            for fs_id in range(1, 5001)
+        ]
+        
+        # 批量添加
+        with patch.object(manager.store, 'save', wraps=manager.store.save) as mock_save:
+            assert manager.add_many("测试", file_infos) == 5000
+            assert manager.add_many("测试", file_infos[:10]) == 0
+            mock_save.assert_called_once()
+        
+        # 批量移除
+        assert manager.remove_many("测试", [1, 2, 3, 99999]) == 3
+        assert len(manager.get_playlist("测试").items) == 4997
+        
+        # 播放列表不存在
+        assert manager.add_many("不存在", file_infos) == 0
+        assert manager.remove_many("不存在", [1]) == 0
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试播放列表集合运算
+"""
+
+import pytest
+from click.testing import CliRunner
+from unittest.mock import MagicMock, patch
+
+from dupan_music.playlist import setops
+from dupan_music.playlist.cli import playlist as playlist_cli
+from dupan_music.playlist.columnar import ColumnarItems
+from dupan_music.playlist.playlist import Playlist, PlaylistItem
+
+
+def make_item(fs_id, md5=""):
+    """创建测试用播放列表项"""
+    return PlaylistItem(fs_id=fs_id, server_filename=f"{fs_id}.mp3", path=f"/music/{fs_id}.mp3",
+                        size=1024, md5=md5)
+
+
+def fs_ids(items):
+    """获取文件ID列表"""
+    return [item.fs_id for item in items]
+
+
+class TestSetOperations:
+    """测试集合运算"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        # 3 与 30 内容相同（MD5相同），2 在 A 中重复出现
+        self.a = [make_item(1, "m1"), make_item(2), make_item(3, "m3"), make_item(2)]
+        self.b = [make_item(30, "m3"), make_item(4, "m4"), make_item(1)]
+    
+    @pytest.mark.parametrize("columnar", [False, True])
+    def test_operations(self, columnar):
+        """测试并集、交集和差集，按文件ID和MD5去重"""
+        a = ColumnarItems(self.a) if columnar else self.a
+        b = ColumnarItems(self.b) if columnar else self.b
+        
+        assert fs_ids(setops.union(a, b)) == [1, 2, 3, 4]
+        assert fs_ids(setops.intersect(a, b)) == [1, 3]
+        assert fs_ids(setops.subtract(a, b)) == [2]
+    
+    def test_diff(self):
+        """测试对比"""
+        only_a, only_b, common = setops.diff(self.a, self.b)
+        
+        assert fs_ids(only_a) == [2]
+        assert fs_ids(only_b) == [4]
+        assert common == 2
+    
+    def test_empty_md5_not_matched(self):
+        """测试空MD5不视为相同"""
+        assert fs_ids(setops.intersect([make_item(1)], [make_item(2)])) == []
+
+
+class TestSaveResult:
+    """测试保存运算结果"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.manager = MagicMock()
+        self.manager.save_playlist.return_value = True
+    
+    def test_replace_existing(self):
+        """测试替换已有播放列表的歌曲，只保存一次"""
+        playlist = Playlist("A", items=[make_item(1)])
+        self.manager.get_playlist.return_value = playlist
+        
+        assert setops.save_result(self.manager, "A", [make_item(2), make_item(3)]) is playlist
+        assert fs_ids(playlist.items) == [2, 3]
+        self.manager.save_playlist.assert_called_once_with(playlist)
+    
+    def test_read_only(self):
+        """测试不修改只读播放列表和被占用的名称"""
+        playlist = MagicMock(read_only=True)
+        self.manager.get_playlist.return_value = playlist
+        assert setops.save_result(self.manager, "智能", [make_item(1)]) is None
+        
+        self.manager.get_playlist.return_value = None
+        self.manager.playlist_exists.return_value = True
+        assert setops.save_result(self.manager, "文件夹", [make_item(1)]) is None
+        self.manager.save_playlist.assert_not_called()
+
+
+class TestSetOperationCommands:
+    """测试集合运算命令"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.runner = CliRunner()
+        self.manager = MagicMock()
+        playlists = {"A": Playlist("A", items=[make_item(1)]), "B": Playlist("B", items=[make_item(2)])}
+        self.manager.get_playlist.side_effect = playlists.get
+    
+    @patch('dupan_music.playlist.cli.setops.save_result')
+    @patch('dupan_music.playlist.cli.get_playlist_manager')
+    def test_replace_a_requires_confirmation(self, mock_get_manager, mock_save):
+        """测试未指定输出时替换A前需要确认"""
+        mock_get_manager.return_value = self.manager
+        
+        result = self.runner.invoke(playlist_cli, ['union', 'A', 'B'], input="n\n")
+        assert result.exit_code == 0
+        mock_save.assert_not_called()
+        
+        self.runner.invoke(playlist_cli, ['union', 'A', 'B'], input="y\n")
+        assert mock_save.call_args[0][1] == "A"
+        
+        mock_save.reset_mock()
+        self.runner.invoke(playlist_cli, ['subtract', 'A', 'B', '--force'])
+        self.runner.invoke(playlist_cli, ['intersect', 'A', 'B', '-o', 'C'])
+        assert [call[0][1] for call in mock_save.call_args_list] == ["A", "C"]
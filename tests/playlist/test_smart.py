@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试智能播放列表
+"""
+
+import pytest
+from unittest.mock import MagicMock, patch
+
+from dupan_music.library.index import LibraryIndex
+from dupan_music.playlist.playlist import PlaylistManager
+from dupan_music.playlist.smart import SmartQuery, SmartPlaylist, SmartPlaylists
+
+
+def make_file_info(fs_id, path, size=1024, server_mtime=0):
+    """创建测试用文件信息"""
+    return {
+        'fs_id': fs_id,
+        'server_filename': path.rsplit('/', 1)[-1],
+        'path': path,
+        'size': size,
+        'isdir': 0,
+        'server_mtime': server_mtime
+    }
+
+
+FILES = [
+    make_file_info(1, "/music/a.flac", size=30 * 1024 * 1024, server_mtime=100),
+    make_file_info(2, "/music/b.mp3", size=5 * 1024 * 1024, server_mtime=200),
+    make_file_info(3, "/music/live/c.FLAC", size=50 * 1024 * 1024, server_mtime=300),
+    make_file_info(4, "/music2/d.flac", size=40 * 1024 * 1024, server_mtime=400),
+    make_file_info(5, "/other/Music_e.flac", size=1024, server_mtime=500),
+]
+
+
+class TestSmartQuery:
+    """测试查询条件"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.index = None
+    
+    def teardown_method(self):
+        """测试后清理"""
+        if self.index:
+            self.index.close()
+    
+    @pytest.mark.parametrize("query, expected", [
+        (SmartQuery(path_prefix="/music"), [1, 2, 3]),
+        (SmartQuery(extensions=["FLAC"]), [1, 3, 4, 5]),
+        (SmartQuery(extensions=["flac"], min_size=35 * 1024 * 1024), [3, 4]),
+        (SmartQuery(modified_after=200, modified_before=400), [2, 3]),
+        (SmartQuery(text="music_"), [5]),
+        (SmartQuery(path_prefix="/music/", extensions=[".flac"], max_size=40 * 1024 * 1024), [1]),
+    ])
+    def test_sql_and_python_agree(self, tmp_path, query, expected):
+        """测试SQL条件与逐条判断的结果一致"""
+        self.index = LibraryIndex(str(tmp_path / "library.db"))
+        self.index.upsert(FILES)
+        
+        where, params = query.to_sql()
+        by_sql = sorted(f['fs_id'] for f in self.index.select(where, params))
+        by_python = sorted(f['fs_id'] for f in self.index.select() if query.matches(f))
+        
+        assert by_sql == expected
+        assert by_python == expected
+    
+    def test_text_case_ascii_only(self, tmp_path):
+        """测试文本条件只忽略ASCII字母的大小写，SQL与逐条判断一致"""
+        self.index = LibraryIndex(str(tmp_path / "library.db"))
+        self.index.upsert([make_file_info(1, "/music/Café.mp3"), make_file_info(2, "/music/CAFÉ.mp3")])
+        
+        for text, expected in (("café", [1]), ("CAFÉ", [2]), ("caf", [1, 2])):
+            query = SmartQuery(text=text)
+            where, params = query.to_sql()
+            assert sorted(f['fs_id'] for f in self.index.select(where, params)) == expected
+            assert sorted(f['fs_id'] for f in self.index.select() if query.matches(f)) == expected
+    
+    def test_round_trip(self):
+        """测试转换为字典"""
+        query = SmartQuery(path_prefix="/music/", extensions=["flac"], min_plays=2)
+        assert query.to_dict() == {'path_prefix': "/music/", 'extensions': [".flac"], 'min_plays': 2}
+        assert SmartQuery.from_dict(query.to_dict()) == query
+        assert query.uses_plays
+
+
+class TestSmartPlaylists:
+    """测试智能播放列表的计算和缓存"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.index = None
+    
+    def teardown_method(self):
+        """测试后清理"""
+        if self.index:
+            self.index.close()
+    
+    def create(self, tmp_path, query, stats=None):
+        """创建曲库索引和智能播放列表"""
+        self.index = LibraryIndex(str(tmp_path / "library.db"))
+        self.index.upsert(FILES)
+        smart = SmartPlaylists(str(tmp_path / "smart"), stats=stats, index=self.index)
+        assert smart.save(SmartPlaylist("无损", query))
+        return smart
+    
+    def test_lazy_load(self, tmp_path):
+        """测试歌曲在首次访问时才计算和读取，之前的摘要来自上次计算的结果"""
+        smart = self.create(tmp_path, SmartQuery(extensions=["flac"]))
+        self.index.upsert([make_file_info(6, "/music/new.mp3")])
+        
+        with patch.object(self.index, 'get_many', wraps=self.index.get_many) as mock_get_many, \
+             patch.object(self.index, 'current_seq', wraps=self.index.current_seq) as mock_seq:
+            playlist = smart.load("无损")
+            assert playlist.item_count == 4
+            assert playlist.read_only
+            assert smart.list_summaries()[0].item_count == 4
+            mock_get_many.assert_not_called()
+            mock_seq.assert_not_called()
+            
+            assert [item.path for item in playlist.items] == [
+                "/music/a.flac", "/music/live/c.FLAC", "/music2/d.flac", "/other/Music_e.flac"
+            ]
+    
+    def test_incremental(self, tmp_path):
+        """测试索引变化后只重新判断变化的文件"""
+        smart = self.create(tmp_path, SmartQuery(path_prefix="/music", extensions=["flac"]))
+        assert smart.load("无损").item_count == 2
+        
+        self.index.upsert([
+            make_file_info(6, "/music/new.flac"),
+            make_file_info(1, "/music/a.mp3")
+        ])
+        self.index.remove([3])
+        
+        with patch.object(self.index, 'select', wraps=self.index.select) as mock_select:
+            playlist = smart.load("无损")
+            mock_select.assert_not_called()
+        
+        assert [item.fs_id for item in playlist.items] == [6]
+    
+    def test_play_counts(self, tmp_path):
+        """测试播放次数条件"""
+        stats = MagicMock()
+        stats.totals.return_value = {'plays': 3}
+        stats.play_counts.return_value = {1: 3, 4: 1}
+        smart = self.create(tmp_path, SmartQuery(extensions=["flac"], min_plays=1), stats=stats)
+        
+        assert sorted(item.fs_id for item in smart.load("无损").items) == [1, 4]
+        
+        # 播放次数变化后重新计算
+        stats.totals.return_value = {'plays': 4}
+        stats.play_counts.return_value = {1: 3, 4: 1, 5: 1}
+        assert sorted(item.fs_id for item in smart.load("无损").items) == [1, 4, 5]
+
+
+class TestManagerSmartPlaylists:
+    """测试播放列表管理器中的智能播放列表"""
+    
+    @patch('dupan_music.playlist.playlist.Path.home')
+    def test_manager(self, mock_home, tmp_path):
+        """测试通过管理器获取、列出和删除智能播放列表"""
+        mock_home.return_value = str(tmp_path)
+        manager = PlaylistManager()
+        index = LibraryIndex(str(tmp_path / "library.db"))
+        manager.smart_playlists._index = index
+        
+        try:
+            index.upsert(FILES)
+            assert manager.create_smart_playlist("无损", SmartQuery(extensions=["flac"]))
+            assert manager.create_smart_playlist("无损", SmartQuery()) is None
+            
+            playlist = manager.get_playlist("无损")
+            assert isinstance(playlist, SmartPlaylist)
+            assert len(playlist.items) == 4
+            
+            # 智能播放列表不能直接保存
+            assert manager.save_playlist(playlist) is False
+            
+            summaries = {summary.name: summary for summary in manager.get_playlist_summaries()}
+            assert summaries["无损"].item_count == 4
+            assert PlaylistManager.RECENT_PLAYLIST_NAME in summaries
+            
+            assert manager.delete_playlist("无损")
+            assert manager.get_playlist("无损") is None
+        finally:
+            index.close()
+            manager.history.close()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+SQLite播放列表存储测试
+"""
+
+import os
+import threading
+import json
+import sqlite3
+import pytest
+from unittest.mock import patch
+
+from dupan_music.playlist.playlist import Playlist, PlaylistItem, PlaylistManager, PlaylistStore, JsonPlaylistStore
+from dupan_music.playlist.sqlite_store import SqlitePlaylistStore
+from dupan_music.utils import file_utils
+
+
+def make_item(fs_id):
+    """创建测试用播放列表项"""
+    return PlaylistItem(
+        fs_id=fs_id,
+        server_filename=f"song{fs_id}.mp3",
+        path=f"/music/song{fs_id}.mp3",
+        size=1024 * fs_id,
+        md5=f"md5_{fs_id}"
+    )
+
+
+class TestSqlitePlaylistStore:
+    """测试SQLite存储后端"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.store = None
+    
+    def teardown_method(self):
+        """测试后清理"""
+        if self.store:
+            self.store.close()
+    
+    def test_save_and_load(self, tmp_path):
+        """测试保存和读取"""
+        self.store = SqlitePlaylistStore(str(tmp_path / "playlists.db"))
+        playlist = Playlist(name="测试", description="描述", items=[make_item(2), make_item(1)])
+        
+        assert self.store.save(playlist) is True
+        assert self.store.exists("测试") is True
+        
+        loaded = self.store.load("测试")
+        assert loaded.name == "测试"
+        assert loaded.description == "描述"
+        assert [item.fs_id for item in loaded.items] == [2, 1]
+        assert loaded.items[0].md5 == "md5_2"
+        assert self.store.load("不存在") is None
+    
+    def test_wal_mode(self, tmp_path):
+        """测试WAL模式"""
+        self.store = SqlitePlaylistStore(str(tmp_path / "playlists.db"))
+        mode = self.store._conn.execute("PRAGMA journal_mode").fetchone()[0]
+        assert mode.lower() == "wal"
+    
+    def test_add_items(self, tmp_path):
+        """测试批量添加（去重并保持顺序）"""
+        self.store = SqlitePlaylistStore(str(tmp_path / "playlists.db"))
+        self.store.save(Playlist(name="测试", items=[make_item(1)]))
+        
+        added = self.store.add_items("测试", [make_item(1), make_item(3), make_item(2)])
+        
+        assert added == 2
+        assert [item.fs_id for item in self.store.load("测试").items] == [1, 3, 2]
+    
+    def test_add_many_items(self, tmp_path):
+        """测试大量添加"""
+        self.store = SqlitePlaylistStore(str(tmp_path / "playlists.db"))
+        self.store.save(Playlist(name="测试"))
+        
+        added = self.store.add_items("测试", [make_item(i) for i in range(1, 10001)])
+        
+        assert added == 10000
+        assert len(self.store.load("测试").items) == 10000
+    
+    def test_remove_items(self, tmp_path):
+        """测试批量移除"""
+        self.store = SqlitePlaylistStore(str(tmp_path / "playlists.db"))
+        self.store.save(Playlist(name="测试", items=[make_item(i) for i in range(1, 6)]))
+        
+        removed = self.store.remove_items("测试", [2, 4, 99])
+        
+        assert removed == 2
+        assert [item.fs_id for item in self.store.load("测试").items] == [1, 3, 5]
+    
+    def test_delete(self, tmp_path):
+        """测试删除播放列表"""
+        self.store = SqlitePlaylistStore(str(tmp_path / "playlists.db"))
+        self.store.save(Playlist(name="测试", items=[make_item(1)]))
+        
+        assert self.store.delete("测试") is True
+        assert self.store.exists("测试") is False
+        assert self.store.delete("测试") is False
+        
+        # 播放列表项随播放列表一起删除
+        count = self.store._conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        assert count == 0
+    
+    def test_list_summaries(self, tmp_path):
+        """测试播放列表摘要随增删更新"""
+        self.store = SqlitePlaylistStore(str(tmp_path / "playlists.db"))
+        self.store.save(Playlist("测试", "描述", items=[make_item(1), make_item(2)]))
+        self.store.add_items("测试", [make_item(3)])
+        self.store.remove_items("测试", [1])
+        
+        summaries = self.store.list_summaries()
+        assert len(summaries) == 1
+        assert summaries[0].name == "测试"
+        assert summaries[0].description == "描述"
+        assert summaries[0].item_count == 2
+        assert summaries[0].total_size == 1024 * 5
+    
+    def test_schema_upgrade(self, tmp_path):
+        """测试旧版本数据库增加摘要字段"""
+        db_path = str(tmp_path / "playlists.db")
+        conn = sqlite3.connect(db_path)
+        conn.executescript("""
+            CREATE TABLE playlists (name TEXT PRIMARY KEY, description TEXT NOT NULL DEFAULT '',
+                                    create_time INTEGER NOT NULL, update_time INTEGER NOT NULL);
+            CREATE TABLE items (playlist TEXT NOT NULL, position INTEGER NOT NULL, fs_id INTEGER NOT NULL,
+                                server_filename TEXT, path TEXT, size INTEGER);
+            INSERT INTO playlists VALUES ('旧列表', '', 1, 1);
+            INSERT INTO items VALUES ('旧列表', 0, 1, 'a.mp3', '/a.mp3', 10);
+            INSERT INTO items VALUES ('旧列表', 1, 2, 'b.mp3', '/b.mp3', 20);
+        """)
+        conn.close()
+        
+        self.store = SqlitePlaylistStore(db_path)
+        summary = self.store.list_summaries()[0]
+        assert summary.item_count == 2
+        assert summary.total_size == 30
+    
+    def test_migrate_from_json(self, tmp_path):
+        """测试从JSON存储迁移"""
+        json_store = JsonPlaylistStore(str(tmp_path))
+        json_store.save(Playlist(name="旧列表", items=[make_item(1), make_item(2)]))
+        
+        self.store = SqlitePlaylistStore(str(tmp_path / "playlists.db"))
+        
+        assert self.store.migrate_from(json_store) == 1
+        assert [item.fs_id for item in self.store.load("旧列表").items] == [1, 2]
+        
+        # 只迁移一次
+        assert self.store.migrate_from(json_store) == 0
+        
+        # JSON文件保留
+        assert os.path.exists(json_store.get_path("旧列表"))
+    
+    def test_cache(self, tmp_path):
+        """测试缓存读取结果，本连接和其他连接的修改都会使缓存失效"""
+        db_path = str(tmp_path / "playlists.db")
+        self.store = SqlitePlaylistStore(db_path)
+        self.store.save(Playlist("测试", items=[make_item(1)]))
+        
+        loaded = self.store.load("测试")
+        loaded.add_item(make_item(9))
+        assert [item.fs_id for item in self.store.load("测试").items] == [1]
+        assert len(self.store.cache) == 1
+        
+        self.store.add_items("测试", [make_item(2)])
+        assert [item.fs_id for item in self.store.load("测试").items] == [1, 2]
+        
+        other = SqlitePlaylistStore(db_path)
+        try:
+            other.remove_items("测试", [1])
+        finally:
+            other.close()
+        assert [item.fs_id for item in self.store.load("测试").items] == [2]
+
+
+class TestPlaylistManagerStorage:
+    """测试播放列表管理器的存储后端选择"""
+    
+    @patch('dupan_music.playlist.playlist.CONFIG.get')
+    @patch('dupan_music.playlist.playlist.Path.home')
+    def test_sqlite_backend(self, mock_home, mock_config_get, tmp_path):
+        """测试使用SQLite存储后端"""
+        mock_home.return_value = str(tmp_path)
+        mock_config_get.side_effect = lambda key, default=None: "sqlite" if key == "playlist.storage" else default
+        
+        manager = PlaylistManager()
+        try:
+            assert isinstance(manager.store, SqlitePlaylistStore)
+            assert manager.get_playlist(PlaylistManager.RECENT_PLAYLIST_NAME) is not None
+            
+            manager.create_playlist("测试")
+            assert manager.add_to_playlist("测试", make_item(1).to_dict()) is True
+            assert manager.add_to_playlist("测试", make_item(1).to_dict()) is False
+            assert manager.remove_from_playlist("测试", 1) is True
+        finally:
+            manager.store.close()
+    
+    @patch('dupan_music.playlist.playlist.Path.home')
+    def test_export_import(self, mock_home, tmp_path):
+        """测试JSON导入导出"""
+        mock_home.return_value = str(tmp_path)
+        
+        manager = PlaylistManager()
+        manager.create_playlist("测试", "描述")
+        manager.add_to_playlist("测试", make_item(1).to_dict())
+        
+        export_file = str(tmp_path / "export.json")
+        assert manager.export_playlist("测试", export_file) is True
+        
+        with open(export_file, encoding="utf-8") as f:
+            data = json.load(f)
+        assert data["name"] == "测试"
+        assert data["items"][0]["fs_id"] == 1
+        
+        # 同名播放列表已存在时不覆盖
+        assert manager.import_playlist(export_file) is None
+        
+        imported = manager.import_playlist(export_file, name="副本")
+        assert imported.name == "副本"
+        assert [item.fs_id for item in manager.get_playlist("副本").items] == [1]
+        
+        # 不能遮盖同名的目录播放列表，即使指定覆盖
+        assert manager.create_folder_playlist("目录", "/music")
+        assert manager.import_playlist(export_file, name="目录", overwrite=True) is None
+        assert not manager.store.exists("目录")
+    
+    def test_abstract_store(self):
+        """测试未实现全部方法的存储后端不能创建"""
+        class IncompleteStore(PlaylistStore):
+            def exists(self, name):
+                return False
+        
+        with pytest.raises(TypeError):
+            IncompleteStore()
+    
+    def test_manifest(self, tmp_path):
+        """测试JSON存储的摘要清单"""
+        store = JsonPlaylistStore(str(tmp_path))
+        store.save(Playlist("测试", items=[make_item(1), make_item(2)]))
+        store.list_summaries()
+        assert os.path.exists(os.path.join(str(tmp_path), JsonPlaylistStore.MANIFEST_FILENAME))
+        
+        # 清单有效时不解析播放列表文件
+        store = JsonPlaylistStore(str(tmp_path))
+        with patch.object(store, '_read') as mock_read:
+            summaries = store.list_summaries()
+            mock_read.assert_not_called()
+        assert [(s.name, s.item_count, s.total_size) for s in summaries] == [("测试", 2, 1024 * 3)]
+        
+        # 文件被外部修改时重新解析
+        data = Playlist("测试", items=[make_item(1)]).to_dict()
+        with open(store.get_path("测试"), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        assert store.list_summaries()[0].item_count == 1
+        
+        # 文件被外部删除时移除记录
+        os.remove(store.get_path("测试"))
+        assert store.list_summaries() == []
+    
+    def test_json_cache(self, tmp_path):
+        """测试JSON存储按文件状态缓存，能发现外部修改"""
+        store = JsonPlaylistStore(str(tmp_path))
+        store.save(Playlist("测试", items=[make_item(1)]))
+        
+        with patch.object(store, '_read', wraps=store._read) as mock_read:
+            assert [item.fs_id for item in store.load("测试").items] == [1]
+            store.load("测试").add_item(make_item(9))
+            assert [item.fs_id for item in store.load("测试").items] == [1]
+            mock_read.assert_not_called()
+            
+            # 其他进程修改了文件
+            JsonPlaylistStore(str(tmp_path)).save(Playlist("测试", items=[make_item(2)]))
+            assert [item.fs_id for item in store.load("测试").items] == [2]
+            assert mock_read.call_count == 1
+        
+        os.remove(store.get_path("测试"))
+        assert store.load("测试") is None
+    
+    def test_write_delay(self, tmp_path):
+        """测试合并写入时多次修改只写入一次，读取未写入的修改不触发写入"""
+        store = JsonPlaylistStore(str(tmp_path), write_delay=60)
+        playlist = Playlist("测试", items=[make_item(1)])
+        
+        with patch.object(file_utils, 'atomic_write', wraps=file_utils.atomic_write) as mock_write:
+            store.save(playlist)
+            playlist.add_item(make_item(2))
+            store.save(playlist)
+            assert store.add_items("测试", [make_item(3)]) == 1
+            assert store.remove_items("测试", [1]) == 1
+            
+            assert store.exists("测试")
+            assert [item.fs_id for item in store.load("测试").items] == [2, 3]
+            assert [p.name for p in store.load_all()] == ["测试"]
+            assert store.list_summaries()[0].item_count == 2
+            assert not os.path.exists(store.get_path("测试"))
+            mock_write.assert_not_called()
+            
+            store.flush()
+            mock_write.assert_called_once()
+        
+        # 写入后由其他实例读取
+        assert [item.fs_id for item in JsonPlaylistStore(str(tmp_path)).load("测试").items] == [2, 3]
+        assert store.list_summaries()[0].item_count == 2
+    
+    def test_list_during_delayed_writes(self, tmp_path):
+        """测试合并写入线程写入期间列出播放列表"""
+        store = JsonPlaylistStore(str(tmp_path), write_delay=0.001)
+        errors = []
+        
+        def save():
+            try:
+                for i in range(200):
+                    store.save(Playlist(f"列表{i % 20}", items=[make_item(i + 1)]))
+            except Exception as e:
+                errors.append(e)
+        
+        thread = threading.Thread(target=save)
+        thread.start()
+        while thread.is_alive():
+            store.list_summaries()
+        thread.join()
+        store.flush()
+        
+        assert not errors
+        assert len(store.list_summaries()) == 20
+    
+    @patch('dupan_music.playlist.playlist.Path.home')
+    def test_lazy_playlists(self, mock_home, tmp_path):
+        """测试列出播放列表时延迟读取播放列表项"""
+        mock_home.return_value = str(tmp_path)
+        
+        manager = PlaylistManager()
+        manager.create_playlist("测试")
+        manager.add_many("测试", [make_item(fs_id).to_dict() for fs_id in range(1, 4)])
+        
+        playlists = {p.name: p for p in manager.get_all_playlists()}
+        playlist = playlists["测试"]
+        assert not playlist.is_loaded
+        assert playlist.item_count == 3
+        assert playlist.is_loaded is False
+        assert [item.fs_id for item in playlist.items] == [1, 2, 3]
+        assert playlist.is_loaded
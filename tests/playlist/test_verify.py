@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试播放列表批量验证
+"""
+
+import pytest
+from click.testing import CliRunner
+from unittest.mock import MagicMock, patch
+
+from dupan_music.playlist.playlist import Playlist, PlaylistItem, PlaylistManager
+from dupan_music.playlist.cli import playlist as playlist_cli
+from dupan_music.playlist.verify import PlaylistVerifier
+
+
+def make_item(fs_id, name=None):
+    """创建测试用播放列表项"""
+    name = name or f"song{fs_id}.mp3"
+    return PlaylistItem(fs_id=fs_id, server_filename=name, path=f"/music/{name}", size=1024)
+
+
+def make_file_info(fs_id, name=None):
+    """创建测试用文件信息"""
+    return make_item(fs_id, name).to_dict()
+
+
+class TestPlaylistVerifier:
+    """测试播放列表批量验证器"""
+    
+    def setup_method(self):
+        """测试前准备"""
+        self.manager = MagicMock(spec=PlaylistManager)
+        self.manager.api = MagicMock()
+        self.manager.save_playlist.return_value = True
+    
+    def test_batches_and_dedupe(self):
+        """测试跨播放列表去重并分批查询"""
+        first = Playlist("一", items=[make_item(i) for i in range(150)])
+        second = Playlist("二", items=[make_item(i) for i in range(100, 250)])
+        self.manager.api.get_file_info.side_effect = lambda fs_ids: [make_file_info(i) for i in fs_ids]
+        
+        progress = []
+        results = PlaylistVerifier(self.manager).verify(
+            [first, second], on_start=progress.append, on_progress=progress.append
+        )
+        
+        # 250 个不重复的文件，每批最多 100 个
+        assert self.manager.api.get_file_info.call_count == 3
+        queried = [i for call in self.manager.api.get_file_info.call_args_list for i in call.args[0]]
+        assert sorted(queried) == list(range(250))
+        assert progress[0] == 250
+        assert sum(progress[1:]) == 250
+        
+        assert all(not result.invalid and not result.changed for result in results)
+        self.manager.save_playlist.assert_not_called()
+    
+    def test_invalid_and_refresh(self):
+        """测试无效文件和刷新已变化的文件"""
+        playlist = Playlist("测试", items=[make_item(1), make_item(2), make_item(3)])
+        add_time = playlist.items[1].add_time
+        self.manager.api.get_file_info.return_value = [
+            make_file_info(1),
+            make_file_info(2, "renamed.mp3")
+        ]
+        
+        result, = PlaylistVerifier(self.manager).verify([playlist], refresh=True)
+        
+        assert [item.fs_id for item in result.invalid] == [3]
+        assert [item.fs_id for item in result.changed] == [2]
+        assert result.refreshed == 1
+        assert playlist.items[1].server_filename == "renamed.mp3"
+        assert playlist.items[1].add_time == add_time
+        self.manager.save_playlist.assert_called_once_with(playlist)
+    
+    def test_failed_batch(self):
+        """测试查询失败的文件不会被判定为无效"""
+        playlist = Playlist("测试", items=[make_item(1), make_item(2)])
+        self.manager.api.get_file_info.side_effect = Exception("网络错误")
+        
+        result, = PlaylistVerifier(self.manager, batch_size=1).verify([playlist], refresh=True)
+        
+        assert not result.invalid
+        assert [item.fs_id for item in result.unknown] == [1, 2]
+        self.manager.save_playlist.assert_not_called()
+
+
+class TestVerifyCommand:
+    """测试验证命令"""
+    
+    @patch('dupan_music.playlist.cli.PlaylistVerifier')
+    @patch('dupan_music.playlist.cli.get_playlist_manager')
+    def test_read_only_skipped(self, mock_get_manager, mock_verifier):
+        """测试不验证目录和智能播放列表，也不列出其中的歌曲"""
+        folder = MagicMock(read_only=True)
+        folder.name = "目录"
+        manager = mock_get_manager.return_value
+        manager.get_playlist.return_value = folder
+        manager.get_all_playlists.return_value = [folder]
+        
+        result = CliRunner().invoke(playlist_cli, ['verify', '目录'])
+        assert "无需验证" in result.output
+        mock_verifier.assert_not_called()
+        
+        CliRunner().invoke(playlist_cli, ['verify', '--all'])
+        assert mock_verifier.return_value.verify.call_args[0][0] == []
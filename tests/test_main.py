@@ -7,6 +7,7 @@
 
 import os
 import sys
+import subprocess
 import pytest
 from unittest.mock import patch, MagicMock
 from click.testing import CliRunner
@@ -107,3 +108,53 @@ class TestMain:
         assert result.exit_code == 0
         assert "dupan-music" in result.output
         assert __version__ in result.output
+
+
+class TestStartupTime:
+    """测试启动时不导入子命令模块"""
+    
+    # 导入主模块和显示帮助时不应导入的模块
+    HEAVY_MODULES = ('requests', 'rich', 'vlc', 'pydub', 'mutagen', 'prompt_toolkit')
+    
+    # 导入主模块的时间预算（微秒）；实测远低于该值，仅用于发现重新引入的全量导入
+    IMPORT_TIME_BUDGET_US = 300000
+    
+    ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    
+    def run_python(self, *args):
+        """在新进程中运行Python"""
+        result = subprocess.run([sys.executable, *args], capture_output=True, text=True, cwd=self.ROOT_DIR)
+        assert result.returncode == 0, result.stderr
+        return result
+    
+    def test_import_time(self):
+        """测试导入主模块的时间和导入的模块（python -X importtime）"""
+        result = self.run_python("-X", "importtime", "-c", "import dupan_music.main")
+        
+        cumulative = {}
+        for line in result.stderr.splitlines():
+            if not line.startswith("import time:") or "|" not in line:
+                continue
+            _, total, name = line.split("|")
+            if total.strip().isdigit():
+                cumulative[name.strip()] = int(total)
+        
+        imported = {name.split('.')[0] for name in cumulative}
+        assert not imported & set(self.HEAVY_MODULES)
+        assert not [name for name in cumulative if name.endswith('.cli')]
+        assert cumulative["dupan_music.main"] < self.IMPORT_TIME_BUDGET_US
+    
+    def test_help_does_not_import_commands(self):
+        """测试显示帮助时不导入子命令模块，调用子命令时才导入"""
+        code = (
+            "import sys\n"
+            "from dupan_music.main import main\n"
+            "main(['--help'], standalone_mode=False)\n"
+            "print('结果', 'dupan_music.playlist.cli' in sys.modules)\n"
+            "main(['stats', '--help'], standalone_mode=False)\n"
+            "print('结果', 'dupan_music.history.cli' in sys.modules, 'dupan_music.player.cli' in sys.modules)\n"
+        )
+        lines = self.run_python("-c", code).stdout.splitlines()
+        
+        assert "播放列表命令" in "\n".join(lines)
+        assert [line for line in lines if line.startswith("结果")] == ["结果 False", "结果 True False"]
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+测试JSON编解码模块
+"""
+
+import json
+import pytest
+from unittest.mock import MagicMock
+
+from dupan_music.utils import codec
+
+
+@pytest.fixture(params=list(codec.available_codecs()))
+def backend(request):
+    """依次使用每个可用的编解码器"""
+    previous = codec.get_codec().name
+    yield codec.set_codec(request.param)
+    codec.set_codec(previous)
+
+
+class TestCodec:
+    """测试JSON编解码"""
+    
+    def test_round_trip(self, backend):
+        """测试编码后解码结果不变"""
+        data = {"name": "测试", "items": [{"fs_id": 1, "size": 2 ** 40, "md5": ""}], "ok": True}
+        
+        assert codec.loads(codec.dumps(data)) == data
+        assert codec.loads(codec.dumpb(data, pretty=True)) == data
+    
+    def test_compatible_with_json(self, backend):
+        """测试输出与标准库 json 互通且不转义中文"""
+        data = {"name": "最近播放", "count": 3}
+        
+        compact = codec.dumps(data)
+        assert "最近播放" in compact
+        assert "\n" not in compact
+        assert json.loads(compact) == data
+        
+        pretty = codec.dumps(data, pretty=True)
+        assert "\n  \"name\"" in pretty
+        assert json.loads(pretty) == data
+    
+    def test_invalid(self, backend):
+        """测试无效内容抛出 ValueError"""
+        with pytest.raises(ValueError):
+            codec.loads(b"{invalid")
+    
+    def test_set_codec_unavailable(self):
+        """测试切换到不可用的编解码器"""
+        with pytest.raises(ValueError):
+            codec.set_codec("unknown")
+    
+    def test_loads_response(self):
+        """测试解码HTTP响应"""
+        response = MagicMock()
+        response.content = '{"errno": 0, "list": ["歌曲"]}'.encode("utf-8")
+        assert codec.loads_response(response) == {"errno": 0, "list": ["歌曲"]}
+        response.json.assert_not_called()
+        
+        # 内容无效时交给 requests 处理
+        response.content = b"\xff"
+        response.json.return_value = {"errno": 0}
+        assert codec.loads_response(response) == {"errno": 0}
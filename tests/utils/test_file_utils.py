@@ -6,9 +6,12 @@
 """
 
 import os
+import sys
 import shutil
 import tempfile
+import subprocess
 from pathlib import Path
+from unittest.mock import MagicMock, patch
 
 import pytest
 
@@ -17,7 +20,8 @@ from dupan_music.utils.file_utils import (
     get_file_name, get_file_name_with_extension, remove_file, remove_dir,
     list_files, list_dirs, copy_file, move_file, read_file, write_file,
     append_file, read_binary_file, write_binary_file, get_temp_dir,
-    get_temp_file, human_readable_size, format_size, split_file, merge_files
+    get_temp_file, human_readable_size, format_size, split_file, merge_files,
+    atomic_write, file_lock, CoalescingWriter, FCNTL_AVAILABLE
 )
 
 
@@ -365,3 +369,101 @@ class TestFileUtils:
         
         # 测试合并空列表
         assert not merge_files([], merged_file)
+
+
+class TestAtomicWrite:
+    """测试原子写入、文件锁和合并写入"""
+    
+    def test_failed_write_keeps_original(self, tmp_path):
+        """测试写入失败时原文件不变，临时文件被清理"""
+        file_path = str(tmp_path / "auth.json")
+        assert write_file(file_path, "原内容")
+        
+        with patch('dupan_music.utils.file_utils.os.fsync', side_effect=OSError("磁盘已满")):
+            assert not write_file(file_path, "新内容")
+        
+        assert read_file(file_path) == "原内容"
+        assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+    
+    def test_keeps_mode(self, tmp_path):
+        """测试保留原文件权限"""
+        file_path = str(tmp_path / "auth.json")
+        atomic_write(file_path, "a")
+        os.chmod(file_path, 0o600)
+        atomic_write(file_path, b"b")
+        
+        assert os.stat(file_path).st_mode & 0o777 == 0o600
+        assert read_file(file_path) == "b"
+    
+    @pytest.mark.skipif(not FCNTL_AVAILABLE, reason="需要 fcntl")
+    def test_file_lock(self, tmp_path):
+        """测试文件锁在进程内可重入，其他进程无法同时获取"""
+        file_path = str(tmp_path / "playlist.json")
+        lock = file_lock(file_path)
+        assert file_lock(file_path) is lock
+        
+        script = (
+            "import fcntl, os, sys\n"
+            "fd = os.open(sys.argv[1], os.O_RDWR)\n"
+            "try:\n"
+            "    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)\n"
+            "except OSError:\n"
+            "    sys.exit(1)\n"
+        )
+        with lock:
+            with file_lock(file_path):
+                atomic_write(file_path, "内容")
+            result = subprocess.run([sys.executable, "-c", script, lock.lock_path])
+            assert result.returncode == 1
+        
+        result = subprocess.run([sys.executable, "-c", script, lock.lock_path])
+        assert result.returncode == 0
+    
+    def test_coalescing_writer(self, tmp_path):
+        """测试多次提交只写入一次最新内容"""
+        file_path = str(tmp_path / "playlist.json")
+        writer = CoalescingWriter(delay=60)
+        callback = MagicMock()
+        
+        contents = []
+        for i in range(3):
+            contents.append(f"内容{i}")
+            writer.submit(file_path, lambda: contents[-1], callback)
+        
+        assert writer.pending(file_path)
+        assert not os.path.exists(file_path)
+        
+        assert writer.flush()
+        assert read_file(file_path) == "内容2"
+        callback.assert_called_once_with(True)
+        assert not writer.pending(file_path)
+    
+    def test_coalescing_writer_pending_until_written(self, tmp_path):
+        """测试写入完成前内容仍视为未写入，写入期间持有文件锁"""
+        file_path = str(tmp_path / "playlist.json")
+        writer = CoalescingWriter(delay=60)
+        lock = file_lock(file_path)
+        
+        def render():
+            assert writer.pending(file_path)
+            assert lock._depth == 1
+            return "内容"
+        
+        writer.submit(file_path, render)
+        assert writer.flush()
+        assert not writer.pending(file_path)
+        assert lock._depth == 0
+    
+    def test_atomic_write_mode(self, tmp_path):
+        """测试新文件按 umask 设置权限，可指定权限，已有文件保留原权限"""
+        old_umask = os.umask(0o022)
+        try:
+            atomic_write(str(tmp_path / "a.json"), "内容")
+            assert os.stat(tmp_path / "a.json").st_mode & 0o777 == 0o644
+            
+            secret = str(tmp_path / "secret.json")
+            atomic_write(secret, "内容", mode=0o600)
+            atomic_write(secret, "新内容")
+            assert os.stat(secret).st_mode & 0o777 == 0o600
+        finally:
+            os.umask(old_umask)
@@ -12,7 +12,7 @@ from unittest.mock import patch, MagicMock
 
 import pytest
 
-from dupan_music.utils.logger import get_logger, setup_logger
+from dupan_music.utils.logger import flush_logs, get_logger, setup_logger
 
 
 class TestLogger:
@@ -49,9 +49,12 @@ class TestLogger:
         # 验证日志级别
         assert logger.level == logging.DEBUG
         
-        # 验证处理器数量（只有控制台处理器）
+        # 验证处理器（队列处理器，后台只有控制台处理器）
         assert len(logger.handlers) == 1
-        assert isinstance(logger.handlers[0], logging.StreamHandler)
+        assert isinstance(logger.handlers[0], logging.handlers.QueueHandler)
+        handlers = logger.handlers[0].listener.handlers
+        assert len(handlers) == 1
+        assert isinstance(handlers[0], logging.StreamHandler)
     
     @patch("dupan_music.utils.logger.CONFIG")
     def test_setup_logger_with_file(self, mock_config):
@@ -70,13 +73,15 @@ class TestLogger:
             # 验证日志级别
             assert logger.level == logging.INFO
             
-            # 验证处理器数量（控制台处理器和文件处理器）
-            assert len(logger.handlers) == 2
-            assert isinstance(logger.handlers[0], logging.StreamHandler)
-            assert isinstance(logger.handlers[1], logging.handlers.RotatingFileHandler)
+            # 验证处理器（队列处理器，后台为控制台处理器和文件处理器）
+            assert len(logger.handlers) == 1
+            handlers = logger.handlers[0].listener.handlers
+            assert len(handlers) == 2
+            assert isinstance(handlers[0], logging.StreamHandler)
+            assert isinstance(handlers[1], logging.handlers.RotatingFileHandler)
             
             # 验证文件处理器的文件名
-            assert logger.handlers[1].baseFilename == temp_file.name
+            assert handlers[1].baseFilename == temp_file.name
     
     @patch("dupan_music.utils.logger.CONFIG")
     def test_logger_functionality(self, mock_config):
@@ -96,10 +101,8 @@ class TestLogger:
             test_message = "This is a test message"
             logger.debug(test_message)
             
-            # 刷新文件处理器
-            for handler in logger.handlers:
-                if isinstance(handler, logging.handlers.RotatingFileHandler):
-                    handler.flush()
+            # 等待后台线程写入并刷新文件处理器
+            flush_logs()
             
             # 验证日志文件内容
             with open(temp_file.name, "r") as f:
@@ -117,3 +120,13 @@ class TestLogger:
             
             logger = setup_logger("test_invalid_level")
             assert logger.level == logging.INFO
+    
+    def test_handlers_created_once(self):
+        """测试相同配置的日志记录器共用处理器，重复获取不重建"""
+        with patch("dupan_music.utils.logger.RotatingFileHandler") as mock_file_handler:
+            first = get_logger("test_shared_a")
+            handler = first.handlers[0]
+            
+            assert get_logger("test_shared_a").handlers == [handler]
+            assert get_logger("test_shared_b").handlers == [handler]
+            mock_file_handler.assert_not_called()